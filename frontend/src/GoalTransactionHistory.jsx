@@ -13,25 +13,29 @@ function GoalTransactionHistory({ goalId }) {
   const [loading, setLoading] = useState(false);
   const [isOpen, setIsOpen] = useState(false); // State to toggle visibility
   const [error, setError] = useState(null); // 2. Add error state
+  const [nextCursor, setNextCursor] = useState(null); // Set when there are older entries
 
   // 3. Wrap fetchHistory in useCallback
-  const fetchHistory = useCallback(async () => {
+  const fetchHistory = useCallback(async (cursor = null) => {
     if (!isOpen || !authorizedFetch) return; 
     
     setLoading(true);
     setError(null); // Reset error
     try {
-      const response = await authorizedFetch(`${apiUrl}/savings-goal/${encodeURIComponent(goalId)}/transactions`);
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await authorizedFetch(`${apiUrl}/savings-goal/${encodeURIComponent(goalId)}/transactions${query}`);
       if (!response.ok) {
         const errData = await response.json();
         throw new Error(errData.message || 'Failed to fetch history');
       }
       const data = await response.json();
-      setTransactions(Array.isArray(data) ? data : []);
+      const page = Array.isArray(data.transactions) ? data.transactions : [];
+      setTransactions((previous) => (cursor ? [...previous, ...page] : page));
+      setNextCursor(data.next_cursor || null);
     } catch (err) {
       toast.error(err.message); // Use toast, but also set local error
       setError(err.message);
-      setTransactions([]);
+      if (!cursor) setTransactions([]);
     } finally {
       setLoading(false);
     }
@@ -80,6 +84,14 @@ function GoalTransactionHistory({ goalId }) {
               ))}
             </ul>
           )}
+          {!loading && !error && nextCursor && (
+            <button
+              onClick={() => fetchHistory(nextCursor)}
+              className="mt-1 text-xs text-primary-blue hover:text-primary-blue-dark"
+            >
+              Load older
+            </button>
+          )}
         </div>
       )}
     </div>
@@ -105,22 +105,32 @@ function SavingsGoals() {
     setAddAmount(prev => ({ ...prev, [goalId]: value }));
   };
 
-  // --- (promptDeleteGoal - no changes) ---
-  const promptDeleteGoal = (goalId) => {
-    setGoalToDelete(goalId);
+  // --- (promptDeleteGoal) ---
+  const promptDeleteGoal = (goal) => {
+    setGoalToDelete(goal);
     setIsDeleteModalOpen(true);
   };
 
-  // --- (executeDeleteGoal - no changes) ---
+  // Tells the backend what the goal holds so it can skip reading it
+  const releaseGoalBody = (goal) => JSON.stringify({
+    wallet_id: goal.wallet_id,
+    amount: goal.current_amount,
+    goal_name: goal.goal_name,
+    expected_balance: wallet?.balance,
+  });
+
+  // --- (executeDeleteGoal) ---
   const executeDeleteGoal = async () => {
     if (!goalToDelete) return;
-    const goalId = goalToDelete;
+    const goalId = goalToDelete.goal_id;
     setActionLoading(prev => ({ ...prev, [goalId]: true }));
     setIsDeleteModalOpen(false);
 
     await toast.promise(
-        authorizedFetch(`${apiUrl}/savings-goal/${encodeURIComponent(goalToDelete)}`, {
+        authorizedFetch(`${apiUrl}/savings-goal/${encodeURIComponent(goalId)}`, {
             method: 'DELETE',
+            headers: { 'Content-Type': 'application/json' },
+            body: releaseGoalBody(goalToDelete),
         })
         .then(async(response) => {
             const responseBody = await response.json();
@@ -144,7 +154,8 @@ function SavingsGoals() {
   };
 
   // --- (handleAddToGoal - cleaned up console.log) ---
-  const handleAddToGoal = async (goalId) => {
+  const handleAddToGoal = async (goal) => {
+    const goalId = goal.goal_id;
     const amountToAddStr = String(addAmount[goalId] || '').trim();
     if (!amountToAddStr || parseFloat(amountToAddStr) <= 0) {
       toast.error(`Please enter a positive amount.`);
@@ -161,6 +172,8 @@ function SavingsGoals() {
             body: JSON.stringify({
               wallet_id: walletId,
               amount: amount,
+              goal_name: goal.goal_name,
+              expected_balance: wallet?.balance,
             }),
         })
         .then(async(response) => {
@@ -187,7 +200,7 @@ function SavingsGoals() {
   };
 
   
-  // --- (Redeem Goal functions - no changes) ---
+  // --- (Redeem Goal functions) ---
   const promptRedeemGoal = (goal) => {
     setGoalToRedeem(goal);
     setIsRedeemModalOpen(true);
@@ -202,6 +215,8 @@ function SavingsGoals() {
     await toast.promise(
         authorizedFetch(`${apiUrl}/savings-goal/${encodeURIComponent(goalToRedeem.goal_id)}/redeem`, {
             method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: releaseGoalBody(goalToRedeem),
         })
         .then(async(response) => {
             const responseBody = await response.json();
@@ -251,7 +266,10 @@ function SavingsGoals() {
           {goals.map((goal) => {
             const current = parseFloat(goal.current_amount || '0');
             const target = parseFloat(goal.target_amount);
-            const percentage = target > 0 ? Math.min((current / target) * 100, 100) : 0;
+            const percentage = goal.progress
+              ? parseFloat(goal.progress.percent_complete || '0')
+              : (target > 0 ? Math.min((current / target) * 100, 100) : 0);
+            const projectedDate = goal.progress?.projected_completion_date;
             const isLoadingThisGoalAction = actionLoading[goal.goal_id];
             const isComplete = percentage >= 100;
 
@@ -265,9 +283,12 @@ function SavingsGoals() {
                       {formatCurrency(current)} / {formatCurrency(target)}
                       <span className="ml-2 text-xs font-semibold text-primary-blue">({percentage.toFixed(0)}%)</span>
                     </span>
+                    {!isComplete && projectedDate && (
+                      <span className="block text-xs text-neutral-500">On track for {projectedDate}</span>
+                    )}
                   </div>
                    <button
-                     onClick={() => promptDeleteGoal(goal.goal_id)}
+                     onClick={() => promptDeleteGoal(goal)}
                      disabled={loading || isLoadingThisGoalAction}
                      className="px-2 py-1 bg-accent-red text-white text-xs rounded hover:bg-accent-red-dark disabled:bg-neutral-300 disabled:cursor-not-allowed disabled:text-neutral-500 flex-shrink-0"
                    >
@@ -297,7 +318,7 @@ function SavingsGoals() {
                           className="flex-grow basis-28 p-1.5 border border-neutral-300 rounded-md text-sm focus:ring-primary-blue focus:border-primary-blue disabled:opacity-50"
                       />
                       <button
-                          onClick={() => handleAddToGoal(goal.goal_id)}
+                          onClick={() => handleAddToGoal(goal)}
                           disabled={loading || isLoadingThisGoalAction || !(addAmount[goal.goal_id] > 0)}
                           className="px-3 py-1.5 bg-accent-green text-white text-xs rounded hover:bg-accent-green-dark focus:outline-none focus:ring-2 focus:ring-accent-green focus:ring-offset-1 disabled:bg-neutral-300 disabled:cursor-not-allowed"
                       >
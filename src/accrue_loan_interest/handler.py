@@ -0,0 +1,259 @@
+import json
+import os
+import time
+import boto3
+from datetime import date, datetime, timezone
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.loan_cache import VERSION_BUMP, VERSION_BUMP_VALUES_DYNAMODB
+from fintech_common.parallel_scan import (
+    Aggregator, CapacityLimiter, DynamoCheckpointStore, ParallelScan, from_dynamodb
+)
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+LOANS_TABLE_NAME = os.environ.get('LOANS_TABLE_NAME')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '16'))
+UPDATE_WORKERS = int(os.environ.get('UPDATE_WORKERS', '16'))
+# Capacity budgets for the whole job. The live repayment path shares the
+# loans table, so the nightly run is capped well below what on-demand allows.
+MAX_RCU_PER_SECOND = int(os.environ.get('MAX_RCU_PER_SECOND', '500'))
+MAX_WCU_PER_SECOND = int(os.environ.get('MAX_WCU_PER_SECOND', '500'))
+
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+JOB_TTL_SECONDS = 30 * 24 * 3600
+DAYS_PER_YEAR = Decimal('365')
+CENT = Decimal('0.01')
+REMAINDER_PRECISION = Decimal('1E-12') # Sub-cent interest carried to the next night
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+def accrual_start(loan):
+    """
+    The date a loan has accrued interest through: its last accrual, or the
+    day it was approved (approved_at, disbursed_at or created_at, in that
+    order) if it has never accrued. None if the loan records none of them.
+    """
+    through = loan.get('interest_accrued_through')
+    if through:
+        return date.fromisoformat(through)
+    for field in ('approved_at', 'disbursed_at', 'created_at'):
+        if loan.get(field) is not None:
+            return datetime.fromtimestamp(int(loan[field]), timezone.utc).date()
+    return None
+
+def days_to_accrue(loans, accrual_date):
+    """
+    Days of interest owed per loan, after its accrual start and up to and
+    including accrual_date. A loan with no dates at all gets one day.
+    """
+    days = []
+    for loan in loans:
+        start = accrual_start(loan)
+        days.append(1 if start is None else max((accrual_date - start).days, 0))
+    return days
+
+def compute_accruals(loans, accrual_date):
+    """
+    Daily simple interest for a whole page of loans in one pass:
+    remaining_balance * (interest_rate% / 365) * days, plus the sub-cent
+    remainder carried from earlier nights. Whole cents are posted and the
+    rest is carried again, so small balances accrue instead of rounding to
+    zero every night.
+    Returns (loan, interest, remainder) for every loan owed at least one day;
+    a loan posting 0.00 still advances its accrual date.
+    """
+    balances = [loan.get('remaining_balance', Decimal('0')) for loan in loans]
+    daily_rates = [loan.get('interest_rate', Decimal('0')) / 100 / DAYS_PER_YEAR for loan in loans]
+    days = days_to_accrue(loans, accrual_date)
+    accruals = []
+    for loan, balance, rate, n in zip(loans, balances, daily_rates, days):
+        if n <= 0:
+            continue
+        exact = (balance * rate * n if balance > 0 else Decimal('0')) + loan.get('interest_remainder', Decimal('0'))
+        interest = exact.quantize(CENT, rounding=ROUND_DOWN)
+        accruals.append((loan, interest, (exact - interest).quantize(REMAINDER_PRECISION, rounding=ROUND_HALF_UP)))
+    return accruals
+
+
+class InterestAccrualAggregator(Aggregator):
+    """
+    Applies accrual for each scanned page and keeps running totals.
+    Updates for a page run in parallel on a shared pool.
+    """
+
+    def __init__(self, dynamodb_client, accrual_date, executor, write_limiter):
+        self.client = dynamodb_client
+        self.accrual_date = accrual_date
+        self.executor = executor
+        self.write_limiter = write_limiter
+
+    def _apply(self, loan, interest, remainder, retry=True):
+        """
+        Adds interest with a conditional write. The condition checks the balance
+        we priced against and today's date, so a rerun never double-accrues and
+        a repayment that lands mid-job is re-priced from the returned item.
+        The accrual date and remainder are written even when interest is 0.00.
+        """
+        accrued_through = self.accrual_date.isoformat()
+        try:
+            response = self.client.update_item(
+                TableName=LOANS_TABLE_NAME,
+                Key={'loan_id': {'S': loan['loan_id']}},
+                UpdateExpression=(
+                    "SET remaining_balance = remaining_balance + :interest, "
+                    "interest_accrued_through = :through, interest_remainder = :remainder, "
+                    "total_interest_accrued = if_not_exists(total_interest_accrued, :zero) + :interest, "
+                    f"{VERSION_BUMP}"
+                ),
+                ConditionExpression=(
+                    "#status = :approved AND remaining_balance = :seen_balance AND "
+                    "(attribute_not_exists(interest_accrued_through) OR interest_accrued_through < :through)"
+                ),
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':interest': {'N': str(interest)},
+                    ':remainder': {'N': str(remainder)},
+                    ':through': {'S': accrued_through},
+                    ':zero': {'N': '0'},
+                    ':approved': {'S': 'APPROVED'},
+                    ':seen_balance': {'N': str(loan['remaining_balance'])},
+                    **VERSION_BUMP_VALUES_DYNAMODB
+                },
+                ReturnConsumedCapacity='TOTAL',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+            self.write_limiter.consume(response.get('ConsumedCapacity', {}).get('CapacityUnits', 1))
+            return ('accrued' if interest > 0 else 'carried'), interest # carried: under a cent so far
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            current = from_dynamodb(e.response.get('Item'))
+            if (retry and current.get('status') == 'APPROVED'
+                    and current.get('interest_accrued_through', '') < accrued_through):
+                # Balance moved (a repayment) between the scan and the write
+                repriced = compute_accruals([current], self.accrual_date)
+                if not repriced:
+                    return 'skipped', Decimal('0')
+                return self._apply(*repriced[0], retry=False)
+            return 'skipped', Decimal('0')
+
+    def accumulate(self, state, items):
+        accruals = compute_accruals(items, self.accrual_date)
+        outcomes = list(self.executor.map(lambda accrual: self._apply(*accrual), accruals))
+
+        state['loans_scanned'] = state.get('loans_scanned', 0) + len(items)
+        for outcome, interest in outcomes:
+            state[f'loans_{outcome}'] = state.get(f'loans_{outcome}', 0) + 1
+            state['interest_accrued'] = state.get('interest_accrued', 0) + interest
+        return state
+
+
+def accrue_loan_interest(event, context):
+    """
+    Scheduled job (EventBridge, nightly).
+    Scans APPROVED loans with a parallel segmented scan, prices a page of
+    loans at a time and applies the interest with parallel conditional
+    updates. Progress is checkpointed per segment in the batch-jobs table;
+    if the run nears the Lambda timeout it re-invokes itself and resumes.
+    Optional event keys: accrual_date (YYYY-MM-DD), job_id.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    dynamodb = boto3.resource('dynamodb')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    log_context = {"action": "accrue_loan_interest"}
+
+    if not LOANS_TABLE_NAME or not jobs_table:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    accrual_date = date.fromisoformat(event.get('accrual_date') or datetime.now(timezone.utc).date().isoformat())
+    job_id = event.get('job_id') or f"interest-accrual#{accrual_date.isoformat()}"
+    log_context.update({"job_id": job_id, "accrual_date": accrual_date.isoformat()})
+
+    existing = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if existing and existing.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Accrual already complete for this date."}))
+        return json.loads(json.dumps(existing, cls=DecimalEncoder))
+    if not existing:
+        jobs_table.put_item(Item={
+            'job_id': job_id,
+            'job_type': 'INTEREST_ACCRUAL',
+            'status': 'RUNNING',
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + JOB_TTL_SECONDS
+        })
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    with ThreadPoolExecutor(max_workers=UPDATE_WORKERS) as executor:
+        aggregator = InterestAccrualAggregator(
+            dynamodb_client, accrual_date, executor, CapacityLimiter(MAX_WCU_PER_SECOND)
+        )
+        scan = ParallelScan(
+            dynamodb_client,
+            LOANS_TABLE_NAME,
+            aggregator,
+            total_segments=SCAN_SEGMENTS,
+            max_capacity_per_second=MAX_RCU_PER_SECOND,
+            scan_kwargs={
+                'FilterExpression': "#status = :approved",
+                'ProjectionExpression': (
+                    "loan_id, #status, remaining_balance, interest_rate, interest_accrued_through, "
+                    "interest_remainder, approved_at, disbursed_at, created_at"
+                ),
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': {':approved': {'S': 'APPROVED'}}
+            },
+            checkpoint_store=DynamoCheckpointStore(dynamodb_client, JOBS_TABLE_NAME, job_id)
+        )
+        logger.info(json.dumps({**log_context, "status": "info", "segments": SCAN_SEGMENTS, "message": "Starting interest accrual."}))
+        result = scan.run(should_stop=out_of_time)
+
+    log_context.update({"items_scanned": result.items_scanned, "capacity_consumed": str(result.capacity_consumed)})
+
+    if not result.complete:
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Out of time; checkpointed. Re-invoking to resume."}))
+        try:
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({"accrual_date": accrual_date.isoformat(), "job_id": job_id})
+            )
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke accrual job."}))
+        return {"job_id": job_id, "status": "RUNNING"}
+
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression="SET #status = :complete, #result = :result, completed_at = :now",
+        ExpressionAttributeNames={'#status': 'status', '#result': 'result'},
+        ExpressionAttributeValues={
+            ':complete': 'COMPLETE',
+            ':result': result.state,
+            ':now': int(time.time())
+        }
+    )
+    logger.info(json.dumps({**log_context, "status": "info", "result": result.state, "message": "Interest accrual complete."}, cls=DecimalEncoder))
+
+    return json.loads(json.dumps({"job_id": job_id, "status": "COMPLETE", "result": result.state}, cls=DecimalEncoder))
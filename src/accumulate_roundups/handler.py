@@ -0,0 +1,96 @@
+import json
+import os
+import time
+import boto3
+from decimal import Decimal, InvalidOperation
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.roundup import DEFAULT_FLUSH_THRESHOLD, flush, record_roundup, roundup_amount
+from fintech_common.savings import SavingsTables
+
+# Set up logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# --- Environment Variables ---
+ROUNDUPS_TABLE_NAME = os.environ.get('ROUNDUPS_TABLE_NAME')
+SAVINGS_TABLE_NAME = os.environ.get('SAVINGS_TABLE_NAME')
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME')
+LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME')
+# Pending round-ups are swept into the goal once they reach this amount
+FLUSH_THRESHOLD = Decimal(os.environ.get('ROUNDUP_FLUSH_THRESHOLD', str(DEFAULT_FLUSH_THRESHOLD)))
+
+def accumulate_roundups(event, context):
+    """
+    SNS Subscriber for 'PAYMENT_SUCCESSFUL'.
+    Adds each payment's round-up to the paying wallet's counter (one
+    conditional write, and nothing at all for wallets not enrolled). When
+    the counter reaches ROUNDUP_FLUSH_THRESHOLD it is swept into the goal in
+    one transaction; flush_roundups sweeps whatever is left once a day.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+
+    if not ROUNDUPS_TABLE_NAME or not SAVINGS_TABLE_NAME or not WALLETS_TABLE_NAME or not LOG_TABLE_NAME:
+        log_message = {
+            "status": "error",
+            "action": "accumulate_roundups",
+            "message": "FATAL: Environment variables not set."
+        }
+        logger.error(json.dumps(log_message))
+        raise Exception("Server configuration error.")
+
+    tables = SavingsTables(WALLETS_TABLE_NAME, SAVINGS_TABLE_NAME, LOG_TABLE_NAME)
+
+    for record in event['Records']:
+        message_id = record.get('Sns', {}).get('MessageId', 'Unknown')
+        log_context = {"action": "accumulate_roundups", "sns_message_id": message_id}
+
+        try:
+            sns_message_str = record.get('Sns', {}).get('Message')
+            if not sns_message_str:
+                logger.warning(json.dumps({**log_context, "status": "warn", "message": "Skipping record: Missing SNS message body."}))
+                continue
+
+            sns_message = json.loads(sns_message_str)
+            event_type = sns_message.get('event_type')
+            log_context["event_type"] = event_type
+            if event_type != 'PAYMENT_SUCCESSFUL':
+                logger.warning(json.dumps({**log_context, "status": "warn", "message": "Skipping unhandled event type."}))
+                continue
+
+            event_details = sns_message.get('details') or sns_message.get('transaction_details') or {}
+            wallet_id = event_details.get('wallet_id')
+            transaction_id = event_details.get('transaction_id')
+            log_context.update({"wallet_id": wallet_id, "transaction_id": transaction_id})
+            if not wallet_id or not transaction_id:
+                logger.warning(json.dumps({**log_context, "status": "warn", "message": "Invalid message, no wallet_id or transaction_id. Skipping."}))
+                continue
+
+            roundup = roundup_amount(Decimal(str(event_details.get('amount', '0'))))
+            if roundup <= 0:
+                continue
+
+            now = int(time.time())
+            row = record_roundup(dynamodb_client, ROUNDUPS_TABLE_NAME, wallet_id, transaction_id, roundup, now)
+            if row is None:
+                continue  # Not enrolled, or this payment was already counted
+
+            pending = Decimal(row['pending_amount']['N'])
+            log_context["pending_amount"] = str(pending)
+            if pending < FLUSH_THRESHOLD:
+                logger.info(json.dumps({**log_context, "status": "info", "roundup": str(roundup), "message": "Round-up recorded."}))
+                continue
+
+            outcome = flush(dynamodb_client, tables, ROUNDUPS_TABLE_NAME, row, now)
+            logger.info(json.dumps({**log_context, "status": "info", "outcome": outcome, "message": "Round-up threshold reached."}))
+
+        except (ValueError, InvalidOperation, TypeError) as val_err:
+            logger.error(json.dumps({**log_context, "status": "error", "message": f"Invalid data error: {str(val_err)}"}))
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": f"DynamoDB error: {str(e)}"}))
+            raise e # Force SNS retry; the counter ignores payments it has already seen
+
+    return {"statusCode": 200, "body": "Events processed."}
@@ -5,6 +5,9 @@ import uuid
 import time
 from decimal import Decimal, InvalidOperation
 from botocore.exceptions import ClientError
+from fintech_common.records import LoanRecord
+from fintech_common.pricing import get_pricing_engine
+from fintech_common.credit import CreditScoreCache
 import logging # <-- 1. Import logging
 
 # --- 2. Set up logger ---
@@ -14,6 +17,10 @@ logger.setLevel(logging.INFO)
 
 # --- Environment Variables ---
 TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
+CONFIG_TABLE_NAME = os.environ.get('CONFIG_TABLE_NAME') # Rate grid; built-in default rates if unset
+RATE_GRID_TTL_SECONDS = int(os.environ.get('RATE_GRID_TTL_SECONDS', '300'))
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME') # Credit scores for risk-based pricing
+CREDIT_SCORE_TTL_SECONDS = int(os.environ.get('CREDIT_SCORE_TTL_SECONDS', '900'))
 ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
 
 # --- (CORS Headers - no changes) ---
@@ -29,6 +36,9 @@ POST_CORS_HEADERS = {
 }
 # ---
 
+# Lives across warm invocations, so repeat applicants don't cost a wallets-table read
+_credit_scores = CreditScoreCache(ttl_seconds=CREDIT_SCORE_TTL_SECONDS)
+
 # --- (DecimalEncoder - no changes) ---
 class DecimalEncoder(json.JSONEncoder):
     def default(self, o):
@@ -46,6 +56,8 @@ def apply_for_loan(event, context):
     # --- 3. Initialize boto3 inside the handler ---
     dynamodb = boto3.resource('dynamodb')
     table = dynamodb.Table(TABLE_NAME) if TABLE_NAME else None
+    config_table = dynamodb.Table(CONFIG_TABLE_NAME) if CONFIG_TABLE_NAME else None
+    wallets_table = dynamodb.Table(WALLETS_TABLE_NAME) if WALLETS_TABLE_NAME else None
     # ---
     
     # --- (CORS Preflight Check - no changes) ---
@@ -89,37 +101,40 @@ def apply_for_loan(event, context):
             loan_id = str(uuid.uuid4())
             timestamp = int(time.time())
             
-            # Determine interest rate
-            if term_months <= 12:
-                interest_rate = Decimal('8.0')
-            elif term_months <= 24:
-                interest_rate = Decimal('12.0')
-            else:
-                interest_rate = Decimal('15.0')
-                
-            # Calculate minimum monthly payment
-            if interest_rate > 0:
-                monthly_rate = (interest_rate / 100) / 12
-                P = amount
-                n = term_months
-                numerator = monthly_rate * ((1 + monthly_rate) ** n)
-                denominator = ((1 + monthly_rate) ** n) - 1
-                minimum_payment = P * (numerator / denominator)
-            else:
-                minimum_payment = amount / term_months # Simple interest-free
+            # Risk tier from the onboarding credit score (cached per container)
+            credit_score = None
+            if wallets_table:
+                try:
+                    credit_score = _credit_scores.get(wallets_table, wallet_id)
+                except ClientError as ce:
+                    logger.warning(json.dumps({**log_context, "status": "warn", "error_code": ce.response['Error']['Code'], "message": "Credit score lookup failed; pricing with the default tier."}))
 
-            item = {
-                'loan_id': loan_id,
-                'wallet_id': wallet_id,
-                'amount': amount,
-                'remaining_balance': amount, # Initially, remaining balance is the full amount
-                'interest_rate': interest_rate,
-                'loan_term_months': term_months,
-                'minimum_payment': minimum_payment.quantize(Decimal('0.01')),
-                'status': 'PENDING', # New loans start as PENDING
-                'created_at': timestamp,
-                'updated_at': timestamp
-            }
+            # Price from the (cached) rate grid
+            engine = get_pricing_engine(config_table, RATE_GRID_TTL_SECONDS)
+            risk_tier = engine.tier_for_score(credit_score)
+            quote = engine.quote(amount, term_months, risk_tier)
+            interest_rate = quote.interest_rate
+            minimum_payment = quote.monthly_payment
+            log_context.update({"credit_score": credit_score, "risk_tier": risk_tier})
+
+            loan = LoanRecord(
+                loan_id=loan_id,
+                wallet_id=wallet_id,
+                amount=amount,
+                remaining_balance=amount, # Initially, remaining balance is the full amount
+                interest_rate=interest_rate,
+                loan_term_months=term_months,
+                minimum_payment=minimum_payment,
+                status='PENDING', # New loans start as PENDING
+                created_at=timestamp,
+                updated_at=timestamp,
+                risk_tier=risk_tier,
+                version=1,
+                active_wallet_id=wallet_id, # Key of the active-wallet-index until the loan closes
+                # Left out (not stored as null) when there is no score
+                **({'credit_score': credit_score} if credit_score is not None else {})
+            )
+            item = loan.to_item()
             
             # 1. Create the loan item
             table.put_item(Item=item)
@@ -1,9 +1,13 @@
 import json
 import os
+import time
 import boto3
 from decimal import Decimal
 from urllib.parse import unquote
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from botocore.exceptions import ClientError
+from fintech_common.records import LedgerEntry
+from fintech_common.loan_cache import VERSION_BUMP, VERSION_BUMP_VALUES, VERSION_BUMP_VALUES_DYNAMODB
 import logging # <-- 1. Import logging
 
 # --- 2. Set up logger ---
@@ -14,8 +18,13 @@ logger.setLevel(logging.INFO)
 # --- Environment Variables ---
 TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN')
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME') # Only needed for instant disbursement
+LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME') # Only needed for instant disbursement
 ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
 
+# Optimistic retries when the wallet balance changes between our read and the transaction
+MAX_DISBURSE_ATTEMPTS = 3
+
 # --- (CORS Headers - no changes) ---
 OPTIONS_CORS_HEADERS = {
     "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
@@ -37,18 +46,120 @@ class DecimalEncoder(json.JSONEncoder):
         return super(DecimalEncoder, self).default(o)
 # ---
 
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+class DisbursementError(Exception):
+    """An instant disbursement that cannot go ahead, with the status code to return."""
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+def wants_instant_disbursement(event):
+    """True for ?disbursement=instant or a body of {"disbursement": "INSTANT"}."""
+    query = event.get('queryStringParameters') or {}
+    if str(query.get('disbursement', '')).upper() == 'INSTANT':
+        return True
+    try:
+        body = json.loads(event.get('body') or '{}')
+    except ValueError:
+        return False
+    return isinstance(body, dict) and str(body.get('disbursement', '')).upper() == 'INSTANT'
+
+def disburse_instantly(dynamodb_client, loan_id, log_context):
+    """
+    Approves the loan, credits the wallet and writes the LOAN_IN ledger entry
+    in one DynamoDB transaction. Returns (approved_loan, new_wallet_balance).
+    The wallet credit is conditioned on the balance we read so the ledger's
+    balance_after is exact; if the balance moves underneath us we retry.
+    """
+    for attempt in range(1, MAX_DISBURSE_ATTEMPTS + 1):
+        loan_raw = dynamodb_client.get_item(
+            TableName=TABLE_NAME, Key={'loan_id': {'S': loan_id}}, ConsistentRead=True
+        ).get('Item')
+        if not loan_raw:
+            raise DisbursementError(404, "Loan not found.")
+        loan = {k: _deserializer.deserialize(v) for k, v in loan_raw.items()}
+        if loan.get('status') != 'PENDING':
+            raise DisbursementError(409, "Loan is not in 'PENDING' state. No action taken.")
+
+        wallet_id = loan['wallet_id']
+        amount = loan.get('remaining_balance') or loan['amount']
+        wallet = dynamodb_client.get_item(
+            TableName=WALLETS_TABLE_NAME, Key={'wallet_id': {'S': wallet_id}}, ConsistentRead=True
+        ).get('Item')
+        if not wallet:
+            raise DisbursementError(409, "Wallet for this loan does not exist.")
+
+        seen_balance = Decimal(wallet['balance']['N'])
+        new_balance = seen_balance + amount
+        ledger_item = LedgerEntry.new(wallet_id, "LOAN_IN", amount, new_balance, loan_id).to_item()
+        disbursed_at = int(time.time())
+
+        try:
+            dynamodb_client.transact_write_items(TransactItems=[
+                {'Update': {
+                    'TableName': TABLE_NAME,
+                    'Key': {'loan_id': {'S': loan_id}},
+                    'UpdateExpression': f"SET #status = :status_val, disbursement = :instant, disbursed_at = :now, approved_at = :now, {VERSION_BUMP}",
+                    'ConditionExpression': "#status = :pending_val",
+                    'ExpressionAttributeNames': {'#status': 'status'},
+                    'ExpressionAttributeValues': {
+                        ':status_val': {'S': 'APPROVED'},
+                        ':pending_val': {'S': 'PENDING'},
+                        ':instant': {'S': 'INSTANT'},
+                        ':now': {'N': str(disbursed_at)},
+                        **VERSION_BUMP_VALUES_DYNAMODB
+                    }
+                }},
+                {'Update': {
+                    'TableName': WALLETS_TABLE_NAME,
+                    'Key': {'wallet_id': {'S': wallet_id}},
+                    'UpdateExpression': "SET balance = balance + :amount, updated_at = :now",
+                    'ConditionExpression': "balance = :seen_balance",
+                    'ExpressionAttributeValues': {
+                        ':amount': {'N': str(amount)},
+                        ':seen_balance': {'N': str(seen_balance)},
+                        ':now': {'N': str(disbursed_at)}
+                    }
+                }},
+                {'Put': {
+                    'TableName': LOG_TABLE_NAME,
+                    'Item': {k: _serializer.serialize(v) for k, v in ledger_item.items()}
+                }}
+            ])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            reasons = [r.get('Code') for r in e.response.get('CancellationReasons', [])]
+            if reasons and reasons[0] == 'ConditionalCheckFailed':
+                raise DisbursementError(409, "Loan is not in 'PENDING' state. No action taken.")
+            # The wallet balance moved, or another transaction conflicted: re-read and
+            # retry; once the attempts run out the loop ends with a 409
+            logger.warning(json.dumps({**log_context, "status": "warn", "attempt": attempt, "reasons": reasons, "message": "Disbursement transaction cancelled; retrying."}))
+            continue
+
+        loan.update({'status': 'APPROVED', 'disbursement': 'INSTANT', 'disbursed_at': disbursed_at, 'approved_at': disbursed_at})
+        return loan, new_balance
+
+    raise DisbursementError(409, "Wallet balance kept changing. Please retry.")
+
 def approve_loan(event, context):
     """
     API: POST /loan/{loan_id}/approve
     Updates a PENDING loan to APPROVED and publishes a 'LOAN_APPROVED' event.
+    With ?disbursement=instant (or {"disbursement": "INSTANT"} in the body) the
+    approval, wallet credit and ledger entry are written in one transaction
+    before responding; the event is still published, marked as already
+    disbursed so process_loan_approval does not credit the wallet again.
     """
-    
+
     # --- 3. Initialize boto3 inside the handler ---
     dynamodb = boto3.resource('dynamodb')
     sns = boto3.client('sns')
     table = dynamodb.Table(TABLE_NAME) if TABLE_NAME else None
     # ---
-    
+
     # --- (CORS Preflight Check - no changes) ---
     http_method = event.get('httpMethod', '').upper()
     if http_method == 'OPTIONS':
@@ -70,25 +181,42 @@ def approve_loan(event, context):
         try:
             loan_id = unquote(event['pathParameters']['loan_id']).strip()
             log_context["loan_id"] = loan_id
-            
+            instant = wants_instant_disbursement(event)
+            log_context["disbursement"] = "INSTANT" if instant else "EVENT"
+
             logger.info(json.dumps({**log_context, "status": "info", "message": "Attempting to approve loan."}))
 
-            # Update the loan status in DynamoDB
-            response = table.update_item(
-                Key={'loan_id': loan_id},
-                UpdateExpression="SET #status = :status_val",
-                # Condition: Only approve if it's currently PENDING
-                ConditionExpression="#status = :pending_val",
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':status_val': 'APPROVED',
-                    ':pending_val': 'PENDING'
-                },
-                ReturnValues="ALL_NEW"  # Return the full updated item
-            )
-            
-            updated_item = response.get('Attributes', {})
-            logger.info(json.dumps({**log_context, "status": "info", "message": "Loan status updated to APPROVED."}))
+            new_balance = None
+            if instant:
+                if not WALLETS_TABLE_NAME or not LOG_TABLE_NAME:
+                    logger.error(json.dumps({**log_context, "status": "error", "message": "Instant disbursement requested but wallet/log tables not configured."}))
+                    return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Server configuration error."}) }
+                try:
+                    updated_item, new_balance = disburse_instantly(boto3.client('dynamodb'), loan_id, log_context)
+                except DisbursementError as de:
+                    logger.warning(json.dumps({**log_context, "status": "warn", "message": str(de)}))
+                    return { "statusCode": de.status_code, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": str(de)}) }
+                logger.info(json.dumps({**log_context, "status": "info", "new_balance": str(new_balance), "message": "Loan approved and wallet credited in one transaction."}))
+            else:
+                # Update the loan status in DynamoDB
+                response = table.update_item(
+                    Key={'loan_id': loan_id},
+                    # approved_at is where interest accrual starts
+                    UpdateExpression=f"SET #status = :status_val, approved_at = :approved_at, {VERSION_BUMP}",
+                    # Condition: Only approve if it's currently PENDING
+                    ConditionExpression="#status = :pending_val",
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={
+                        ':status_val': 'APPROVED',
+                        ':pending_val': 'PENDING',
+                        ':approved_at': int(time.time()),
+                        **VERSION_BUMP_VALUES
+                    },
+                    ReturnValues="ALL_NEW"  # Return the full updated item
+                )
+
+                updated_item = response.get('Attributes', {})
+                logger.info(json.dumps({**log_context, "status": "info", "message": "Loan status updated to APPROVED."}))
 
             # Publish 'LOAN_APPROVED' event to SNS
             sns.publish(
@@ -102,19 +230,23 @@ def approve_loan(event, context):
                     }
                 }
             )
-            
+
             logger.info(json.dumps({**log_context, "status": "info", "message": "Published LOAN_APPROVED event."}))
 
+            response_body = {"message": "Loan approved and event published!", "loan": updated_item}
+            if instant:
+                response_body = {"message": "Loan approved and funds disbursed!", "loan": updated_item, "new_balance": new_balance}
+
             return {
                 "statusCode": 200,
                 "headers": POST_CORS_HEADERS,
-                "body": json.dumps({"message": "Loan approved and event published!", "loan": updated_item}, cls=DecimalEncoder)
+                "body": json.dumps(response_body, cls=DecimalEncoder)
             }
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             log_context["error_code"] = error_code
-            
+
             if error_code == 'ConditionalCheckFailedException':
                 logger.warning(json.dumps({**log_context, "status": "warn", "message": "Loan was not in PENDING state."}))
                 return {
@@ -137,4 +269,4 @@ def approve_loan(event, context):
             "statusCode": 405,
             "headers": POST_CORS_HEADERS,
             "body": json.dumps({"message": f"Method {http_method} not allowed."})
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,181 @@
+import json
+import os
+import time
+import boto3
+from datetime import datetime, timezone
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.loan_index import CLOSED_STATUSES, CLOSE_LOAN_REMOVE, CLOSE_LOAN_SET, OPEN_STATUSES
+from fintech_common.parallel_scan import Aggregator, CapacityLimiter, DynamoCheckpointStore, ParallelScan
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+LOANS_TABLE_NAME = os.environ.get('LOANS_TABLE_NAME')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '16'))
+UPDATE_WORKERS = int(os.environ.get('UPDATE_WORKERS', '16'))
+MAX_RCU_PER_SECOND = int(os.environ.get('MAX_RCU_PER_SECOND', '500'))
+MAX_WCU_PER_SECOND = int(os.environ.get('MAX_WCU_PER_SECOND', '500'))
+
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+JOB_TTL_SECONDS = 30 * 24 * 3600
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+class LoanArchiveAggregator(Aggregator):
+    """
+    Puts every loan scanned on the right side of the hot/cold split:
+    closed loans still in the active index (or never indexed) move to the
+    wallet's history, and open loans written before the split get their
+    active index key. Each write is conditional on the status the scan saw.
+    """
+
+    def __init__(self, dynamodb_client, executor, write_limiter):
+        self.client = dynamodb_client
+        self.executor = executor
+        self.write_limiter = write_limiter
+
+    def _fix(self, loan):
+        status = loan.get('status')
+        values = {':status': {'S': status}}
+        if status in CLOSED_STATUSES:
+            # Legacy loans have no close time; their last update is the closest we have
+            closed_at = loan.get('closed_at') or loan.get('updated_at') or loan.get('created_at') or int(time.time())
+            update_expression = f"SET {CLOSE_LOAN_SET} REMOVE {CLOSE_LOAN_REMOVE}"
+            values[':closed_at'] = {'N': str(closed_at)}
+            outcome = 'archived'
+        else:
+            update_expression = "SET active_wallet_id = wallet_id"
+            outcome = 'activated'
+        try:
+            response = self.client.update_item(
+                TableName=LOANS_TABLE_NAME,
+                Key={'loan_id': {'S': loan['loan_id']}},
+                UpdateExpression=update_expression,
+                ConditionExpression="#status = :status AND attribute_exists(wallet_id)",
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues=values,
+                ReturnConsumedCapacity='TOTAL'
+            )
+            self.write_limiter.consume(response.get('ConsumedCapacity', {}).get('CapacityUnits', 1))
+            return outcome
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return 'skipped' # Status changed since the scan; the writer that changed it indexed it
+
+    def accumulate(self, state, items):
+        outcomes = list(self.executor.map(self._fix, items))
+        state['loans_scanned'] = state.get('loans_scanned', 0) + len(items)
+        for outcome in outcomes:
+            state[f'loans_{outcome}'] = state.get(f'loans_{outcome}', 0) + 1
+        return state
+
+
+def archive_closed_loans(event, context):
+    """
+    Scheduled job (EventBridge, nightly).
+    Moves closed loans (PAID, REJECTED) out of the active-wallet-index and
+    into the wallet-history-index, and indexes open loans that predate the
+    split. Writers that close loans already do this inline, so after the
+    first run this only picks up stragglers. Runs as a checkpointed
+    parallel scan that re-invokes itself if it nears the Lambda timeout.
+    Optional event keys: job_id.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    dynamodb = boto3.resource('dynamodb')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    log_context = {"action": "archive_closed_loans"}
+
+    if not LOANS_TABLE_NAME or not jobs_table:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    job_id = event.get('job_id') or f"loan-archive#{datetime.now(timezone.utc).date().isoformat()}"
+    log_context["job_id"] = job_id
+
+    existing = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if existing and existing.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Archival already complete for this job."}))
+        return json.loads(json.dumps(existing, cls=DecimalEncoder))
+    if not existing:
+        jobs_table.put_item(Item={
+            'job_id': job_id,
+            'job_type': 'LOAN_ARCHIVE',
+            'status': 'RUNNING',
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + JOB_TTL_SECONDS
+        })
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    values = {':s0': {'S': OPEN_STATUSES[0]}, ':s1': {'S': OPEN_STATUSES[1]},
+              ':s2': {'S': CLOSED_STATUSES[0]}, ':s3': {'S': CLOSED_STATUSES[1]}}
+    with ThreadPoolExecutor(max_workers=UPDATE_WORKERS) as executor:
+        scan = ParallelScan(
+            dynamodb_client,
+            LOANS_TABLE_NAME,
+            LoanArchiveAggregator(dynamodb_client, executor, CapacityLimiter(MAX_WCU_PER_SECOND)),
+            total_segments=SCAN_SEGMENTS,
+            max_capacity_per_second=MAX_RCU_PER_SECOND,
+            scan_kwargs={
+                # Only loans on the wrong side of the split come back
+                'FilterExpression': (
+                    "(#status IN (:s0, :s1) AND attribute_not_exists(active_wallet_id)) OR "
+                    "(#status IN (:s2, :s3) AND (attribute_exists(active_wallet_id) OR attribute_not_exists(closed_wallet_id)))"
+                ),
+                'ProjectionExpression': "loan_id, #status, closed_at, updated_at, created_at",
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': values
+            },
+            checkpoint_store=DynamoCheckpointStore(dynamodb_client, JOBS_TABLE_NAME, job_id)
+        )
+        logger.info(json.dumps({**log_context, "status": "info", "segments": SCAN_SEGMENTS, "message": "Starting loan archival."}))
+        result = scan.run(should_stop=out_of_time)
+
+    log_context.update({"items_scanned": result.items_scanned, "capacity_consumed": str(result.capacity_consumed)})
+
+    if not result.complete:
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Out of time; checkpointed. Re-invoking to resume."}))
+        try:
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({"job_id": job_id})
+            )
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke archival job."}))
+        return {"job_id": job_id, "status": "RUNNING"}
+
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression="SET #status = :complete, #result = :result, completed_at = :now",
+        ExpressionAttributeNames={'#status': 'status', '#result': 'result'},
+        ExpressionAttributeValues={
+            ':complete': 'COMPLETE',
+            ':result': result.state,
+            ':now': int(time.time())
+        }
+    )
+    logger.info(json.dumps({**log_context, "status": "info", "result": result.state, "message": "Loan archival complete."}, cls=DecimalEncoder))
+
+    return json.loads(json.dumps({"job_id": job_id, "status": "COMPLETE", "result": result.state}, cls=DecimalEncoder))
@@ -0,0 +1,169 @@
+import json
+import os
+import time
+import boto3
+from datetime import datetime, timezone
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.parallel_scan import Aggregator, CapacityLimiter, DynamoCheckpointStore, ParallelScan
+from fintech_common.savings import GOAL_HISTORY_TYPES, goal_history_attributes
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '16'))
+UPDATE_WORKERS = int(os.environ.get('UPDATE_WORKERS', '16'))
+MAX_RCU_PER_SECOND = int(os.environ.get('MAX_RCU_PER_SECOND', '500'))
+MAX_WCU_PER_SECOND = int(os.environ.get('MAX_WCU_PER_SECOND', '500'))
+
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+JOB_TTL_SECONDS = 30 * 24 * 3600
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+class GoalHistoryAggregator(Aggregator):
+    """
+    Adds the goal-history-index keys to goal ledger entries written before
+    the index existed. Ledger entries are never updated otherwise, so each
+    write is only conditioned on the keys still being absent.
+    """
+
+    def __init__(self, dynamodb_client, executor, write_limiter):
+        self.client = dynamodb_client
+        self.executor = executor
+        self.write_limiter = write_limiter
+
+    def _index(self, entry):
+        keys = goal_history_attributes(entry)
+        if not keys:
+            return 'skipped'
+        try:
+            response = self.client.update_item(
+                TableName=LOG_TABLE_NAME,
+                Key={'transaction_id': {'S': entry['transaction_id']}},
+                UpdateExpression="SET goal_history_id = :goal_id, goal_history_key = :history_key",
+                ConditionExpression="attribute_not_exists(goal_history_key)",
+                ExpressionAttributeValues={
+                    ':goal_id': {'S': keys['goal_history_id']},
+                    ':history_key': {'S': keys['goal_history_key']}
+                },
+                ReturnConsumedCapacity='TOTAL'
+            )
+            self.write_limiter.consume(response.get('ConsumedCapacity', {}).get('CapacityUnits', 1))
+            return 'indexed'
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return 'skipped'
+
+    def accumulate(self, state, items):
+        outcomes = list(self.executor.map(self._index, items))
+        state['entries_scanned'] = state.get('entries_scanned', 0) + len(items)
+        for outcome in outcomes:
+            state[f'entries_{outcome}'] = state.get(f'entries_{outcome}', 0) + 1
+        return state
+
+
+def backfill_goal_history(event, context):
+    """
+    One-off job (invoke manually after deploying the goal-history-index).
+    Indexes the savings ledger entries (SAVINGS_ADD, SAVINGS_REDEEM,
+    SAVINGS_REFUND) written before the index existed; new entries are
+    indexed when they are written. Runs as a checkpointed parallel scan
+    that re-invokes itself if it nears the Lambda timeout.
+    Optional event keys: job_id.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    dynamodb = boto3.resource('dynamodb')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    log_context = {"action": "backfill_goal_history"}
+
+    if not LOG_TABLE_NAME or not jobs_table:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    job_id = event.get('job_id') or f"goal-history-backfill#{datetime.now(timezone.utc).date().isoformat()}"
+    log_context["job_id"] = job_id
+
+    existing = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if existing and existing.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Backfill already complete for this job."}))
+        return json.loads(json.dumps(existing, cls=DecimalEncoder))
+    if not existing:
+        jobs_table.put_item(Item={
+            'job_id': job_id,
+            'job_type': 'GOAL_HISTORY_BACKFILL',
+            'status': 'RUNNING',
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + JOB_TTL_SECONDS
+        })
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    values = {f':t{i}': {'S': tx_type} for i, tx_type in enumerate(GOAL_HISTORY_TYPES)}
+    with ThreadPoolExecutor(max_workers=UPDATE_WORKERS) as executor:
+        scan = ParallelScan(
+            dynamodb_client,
+            LOG_TABLE_NAME,
+            GoalHistoryAggregator(dynamodb_client, executor, CapacityLimiter(MAX_WCU_PER_SECOND)),
+            total_segments=SCAN_SEGMENTS,
+            max_capacity_per_second=MAX_RCU_PER_SECOND,
+            scan_kwargs={
+                # Only goal entries that are not indexed yet come back
+                'FilterExpression': f"#type IN ({', '.join(values)}) AND attribute_not_exists(goal_history_key)",
+                'ProjectionExpression': "transaction_id, #type, related_id, #timestamp",
+                'ExpressionAttributeNames': {'#type': 'type', '#timestamp': 'timestamp'},
+                'ExpressionAttributeValues': values
+            },
+            checkpoint_store=DynamoCheckpointStore(dynamodb_client, JOBS_TABLE_NAME, job_id)
+        )
+        logger.info(json.dumps({**log_context, "status": "info", "segments": SCAN_SEGMENTS, "message": "Starting goal history backfill."}))
+        result = scan.run(should_stop=out_of_time)
+
+    log_context.update({"items_scanned": result.items_scanned, "capacity_consumed": str(result.capacity_consumed)})
+
+    if not result.complete:
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Out of time; checkpointed. Re-invoking to resume."}))
+        try:
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({"job_id": job_id})
+            )
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke backfill job."}))
+        return {"job_id": job_id, "status": "RUNNING"}
+
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression="SET #status = :complete, #result = :result, completed_at = :now",
+        ExpressionAttributeNames={'#status': 'status', '#result': 'result'},
+        ExpressionAttributeValues={
+            ':complete': 'COMPLETE',
+            ':result': result.state,
+            ':now': int(time.time())
+        }
+    )
+    logger.info(json.dumps({**log_context, "status": "info", "result": result.state, "message": "Goal history backfill complete."}, cls=DecimalEncoder))
+
+    return json.loads(json.dumps({"job_id": job_id, "status": "COMPLETE", "result": result.state}, cls=DecimalEncoder))
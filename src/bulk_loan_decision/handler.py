@@ -0,0 +1,215 @@
+import json
+import os
+import time
+import boto3
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from fintech_common.loan_cache import VERSION_BUMP, VERSION_BUMP_VALUES_DYNAMODB
+from fintech_common.loan_index import CLOSE_LOAN_REMOVE, CLOSE_LOAN_SET
+import logging
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
+SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN')
+ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
+MAX_WORKERS = int(os.environ.get('BULK_DECISION_MAX_WORKERS', '10'))
+
+# --- Limits ---
+MAX_DECISIONS_PER_REQUEST = 100 # Keeps one invocation well inside the 30s API Gateway timeout
+SNS_BATCH_SIZE = 10 # PublishBatch accepts at most 10 entries
+DECISION_STATUSES = ('APPROVED', 'REJECTED')
+
+# --- CORS Headers ---
+OPTIONS_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Allow-Credentials": True
+}
+POST_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Credentials": True
+}
+# ---
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+_deserializer = TypeDeserializer()
+
+def _from_dynamodb(attributes):
+    return {k: _deserializer.deserialize(v) for k, v in (attributes or {}).items()}
+
+def parse_decisions(body):
+    """
+    Accepts either {"decisions": [{"loan_id": ..., "decision": ...}, ...]}
+    or the shorthand {"loan_ids": [...], "decision": ...}.
+    Returns a de-duplicated list of (loan_id, decision) tuples.
+    """
+    if 'decisions' in body:
+        raw = [(d.get('loan_id'), d.get('decision')) for d in body['decisions']]
+    else:
+        raw = [(loan_id, body.get('decision')) for loan_id in body.get('loan_ids', [])]
+
+    if not raw:
+        raise ValueError("At least one loan decision is required.")
+    if len(raw) > MAX_DECISIONS_PER_REQUEST:
+        raise ValueError(f"A maximum of {MAX_DECISIONS_PER_REQUEST} decisions is allowed per request.")
+
+    decisions = {}
+    for loan_id, decision in raw:
+        if not isinstance(loan_id, str) or not loan_id.strip():
+            raise ValueError("Every decision needs a loan_id.")
+        if decision not in DECISION_STATUSES:
+            raise ValueError(f"decision must be one of {DECISION_STATUSES}.")
+        loan_id = loan_id.strip()
+        if loan_id in decisions and decisions[loan_id] != decision:
+            raise ValueError(f"Conflicting decisions for loan {loan_id}.")
+        decisions[loan_id] = decision
+    return list(decisions.items())
+
+def apply_decision(dynamodb_client, loan_id, decision):
+    """
+    Conditionally moves one loan from PENDING to `decision`.
+    Returns a per-loan outcome dict; never raises for a single loan's failure.
+    """
+    update_expression = f"SET #status = :status_val, {VERSION_BUMP}"
+    values = {
+        ':status_val': {'S': decision},
+        ':pending_val': {'S': 'PENDING'},
+        **VERSION_BUMP_VALUES_DYNAMODB
+    }
+    if decision == 'APPROVED':
+        # Where interest accrual starts
+        update_expression += ", approved_at = :decided_at"
+        values[':decided_at'] = {'N': str(int(time.time()))}
+    if decision == 'REJECTED':
+        # Rejected loans move from the active index to the wallet's history
+        update_expression += f", {CLOSE_LOAN_SET} REMOVE {CLOSE_LOAN_REMOVE}"
+        values[':closed_at'] = {'N': str(int(time.time()))}
+    try:
+        response = dynamodb_client.update_item(
+            TableName=TABLE_NAME,
+            Key={'loan_id': {'S': loan_id}},
+            UpdateExpression=update_expression,
+            ConditionExpression="#status = :pending_val",
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW",
+            # Lets us tell "not found" from "no longer PENDING" without a second read
+            ReturnValuesOnConditionCheckFailure="ALL_OLD"
+        )
+        return {"loan_id": loan_id, "outcome": decision, "loan": _from_dynamodb(response.get('Attributes'))}
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        if error_code == 'ConditionalCheckFailedException':
+            current = _from_dynamodb(e.response.get('Item'))
+            if not current:
+                return {"loan_id": loan_id, "outcome": "NOT_FOUND"}
+            return {"loan_id": loan_id, "outcome": "CONFLICT", "current_status": current.get('status')}
+        return {"loan_id": loan_id, "outcome": "ERROR", "error_code": error_code}
+
+def publish_approvals(sns, approved_results, log_context):
+    """Publishes LOAN_APPROVED events in batches of 10. Marks each result with event_published."""
+    for start in range(0, len(approved_results), SNS_BATCH_SIZE):
+        chunk = approved_results[start:start + SNS_BATCH_SIZE]
+        entries = [
+            {
+                'Id': str(index),
+                'Message': json.dumps({"event_type": "LOAN_APPROVED", "loan_details": result['loan']}, cls=DecimalEncoder),
+                'Subject': f"Loan Approved: {result['loan_id']}",
+                'MessageAttributes': {
+                    'event_type': {'DataType': 'String', 'StringValue': 'LOAN_APPROVED'}
+                }
+            }
+            for index, result in enumerate(chunk)
+        ]
+        try:
+            response = sns.publish_batch(TopicArn=SNS_TOPIC_ARN, PublishBatchRequestEntries=entries)
+            failed_ids = {f['Id'] for f in response.get('Failed', [])}
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "PublishBatch call failed."}))
+            failed_ids = {entry['Id'] for entry in entries}
+
+        for index, result in enumerate(chunk):
+            result['event_published'] = str(index) not in failed_ids
+            if not result['event_published']:
+                logger.error(json.dumps({**log_context, "status": "error", "loan_id": result['loan_id'], "message": "Failed to publish LOAN_APPROVED event."}))
+
+def bulk_loan_decision(event, context):
+    """
+    API: POST /loan/bulk-decision
+    Approves/rejects many PENDING loans in one call. Status transitions run
+    in parallel (each is its own conditional update), LOAN_APPROVED events
+    are published in batches, and the response lists a per-loan outcome:
+    APPROVED, REJECTED, CONFLICT (no longer PENDING), NOT_FOUND or ERROR.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    sns = boto3.client('sns')
+    # ---
+
+    # --- CORS Preflight Check ---
+    http_method = event.get('httpMethod', '').upper()
+    if http_method == 'OPTIONS':
+        logger.info("Handling OPTIONS preflight request for bulk_loan_decision")
+        return { "statusCode": 200, "headers": OPTIONS_CORS_HEADERS, "body": "" }
+
+    if not TABLE_NAME or not SNS_TOPIC_ARN:
+        log_message = {
+            "status": "error",
+            "action": "bulk_loan_decision",
+            "message": "FATAL: Environment variables not set."
+        }
+        logger.error(json.dumps(log_message))
+        return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Server configuration error."}) }
+
+    if http_method == 'POST':
+        log_context = {"action": "bulk_loan_decision"}
+        try:
+            body = json.loads(event.get('body') or '{}')
+            decisions = parse_decisions(body)
+            log_context["decision_count"] = len(decisions)
+
+            logger.info(json.dumps({**log_context, "status": "info", "message": "Applying bulk loan decisions."}))
+
+            # boto3 clients are thread-safe, so the workers share one
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(decisions))) as executor:
+                results = list(executor.map(lambda d: apply_decision(dynamodb_client, *d), decisions))
+
+            approved = [r for r in results if r['outcome'] == 'APPROVED']
+            publish_approvals(sns, approved, log_context)
+
+            summary = {}
+            for result in results:
+                summary[result['outcome']] = summary.get(result['outcome'], 0) + 1
+
+            logger.info(json.dumps({**log_context, "status": "info", "summary": summary, "message": "Bulk loan decisions applied."}))
+
+            return {
+                "statusCode": 200,
+                "headers": POST_CORS_HEADERS,
+                "body": json.dumps({"message": "Bulk decisions processed.", "summary": summary, "results": results}, cls=DecimalEncoder)
+            }
+
+        except (ValueError, TypeError, AttributeError) as ve:
+             logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+             return { "statusCode": 400, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+        except Exception as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Failed to apply bulk decisions.", "error": str(e)}) }
+    else:
+         return { "statusCode": 405, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Method {http_method} not allowed."}) }
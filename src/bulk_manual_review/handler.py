@@ -0,0 +1,178 @@
+import json
+import os
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import BotoCoreError, ClientError
+from fintech_common.review_queue import DECISION_STATUSES, LEAVE_QUEUE_REMOVE, return_to_queue, send_decision
+import logging
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME')
+ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
+MAX_WORKERS = int(os.environ.get('BULK_DECISION_MAX_WORKERS', '10'))
+
+# --- Limits ---
+MAX_DECISIONS_PER_REQUEST = 100 # Keeps one invocation well inside the 30s API Gateway timeout
+
+# --- CORS Headers ---
+OPTIONS_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Allow-Credentials": True
+}
+POST_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Credentials": True
+}
+# ---
+
+# Outcome for each of the task token errors that mean the execution is no longer waiting (SPENT_TOKEN_ERRORS)
+TASK_TOKEN_OUTCOMES = {'TaskTimedOut': 'TIMED_OUT', 'TaskDoesNotExist': 'TOKEN_INVALID'}
+
+_deserializer = TypeDeserializer()
+
+def _from_dynamodb(attributes):
+    return {k: _deserializer.deserialize(v) for k, v in (attributes or {}).items()}
+
+def parse_decisions(body):
+    """
+    Accepts either {"decisions": [{"user_id": ..., "decision": ...}, ...]}
+    or the shorthand {"user_ids": [...], "decision": ...}.
+    Returns a de-duplicated list of (user_id, decision) tuples.
+    """
+    if 'decisions' in body:
+        raw = [(d.get('user_id'), d.get('decision')) for d in body['decisions']]
+    else:
+        raw = [(user_id, body.get('decision')) for user_id in body.get('user_ids', [])]
+
+    if not raw:
+        raise ValueError("At least one review decision is required.")
+    if len(raw) > MAX_DECISIONS_PER_REQUEST:
+        raise ValueError(f"A maximum of {MAX_DECISIONS_PER_REQUEST} decisions is allowed per request.")
+
+    decisions = {}
+    for user_id, decision in raw:
+        if not isinstance(user_id, str) or not user_id.strip():
+            raise ValueError("Every decision needs a user_id.")
+        if decision not in DECISION_STATUSES:
+            raise ValueError(f"decision must be one of {tuple(DECISION_STATUSES)}.")
+        user_id = user_id.strip()
+        if user_id in decisions and decisions[user_id] != decision:
+            raise ValueError(f"Conflicting decisions for user {user_id}.")
+        decisions[user_id] = decision
+    return list(decisions.items())
+
+def apply_decision(dynamodb_client, sfn_client, user_id, decision):
+    """
+    Takes the user's task token (the same conditional update that records
+    the decision and leaves the review queue, so a token is only ever sent
+    once) and resumes the execution with it. If the decision cannot be
+    sent and the token is still live, the user goes back in the queue.
+    Returns a per-user outcome dict; never raises for a single user's failure.
+    """
+    try:
+        response = dynamodb_client.update_item(
+            TableName=USERS_TABLE_NAME,
+            Key={'user_id': {'S': user_id}},
+            UpdateExpression=f"SET onboarding_status = :status REMOVE {LEAVE_QUEUE_REMOVE}",
+            ConditionExpression="attribute_exists(sfn_task_token)",
+            ExpressionAttributeValues={':status': {'S': DECISION_STATUSES[decision]}},
+            ReturnValues="UPDATED_OLD",
+            # Lets us tell "not found" from "not awaiting review" without a second read
+            ReturnValuesOnConditionCheckFailure="ALL_OLD"
+        )
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        if error_code == 'ConditionalCheckFailedException':
+            current = _from_dynamodb(e.response.get('Item'))
+            if not current:
+                return {"user_id": user_id, "outcome": "NOT_FOUND"}
+            return {"user_id": user_id, "outcome": "NOT_PENDING", "current_status": current.get('onboarding_status')}
+        return {"user_id": user_id, "outcome": "ERROR", "error_code": error_code}
+
+    previous = _from_dynamodb(response.get('Attributes'))
+    try:
+        send_decision(sfn_client, previous['sfn_task_token'], decision)
+    except (ClientError, BotoCoreError) as e:
+        error_code = e.response['Error']['Code'] if isinstance(e, ClientError) else type(e).__name__
+        if error_code in TASK_TOKEN_OUTCOMES:
+            return {"user_id": user_id, "outcome": TASK_TOKEN_OUTCOMES[error_code], "error_code": error_code}
+        # The execution is still waiting: put the token back so the user can be decided again
+        try:
+            requeued = return_to_queue(dynamodb_client, USERS_TABLE_NAME, user_id, previous, DECISION_STATUSES[decision])
+        except ClientError:
+            requeued = False
+        return {"user_id": user_id, "outcome": "ERROR", "error_code": error_code, "requeued": requeued}
+    return {"user_id": user_id, "outcome": decision}
+
+def bulk_manual_review(event, context):
+    """
+    API: POST /onboarding/manual-review/bulk
+    Approves/rejects many applicants waiting for manual review in one call
+    (e.g. a page of GET /onboarding/review-queue). Each decision takes the
+    user's task token and sends SendTaskSuccess/SendTaskFailure; they run in
+    parallel, and the response lists a per-user outcome: APPROVED, REJECTED,
+    NOT_PENDING (not awaiting review), NOT_FOUND, TIMED_OUT, TOKEN_INVALID
+    or ERROR (with `requeued` telling whether the user is back in the queue).
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    sfn_client = boto3.client('stepfunctions')
+    # ---
+
+    # --- CORS Preflight Check ---
+    http_method = event.get('httpMethod', '').upper()
+    if http_method == 'OPTIONS':
+        logger.info("Handling OPTIONS preflight request for bulk_manual_review")
+        return { "statusCode": 200, "headers": OPTIONS_CORS_HEADERS, "body": "" }
+
+    if not USERS_TABLE_NAME:
+        log_message = {
+            "status": "error",
+            "action": "bulk_manual_review",
+            "message": "FATAL: USERS_TABLE_NAME environment variable not set."
+        }
+        logger.error(json.dumps(log_message))
+        return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Server configuration error."}) }
+
+    if http_method == 'POST':
+        log_context = {"action": "bulk_manual_review"}
+        try:
+            body = json.loads(event.get('body') or '{}')
+            decisions = parse_decisions(body)
+            log_context["decision_count"] = len(decisions)
+
+            logger.info(json.dumps({**log_context, "status": "info", "message": "Applying bulk review decisions."}))
+
+            # boto3 clients are thread-safe, so the workers share them
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(decisions))) as executor:
+                results = list(executor.map(lambda d: apply_decision(dynamodb_client, sfn_client, *d), decisions))
+
+            summary = {}
+            for result in results:
+                summary[result['outcome']] = summary.get(result['outcome'], 0) + 1
+
+            logger.info(json.dumps({**log_context, "status": "info", "summary": summary, "message": "Bulk review decisions applied."}))
+
+            return {
+                "statusCode": 200,
+                "headers": POST_CORS_HEADERS,
+                "body": json.dumps({"message": "Bulk decisions processed.", "summary": summary, "results": results})
+            }
+
+        except (ValueError, TypeError, AttributeError) as ve:
+             logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+             return { "statusCode": 400, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+        except Exception as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Failed to apply bulk decisions.", "error": str(e)}) }
+    else:
+         return { "statusCode": 405, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Method {http_method} not allowed."}) }
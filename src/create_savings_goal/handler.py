@@ -5,6 +5,7 @@ import uuid
 import time
 from decimal import Decimal, InvalidOperation
 from botocore.exceptions import ClientError
+from fintech_common.records import GoalRecord
 import logging
 
 # Set up logger
@@ -86,14 +87,15 @@ def create_savings_goal(event, context):
             })
             logger.info(json.dumps({**log_context, "status": "info", "message": "Creating new savings goal."}))
 
-            item = {
-                'goal_id': goal_id,
-                'wallet_id': wallet_id,
-                'goal_name': goal_name,
-                'target_amount': target_amount,
-                'current_amount': Decimal('0.00'), # Start at 0
-                'created_at': timestamp,
-            }
+            goal = GoalRecord(
+                goal_id=goal_id,
+                wallet_id=wallet_id,
+                goal_name=goal_name,
+                target_amount=target_amount,
+                current_amount=Decimal('0.00'), # Start at 0
+                created_at=timestamp
+            )
+            item = goal.to_item()
             
             table.put_item(Item=item)
             
@@ -1,10 +1,9 @@
 import json
 import os
 import boto3
-import uuid
-import time
 from decimal import Decimal
 from botocore.exceptions import ClientError
+from fintech_common.wallets import create_wallet as create_wallet_record
 import logging
 
 # --- Set up logger ---
@@ -34,61 +33,20 @@ class DecimalEncoder(json.JSONEncoder):
         return super(DecimalEncoder, self).default(o)
 # ---
 
-# --- Transaction Logging Helper ---
-def log_transaction(log_table, wallet_id, tx_type, amount, new_balance=None, related_id=None, details=None):
-    if not log_table:
-        logger.warn(json.dumps({"status": "warn", "action": "log_transaction", "message": "Log table not configured."}))
-        return
-    try:
-        timestamp = int(time.time())
-        log_item = {
-            'transaction_id': str(uuid.uuid4()),
-            'wallet_id': wallet_id,
-            'timestamp': timestamp,
-            'type': tx_type,
-            'amount': amount,
-            'balance_after': new_balance if new_balance is not None else Decimal('NaN'),
-            'related_id': related_id if related_id else 'N/A',
-            'details': details if details else {}
-        }
-        if isinstance(log_item['balance_after'], Decimal) and log_item['balance_after'].is_nan():
-             log_item['balance_after'] = 'N/A' 
-        
-        log_table.put_item(Item=log_item)
-        
-        log_message = {
-            "status": "info",
-            "action": "log_transaction",
-            "wallet_id": wallet_id,
-            "transaction_id": log_item['transaction_id']
-        }
-        logger.info(json.dumps(log_message))
-
-    except Exception as log_e:
-        log_message = {
-            "status": "error",
-            "action": "log_transaction",
-            "wallet_id": wallet_id,
-            "error_message": str(log_e)
-        }
-        logger.error(json.dumps(log_message))
-# ---
-
 # --- THIS IS THE CORRECT FUNCTION ---
 def create_wallet(event, context):
     """
     Creates a new digital wallet with a zero balance.
-    This handler is invoked by the Step Function, not API Gateway.
+    Private (not behind API Gateway); onboarding no longer invokes it and
+    creates wallets through fintech_common.wallets directly.
     """
     
     # --- Initialize boto3 clients inside the handler ---
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(TABLE_NAME) if TABLE_NAME else None
-    log_table = dynamodb.Table(LOG_TABLE_NAME) if LOG_TABLE_NAME else None
+    dynamodb_client = boto3.client('dynamodb')
     
     log_context = {"action": "create_wallet"}
     
-    if not table or not log_table:
+    if not TABLE_NAME or not LOG_TABLE_NAME:
         log_message = {
             **log_context,
             "status": "error",
@@ -99,33 +57,15 @@ def create_wallet(event, context):
         raise Exception("Server configuration error.")
 
     try:
-        wallet_id = str(uuid.uuid4())
-        timestamp = int(time.time())
-        new_balance = Decimal('0.00')
-        
-        log_context["wallet_id"] = wallet_id
-        
-        item = {
-            'wallet_id': wallet_id,
-            'balance': new_balance,
-            'currency': 'USD',
-            'created_at': timestamp,
-            'updated_at': timestamp
-        }
-        
-        table.put_item(Item=item)
+        # Optional credit score from onboarding (provision_account), kept for loan pricing
+        request_body = json.loads(event.get('body') or '{}')
+        credit_score = request_body.get('credit_score')
+
+        # The wallet and its WALLET_CREATED ledger entry are written in one transaction
+        item, _ = create_wallet_record(dynamodb_client, TABLE_NAME, LOG_TABLE_NAME, credit_score=credit_score)
         
+        log_context["wallet_id"] = item['wallet_id']
         logger.info(json.dumps({**log_context, "status": "info", "message": "New wallet created in DynamoDB."}))
-
-        # Log this as the first transaction
-        log_transaction(
-            log_table=log_table,
-            wallet_id=wallet_id,
-            tx_type="WALLET_CREATED",
-            amount=Decimal('0.00'),
-            new_balance=new_balance,
-            related_id=wallet_id
-        )
         
         # Return a 201 response so the Step Function knows it succeeded
         return {
@@ -1,17 +1,66 @@
 import json
 import os
+import time
+import boto3
+from botocore.exceptions import ClientError
 import logging
 
+from fintech_common.provider_cache import ProviderResultCache
+from fintech_common.provider_sim import ProviderError, simulation_for
+
 # Set up logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# --- Environment Variables ---
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME')
+RESULT_CACHE_TABLE_NAME = os.environ.get('RESULT_CACHE_TABLE_NAME')
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+
+# Kept across warm invocations (the in-process layer of the cache)
+result_cache = ProviderResultCache('credit_check', RESULT_CACHE_TTL_SECONDS)
+
+def ask_provider(event, email, log_context):
+    """The (simulated) provider call; raises ProviderError subclasses for Retry."""
+    # --- SIMULATED PROVIDER CALL ---
+    # Latency, errors, timeouts and throttling as configured (PROVIDER_* env vars,
+    # or the event's provider_simulation); failures raise so the Step Function's
+    # Retry policy handles them like a real provider's.
+    try:
+        latency_ms = simulation_for(event, 'credit_check').call()
+    except ValueError as ve:
+        logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve), "message": "Invalid provider simulation config."}))
+        raise Exception("Server configuration error.")
+    except ProviderError as pe:
+        logger.warning(json.dumps({**log_context, "status": "warn", "error_type": type(pe).__name__, "message": str(pe)}))
+        raise
+    log_context["provider_latency_ms"] = round(latency_ms)
+
+    # --- MOCK LOGIC ---
+    decision = "APPROVED"
+    message = "Credit check passed (Mock)."
+    credit_score = 750
+
+    if "lowscore@" in email:
+        decision = "REJECTED"
+        message = "Credit check failed: low score (Mock)."
+        credit_score = 550
+    # --- END MOCK LOGIC ---
+
+    return {
+        "status": decision,
+        "message": message,
+        "credit_score": credit_score
+    }
+
 def credit_check(event, context):
     """
     MOCK: Simulates a 3rd-party credit check.
     This function is invoked by the Step Function.
     
-    It returns a decision.
+    It returns a decision. A check of the same person from the last
+    RESULT_CACHE_TTL_SECONDS (a re-application, or a re-run execution) is
+    reused instead of calling the provider again.
     """
     
     logger.info(f"Received event: {json.dumps(event)}")
@@ -24,22 +73,29 @@ def credit_check(event, context):
         logger.error(json.dumps({**log_context, "status": "error", "message": "user_id not found in event input."}))
         raise ValueError("user_id not found in event input.")
 
-    # --- MOCK LOGIC ---
-    decision = "APPROVED"
-    message = "Credit check passed (Mock)."
-    credit_score = 750
-
-    if "lowscore@" in email:
-        decision = "REJECTED"
-        message = "Credit check failed: low score (Mock)."
-        credit_score = 550
+    cache_table = boto3.resource('dynamodb').Table(RESULT_CACHE_TABLE_NAME) if RESULT_CACHE_TABLE_NAME else None
+    result, source = result_cache.fetch(cache_table, email, lambda: ask_provider(event, email, log_context))
+    credit_score = result['credit_score']
     
-    logger.info(json.dumps({**log_context, "status": "info", "decision": decision, "credit_score": credit_score, "message": "Simulation complete."}))
-    # --- END MOCK LOGIC ---
+    logger.info(json.dumps({**log_context, "status": "info", "decision": result['status'], "credit_score": credit_score, "result_source": source, "message": "Simulation complete."}))
+
+    # Persist the score against the user so pricing can use it later.
+    # provision_account copies it onto the wallet when the account is created.
+    if USERS_TABLE_NAME:
+        try:
+            boto3.resource('dynamodb').Table(USERS_TABLE_NAME).update_item(
+                Key={'user_id': user_id},
+                UpdateExpression="SET credit_score = :score, credit_checked_at = :now",
+                # Never create a partial user item for an unknown user_id
+                ConditionExpression="attribute_exists(user_id)",
+                ExpressionAttributeValues={':score': credit_score, ':now': int(time.time())}
+            )
+        except ClientError as ce:
+            if ce.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                logger.error(json.dumps({**log_context, "status": "error", "message": "User not found; credit score not stored."}))
+                raise ValueError(f"User {user_id} not found.")
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": ce.response['Error']['Code'], "message": "Failed to store credit score."}))
+            raise ce # Let the Step Function retry/fail the task
 
     # Return the result to the Step Function
-    return {
-        "status": decision,
-        "message": message,
-        "credit_score": credit_score
-    }
\ No newline at end of file
+    return result
\ No newline at end of file
@@ -0,0 +1,159 @@
+import json
+import os
+import time
+import boto3
+from datetime import datetime, timezone
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.parallel_scan import Aggregator, CapacityLimiter, DynamoCheckpointStore, ParallelScan, to_dynamodb
+from fintech_common.roundup import flush
+from fintech_common.savings import SavingsTables
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+ROUNDUPS_TABLE_NAME = os.environ.get('ROUNDUPS_TABLE_NAME')
+SAVINGS_TABLE_NAME = os.environ.get('SAVINGS_TABLE_NAME')
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME')
+LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '8'))
+FLUSH_WORKERS = int(os.environ.get('FLUSH_WORKERS', '8'))
+MAX_RCU_PER_SECOND = int(os.environ.get('MAX_RCU_PER_SECOND', '200'))
+MAX_WCU_PER_SECOND = int(os.environ.get('MAX_WCU_PER_SECOND', '200'))
+
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+JOB_TTL_SECONDS = 30 * 24 * 3600
+# Wallet update, goal update, ledger put and counter reset, doubled for the transaction
+FLUSH_WCU = 8
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+class RoundupFlushAggregator(Aggregator):
+    """
+    Sweeps each wallet's pending round-ups into its goal and counts the
+    outcomes. A counter that moved since the scan read it is left for the
+    next payment or the next run.
+    """
+
+    def __init__(self, dynamodb_client, executor, write_limiter, tables, now):
+        self.client = dynamodb_client
+        self.executor = executor
+        self.write_limiter = write_limiter
+        self.tables = tables
+        self.now = now
+
+    def _flush(self, row):
+        self.write_limiter.consume(FLUSH_WCU)
+        return row['pending_amount'], flush(self.client, self.tables, ROUNDUPS_TABLE_NAME, to_dynamodb(row), self.now)
+
+    def accumulate(self, state, items):
+        outcomes = list(self.executor.map(self._flush, items))
+        state['wallets_scanned'] = state.get('wallets_scanned', 0) + len(items)
+        for amount, outcome in outcomes:
+            state[f'wallets_{outcome}'] = state.get(f'wallets_{outcome}', 0) + 1
+            if outcome == 'flushed':
+                state['amount_flushed'] = state.get('amount_flushed', Decimal('0')) + amount
+        return state
+
+
+def flush_roundups(event, context):
+    """
+    Scheduled job (EventBridge, daily).
+    Sweeps pending round-ups that have not reached the flush threshold into
+    their goals, so small spenders still see them within a day. Only rows
+    with something pending come back from the scan. Runs as a checkpointed
+    parallel scan that re-invokes itself if it nears the Lambda timeout.
+    Optional event keys: job_id.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    dynamodb = boto3.resource('dynamodb')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    log_context = {"action": "flush_roundups"}
+
+    if not ROUNDUPS_TABLE_NAME or not SAVINGS_TABLE_NAME or not WALLETS_TABLE_NAME or not LOG_TABLE_NAME or not jobs_table:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    job_id = event.get('job_id') or f"roundup-flush#{datetime.now(timezone.utc).date().isoformat()}"
+    log_context["job_id"] = job_id
+
+    existing = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if existing and existing.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Round-up flush already complete for this job."}))
+        return json.loads(json.dumps(existing, cls=DecimalEncoder))
+    if not existing:
+        jobs_table.put_item(Item={
+            'job_id': job_id,
+            'job_type': 'ROUNDUP_FLUSH',
+            'status': 'RUNNING',
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + JOB_TTL_SECONDS
+        })
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    tables = SavingsTables(WALLETS_TABLE_NAME, SAVINGS_TABLE_NAME, LOG_TABLE_NAME)
+    with ThreadPoolExecutor(max_workers=FLUSH_WORKERS) as executor:
+        scan = ParallelScan(
+            dynamodb_client,
+            ROUNDUPS_TABLE_NAME,
+            RoundupFlushAggregator(dynamodb_client, executor, CapacityLimiter(MAX_WCU_PER_SECOND), tables, int(time.time())),
+            total_segments=SCAN_SEGMENTS,
+            max_capacity_per_second=MAX_RCU_PER_SECOND,
+            scan_kwargs={
+                'FilterExpression': "enabled = :true AND pending_amount > :zero",
+                # pending_tx can hold many ids and is not needed to flush
+                'ProjectionExpression': "wallet_id, goal_id, goal_name, pending_amount, pending_count",
+                'ExpressionAttributeValues': {':true': {'BOOL': True}, ':zero': {'N': '0'}}
+            },
+            checkpoint_store=DynamoCheckpointStore(dynamodb_client, JOBS_TABLE_NAME, job_id)
+        )
+        logger.info(json.dumps({**log_context, "status": "info", "segments": SCAN_SEGMENTS, "message": "Starting round-up flush."}))
+        result = scan.run(should_stop=out_of_time)
+
+    log_context.update({"items_scanned": result.items_scanned, "capacity_consumed": str(result.capacity_consumed)})
+
+    if not result.complete:
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Out of time; checkpointed. Re-invoking to resume."}))
+        try:
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({"job_id": job_id})
+            )
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke round-up flush."}))
+        return {"job_id": job_id, "status": "RUNNING"}
+
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression="SET #status = :complete, #result = :result, completed_at = :now",
+        ExpressionAttributeNames={'#status': 'status', '#result': 'result'},
+        ExpressionAttributeValues={
+            ':complete': 'COMPLETE',
+            ':result': result.state,
+            ':now': int(time.time())
+        }
+    )
+    logger.info(json.dumps({**log_context, "status": "info", "result": result.state, "message": "Round-up flush complete."}, cls=DecimalEncoder))
+
+    return json.loads(json.dumps({"job_id": job_id, "status": "COMPLETE", "result": result.state}, cls=DecimalEncoder))
@@ -1,9 +1,12 @@
 import json
 import os
+import base64
 import boto3
+from boto3.dynamodb.conditions import Key
 from decimal import Decimal
 from urllib.parse import unquote
 from botocore.exceptions import ClientError
+from fintech_common.savings import GOAL_HISTORY_INDEX_NAME
 import logging
 
 # Set up logger
@@ -14,6 +17,11 @@ logger.setLevel(logging.INFO)
 LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME')
 ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# A goal-history-index LastEvaluatedKey: the table key plus the index keys, all strings
+CURSOR_KEYS = {'transaction_id', 'goal_history_id', 'goal_history_key'}
+
 # --- CORS Headers ---
 OPTIONS_CORS_HEADERS = {
     "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
@@ -33,10 +41,30 @@ class DecimalEncoder(json.JSONEncoder):
             return str(o)
         return super(DecimalEncoder, self).default(o)
 
+def encode_cursor(last_key):
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, cls=DecimalEncoder).encode()).decode()
+
+def decode_cursor(cursor, goal_id):
+    """The ExclusiveStartKey for a next_cursor this endpoint returned for `goal_id`; ValueError otherwise."""
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("cursor is not valid.")
+    if (not isinstance(last_key, dict) or set(last_key) != CURSOR_KEYS
+            or not all(isinstance(value, str) for value in last_key.values())
+            or last_key['goal_history_id'] != goal_id):
+        raise ValueError("cursor is not valid.")
+    return last_key
+
 def get_goal_transactions(event, context):
     """
-    API: GET /savings-goal/{goal_id}/transactions
-    Retrieves all transactions for a specific savings goal using the GSI.
+    API: GET /savings-goal/{goal_id}/transactions?limit=20&cursor=<next_cursor>
+    Retrieves a goal's contributions, redemptions and refunds, newest first,
+    one page at a time from the sparse goal-history-index (only goal ledger
+    entries are in it, so nothing is read and then filtered out).
+    Returns {"transactions": [...], "next_cursor": ...}.
     """
     
     # --- Initialize boto3 inside the handler ---
@@ -63,33 +91,37 @@ def get_goal_transactions(event, context):
         log_context = {"action": "get_goal_transactions"}
         try:
             goal_id = unquote(event['pathParameters']['goal_id']).strip()
+            params = event.get('queryStringParameters') or {}
             log_context["goal_id"] = goal_id
-            
-            logger.info(json.dumps({**log_context, "status": "info", "message": "Querying GSI for goal transactions."}))
 
-            # Query the Global Secondary Index on the logs table
-            response = log_table.query(
-                IndexName='related_id-timestamp-index',
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('related_id').eq(goal_id),
-                # Only get savings-related transactions for this goal
-                FilterExpression='#type IN (:add, :redeem, :refund)',
-                ExpressionAttributeNames={'#type': 'type'},
-                ExpressionAttributeValues={
-                    ':add': 'SAVINGS_ADD',
-                    ':redeem': 'SAVINGS_REDEEM',
-                    ':refund': 'SAVINGS_REFUND'
-                },
-                ScanIndexForward=False  # Sort by timestamp descending
-            )
-            
-            items = response.get('Items', [])
+            limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+            query_kwargs = {
+                'IndexName': GOAL_HISTORY_INDEX_NAME,
+                'KeyConditionExpression': Key('goal_history_id').eq(goal_id),
+                'ScanIndexForward': False,  # Newest first
+                'Limit': limit
+            }
+            if params.get('cursor'):
+                query_kwargs['ExclusiveStartKey'] = decode_cursor(params['cursor'], goal_id)
+
+            logger.info(json.dumps({**log_context, "status": "info", "limit": limit, "message": "Querying goal history."}))
+            response = log_table.query(**query_kwargs)
 
             return {
                 "statusCode": 200,
                 "headers": GET_CORS_HEADERS,
-                "body": json.dumps(items, cls=DecimalEncoder)
+                "body": json.dumps({
+                    "transactions": response.get('Items', []),
+                    "next_cursor": encode_cursor(response.get('LastEvaluatedKey'))
+                }, cls=DecimalEncoder)
             }
-            
+
+        except ValueError as ve:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+            return { "statusCode": 400, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+
         except ClientError as ce:
              logger.error(json.dumps({**log_context, "status": "error", "error_code": ce.response['Error']['Code'], "error_message": str(ce)}))
              return { "statusCode": 500, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": "Database error.", "error": str(ce)}) }
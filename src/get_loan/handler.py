@@ -4,6 +4,7 @@ import boto3
 from decimal import Decimal
 from urllib.parse import unquote
 from botocore.exceptions import ClientError
+from fintech_common.loan_cache import LoanCache
 import logging # <-- 1. Import logging
 
 # --- 2. Set up logger ---
@@ -13,6 +14,7 @@ logger.setLevel(logging.INFO)
 
 # --- Environment Variables ---
 TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
+LOAN_CACHE_TTL_SECONDS = int(os.environ.get('LOAN_CACHE_TTL_SECONDS', '5'))
 ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
 
 # --- (CORS Headers - no changes) ---
@@ -28,6 +30,9 @@ GET_CORS_HEADERS = {
 }
 # ---
 
+# Lives across warm invocations, so polling the same loan costs one read per TTL
+_loans = LoanCache(ttl_seconds=LOAN_CACHE_TTL_SECONDS)
+
 # --- (DecimalEncoder - no changes) ---
 class DecimalEncoder(json.JSONEncoder):
     def default(self, o):
@@ -40,6 +45,8 @@ def get_loan(event, context):
     """
     API: GET /loan/{loan_id}
     Retrieves a specific loan by its loan_id.
+    Served from a short-lived per-container cache; at most
+    LOAN_CACHE_TTL_SECONDS behind the table.
     """
     
     # --- 3. Initialize boto3 inside the handler ---
@@ -71,8 +78,7 @@ def get_loan(event, context):
             
             logger.info(json.dumps({**log_context, "status": "info", "message": "Fetching loan."}))
 
-            response = table.get_item(Key={'loan_id': loan_id})
-            item = response.get('Item')
+            item = _loans.get(table, loan_id)
 
             if not item:
                 logger.warning(json.dumps({**log_context, "status": "warn", "message": "Loan not found."}))
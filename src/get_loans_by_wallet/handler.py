@@ -1,9 +1,12 @@
 import json
 import os
+import base64
 import boto3
-from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
+from decimal import Decimal, InvalidOperation
 from urllib.parse import unquote
 from botocore.exceptions import ClientError
+from fintech_common.loan_index import ACTIVE_INDEX_NAME, HISTORY_INDEX_NAME, OPEN_STATUSES
 import logging # <-- 1. Import logging
 
 # --- 2. Set up logger ---
@@ -15,6 +18,9 @@ logger.setLevel(logging.INFO)
 TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
 ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
 
+DEFAULT_HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
 # --- (CORS Headers - no changes) ---
 OPTIONS_CORS_HEADERS = {
     "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
@@ -36,10 +42,37 @@ class DecimalEncoder(json.JSONEncoder):
         return super(DecimalEncoder, self).default(o)
 # ---
 
+def encode_cursor(last_key):
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, cls=DecimalEncoder).encode()).decode()
+
+def decode_cursor(cursor, wallet_id):
+    """The ExclusiveStartKey for a next_cursor the history view returned for `wallet_id`; ValueError otherwise."""
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("cursor is not valid.")
+    # A wallet-history-index LastEvaluatedKey: loan_id and closed_wallet_id, and closed_at, the numeric range key
+    if (not isinstance(last_key, dict) or set(last_key) != {'loan_id', 'closed_wallet_id', 'closed_at'}
+            or not isinstance(last_key['loan_id'], str) or last_key['closed_wallet_id'] != wallet_id):
+        raise ValueError("cursor is not valid.")
+    try:
+        last_key['closed_at'] = Decimal(str(last_key['closed_at']))
+    except InvalidOperation:
+        raise ValueError("cursor is not valid.")
+    if not last_key['closed_at'].is_finite():
+        raise ValueError("cursor is not valid.")
+    return last_key
+
 def get_loans_by_wallet(event, context):
     """
     API: GET /loan/by-wallet/{wallet_id}
-    Retrieves all loans associated with a specific wallet_id using the GSI.
+    Default (view=active): the wallet's open loans (PENDING, APPROVED) from
+    the sparse active-wallet-index, as a list.
+    view=history: closed loans (PAID, REJECTED), newest first, one page at
+    a time: ?view=history&limit=20&cursor=<next_cursor>
+    returns {"loans": [...], "next_cursor": ...}.
     """
     
     # --- 3. Initialize boto3 inside the handler ---
@@ -67,24 +100,63 @@ def get_loans_by_wallet(event, context):
         log_context = {"action": "get_loans_by_wallet"}
         try:
             wallet_id = unquote(event['pathParameters']['wallet_id']).strip()
-            log_context["wallet_id"] = wallet_id
-            
-            logger.info(json.dumps({**log_context, "status": "info", "message": "Querying GSI for loans."}))
-
-            # Query the Global Secondary Index
-            response = table.query(
-                IndexName='wallet_id-index',
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('wallet_id').eq(wallet_id)
-            )
-            
-            items = response.get('Items', [])
+            params = event.get('queryStringParameters') or {}
+            view = params.get('view', 'active')
+            log_context.update({"wallet_id": wallet_id, "view": view})
+
+            if view == 'active':
+                logger.info(json.dumps({**log_context, "status": "info", "message": "Querying active loans."}))
+                items = []
+                query_kwargs = {
+                    'IndexName': ACTIVE_INDEX_NAME,
+                    'KeyConditionExpression': Key('active_wallet_id').eq(wallet_id),
+                    # A loan closed moments ago may not have left the index yet
+                    'FilterExpression': Attr('status').is_in(list(OPEN_STATUSES))
+                }
+                while True:
+                    response = table.query(**query_kwargs)
+                    items.extend(response.get('Items', []))
+                    if 'LastEvaluatedKey' not in response:
+                        break
+                    query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+                return {
+                    "statusCode": 200,
+                    "headers": GET_CORS_HEADERS,
+                    "body": json.dumps(items, cls=DecimalEncoder)
+                }
+
+            if view != 'history':
+                raise ValueError("view must be 'active' or 'history'.")
+
+            limit = int(params.get('limit', DEFAULT_HISTORY_PAGE_SIZE))
+            if limit < 1 or limit > MAX_HISTORY_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_HISTORY_PAGE_SIZE}.")
+            query_kwargs = {
+                'IndexName': HISTORY_INDEX_NAME,
+                'KeyConditionExpression': Key('closed_wallet_id').eq(wallet_id),
+                'ScanIndexForward': False, # Most recently closed first
+                'Limit': limit
+            }
+            if params.get('cursor'):
+                query_kwargs['ExclusiveStartKey'] = decode_cursor(params['cursor'], wallet_id)
+
+            logger.info(json.dumps({**log_context, "status": "info", "limit": limit, "message": "Querying loan history."}))
+            response = table.query(**query_kwargs)
 
             return {
                 "statusCode": 200,
                 "headers": GET_CORS_HEADERS,
-                "body": json.dumps(items, cls=DecimalEncoder)
+                "body": json.dumps({
+                    "loans": response.get('Items', []),
+                    "next_cursor": encode_cursor(response.get('LastEvaluatedKey'))
+                }, cls=DecimalEncoder)
             }
-            
+
+        except ValueError as ve:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+            return { "statusCode": 400, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+
         except ClientError as ce:
              logger.error(json.dumps({**log_context, "status": "error", "error_code": ce.response['Error']['Code'], "error_message": str(ce)}))
              return { "statusCode": 500, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": "Database error.", "error": str(ce)}) }
@@ -0,0 +1,130 @@
+import json
+import os
+import base64
+import boto3
+from boto3.dynamodb.conditions import Key
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from fintech_common.review_queue import REVIEW_QUEUE_INDEX_NAME, REVIEW_QUEUE
+import logging
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME')
+ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# --- CORS Headers ---
+OPTIONS_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Allow-Credentials": True
+}
+GET_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Credentials": True
+}
+# ---
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+def encode_cursor(last_key):
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, cls=DecimalEncoder).encode()).decode()
+
+def decode_cursor(cursor):
+    # Every key attribute of the index is a string, so nothing to convert back
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("cursor is not valid.")
+    if not isinstance(last_key, dict):
+        raise ValueError("cursor is not valid.")
+    return last_key
+
+def get_review_queue(event, context):
+    """
+    API: GET /onboarding/review-queue
+    Lists the applicants waiting for manual review, oldest submission
+    first, from the sparse review-queue-index (never a table scan):
+    ?limit=20&cursor=<next_cursor> returns {"users": [...], "next_cursor": ...}.
+    Decide them with POST /onboarding/manual-review or .../manual-review/bulk.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb = boto3.resource('dynamodb')
+    users_table = dynamodb.Table(USERS_TABLE_NAME) if USERS_TABLE_NAME else None
+    # ---
+
+    # --- CORS Preflight Check ---
+    http_method = event.get('httpMethod', '').upper()
+    if http_method == 'OPTIONS':
+        logger.info("Handling OPTIONS preflight request for get_review_queue")
+        return { "statusCode": 200, "headers": OPTIONS_CORS_HEADERS, "body": "" }
+
+    if not users_table:
+        log_message = {
+            "status": "error",
+            "action": "get_review_queue",
+            "message": "FATAL: USERS_TABLE_NAME environment variable not set."
+        }
+        logger.error(json.dumps(log_message))
+        return { "statusCode": 500, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": "Server configuration error."}) }
+
+    if http_method == 'GET':
+        log_context = {"action": "get_review_queue"}
+        try:
+            params = event.get('queryStringParameters') or {}
+            limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+            query_kwargs = {
+                'IndexName': REVIEW_QUEUE_INDEX_NAME,
+                'KeyConditionExpression': Key('review_queue').eq(REVIEW_QUEUE),
+                'ScanIndexForward': True, # Oldest submission first
+                'Limit': limit
+            }
+            if params.get('cursor'):
+                query_kwargs['ExclusiveStartKey'] = decode_cursor(params['cursor'])
+
+            logger.info(json.dumps({**log_context, "status": "info", "limit": limit, "message": "Querying the review queue."}))
+            response = users_table.query(**query_kwargs)
+            users = [
+                {k: v for k, v in item.items() if k != 'review_queue'}
+                for item in response.get('Items', [])
+            ]
+
+            return {
+                "statusCode": 200,
+                "headers": GET_CORS_HEADERS,
+                "body": json.dumps({
+                    "users": users,
+                    "next_cursor": encode_cursor(response.get('LastEvaluatedKey'))
+                }, cls=DecimalEncoder)
+            }
+
+        except ValueError as ve:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+            return { "statusCode": 400, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+        except ClientError as ce:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": ce.response['Error']['Code'], "error_message": str(ce)}))
+            return { "statusCode": 500, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": "Database error.", "error": str(ce)}) }
+        except Exception as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": "Failed to retrieve the review queue.", "error": str(e)}) }
+    else:
+         return { "statusCode": 405, "headers": GET_CORS_HEADERS, "body": json.dumps({"message": f"Method {http_method} not allowed."}) }
@@ -1,11 +1,14 @@
 import json
 import os
+import time
 import boto3
 from decimal import Decimal
 from urllib.parse import unquote
 from botocore.exceptions import ClientError
 import logging
 
+from fintech_common.goal_progress import project_goals
+
 # Set up logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -36,7 +39,9 @@ class DecimalEncoder(json.JSONEncoder):
 def get_savings_goals(event, context):
     """
     API: GET /savings-goal/by-wallet/{wallet_id}
-    Retrieves all savings goals for a wallet using the GSI.
+    Retrieves all savings goals for a wallet using the GSI, each with a
+    "progress" object (percent complete, average daily contribution and
+    projected completion date) computed from the goal items alone.
     """
     
     # --- Initialize boto3 inside the handler ---
@@ -74,6 +79,8 @@ def get_savings_goals(event, context):
             )
             
             items = response.get('Items', [])
+            for item, progress in zip(items, project_goals(items, int(time.time()))):
+                item['progress'] = progress
 
             return {
                 "statusCode": 200,
@@ -0,0 +1,331 @@
+import csv
+import json
+import os
+import time
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.onboarding import EMAIL_INDEX_NAME, email_spellings, execution_name, new_user_item
+from fintech_common.parallel_scan import CapacityLimiter
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME')
+STEP_FUNCTION_ARN = os.environ.get('STEP_FUNCTION_ARN')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+IMPORT_BUCKET_NAME = os.environ.get('IMPORT_BUCKET_NAME')
+# Executions started at once, and the most started per second (StartExecution is throttled per account)
+START_CONCURRENCY = int(os.environ.get('START_CONCURRENCY', '10'))
+MAX_STARTS_PER_SECOND = int(os.environ.get('MAX_STARTS_PER_SECOND', '25'))
+# Lines processed between progress checkpoints
+CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '100'))
+
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+JOB_TTL_SECONDS = 30 * 24 * 3600
+BATCH_GET_SIZE = 100
+MAX_START_ATTEMPTS = 5
+MAX_REPORTED_ERRORS = 50
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+class OnboardingImport:
+    """
+    Imports one chunk of lines at a time. Users who already exist (by id,
+    or by email for users from before derived ids) are left alone, new
+    users are written with conditional puts (so a user who signs up
+    meanwhile is never overwritten), and their executions are started
+    under the concurrency and rate limits. The first chunk after a
+    resume may have been cut short, so this job's own users in it are
+    started again: execution names are deterministic, which makes that a
+    no-op for executions that did start.
+    """
+
+    def __init__(self, dynamodb_client, sfn_client, executor, start_limiter, job_id):
+        self.client = dynamodb_client
+        self.sfn = sfn_client
+        self.executor = executor
+        self.start_limiter = start_limiter
+        self.job_id = job_id
+
+    def _existing(self, user_ids):
+        """user_id -> import_job_id (None if not imported) for the ids already in the table."""
+        found = {}
+        for start in range(0, len(user_ids), BATCH_GET_SIZE):
+            request = {USERS_TABLE_NAME: {
+                'Keys': [{'user_id': {'S': user_id}} for user_id in user_ids[start:start + BATCH_GET_SIZE]],
+                'ProjectionExpression': 'user_id, import_job_id'
+            }}
+            while request:
+                response = self.client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(USERS_TABLE_NAME, []):
+                    found[item['user_id']['S']] = item.get('import_job_id', {}).get('S')
+                request = response.get('UnprocessedKeys') or None
+        return found
+
+    def _registered(self, email):
+        """Whether a user is on record for `email` under any id (users from before derived ids have random ones)."""
+        for spelling in email_spellings(email):
+            response = self.client.query(
+                TableName=USERS_TABLE_NAME,
+                IndexName=EMAIL_INDEX_NAME,
+                KeyConditionExpression='email = :email',
+                ExpressionAttributeValues={':email': {'S': spelling}},
+                Select='COUNT',
+                Limit=1
+            )
+            if response['Count']:
+                return True
+        return False
+
+    def _put(self, user):
+        """Writes a new user unless one has appeared since the batch get (e.g. they signed up); returns whether it was written."""
+        try:
+            self.client.put_item(
+                TableName=USERS_TABLE_NAME,
+                Item={k: ({'N': str(v)} if isinstance(v, int) else {'S': v}) for k, v in user.items()},
+                ConditionExpression='attribute_not_exists(user_id)'
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return False
+
+    def _write(self, users):
+        """Writes the users concurrently; returns the ones that were written."""
+        return [user for user, written in zip(users, self.executor.map(self._put, users)) if written]
+
+    def _start(self, user):
+        for attempt in range(1, MAX_START_ATTEMPTS + 1):
+            self.start_limiter.consume(1)
+            try:
+                self.sfn.start_execution(
+                    stateMachineArn=STEP_FUNCTION_ARN,
+                    name=execution_name(user['user_id']),
+                    input=json.dumps({'user_id': user['user_id'], 'email': user['email']})
+                )
+                return 'started', None
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'ExecutionAlreadyExists':
+                    return 'existing', None
+                if code not in ('ThrottlingException', 'TooManyRequestsException') or attempt == MAX_START_ATTEMPTS:
+                    error = f"{code}: {e.response['Error'].get('Message', '')}"
+                    # Remove the record so a later import can pick this user up again
+                    try:
+                        self.client.delete_item(
+                            TableName=USERS_TABLE_NAME,
+                            Key={'user_id': {'S': user['user_id']}},
+                            ConditionExpression='import_job_id = :job_id',
+                            ExpressionAttributeValues={':job_id': {'S': self.job_id}}
+                        )
+                    except ClientError as de:
+                        if de.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                            raise
+                        # No longer this job's record (e.g. the user has since signed up): leave it be
+                        error += " (user record no longer belongs to this import; not removed)"
+                    return 'failed', error
+                time.sleep(0.1 * 2 ** attempt)
+
+    def process(self, rows, email_column, resumed=False):
+        """Imports (line_number, fields) rows; returns (totals, errors)."""
+        totals = {'rows_read': len(rows)}
+        errors = []
+        users = {}
+        emails = {}  # user_id -> the email as written in the file
+        for line_number, fields in rows:
+            try:
+                email = fields[email_column] if email_column < len(fields) else None
+                user = new_user_item(email, STEP_FUNCTION_ARN, import_job_id=self.job_id)
+            except ValueError as ve:
+                totals['rows_invalid'] = totals.get('rows_invalid', 0) + 1
+                errors.append({'line': line_number, 'error': str(ve)})
+                continue
+            users.setdefault(user['user_id'], user)  # A repeated email is imported once
+            emails.setdefault(user['user_id'], email)
+
+        existing = self._existing(list(users))
+        candidates = [user for user_id, user in users.items() if user_id not in existing]
+        registered = self.executor.map(lambda user: self._registered(emails[user['user_id']]), candidates)
+        new_users = self._write([user for user, found in zip(candidates, registered) if not found])
+        totals['users_written'] = len(new_users)
+        resuming = [user for user_id, user in users.items() if resumed and existing.get(user_id) == self.job_id]
+        totals['users_existing'] = len(users) - len(new_users) - len(resuming)
+
+        to_start = new_users + resuming
+        for index, (user, (outcome, error)) in enumerate(zip(to_start, self.executor.map(self._start, to_start))):
+            if index >= len(new_users) and outcome != 'failed':
+                outcome = 'resumed'
+            totals[f'executions_{outcome}'] = totals.get(f'executions_{outcome}', 0) + 1
+            if error:
+                errors.append({'email': user['email'], 'error': error})
+        return totals, errors
+
+
+def read_lines(s3_client, bucket, key, offset):
+    """Yields (end_offset, line) from byte `offset` on, streaming the object."""
+    params = {'Bucket': bucket, 'Key': key}
+    if offset:
+        params['Range'] = f"bytes={offset}-"
+    try:
+        body = s3_client.get_object(**params)['Body']
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'InvalidRange':
+            return  # Stopped exactly at the end of the file
+        raise
+    encoding = 'utf-8-sig' if not offset else 'utf-8'  # Spreadsheet exports often start with a BOM
+    for line in body.iter_lines(keepends=True):
+        offset += len(line)
+        yield offset, line.decode(encoding).rstrip('\r\n')
+        encoding = 'utf-8'
+
+
+def import_onboarding_users(event, context):
+    """
+    Batch job (invoke with {"key": "imports/<file>.csv"}, optional "bucket"
+    and "job_id").
+    Onboards a partner's user list: a CSV file with a header row and an
+    `email` column, one user per line. The file is streamed, never loaded
+    whole; new users are written with conditional puts and their onboarding
+    executions started at most START_CONCURRENCY at a time and
+    MAX_STARTS_PER_SECOND overall. Progress (the byte offset reached plus
+    running totals) is checkpointed on the job item after every chunk, so
+    the job re-invokes itself near the Lambda timeout and resumes where it
+    stopped. The job item ends with the summary report.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    sfn_client = boto3.client('stepfunctions')
+    s3_client = boto3.client('s3')
+    dynamodb = boto3.resource('dynamodb')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    log_context = {"action": "import_onboarding_users"}
+
+    if not USERS_TABLE_NAME or not STEP_FUNCTION_ARN or not jobs_table:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    bucket = event.get('bucket') or IMPORT_BUCKET_NAME
+    key = event.get('key')
+    if not bucket or not key:
+        raise ValueError("bucket and key of the user file are required.")
+    job_id = event.get('job_id') or f"onboarding-import#{bucket}/{key}"
+    log_context.update({"job_id": job_id, "key": key})
+
+    job = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if job and job.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Import already complete for this job."}))
+        return json.loads(json.dumps(job, cls=DecimalEncoder))
+    if not job:
+        job = {
+            'job_id': job_id,
+            'job_type': 'ONBOARDING_IMPORT',
+            'status': 'RUNNING',
+            'source': f"s3://{bucket}/{key}",
+            'next_offset': 0,
+            'errors': [],
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + JOB_TTL_SECONDS
+        }
+        jobs_table.put_item(Item=job)
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    reported_errors = len(job.get('errors', []))
+    email_column = int(job['email_column']) if 'email_column' in job else None
+    line_number = int(job.get('lines_read', 0))
+
+    def checkpoint(offset, totals, errors):
+        """Records the offset reached and adds a chunk's totals (and first errors) to the report."""
+        nonlocal reported_errors
+        errors = errors[:max(MAX_REPORTED_ERRORS - reported_errors, 0)]
+        reported_errors += len(errors)
+        names = {'#errors': 'errors'}
+        values = {':offset': offset, ':lines': line_number, ':errors': errors, ':email_column': email_column}
+        add = []
+        for i, (name, count) in enumerate(totals.items()):
+            names[f'#t{i}'] = name
+            values[f':t{i}'] = count
+            add.append(f"#t{i} :t{i}")
+        update = "SET next_offset = :offset, lines_read = :lines, email_column = :email_column, #errors = list_append(#errors, :errors)"
+        if add:
+            update += " ADD " + ", ".join(add)
+        jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression=update,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+
+    complete = True
+    with ThreadPoolExecutor(max_workers=START_CONCURRENCY) as executor:
+        run = OnboardingImport(dynamodb_client, sfn_client, executor, CapacityLimiter(MAX_STARTS_PER_SECOND), job_id)
+        logger.info(json.dumps({**log_context, "status": "info", "offset": str(job['next_offset']), "message": "Starting onboarding import."}))
+        chunk = []
+        offset = int(job['next_offset'])
+        resumed = email_column is not None  # A previous invocation got past the header
+        for end_offset, line in read_lines(s3_client, bucket, key, offset):
+            line_number += 1
+            if email_column is None:
+                header = [name.strip().lower() for name in next(csv.reader([line]))]
+                if 'email' not in header:
+                    raise ValueError("The user file's header row has no 'email' column.")
+                email_column = header.index('email')
+                offset = end_offset
+                checkpoint(offset, {}, [])
+                continue
+            if line.strip():
+                chunk.append((line_number, next(csv.reader([line]))))
+            offset = end_offset
+            if len(chunk) >= CHUNK_SIZE:
+                totals, errors = run.process(chunk, email_column, resumed)
+                checkpoint(offset, totals, errors)
+                chunk = []
+                resumed = False
+                if out_of_time():
+                    complete = False
+                    break
+        if chunk:
+            totals, errors = run.process(chunk, email_column, resumed)
+            checkpoint(offset, totals, errors)
+
+    if not complete:
+        logger.info(json.dumps({**log_context, "status": "info", "offset": offset, "message": "Out of time; checkpointed. Re-invoking to resume."}))
+        try:
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({"bucket": bucket, "key": key, "job_id": job_id})
+            )
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke import job."}))
+        return {"job_id": job_id, "status": "RUNNING"}
+
+    report = jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression="SET #status = :complete, completed_at = :now",
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':complete': 'COMPLETE', ':now': int(time.time())},
+        ReturnValues='ALL_NEW'
+    )['Attributes']
+    logger.info(json.dumps({**log_context, "status": "info", "report": report, "message": "Onboarding import complete."}, cls=DecimalEncoder))
+
+    return json.loads(json.dumps(report, cls=DecimalEncoder))
@@ -0,0 +1,282 @@
+"""
+Local onboarding benchmark.
+
+    cd src && python -m local_workflow.onboarding_bench --applicants 2000 \\
+        --verify-latency lognormal:400,0.6 --credit-latency uniform:200,900 --throttle-rate 0.02
+
+Runs onboarding end to end in-process: start_onboarding, the state machine
+read from terraform/modules/onboarding_orchestrator (so it is the deployed
+definition, not a copy), the mock providers, manual review of flagged
+applicants through manual_review_handler (resuming the waitForTaskToken
+step) and provision_account. DynamoDB is moto; Step Functions is the
+local interpreter; provider latency, Wait states, retry backoff and
+review delays advance a virtual clock instead of sleeping, so thousands
+of applicants take seconds while their simulated timings stay realistic.
+
+Reports per-state wall time (our code) and simulated time (what an
+applicant would wait), retries, outcomes and end-to-end percentiles.
+Handlers read their environment at import, so run this in its own process.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+import boto3
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'shared', 'python'))
+
+from fintech_common import provider_sim  # noqa: E402
+from local_workflow.stand_ins import LocalStepFunctions, boto3_sdk, local_step_functions  # noqa: E402
+from local_workflow.states import StateMachine, StateTimings, Clock  # noqa: E402
+from local_workflow.terraform import TerraformModule, lambda_arn  # noqa: E402
+
+MODULE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'terraform', 'modules', 'onboarding_orchestrator')
+REGION = 'us-east-1'
+ACCOUNT_ID = '123456789012'
+
+DEFAULT_TABLES = {
+    'USERS_TABLE_NAME': 'local-users',
+    'WALLETS_TABLE_NAME': 'local-wallets',
+    'TRANSACTIONS_LOG_TABLE_NAME': 'local-transaction-logs'
+}
+TABLE_KEYS = {
+    'USERS_TABLE_NAME': 'user_id',
+    'WALLETS_TABLE_NAME': 'wallet_id',
+    'TRANSACTIONS_LOG_TABLE_NAME': 'transaction_id'
+}
+# start_onboarding looks applicants up by email (as in terraform's users table)
+USERS_EMAIL_INDEX = {
+    'AttributeDefinitions': [{'AttributeName': 'user_id', 'AttributeType': 'S'}, {'AttributeName': 'email', 'AttributeType': 'S'}],
+    'GlobalSecondaryIndexes': [{
+        'IndexName': 'email-index',
+        'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+        'Projection': {'ProjectionType': 'ALL'}
+    }]
+}
+
+# The mocks decide from these email markers (see verify_id_mock / credit_check_mock)
+MARKERS = (('flag_rate', 'flag'), ('reject_rate', 'reject'), ('lowscore_rate', 'lowscore'))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def _summary(values):
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        'max_ms': round(max(values) * 1000, 2)
+    }
+
+
+def _resources(definition):
+    """Every Task Resource in a definition, including inside Parallel branches."""
+    for state in definition['States'].values():
+        if 'Resource' in state:
+            yield state['Resource']
+        for branch in state.get('Branches', []):
+            yield from _resources(branch)
+
+
+class OnboardingBench:
+    """One benchmark run; see the module docstring."""
+
+    def __init__(self, applicants, flag_rate=0.1, reject_rate=0.02, lowscore_rate=0.03,
+                 review_approve_rate=0.8, review_delay_seconds=300.0, verify_simulation=None,
+                 credit_simulation=None, seed=None, tables=None,
+                 state_machine_arn=f"arn:aws:states:{REGION}:{ACCOUNT_ID}:stateMachine:local-onboarding"):
+        self.applicants = applicants
+        self.rates = {'flag_rate': flag_rate, 'reject_rate': reject_rate, 'lowscore_rate': lowscore_rate}
+        self.review_approve_rate = review_approve_rate
+        self.review_delay_seconds = review_delay_seconds
+        self.simulations = {'verify_id': verify_simulation or {}, 'credit_check': credit_simulation or {}}
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.tables = {**DEFAULT_TABLES, **(tables or {})}
+        self.state_machine_arn = state_machine_arn
+
+    def _email(self, index):
+        draw = self.rng.random()
+        for rate_name, marker in MARKERS:
+            if draw < self.rates[rate_name]:
+                return f"applicant{index}-{marker}@example.com"
+            draw -= self.rates[rate_name]
+        return f"applicant{index}@example.com"
+
+    def _handlers(self, module):
+        handlers = {}
+        for resource, (directory, module_name, function) in module.lambda_handlers().items():
+            handlers[resource] = (f"{directory}.{module_name}", function)
+        return handlers
+
+    def _load(self, handlers, resource):
+        module_path, function = handlers[resource]
+        return getattr(importlib.import_module(module_path), function)
+
+    def run(self):
+        os.environ.update(self.tables)
+        os.environ['STEP_FUNCTION_ARN'] = self.state_machine_arn
+        os.environ.setdefault('AWS_DEFAULT_REGION', REGION)
+        for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+            os.environ.setdefault(name, 'testing')
+
+        users_table_arn = f"arn:aws:dynamodb:{REGION}:{ACCOUNT_ID}:table/{self.tables['USERS_TABLE_NAME']}"
+        module = TerraformModule(MODULE_DIR, {'users_table_arn': users_table_arn})
+        definition = module.state_machine_definition('onboarding_sfn')
+        handlers = self._handlers(module)
+        tasks = {
+            resource: self._load(handlers, resource[len(lambda_arn('')):])
+            for resource in set(_resources(definition)) if resource.startswith(lambda_arn(''))
+        }
+        start_onboarding = self._load(handlers, 'start_onboarding_lambda')
+        manual_review = self._load(handlers, 'manual_review_handler_lambda')
+
+        clock, timings = Clock(), StateTimings()
+        for provider, overrides in self.simulations.items():
+            seed = None if self.seed is None else f"{self.seed}-{provider}"
+            provider_sim.install(provider, provider_sim.ProviderSimulation.from_env(
+                {'seed': seed, **overrides}, sleep=clock.sleep))
+        machine = StateMachine(definition, tasks, boto3_sdk, clock=clock, rng=self.rng, timings=timings)
+        sfn = LocalStepFunctions(machine, self.state_machine_arn)
+        try:
+            return self._run(start_onboarding, manual_review, sfn, clock, timings)
+        finally:
+            for provider in self.simulations:
+                provider_sim.install(provider, None)
+
+    def _run(self, start_onboarding, manual_review, sfn, clock, timings):
+        def timed(name, handler, body):
+            started = time.perf_counter()
+            response = handler({'httpMethod': 'POST', 'body': json.dumps(body)}, None)
+            elapsed = time.perf_counter() - started
+            timings.record(name, elapsed, elapsed)
+            return response
+
+        with mock_aws(), local_step_functions(sfn):
+            dynamodb = boto3.resource('dynamodb', region_name=REGION)
+            for env_name, key in TABLE_KEYS.items():
+                dynamodb.create_table(**{
+                    'TableName': self.tables[env_name],
+                    'KeySchema': [{'AttributeName': key, 'KeyType': 'HASH'}],
+                    'AttributeDefinitions': [{'AttributeName': key, 'AttributeType': 'S'}],
+                    'BillingMode': 'PAY_PER_REQUEST',
+                    **(USERS_EMAIL_INDEX if env_name == 'USERS_TABLE_NAME' else {})
+                })
+
+            started = time.perf_counter()
+            reviews = {'APPROVED': 0, 'REJECTED': 0}
+            reviewed = set()
+            for index in range(self.applicants):
+                response = timed('start_onboarding (API)', start_onboarding, {'email': self._email(index)})
+                if response['statusCode'] not in (200, 202):
+                    raise RuntimeError(f"start_onboarding failed: {response['body']}")
+                waiting = sfn.run_pending()
+                while waiting:
+                    for execution in waiting:
+                        clock.sleep(self.review_delay_seconds)
+                        decision = 'APPROVED' if self.rng.random() < self.review_approve_rate else 'REJECTED'
+                        user_id = json.loads(execution.input)['user_id']
+                        review = timed('manual_review (API)', manual_review, {'user_id': user_id, 'decision': decision})
+                        if review['statusCode'] != 200:
+                            raise RuntimeError(f"manual_review failed: {review['body']}")
+                        reviews[decision] += 1
+                        reviewed.add(execution.arn)
+                    waiting = sfn.run_pending()
+            wall_seconds = time.perf_counter() - started
+
+        return self._report(sfn, timings, reviews, reviewed, wall_seconds)
+
+    def _report(self, sfn, timings, reviews, reviewed, wall_seconds):
+        outcomes = {}
+        for execution in sfn.executions.values():
+            key = execution.status if execution.status != 'FAILED' else f"FAILED ({execution.error})"
+            outcomes[key] = outcomes.get(key, 0) + 1
+        succeeded = [e for e in sfn.executions.values() if e.status == 'SUCCEEDED']
+        automatic = [e.simulated for e in succeeded if e.arn not in reviewed]
+        with_review = [e.simulated for e in succeeded if e.arn in reviewed]
+        return {
+            'applicants': self.applicants,
+            'wall_seconds': round(wall_seconds, 2),
+            'applicants_per_second': round(self.applicants / wall_seconds, 1) if wall_seconds else None,
+            'outcomes': outcomes,
+            'manual_reviews': reviews,
+            # Simulated onboarding time of approved applicants, with and without a manual review
+            'end_to_end_simulated': _summary(automatic) if automatic else None,
+            'end_to_end_simulated_with_review': _summary(with_review) if with_review else None,
+            'states': {
+                name: {
+                    'wall': _summary(timings.wall[name]),
+                    'simulated': _summary(timings.simulated[name]),
+                    'retries': timings.retries.get(name, 0)
+                }
+                for name in timings.wall
+            }
+        }
+
+
+def _print_report(report):
+    print(f"{report['applicants']} applicants in {report['wall_seconds']}s wall "
+          f"({report['applicants_per_second']}/s); manual reviews: {report['manual_reviews']}")
+    print("Outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(report['outcomes'].items())))
+    for label in ('end_to_end_simulated', 'end_to_end_simulated_with_review'):
+        if report[label]:
+            s = report[label]
+            print(f"{label}: p50={s['p50_ms']:.0f}ms p95={s['p95_ms']:.0f}ms p99={s['p99_ms']:.0f}ms max={s['max_ms']:.0f}ms")
+    print(f"\n{'state':<28}{'count':>7}{'wall p50':>10}{'wall p95':>10}{'sim p50':>11}{'sim p95':>11}{'sim p99':>11}{'retries':>9}")
+    print(f"{'':<28}{'':>7}{'(ms)':>10}{'(ms)':>10}{'(ms)':>11}{'(ms)':>11}{'(ms)':>11}")
+    for name, stats in report['states'].items():
+        wall, sim = stats['wall'], stats['simulated']
+        print(f"{name:<28}{wall['count']:>7}{wall['p50_ms']:>10.2f}{wall['p95_ms']:>10.2f}"
+              f"{sim['p50_ms']:>11.0f}{sim['p95_ms']:>11.0f}{sim['p99_ms']:>11.0f}{stats['retries']:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the onboarding workflow locally and report per-state timings.")
+    parser.add_argument('--applicants', type=int, default=1000)
+    parser.add_argument('--flag-rate', type=float, default=0.1, help="Share of applicants flagged for manual review")
+    parser.add_argument('--reject-rate', type=float, default=0.02, help="Share rejected by the ID check")
+    parser.add_argument('--lowscore-rate', type=float, default=0.03, help="Share rejected by the credit check")
+    parser.add_argument('--review-approve-rate', type=float, default=0.8)
+    parser.add_argument('--review-delay-seconds', type=float, default=300.0, help="Simulated reviewer response time")
+    parser.add_argument('--verify-latency', help="verify_id_mock latency spec, e.g. lognormal:400,0.6")
+    parser.add_argument('--credit-latency', help="credit_check_mock latency spec, e.g. uniform:200,900")
+    parser.add_argument('--error-rate', type=float, help="Provider error rate (both mocks)")
+    parser.add_argument('--throttle-rate', type=float, help="Provider throttle rate (both mocks)")
+    parser.add_argument('--timeout-rate', type=float, help="Provider timeout rate (both mocks)")
+    parser.add_argument('--timeout-ms', type=float, help="Provider timeout (both mocks)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--verbose', action='store_true', help="Keep the handlers' warning logs")
+    args = parser.parse_args(argv)
+
+    shared = {key: getattr(args, key) for key in ('error_rate', 'throttle_rate', 'timeout_rate', 'timeout_ms')
+              if getattr(args, key) is not None}
+    bench = OnboardingBench(
+        args.applicants, args.flag_rate, args.reject_rate, args.lowscore_rate,
+        args.review_approve_rate, args.review_delay_seconds,
+        verify_simulation={**shared, **({'latency': args.verify_latency} if args.verify_latency else {})},
+        credit_simulation={**shared, **({'latency': args.credit_latency} if args.credit_latency else {})},
+        seed=args.seed
+    )
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+    report = bench.run()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == '__main__':
+    main()
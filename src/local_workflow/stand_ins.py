@@ -0,0 +1,122 @@
+"""
+Local stand-ins for the AWS services the onboarding handlers call.
+
+DynamoDB is moto's in-memory implementation (the same one the tests use).
+Step Functions is LocalStepFunctions: it has the client methods the
+handlers use (start_execution, describe_execution, send_task_success,
+send_task_failure) and runs executions on a local StateMachine. Lambda
+is not needed: Tasks call the handlers directly.
+"""
+import contextlib
+import re
+import threading
+from collections import deque
+
+import boto3
+from botocore.exceptions import ClientError
+
+
+def _client_error(code, message, operation):
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def boto3_sdk(service, action, parameters):
+    """Performs an aws-sdk:SERVICE:ACTION task with boto3 (updateItem -> update_item)."""
+    method = re.sub(r'(?<!^)(?=[A-Z])', '_', action).lower()
+    return getattr(boto3.client(service), method)(**parameters)
+
+
+class LocalStepFunctions:
+    """
+    A stepfunctions client backed by `machine`. Executions are queued by
+    start_execution and by task token callbacks, and run by run_pending(),
+    so a handler's own timing never includes the workflow it started.
+    """
+
+    def __init__(self, machine, state_machine_arn):
+        self.machine = machine
+        self.state_machine_arn = state_machine_arn
+        self.executions = {}
+        self.waiting = {}  # task token -> execution
+        self.pending = deque()
+        self._lock = threading.Lock()
+
+    def start_execution(self, stateMachineArn, name, input='{}'):
+        if stateMachineArn != self.state_machine_arn:
+            raise _client_error('StateMachineDoesNotExist', stateMachineArn, 'StartExecution')
+        arn = f"{stateMachineArn.replace(':stateMachine:', ':execution:', 1)}:{name}"
+        with self._lock:
+            existing = self.executions.get(arn)
+            if existing:
+                # Same name and input while running returns it; anything else is a conflict
+                if existing.status == 'RUNNING' and existing.input == input:
+                    return {'executionArn': arn, 'startDate': existing.started_at}
+                raise _client_error('ExecutionAlreadyExists', f"Execution {name} already exists", 'StartExecution')
+            execution = self.machine.start(arn, name, input)
+            self.executions[arn] = execution
+            self.pending.append(execution)
+        return {'executionArn': arn, 'startDate': execution.started_at}
+
+    def describe_execution(self, executionArn):
+        execution = self.executions.get(executionArn)
+        if not execution:
+            raise _client_error('ExecutionDoesNotExist', executionArn, 'DescribeExecution')
+        description = {'executionArn': executionArn, 'name': execution.name, 'status': execution.status,
+                       'input': execution.input, 'stateMachineArn': self.state_machine_arn}
+        if execution.output is not None:
+            description['output'] = execution.output
+        if execution.error is not None:
+            description.update({'error': execution.error, 'cause': execution.cause})
+        return description
+
+    def _take(self, token, operation):
+        with self._lock:
+            execution = self.waiting.pop(token, None)
+        if execution is None:
+            raise _client_error('TaskDoesNotExist', "Task token is invalid or already used", operation)
+        return execution
+
+    def send_task_success(self, taskToken, output):
+        execution = self._take(taskToken, 'SendTaskSuccess')
+        self.machine.resume(execution, output_json=output)
+        with self._lock:
+            self.pending.append(execution)
+        return {}
+
+    def send_task_failure(self, taskToken, error=None, cause=''):
+        execution = self._take(taskToken, 'SendTaskFailure')
+        self.machine.resume(execution, error=error or 'States.TaskFailed', cause=cause or '')
+        with self._lock:
+            self.pending.append(execution)
+        return {}
+
+    def run_pending(self):
+        """Runs queued executions until each ends or waits; returns the ones now waiting."""
+        waiting = []
+        while True:
+            with self._lock:
+                if not self.pending:
+                    return waiting
+                execution = self.pending.popleft()
+            token = self.machine.run(execution)
+            if token:
+                with self._lock:
+                    self.waiting[token] = execution
+                waiting.append(execution)
+
+
+@contextlib.contextmanager
+def local_step_functions(sfn):
+    """Routes boto3.client('stepfunctions') to `sfn` for the duration."""
+    real_client = boto3.client
+
+    def client(service_name, *args, **kwargs):
+        if service_name == 'stepfunctions':
+            return sfn
+        return real_client(service_name, *args, **kwargs)
+
+    boto3.client = client
+    try:
+        yield sfn
+    finally:
+        boto3.client = real_client
@@ -0,0 +1,386 @@
+"""
+A small in-process Step Functions interpreter.
+
+Runs a state machine definition (as read from Terraform) against Python
+callables instead of Lambda functions, and records how long every state
+took, both in wall time and in simulated time (wall time plus the virtual
+waits: Wait states, Retry backoff, simulated provider latency and the
+time a callback task waited for its token).
+
+Supported: Task, Parallel, Choice, Wait, Pass, Succeed and Fail states;
+InputPath, Parameters, ResultSelector, ResultPath and OutputPath with
+plain JSONPath ($.a.b[0], $$.Task.Token, $$.Execution.StartTime, no
+filters or intrinsics);
+Retry (including BackoffRate, MaxDelaySeconds and full jitter), Catch
+and TimeoutSeconds; `arn:aws:states:::aws-sdk:SERVICE:ACTION` tasks and
+their `.waitForTaskToken` form, which pauses the execution until
+send_task_success / send_task_failure is called with its token. A
+callback task is not retried, and may not run inside a Parallel branch.
+"""
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+_TOKEN = re.compile(r"\.([^.\[]+)|\[(\d+)\]|\['([^']+)'\]")
+_SDK_RESOURCE = re.compile(r'arn:aws:states:::aws-sdk:([\w\-]+):(\w+?)(\.waitForTaskToken)?$')
+
+
+class StatesError(Exception):
+    """A state's error, named as Step Functions names it (e.g. States.Timeout)."""
+    def __init__(self, error, cause=''):
+        super().__init__(f"{error}: {cause}")
+        self.error = error
+        self.cause = cause
+
+
+class Clock:
+    """Virtual time: simulated waits advance it instead of sleeping."""
+    def __init__(self):
+        self.now = 0.0
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _timestamp(clock_time):
+    """Clock seconds as a context object timestamp (ISO 8601, milliseconds, UTC)."""
+    moment = datetime.fromtimestamp(clock_time, timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}Z"
+
+
+class StateTimings:
+    """Wall and simulated seconds per state name, plus retries."""
+    def __init__(self):
+        self.wall = {}
+        self.simulated = {}
+        self.retries = {}
+
+    def record(self, name, wall, simulated):
+        self.wall.setdefault(name, []).append(wall)
+        self.simulated.setdefault(name, []).append(simulated)
+
+    def retried(self, name):
+        self.retries[name] = self.retries.get(name, 0) + 1
+
+
+def _tokens(path):
+    rest = path[1:]
+    tokens = []
+    while rest:
+        match = _TOKEN.match(rest)
+        if not match:
+            raise StatesError('States.Runtime', f"Unsupported path {path}")
+        key, index, quoted = match.groups()
+        tokens.append(int(index) if index is not None else (key if key is not None else quoted))
+        rest = rest[match.end():]
+    return tokens
+
+
+def read_path(data, path, context=None):
+    if path.startswith('$$'):
+        data, path = context or {}, path[1:]
+    try:
+        for token in _tokens(path):
+            data = data[token]
+    except (KeyError, IndexError, TypeError):
+        raise StatesError('States.Runtime', f"Path {path} does not match the input")
+    return data
+
+
+def write_path(data, path, value):
+    """A copy of `data` with `value` at `path` (ResultPath semantics)."""
+    tokens = _tokens(path)
+    if not tokens:
+        return value
+    data = json.loads(json.dumps(data))
+    target = data
+    for token in tokens[:-1]:
+        target = target.setdefault(token, {})
+    target[tokens[-1]] = value
+    return data
+
+
+def apply_parameters(template, data, context=None):
+    if isinstance(template, dict):
+        result = {}
+        for key, value in template.items():
+            if key.endswith('.$'):
+                if not isinstance(value, str) or not value.startswith('$'):
+                    raise StatesError('States.Runtime', f"Intrinsic functions are not supported ({key})")
+                result[key[:-2]] = read_path(data, value, context)
+            else:
+                result[key] = apply_parameters(value, data, context)
+        return result
+    if isinstance(template, list):
+        return [apply_parameters(item, data, context) for item in template]
+    return template
+
+
+_COMPARISONS = {
+    'StringEquals': lambda a, b: isinstance(a, str) and a == b,
+    'NumericEquals': lambda a, b: isinstance(a, (int, float)) and a == b,
+    'NumericLessThan': lambda a, b: isinstance(a, (int, float)) and a < b,
+    'NumericLessThanEquals': lambda a, b: isinstance(a, (int, float)) and a <= b,
+    'NumericGreaterThan': lambda a, b: isinstance(a, (int, float)) and a > b,
+    'NumericGreaterThanEquals': lambda a, b: isinstance(a, (int, float)) and a >= b,
+    'BooleanEquals': lambda a, b: isinstance(a, bool) and a == b,
+}
+
+
+def _matches(rule, data):
+    if 'And' in rule:
+        return all(_matches(r, data) for r in rule['And'])
+    if 'Or' in rule:
+        return any(_matches(r, data) for r in rule['Or'])
+    if 'Not' in rule:
+        return not _matches(rule['Not'], data)
+    try:
+        value = read_path(data, rule['Variable'])
+        present = True
+    except StatesError:
+        value, present = None, False
+    if 'IsPresent' in rule:
+        return present == rule['IsPresent']
+    if 'IsNull' in rule:
+        return present and (value is None) == rule['IsNull']
+    for name, compare in _COMPARISONS.items():
+        if name in rule:
+            return present and compare(value, rule[name])
+    raise StatesError('States.Runtime', f"Unsupported Choice rule {sorted(rule)}")
+
+
+def _handles(rule, error):
+    names = rule['ErrorEquals']
+    return error in names or 'States.ALL' in names or (
+        'States.TaskFailed' in names and not error.startswith('States.')
+    )
+
+
+class _Paused(Exception):
+    def __init__(self, token):
+        self.token = token
+
+
+class Execution:
+    def __init__(self, arn, name, input_json, started_at=0.0):
+        self.arn = arn
+        self.name = name
+        self.input = input_json
+        self.started_at = started_at  # Clock time
+        self.status = 'RUNNING'
+        self.output = None
+        self.error = None
+        self.cause = None
+        self.simulated = 0.0  # Seconds, summed over top-level states
+        self.position = None  # (state name, state input) to run next
+        self.waiting = None   # (state name, state input, task token, clock time paused)
+
+
+class StateMachine:
+    """
+    Runs `definition`. `tasks` maps a Task's Resource ARN to a callable
+    taking (event, context); `sdk` performs aws-sdk integrations as
+    sdk(service, action, parameters) (e.g. through boto3).
+    """
+
+    def __init__(self, definition, tasks, sdk, clock=None, rng=None, timings=None):
+        self.definition = definition
+        self.tasks = tasks
+        self.sdk = sdk
+        self.clock = clock or Clock()
+        self.rng = rng
+        self.timings = timings or StateTimings()
+
+    # --- Executions ---
+
+    def start(self, arn, name, input_json):
+        execution = Execution(arn, name, input_json, self.clock.now)
+        execution.position = (self.definition['StartAt'], json.loads(input_json))
+        return execution
+
+    def run(self, execution):
+        """Runs until the execution ends or waits for a task token; returns that token or None."""
+        while execution.position and execution.status == 'RUNNING':
+            name, data = execution.position
+            try:
+                next_name, output, simulated = self._run_state(name, self.definition['States'][name], data, execution, True)
+            except _Paused as paused:
+                execution.position = None
+                return paused.token
+            except StatesError as e:
+                execution.status, execution.error, execution.cause = 'FAILED', e.error, e.cause
+                execution.position = None
+                return None
+            execution.simulated += simulated
+            if next_name is None:
+                execution.status, execution.output, execution.position = 'SUCCEEDED', json.dumps(output), None
+            else:
+                execution.position = (next_name, output)
+        return None
+
+    def resume(self, execution, output_json=None, error=None, cause=''):
+        """Completes the task the execution waits on, with a result or an error; run() continues it."""
+        name, data, _, paused_at = execution.waiting
+        execution.waiting = None
+        state = self.definition['States'][name]
+        waited = self.clock.now - paused_at
+        self.timings.record(name, 0.0, waited)
+        execution.simulated += waited
+        if error is None:
+            result = json.loads(output_json) if output_json else None
+            next_name, output = self._complete(name, state, data, result)
+            if next_name is None:
+                execution.status, execution.output = 'SUCCEEDED', json.dumps(output)
+            else:
+                execution.position = (next_name, output)
+            return
+        catcher = next((c for c in state.get('Catch', []) if _handles(c, error)), None)
+        if catcher is None:
+            execution.status, execution.error, execution.cause = 'FAILED', error, cause
+            return
+        output = write_path(data, catcher.get('ResultPath', '$'), {'Error': error, 'Cause': cause})
+        execution.position = (catcher['Next'], output)
+
+    # --- States ---
+
+    def _run_states(self, states, start_at, data, execution):
+        """Runs a Parallel branch to its end; returns (output, simulated seconds)."""
+        name, total = start_at, 0.0
+        while name is not None:
+            name, data, simulated = self._run_state(name, states[name], data, execution, False)
+            total += simulated
+        return data, total
+
+    def _run_state(self, name, state, data, execution, top_level):
+        started = time.perf_counter()
+        kind = state['Type']
+        if kind in ('Task', 'Parallel'):
+            return self._run_with_retry(name, state, data, execution, top_level, started)
+        else:
+            effective = read_path(data, state.get('InputPath', '$'))
+            simulated = 0.0
+            if kind == 'Choice':
+                rule = next((r for r in state.get('Choices', []) if _matches(r, effective)), None)
+                next_name = rule['Next'] if rule else state.get('Default')
+                if next_name is None:
+                    raise StatesError('States.NoChoiceMatched', f"No choice matched in {name}")
+                output = read_path(effective, state.get('OutputPath', '$'))
+                simulated = time.perf_counter() - started
+                self.timings.record(name, simulated, simulated)
+                return next_name, output, simulated
+            if kind == 'Wait':
+                seconds = state['Seconds'] if 'Seconds' in state else read_path(effective, state['SecondsPath'])
+                self.clock.sleep(seconds)
+                simulated = seconds
+                output = effective
+            elif kind == 'Pass':
+                if 'Result' in state:
+                    result = state['Result']
+                elif 'Parameters' in state:
+                    result = apply_parameters(state['Parameters'], effective)
+                else:
+                    result = effective
+                output = self._result(state, data, result)
+            elif kind == 'Succeed':
+                output = effective
+            elif kind == 'Fail':
+                raise StatesError(state.get('Error', 'States.Fail'), state.get('Cause', ''))
+            else:
+                raise StatesError('States.Runtime', f"Unsupported state type {kind}")
+            if kind != 'Pass':
+                output = read_path(output, state.get('OutputPath', '$'))
+            next_name = None if state.get('End') or kind == 'Succeed' else state['Next']
+            simulated += time.perf_counter() - started
+            self.timings.record(name, time.perf_counter() - started, simulated)
+            return next_name, output, simulated
+
+    def _run_with_retry(self, name, state, data, execution, top_level, started):
+        effective = read_path(data, state.get('InputPath', '$'))
+        attempts = {}
+        simulated = 0.0
+        while True:
+            try:
+                if state['Type'] == 'Parallel':
+                    params = apply_parameters(state['Parameters'], effective) if 'Parameters' in state else effective
+                    results, longest = [], 0.0
+                    for branch in state['Branches']:
+                        output, branch_time = self._run_states(branch['States'], branch['StartAt'], params, execution)
+                        results.append(output)
+                        longest = max(longest, branch_time)
+                    simulated += longest
+                    result = results
+                else:
+                    result, task_time = self._invoke(name, state, effective, data, execution, top_level)
+                    simulated += task_time
+                break
+            except StatesError as e:
+                retrier = next((r for r in state.get('Retry', []) if _handles(r, e.error)), None)
+                index = state.get('Retry', []).index(retrier) if retrier else None
+                if retrier and attempts.get(index, 0) < retrier.get('MaxAttempts', 3):
+                    delay = retrier.get('IntervalSeconds', 1) * retrier.get('BackoffRate', 2.0) ** attempts.get(index, 0)
+                    delay = min(delay, retrier.get('MaxDelaySeconds', delay))
+                    if retrier.get('JitterStrategy') == 'FULL' and self.rng is not None:
+                        delay = self.rng.uniform(0, delay)
+                    attempts[index] = attempts.get(index, 0) + 1
+                    self.clock.sleep(delay)
+                    simulated += delay
+                    self.timings.retried(name)
+                    continue
+                catcher = next((c for c in state.get('Catch', []) if _handles(c, e.error)), None)
+                if catcher is None:
+                    raise
+                self.timings.record(name, time.perf_counter() - started, simulated)
+                output = write_path(data, catcher.get('ResultPath', '$'), {'Error': e.error, 'Cause': e.cause})
+                return catcher['Next'], output, simulated
+        self.timings.record(name, time.perf_counter() - started, simulated)
+        return (*self._complete(name, state, data, result), simulated)
+
+    def _invoke(self, name, state, effective, data, execution, top_level):
+        """Runs a Task once; returns (result, simulated seconds) or raises StatesError/_Paused."""
+        resource = state['Resource']
+        sdk = _SDK_RESOURCE.match(resource)
+        callback = bool(sdk and sdk.group(3))
+        context = {'Execution': {'Id': execution.arn, 'Name': execution.name, 'StartTime': _timestamp(execution.started_at)},
+                   'State': {'Name': name}}
+        if callback:
+            if not top_level:
+                raise StatesError('States.Runtime', f"{name}: callback tasks inside Parallel are not supported locally")
+            context['Task'] = {'Token': uuid.uuid4().hex}
+        params = apply_parameters(state['Parameters'], effective, context) if 'Parameters' in state else effective
+        clock_before, started = self.clock.now, time.perf_counter()
+        try:
+            if sdk:
+                result = self.sdk(sdk.group(1), sdk.group(2), params)
+            elif resource in self.tasks:
+                # Round-trip through JSON like a Lambda payload
+                result = self.tasks[resource](json.loads(json.dumps(params)), None)
+                result = json.loads(json.dumps(result))
+            else:
+                raise StatesError('States.Runtime', f"No local handler for {resource}")
+        except StatesError:
+            raise
+        except Exception as e:
+            raise StatesError(type(e).__name__, str(e))
+        simulated = time.perf_counter() - started + self.clock.now - clock_before
+        if 'TimeoutSeconds' in state and simulated > state['TimeoutSeconds']:
+            raise StatesError('States.Timeout', f"{name} ran for {simulated:.1f}s")
+        if callback:
+            execution.waiting = (name, data, context['Task']['Token'], self.clock.now)
+            raise _Paused(context['Task']['Token'])
+        return result, simulated
+
+    def _result(self, state, data, result):
+        if 'ResultPath' in state and state['ResultPath'] is None:
+            output = data
+        else:
+            output = write_path(data, state.get('ResultPath', '$'), result)
+        return read_path(output, state.get('OutputPath', '$'))
+
+    def _complete(self, name, state, data, result):
+        """(next state, output) once a Task or Parallel has its result."""
+        if 'ResultSelector' in state:
+            result = apply_parameters(state['ResultSelector'], result)
+        output = self._result(state, data, result)
+        return (None if state.get('End') else state['Next']), output
@@ -0,0 +1,223 @@
+"""
+Reads a Step Functions definition out of a Terraform module.
+
+Only the subset of HCL the module uses is understood: a state machine's
+`definition = jsonencode({...})` object, the module's `locals` block and
+its variables' defaults. Attribute values are strings, numbers, bools,
+null, lists, objects, and these expressions:
+
+    local.NAME                      var.NAME (default, or an override)
+    aws_lambda_function.NAME.arn    split("SEP", EXPR)[INDEX]
+    EXPR + NUMBER
+
+A Lambda ARN resolves to `lambda_arn(NAME)`, so the runner can map each
+Task back to the Python handler it deploys. Anything else raises
+ValueError naming the expression, rather than being guessed at.
+"""
+import os
+import re
+
+_NUMBER = re.compile(r'-?\d+(\.\d+)?([eE][-+]?\d+)?')
+
+
+def lambda_arn(function_resource):
+    """The stand-in ARN for an aws_lambda_function resource of the module."""
+    return f"arn:local:lambda:{function_resource}"
+
+
+class Expression(str):
+    """An unevaluated HCL expression (the raw source text)."""
+
+
+def _unquote(literal):
+    return _Parser(literal)._string()
+
+
+class _Parser:
+    def __init__(self, text, pos=0):
+        self.text = text
+        self.pos = pos
+
+    def _skip(self, newlines=True):
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char in ' \t\r' or (newlines and char in '\n,'):
+                self.pos += 1
+            elif char == '#' or self.text.startswith('//', self.pos):
+                end = self.text.find('\n', self.pos)
+                self.pos = len(self.text) if end < 0 else end
+            elif self.text.startswith('/*', self.pos):
+                self.pos = self.text.index('*/', self.pos) + 2
+            else:
+                break
+
+    def _string(self):
+        self.pos += 1
+        out = []
+        escapes = {'n': '\n', 't': '\t', '"': '"', '\\': '\\'}
+        while self.text[self.pos] != '"':
+            char = self.text[self.pos]
+            if char == '\\':
+                self.pos += 1
+                char = escapes.get(self.text[self.pos], '\\' + self.text[self.pos])
+            out.append(char)
+            self.pos += 1
+        self.pos += 1
+        return ''.join(out)
+
+    def _expression(self):
+        """Raw text up to the end of the attribute (newline, comma or closing bracket at depth 0)."""
+        start, depth, in_string = self.pos, 0, False
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if in_string:
+                if char == '\\':
+                    self.pos += 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in '([{':
+                depth += 1
+            elif char in ')]}':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and (char in '\n,#' or self.text.startswith('//', self.pos)):
+                break
+            self.pos += 1
+        return Expression(self.text[start:self.pos].strip())
+
+    def value(self):
+        self._skip()
+        char = self.text[self.pos]
+        if char == '{':
+            return self.object()
+        if char == '[':
+            self.pos += 1
+            items = []
+            while True:
+                self._skip()
+                if self.text[self.pos] == ']':
+                    self.pos += 1
+                    return items
+                items.append(self.value())
+        expression = self._expression()
+        if re.fullmatch(r'"(?:[^"\\]|\\.)*"', expression):
+            return _unquote(expression)
+        if _NUMBER.fullmatch(expression):
+            number = float(expression)
+            return int(number) if number.is_integer() and '.' not in expression else number
+        return {'true': True, 'false': False, 'null': None}.get(expression, expression)
+
+    def object(self):
+        """Parses `{ key = value ... }` at the current position."""
+        self._skip()
+        assert self.text[self.pos] == '{', f"Expected '{{' at offset {self.pos}"
+        self.pos += 1
+        result = {}
+        while True:
+            self._skip()
+            if self.text[self.pos] == '}':
+                self.pos += 1
+                return result
+            if self.text[self.pos] == '"':
+                key = self._string()
+            else:
+                key = re.match(r'[\w\-]+', self.text[self.pos:]).group(0)
+                self.pos += len(key)
+            self._skip(newlines=False)
+            if self.text[self.pos] == '{':  # Nested block (e.g. `environment {`)
+                result[key] = self.object()
+                continue
+            assert self.text[self.pos] in '=:', f"Expected '=' after {key!r} at offset {self.pos}"
+            self.pos += 1
+            result[key] = self.value()
+
+
+def _block(text, header):
+    """The body of the first block whose header matches the regex `header`."""
+    match = re.search(header + r'\s*\{', text)
+    if not match:
+        raise ValueError(f"No block matching {header!r} in the module.")
+    return _Parser(text, match.end() - 1).object()
+
+
+class TerraformModule:
+    """The .tf files of one module, for resolving the expressions above."""
+
+    def __init__(self, module_dir, variables=None):
+        self.text = '\n'.join(
+            open(os.path.join(module_dir, name)).read()
+            for name in sorted(os.listdir(module_dir)) if name.endswith('.tf')
+        )
+        self.variables = {}
+        for match in re.finditer(r'variable\s+"([\w\-]+)"\s*\{', self.text):
+            body = _Parser(self.text, match.end() - 1).object()
+            if 'default' in body:
+                self.variables[match.group(1)] = body['default']
+        self.variables.update(variables or {})
+        self._locals = None
+
+    @property
+    def locals(self):
+        if self._locals is None:
+            self._locals = _block(self.text, r'\blocals')
+        return self._locals
+
+    def lambda_handlers(self):
+        """
+        {aws_lambda_function resource name: (source directory name, handler
+        module, handler function)}, following each function's archive_file.
+        """
+        handlers = {}
+        for match in re.finditer(r'resource\s+"aws_lambda_function"\s+"([\w\-]+)"\s*\{', self.text):
+            body = _Parser(self.text, match.end() - 1).object()
+            archive = re.fullmatch(r'data\.archive_file\.([\w\-]+)\.output_path', body.get('filename', ''))
+            if not archive or 'handler' not in body:
+                continue
+            source = _block(self.text, r'data\s+"archive_file"\s+"' + re.escape(archive.group(1)) + '"')
+            module, function = body['handler'].rsplit('.', 1)
+            handlers[match.group(1)] = (os.path.basename(source['source_dir'].rstrip('/')), module, function)
+        return handlers
+
+    def state_machine_definition(self, resource_name):
+        """The resolved definition of `aws_sfn_state_machine.<resource_name>`."""
+        resource = re.search(r'resource\s+"aws_sfn_state_machine"\s+"' + re.escape(resource_name) + r'"\s*\{', self.text)
+        if not resource:
+            raise ValueError(f"No aws_sfn_state_machine.{resource_name} in the module.")
+        definition = re.compile(r'definition\s*=\s*jsonencode\(').search(self.text, resource.end())
+        return self.resolve(_Parser(self.text, definition.end()).value())
+
+    def resolve(self, value):
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        if isinstance(value, Expression):
+            return self._evaluate(value)
+        return value
+
+    def _evaluate(self, expression):
+        expression = expression.strip()
+        match = re.fullmatch(r'(.+?)\s*\+\s*(\d+)', expression)
+        if match:
+            return self._evaluate(Expression(match.group(1))) + int(match.group(2))
+        match = re.fullmatch(r'split\(\s*"(.*?)"\s*,\s*(.+)\)\[(\d+)\]', expression)
+        if match:
+            return str(self._evaluate(Expression(match.group(2)))).split(match.group(1))[int(match.group(3))]
+        match = re.fullmatch(r'aws_lambda_function\.([\w\-]+)\.arn', expression)
+        if match:
+            return lambda_arn(match.group(1))
+        match = re.fullmatch(r'(var|local)\.([\w\-]+)', expression)
+        if match:
+            scope, name = match.groups()
+            values = self.variables if scope == 'var' else self.locals
+            if name not in values:
+                raise ValueError(f"{expression} has no value (pass it as a variable override).")
+            return self.resolve(values[name])
+        if _NUMBER.fullmatch(expression):
+            return float(expression) if '.' in expression else int(expression)
+        if expression.startswith('"') and expression.endswith('"'):
+            return _unquote(expression)
+        raise ValueError(f"Unsupported Terraform expression: {expression}")
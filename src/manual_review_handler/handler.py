@@ -2,7 +2,10 @@ import json
 import os
 import boto3
 from decimal import Decimal
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+from fintech_common.review_queue import (
+    DECISION_STATUSES, LEAVE_QUEUE_REMOVE, QUEUE_ATTRIBUTES, SPENT_TOKEN_ERRORS, return_to_queue, send_decision
+)
 import logging
 
 # Set up logger
@@ -34,6 +37,7 @@ def manual_review(event, context):
     
     # --- Initialize boto3 clients ---
     dynamodb = boto3.resource('dynamodb')
+    dynamodb_client = boto3.client('dynamodb')
     sfn_client = boto3.client('stepfunctions')
     users_table = dynamodb.Table(USERS_TABLE_NAME) if USERS_TABLE_NAME else None
     
@@ -80,29 +84,24 @@ def manual_review(event, context):
                  return { "statusCode": 400, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "User is not awaiting manual review or token is missing."}) }
 
             # 2. Update user status in DynamoDB
-            new_status = "PENDING_CREDIT_CHECK" if decision == "APPROVED" else "REJECTED_MANUAL"
-            
             users_table.update_item(
                 Key={'user_id': user_id},
-                # Clear the task token so this can't be called twice
-                UpdateExpression="SET onboarding_status = :status REMOVE sfn_task_token",
-                ExpressionAttributeValues={':status': new_status}
+                # Clear the task token so this can't be called twice; also leaves the review queue
+                UpdateExpression=f"SET onboarding_status = :status REMOVE {LEAVE_QUEUE_REMOVE}",
+                ExpressionAttributeValues={':status': DECISION_STATUSES[decision]}
             )
             
             # 3. Send success/failure signal back to the Step Function
-            if decision == 'APPROVED':
-                logger.info(json.dumps({**log_context, "status": "info", "message": "Sending TaskSuccess to Step Function."}))
-                sfn_client.send_task_success(
-                    taskToken=task_token,
-                    output=json.dumps({"status": "APPROVED", "message": "Manual review approved."})
-                )
-            else: # 'REJECTED'
-                logger.info(json.dumps({**log_context, "status": "info", "message": "Sending TaskFailure to Step Function."}))
-                sfn_client.send_task_failure(
-                    taskToken=task_token,
-                    error="ManualReviewRejected",
-                    cause="The user was rejected during manual review by an admin."
-                )
+            logger.info(json.dumps({**log_context, "status": "info", "message": "Resuming the Step Function."}))
+            try:
+                send_decision(sfn_client, task_token, decision)
+            except (ClientError, BotoCoreError) as send_error:
+                if not isinstance(send_error, ClientError) or send_error.response['Error']['Code'] not in SPENT_TOKEN_ERRORS:
+                    # The execution is still waiting: put the token back so the decision can be retried
+                    previous = {name: user_item.get(name) for name in QUEUE_ATTRIBUTES}
+                    requeued = return_to_queue(dynamodb_client, USERS_TABLE_NAME, user_id, previous, DECISION_STATUSES[decision])
+                    logger.warning(json.dumps({**log_context, "status": "warn", "requeued": requeued, "message": "Decision not sent; task token restored." if requeued else "Decision not sent; user changed since, task token not restored."}))
+                raise
                 
             logger.info(json.dumps({**log_context, "status": "info", "message": "Successfully processed manual review."}))
 
@@ -0,0 +1,190 @@
+import json
+import os
+import time
+import boto3
+from datetime import datetime, timezone
+from decimal import Decimal
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.parallel_scan import Aggregator, DynamoCheckpointStore, ParallelScan
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+LOANS_TABLE_NAME = os.environ.get('LOANS_TABLE_NAME')
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME')
+SAVINGS_TABLE_NAME = os.environ.get('SAVINGS_TABLE_NAME')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '8'))
+# RCU budget for the whole scan; keeps reports from competing with live traffic
+SCAN_MAX_RCU_PER_SECOND = int(os.environ.get('SCAN_MAX_RCU_PER_SECOND', '200'))
+
+# Stop scanning (and checkpoint) when less than this much time is left
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+REPORT_TTL_SECONDS = 90 * 24 * 3600
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+# --- Report aggregators ---
+
+class LoanPortfolioAggregator(Aggregator):
+    """Loan counts and principal by status, plus total outstanding principal."""
+    projection = "#status, amount, remaining_balance"
+
+    def accumulate(self, state, items):
+        for item in items:
+            status = item.get('status', 'UNKNOWN')
+            state.setdefault('loans_by_status', {})
+            state.setdefault('principal_by_status', {})
+            state['loans_by_status'][status] = state['loans_by_status'].get(status, 0) + 1
+            state['principal_by_status'][status] = state['principal_by_status'].get(status, 0) + item.get('amount', Decimal('0'))
+            if status == 'APPROVED':
+                state['outstanding_principal'] = state.get('outstanding_principal', 0) + item.get('remaining_balance', Decimal('0'))
+        return state
+
+
+class WalletPortfolioAggregator(Aggregator):
+    """Wallet counts and total balances per currency."""
+    projection = "balance, currency"
+
+    def accumulate(self, state, items):
+        for item in items:
+            currency = item.get('currency', 'USD')
+            state.setdefault('wallets_by_currency', {})
+            state.setdefault('balance_by_currency', {})
+            state['wallets_by_currency'][currency] = state['wallets_by_currency'].get(currency, 0) + 1
+            state['balance_by_currency'][currency] = state['balance_by_currency'].get(currency, 0) + item.get('balance', Decimal('0'))
+        return state
+
+
+class SavingsPortfolioAggregator(Aggregator):
+    """Goal counts, amounts saved versus targeted, and completed goals."""
+    projection = "current_amount, target_amount"
+
+    def accumulate(self, state, items):
+        for item in items:
+            current = item.get('current_amount', Decimal('0'))
+            target = item.get('target_amount', Decimal('0'))
+            state['goal_count'] = state.get('goal_count', 0) + 1
+            state['total_saved'] = state.get('total_saved', 0) + current
+            state['total_target'] = state.get('total_target', 0) + target
+            if current >= target:
+                state['goals_completed'] = state.get('goals_completed', 0) + 1
+        return state
+
+
+REPORTS = {
+    'loans': (LoanPortfolioAggregator, lambda: LOANS_TABLE_NAME),
+    'wallets': (WalletPortfolioAggregator, lambda: WALLETS_TABLE_NAME),
+    'savings': (SavingsPortfolioAggregator, lambda: SAVINGS_TABLE_NAME),
+}
+# ---
+
+def portfolio_report(event, context):
+    """
+    Scheduled job (EventBridge): {"report": "loans" | "wallets" | "savings"}
+    Computes portfolio-wide totals with a parallel segmented scan and stores
+    the result on the job item in the batch-jobs table.
+    The job id defaults to one per report per day, so a run that hits the
+    Lambda timeout re-invokes itself and resumes from its checkpoints.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    dynamodb = boto3.resource('dynamodb')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    report = event.get('report')
+    log_context = {"action": "portfolio_report", "report": report}
+
+    if report not in REPORTS:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "Unknown report requested."}))
+        raise ValueError(f"report must be one of {sorted(REPORTS)}.")
+
+    aggregator_class, table_name_for = REPORTS[report]
+    table_name = table_name_for()
+
+    if not jobs_table or not table_name:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    job_id = event.get('job_id') or f"portfolio-report#{report}#{datetime.now(timezone.utc).strftime('%Y-%m-%d')}"
+    log_context["job_id"] = job_id
+
+    existing = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if existing and existing.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Report already complete."}))
+        return json.loads(json.dumps(existing, cls=DecimalEncoder))
+
+    if not existing:
+        jobs_table.put_item(Item={
+            'job_id': job_id,
+            'job_type': 'PORTFOLIO_REPORT',
+            'report': report,
+            'status': 'RUNNING',
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + REPORT_TTL_SECONDS
+        })
+
+    aggregator = aggregator_class()
+    scan = ParallelScan(
+        dynamodb_client,
+        table_name,
+        aggregator,
+        total_segments=SCAN_SEGMENTS,
+        max_capacity_per_second=SCAN_MAX_RCU_PER_SECOND,
+        scan_kwargs={
+            'ProjectionExpression': aggregator.projection,
+            **({'ExpressionAttributeNames': {'#status': 'status'}} if '#status' in aggregator.projection else {})
+        },
+        checkpoint_store=DynamoCheckpointStore(dynamodb_client, JOBS_TABLE_NAME, job_id)
+    )
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    logger.info(json.dumps({**log_context, "status": "info", "segments": SCAN_SEGMENTS, "message": "Starting portfolio scan."}))
+    result = scan.run(should_stop=out_of_time)
+    log_context.update({"items_scanned": result.items_scanned, "capacity_consumed": str(result.capacity_consumed)})
+
+    if not result.complete:
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Out of time; checkpointed. Re-invoking to resume."}))
+        try:
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({"report": report, "job_id": job_id})
+            )
+        except ClientError as e:
+            # job_id is dated, so tomorrow's run would start a new job. Fail instead: Lambda
+            # retries this asynchronous invocation with the same event, which resumes from
+            # the checkpoints (as does invoking with {"report", "job_id"} by hand).
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke report job."}))
+            raise
+        return {"job_id": job_id, "status": "RUNNING"}
+
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression="SET #status = :complete, #result = :result, completed_at = :now",
+        ExpressionAttributeNames={'#status': 'status', '#result': 'result'},
+        ExpressionAttributeValues={
+            ':complete': 'COMPLETE',
+            ':result': result.state,
+            ':now': int(time.time())
+        }
+    )
+    logger.info(json.dumps({**log_context, "status": "info", "result": result.state, "message": "Portfolio report complete."}, cls=DecimalEncoder))
+
+    return json.loads(json.dumps({"job_id": job_id, "status": "COMPLETE", "result": result.state}, cls=DecimalEncoder))
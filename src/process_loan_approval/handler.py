@@ -1,10 +1,9 @@
 import json
 import os
 import boto3
-import uuid
-import time
 from decimal import Decimal, InvalidOperation
 from botocore.exceptions import ClientError
+from fintech_common.records import LedgerEntry
 import logging # <-- 1. Import logging
 
 # --- 2. Set up logger ---
@@ -29,19 +28,7 @@ def log_transaction(log_table, wallet_id, tx_type, amount, new_balance=None, rel
         logger.warning(json.dumps({"status": "warn", "action": "log_transaction", "message": "Log table not configured."}))
         return
     try:
-        timestamp = int(time.time())
-        log_item = {
-            'transaction_id': str(uuid.uuid4()),
-            'wallet_id': wallet_id,
-            'timestamp': timestamp,
-            'type': tx_type,
-            'amount': amount,
-            'balance_after': new_balance if new_balance is not None else Decimal('NaN'),
-            'related_id': related_id if related_id else 'N/A',
-            'details': details if details else {}
-        }
-        if isinstance(log_item['balance_after'], Decimal) and log_item['balance_after'].is_nan():
-             log_item['balance_after'] = 'N/A' 
+        log_item = LedgerEntry.new(wallet_id, tx_type, amount, new_balance, related_id, details).to_item()
         
         log_table.put_item(Item=log_item)
         
@@ -111,6 +98,11 @@ def process_loan_approval(event, context):
                     logger.error(json.dumps({**log_context, "status": "error", "message": "Invalid loan details in message."}))
                     continue
 
+                # approve_loan already credited the wallet in the same transaction as the approval
+                if loan_details.get('disbursement') == 'INSTANT':
+                    logger.info(json.dumps({**log_context, "status": "info", "message": "Loan was disbursed instantly. Skipping wallet credit."}))
+                    continue
+
                 amount = Decimal(amount_str)
                 if amount <= 0:
                     logger.warning(json.dumps({**log_context, "status": "warn", "message": f"Loan amount is not positive: {amount}"}))
@@ -1,35 +1,37 @@
 import json
 import os
 import boto3
-from decimal import Decimal
 from botocore.exceptions import ClientError
 import logging
 
+from fintech_common.wallets import provision_wallet
+
 # Set up logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # --- Environment Variables ---
 USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME')
-CREATE_WALLET_LAMBDA_ARN = os.environ.get('CREATE_WALLET_LAMBDA_ARN') # The ARN of the wallet Lambda
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME')
+LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME')
 
 def provision_account(event, context):
     """
     Final step in the Step Function.
-    1. Invokes the create_wallet Lambda.
-    2. Updates the user's status to 'APPROVED' with their new wallet_id.
+    Creates the user's wallet (with its WALLET_CREATED ledger entry) and sets
+    the user's status to 'APPROVED' with the new wallet_id, in one DynamoDB
+    transaction. The wallet id is derived from the user id, so a retried
+    task returns the wallet it already created.
     """
     
     # --- Initialize boto3 clients ---
-    dynamodb = boto3.resource('dynamodb')
-    lambda_client = boto3.client('lambda')
-    users_table = dynamodb.Table(USERS_TABLE_NAME) if USERS_TABLE_NAME else None
+    dynamodb_client = boto3.client('dynamodb')
 
-    if not users_table or not CREATE_WALLET_LAMBDA_ARN:
+    if not USERS_TABLE_NAME or not WALLETS_TABLE_NAME or not LOG_TABLE_NAME:
         log_message = {
             "status": "error",
             "action": "provision_account",
-            "message": "FATAL: Environment variables not set (USERS_TABLE_NAME or CREATE_WALLET_LAMBDA_ARN)."
+            "message": "FATAL: Environment variables not set (USERS_TABLE_NAME, WALLETS_TABLE_NAME or TRANSACTIONS_LOG_TABLE_NAME)."
         }
         logger.error(json.dumps(log_message))
         raise Exception("Server configuration error.")
@@ -44,74 +46,17 @@ def provision_account(event, context):
         raise ValueError("user_id not found in event input.")
 
     try:
-        # --- 1. Invoke the create_wallet Lambda ---
-        logger.info(json.dumps({**log_context, "status": "info", "message": "Invoking create_wallet Lambda."}))
-        
-        # We pass an empty event because the create_wallet handler
-        # doesn't need any info, it just creates a wallet and returns the ID.
-        # We mock a minimal 'httpMethod' to bypass its API Gateway checks.
-        invoke_payload = json.dumps({"httpMethod": "POST", "body": "{}"}) 
-        
-        invoke_response = lambda_client.invoke(
-            FunctionName=CREATE_WALLET_LAMBDA_ARN,
-            InvocationType='RequestResponse', # We need the response
-            Payload=invoke_payload
-        )
-        
-        response_payload_str = invoke_response['Payload'].read().decode('utf-8')
-        
-        # Check for Lambda invocation error
-        if invoke_response.get('FunctionError'):
-             log_message = {
-                 **log_context,
-                 "status": "error",
-                 "message": "create_wallet Lambda invocation failed.",
-                 "lambda_error": response_payload_str
-             }
-             logger.error(json.dumps(log_message))
-             raise Exception(f"Wallet creation failed: {response_payload_str}")
+        # The credit score from the credit check is stored on the wallet for loan pricing
+        credit_score = (event.get('CreditResult') or {}).get('credit_score')
 
-        response_payload = json.loads(response_payload_str)
-
-        # Check the statusCode from the Lambda's *return*
-        if response_payload.get('statusCode') != 201:
-            log_message = {
-                 **log_context,
-                 "status": "error",
-                 "message": "create_wallet Lambda returned non-201 status.",
-                 "lambda_response": response_payload.get('body')
-             }
-            logger.error(json.dumps(log_message))
-            raise Exception(f"Wallet creation returned error: {response_payload.get('body')}")
+        wallet, created = provision_wallet(
+            dynamodb_client, WALLETS_TABLE_NAME, LOG_TABLE_NAME, USERS_TABLE_NAME, user_id, credit_score
+        )
+        new_wallet_id = wallet['wallet_id']
 
-        # --- 2. Get the new wallet_id ---
-        wallet_body = json.loads(response_payload.get('body', '{}'))
-        new_wallet_id = wallet_body.get('wallet', {}).get('wallet_id')
-        
-        if not new_wallet_id:
-            log_message = {
-                 **log_context,
-                 "status": "error",
-                 "message": "Could not parse wallet_id from create_wallet response.",
-                 "lambda_response_body": wallet_body
-             }
-            logger.error(json.dumps(log_message))
-            raise Exception("Failed to parse wallet_id from create_wallet response.")
-            
         log_context["wallet_id"] = new_wallet_id
-        logger.info(json.dumps({**log_context, "status": "info", "message": "Successfully created wallet."}))
-
-        # --- 3. Update the user's status to APPROVED ---
-        users_table.update_item(
-            Key={'user_id': user_id},
-            UpdateExpression="SET onboarding_status = :status, wallet_id = :wallet_id",
-            ExpressionAttributeValues={
-                ':status': 'APPROVED',
-                ':wallet_id': new_wallet_id
-            }
-        )
-        
-        logger.info(json.dumps({**log_context, "status": "info", "message": "User status set to APPROVED."}))
+        message = "Wallet created and user status set to APPROVED." if created else "Account already provisioned (retried task)."
+        logger.info(json.dumps({**log_context, "status": "info", "message": message}))
         
         # Return the final, complete user object to the Step Function
         return {
@@ -126,4 +71,4 @@ def provision_account(event, context):
          raise ce
     except Exception as e:
         logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,121 @@
+import json
+import os
+import boto3
+from decimal import Decimal, InvalidOperation
+from botocore.exceptions import ClientError
+from fintech_common.pricing import get_pricing_engine
+import logging
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+CONFIG_TABLE_NAME = os.environ.get('CONFIG_TABLE_NAME') # Rate grid; built-in default rates if unset
+RATE_GRID_TTL_SECONDS = int(os.environ.get('RATE_GRID_TTL_SECONDS', '300'))
+ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
+
+MAX_OFFERS_PER_REQUEST = 500
+
+# --- CORS Headers ---
+OPTIONS_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Allow-Credentials": True
+}
+POST_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Credentials": True
+}
+# ---
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+def expand_offers(body):
+    """
+    Accepts {"offers": [{"amount", "loan_term_months", "risk_tier"? | "credit_score"?}, ...]}
+    or the grid shorthand {"amounts": [...], "terms": [...], "risk_tier"? | "credit_score"?},
+    which quotes every amount for every term.
+    """
+    if 'offers' in body:
+        offers = body['offers']
+    else:
+        pricing = {k: body[k] for k in ('risk_tier', 'credit_score') if k in body}
+        offers = [
+            {"amount": amount, "loan_term_months": term, **pricing}
+            for amount in body.get('amounts', [])
+            for term in body.get('terms', [])
+        ]
+    if not offers:
+        raise ValueError("At least one offer is required.")
+    if len(offers) > MAX_OFFERS_PER_REQUEST:
+        raise ValueError(f"A maximum of {MAX_OFFERS_PER_REQUEST} offers can be quoted per request.")
+    return offers
+
+def quote_loan_offers(event, context):
+    """
+    API: POST /loan/quotes
+    Prices many candidate offers against the rate grid in one call.
+    Every quote is a lookup into pre-computed annuity factors; offers
+    outside the grid get a per-offer error instead of failing the batch.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb = boto3.resource('dynamodb')
+    config_table = dynamodb.Table(CONFIG_TABLE_NAME) if CONFIG_TABLE_NAME else None
+    # ---
+
+    # --- CORS Preflight Check ---
+    http_method = event.get('httpMethod', '').upper()
+    if http_method == 'OPTIONS':
+        logger.info("Handling OPTIONS preflight request for quote_loan_offers")
+        return { "statusCode": 200, "headers": OPTIONS_CORS_HEADERS, "body": "" }
+
+    if http_method == 'POST':
+        log_context = {"action": "quote_loan_offers"}
+        try:
+            body = json.loads(event.get('body') or '{}')
+            offers = expand_offers(body)
+            log_context["offer_count"] = len(offers)
+
+            engine = get_pricing_engine(config_table, RATE_GRID_TTL_SECONDS)
+
+            quotes = []
+            for offer in offers:
+                try:
+                    risk_tier = offer.get('risk_tier')
+                    if risk_tier is None:
+                        credit_score = offer.get('credit_score')
+                        risk_tier = engine.tier_for_score(int(credit_score) if credit_score is not None else None)
+                    quote = engine.quote(offer.get('amount'), offer.get('loan_term_months'), risk_tier)
+                    quotes.append(quote.to_dict())
+                except (ValueError, TypeError, InvalidOperation) as offer_error:
+                    quotes.append({**offer, "error": str(offer_error)})
+
+            logger.info(json.dumps({**log_context, "status": "info", "message": "Quoted loan offers."}))
+
+            return {
+                "statusCode": 200,
+                "headers": POST_CORS_HEADERS,
+                "body": json.dumps({"quotes": quotes, "risk_tiers": engine.risk_tiers, "max_term_months": engine.max_term}, cls=DecimalEncoder)
+            }
+
+        except (ValueError, TypeError, AttributeError) as ve:
+             logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+             return { "statusCode": 400, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+        except ClientError as ce:
+             logger.error(json.dumps({**log_context, "status": "error", "error_code": ce.response['Error']['Code'], "error_message": str(ce)}))
+             return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Database error.", "error": str(ce)}) }
+        except Exception as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "An unexpected error occurred.", "error": str(e)}) }
+    else:
+         return { "statusCode": 405, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Method {http_method} not allowed."}) }
@@ -1,8 +1,11 @@
 import json
 import os
+import time
 import boto3
 from urllib.parse import unquote
 from botocore.exceptions import ClientError
+from fintech_common.loan_cache import VERSION_BUMP, VERSION_BUMP_VALUES
+from fintech_common.loan_index import CLOSE_LOAN_REMOVE, CLOSE_LOAN_SET
 import logging # <-- 1. Import logging
 from decimal import Decimal
 
@@ -72,13 +75,15 @@ def reject_loan(event, context):
             # Update the loan status in DynamoDB
             response = table.update_item(
                 Key={'loan_id': loan_id},
-                UpdateExpression="SET #status = :status_val",
+                UpdateExpression=f"SET #status = :status_val, {VERSION_BUMP}, {CLOSE_LOAN_SET} REMOVE {CLOSE_LOAN_REMOVE}",
                 # Condition: Only reject if it's currently PENDING
                 ConditionExpression="#status = :pending_val",
                 ExpressionAttributeNames={'#status': 'status'},
                 ExpressionAttributeValues={
                     ':status_val': 'REJECTED',
-                    ':pending_val': 'PENDING'
+                    ':pending_val': 'PENDING',
+                    ':closed_at': int(time.time()),
+                    **VERSION_BUMP_VALUES
                 },
                 ReturnValues="ALL_NEW"  # Return the full updated item
             )
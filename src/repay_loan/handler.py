@@ -6,6 +6,7 @@ import time
 from decimal import Decimal, InvalidOperation
 from urllib.parse import unquote
 from botocore.exceptions import ClientError
+from fintech_common.loan_cache import LoanCache, loan_version
 import logging # <-- 1. Import logging
 
 # --- 2. Set up logger ---
@@ -16,6 +17,7 @@ logger.setLevel(logging.INFO)
 # --- Environment Variables ---
 LOANS_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN') # Payment events topic
+LOAN_CACHE_TTL_SECONDS = int(os.environ.get('LOAN_CACHE_TTL_SECONDS', '5'))
 ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
 
 # --- (CORS Headers - no changes) ---
@@ -31,6 +33,9 @@ POST_CORS_HEADERS = {
 }
 # ---
 
+# Lives across warm invocations; see fintech_common.loan_cache
+_loans = LoanCache(ttl_seconds=LOAN_CACHE_TTL_SECONDS)
+
 # --- (DecimalEncoder - no changes) ---
 class DecimalEncoder(json.JSONEncoder):
     def default(self, o):
@@ -44,6 +49,10 @@ def repay_loan(event, context):
     Initiates a loan repayment.
     If the amount is > remaining_balance, it adjusts the amount.
     Publishes 'LOAN_REPAYMENT_REQUESTED' event.
+    The loan may come from the container's loan cache; the event carries the
+    version it was validated against, and update_loan_repayment_status
+    re-checks the request if the loan has changed since and credits back
+    anything it could not apply.
     """
     
     # --- 3. Initialize boto3 inside the handler ---
@@ -83,9 +92,12 @@ def repay_loan(event, context):
             
             log_context["amount"] = str(amount)
             
-            # 1. Get the loan to find the wallet_id and remaining_balance
-            response = loans_table.get_item(Key={'loan_id': loan_id})
-            loan_item = response.get('Item')
+            # 1. Get the loan to find the wallet_id and remaining_balance. A stale
+            #    cached view is caught downstream by the version check (and any
+            #    excess credited back), so it is only re-read to turn a request away
+            loan_item = _loans.get(loans_table, loan_id)
+            if not loan_item or loan_item.get('status') != 'APPROVED' or Decimal(loan_item.get('remaining_balance', '0')) <= 0:
+                loan_item = _loans.get(loans_table, loan_id, refresh=True)
 
             if not loan_item:
                 logger.warning(json.dumps({**log_context, "status": "warn", "message": "Loan not found."}))
@@ -118,7 +130,9 @@ def repay_loan(event, context):
                 'loan_id': loan_id,
                 'wallet_id': wallet_id,
                 'amount': amount_to_pay,
-                'repayment_time': int(time.time())
+                'repayment_time': int(time.time()),
+                'loan_version': loan_version(loan_item),
+                'remaining_balance': remaining_balance
             }
             
             sns.publish(
@@ -129,7 +143,7 @@ def repay_loan(event, context):
                     'event_type': { 'DataType': 'String', 'StringValue': 'LOAN_REPAYMENT_REQUESTED' }
                 }
             )
-            
+
             log_context["amount_processed"] = str(amount_to_pay)
             logger.info(json.dumps({**log_context, "status": "info", "message": "Published LOAN_REPAYMENT_REQUESTED event."}))
 
@@ -0,0 +1,328 @@
+import json
+import os
+import time
+import boto3
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.autopay import (
+    AUTOPAY_INDEX_NAME, DEFAULT_AUTOPAY_SHARDS, autopay_job_id, bucket_keys,
+    due_bucket, next_due_date, outcome_counter_ids
+)
+from fintech_common.parallel_scan import CapacityLimiter, from_dynamodb, merge_totals
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+LOANS_TABLE_NAME = os.environ.get('LOANS_TABLE_NAME')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN') # Payment events topic
+AUTOPAY_SHARDS = int(os.environ.get('AUTOPAY_SHARDS', str(DEFAULT_AUTOPAY_SHARDS))) # Must match set_loan_autopay
+AUTOPAY_WORKERS = int(os.environ.get('AUTOPAY_WORKERS', '16'))
+# Due dates this far back are swept too, so a missed run is caught up next time
+LOOKBACK_DAYS = int(os.environ.get('LOOKBACK_DAYS', '3'))
+# Claims share the loans table with live repayments
+MAX_WCU_PER_SECOND = int(os.environ.get('MAX_WCU_PER_SECOND', '500'))
+
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+JOB_TTL_SECONDS = 30 * 24 * 3600
+SNS_BATCH_SIZE = 10
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+def repayment_amount(loan):
+    """The scheduled payment: the minimum payment, or the balance if that is smaller."""
+    balance = loan.get('remaining_balance', Decimal('0'))
+    minimum = loan.get('minimum_payment') or balance
+    return min(minimum, balance)
+
+
+class AutopayRun:
+    """
+    One pass over the due buckets of a cycle. Each bucket (date x shard) is
+    drained by its own worker: query a page of due loan_ids, claim each loan
+    with a conditional write that moves it to its next due bucket, then
+    publish the claimed repayments with SNS PublishBatch.
+
+    The claim is what makes the run safe to repeat: a claimed loan has left
+    the bucket, so a rerun or a resumed run never requests it twice.
+    """
+
+    def __init__(self, dynamodb_client, sns_client, cycle_date, write_limiter, should_stop=None):
+        self.client = dynamodb_client
+        self.sns = sns_client
+        self.cycle_date = cycle_date
+        self.write_limiter = write_limiter
+        self.should_stop = should_stop or (lambda: False)
+
+    def _claim(self, loan_id, bucket, due_date):
+        """Returns the claimed loan, or None if it was already claimed or is no longer payable."""
+        following = next_due_date(due_date, due_date.day)
+        try:
+            response = self.client.update_item(
+                TableName=LOANS_TABLE_NAME,
+                Key={'loan_id': {'S': loan_id}},
+                UpdateExpression=(
+                    "SET autopay_due_bucket = :next_bucket, next_due_date = :next_due, "
+                    "autopay_last_cycle = :cycle, autopay_last_status = :requested"
+                ),
+                ConditionExpression="autopay_due_bucket = :bucket AND #status = :approved AND remaining_balance > :zero",
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':next_bucket': {'S': due_bucket(following, loan_id, AUTOPAY_SHARDS)},
+                    ':next_due': {'S': following.isoformat()},
+                    ':cycle': {'S': self.cycle_date.isoformat()},
+                    ':requested': {'S': 'REQUESTED'},
+                    ':bucket': {'S': bucket},
+                    ':approved': {'S': 'APPROVED'},
+                    ':zero': {'N': '0'}
+                },
+                ReturnValues='ALL_NEW',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD',
+                ReturnConsumedCapacity='TOTAL'
+            )
+            self.write_limiter.consume(response.get('ConsumedCapacity', {}).get('CapacityUnits', 1))
+            return from_dynamodb(response['Attributes'])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            current = from_dynamodb(e.response.get('Item'))
+            if current.get('autopay_due_bucket') == bucket:
+                # Still in this bucket but paid off or not APPROVED: drop it from the index
+                self._close(loan_id, bucket)
+                return 'closed'
+            return None
+
+    def _close(self, loan_id, bucket):
+        try:
+            self.client.update_item(
+                TableName=LOANS_TABLE_NAME,
+                Key={'loan_id': {'S': loan_id}},
+                UpdateExpression="REMOVE autopay_due_bucket, next_due_date",
+                ConditionExpression="autopay_due_bucket = :bucket",
+                ExpressionAttributeValues={':bucket': {'S': bucket}}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def _release(self, loan, bucket, due_date):
+        """Puts a loan back in its bucket after its request could not be published."""
+        try:
+            self.client.update_item(
+                TableName=LOANS_TABLE_NAME,
+                Key={'loan_id': {'S': loan['loan_id']}},
+                UpdateExpression="SET autopay_due_bucket = :bucket, next_due_date = :due REMOVE autopay_last_status",
+                ConditionExpression="autopay_due_bucket = :next_bucket",
+                ExpressionAttributeValues={
+                    ':bucket': {'S': bucket},
+                    ':due': {'S': due_date.isoformat()},
+                    ':next_bucket': {'S': loan['autopay_due_bucket']}
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def _publish(self, loans):
+        """Publishes repayment requests in batches of 10. Returns the loans that failed."""
+        failed = []
+        now = int(time.time())
+        for start in range(0, len(loans), SNS_BATCH_SIZE):
+            chunk = loans[start:start + SNS_BATCH_SIZE]
+            entries = []
+            for index, loan in enumerate(chunk):
+                details = {
+                    'loan_id': loan['loan_id'],
+                    'wallet_id': loan['wallet_id'],
+                    'amount': repayment_amount(loan),
+                    'repayment_time': now,
+                    'source': 'AUTOPAY',
+                    'autopay_cycle': self.cycle_date.isoformat()
+                }
+                entries.append({
+                    'Id': str(index),
+                    'Message': json.dumps({"event_type": "LOAN_REPAYMENT_REQUESTED", "details": details}, cls=DecimalEncoder),
+                    'Subject': f"Loan Repayment Requested: {loan['loan_id']}",
+                    'MessageAttributes': {
+                        'event_type': {'DataType': 'String', 'StringValue': 'LOAN_REPAYMENT_REQUESTED'}
+                    }
+                })
+            try:
+                response = self.sns.publish_batch(TopicArn=SNS_TOPIC_ARN, PublishBatchRequestEntries=entries)
+                failed.extend(chunk[int(f['Id'])] for f in response.get('Failed', []))
+            except ClientError as e:
+                logger.error(json.dumps({"action": "run_loan_autopay", "status": "error", "error_code": e.response['Error']['Code'], "message": "PublishBatch failed."}))
+                failed.extend(chunk)
+        return failed
+
+    def drain_bucket(self, bucket):
+        due_date = date.fromisoformat(bucket.split('#')[0])
+        totals = {'loans_due': 0, 'loans_requested': 0, 'loans_closed': 0, 'publish_failures': 0, 'amount_requested': Decimal('0')}
+        query_kwargs = {
+            'TableName': LOANS_TABLE_NAME,
+            'IndexName': AUTOPAY_INDEX_NAME,
+            'KeyConditionExpression': "autopay_due_bucket = :bucket",
+            'ExpressionAttributeValues': {':bucket': {'S': bucket}}
+        }
+        while True:
+            page = self.client.query(**query_kwargs)
+            loan_ids = [item['loan_id']['S'] for item in page.get('Items', [])]
+            totals['loans_due'] += len(loan_ids)
+
+            claimed = []
+            for loan_id in loan_ids:
+                loan = self._claim(loan_id, bucket, due_date)
+                if loan == 'closed':
+                    totals['loans_closed'] += 1
+                elif loan:
+                    claimed.append(loan)
+
+            failed = self._publish(claimed)
+            for loan in failed:
+                self._release(loan, bucket, due_date)
+            failed_ids = {loan['loan_id'] for loan in failed}
+            for loan in claimed:
+                if loan['loan_id'] not in failed_ids:
+                    totals['loans_requested'] += 1
+                    totals['amount_requested'] += repayment_amount(loan)
+            totals['publish_failures'] += len(failed)
+
+            # Claimed loans have left the bucket, so stopping here loses nothing
+            if 'LastEvaluatedKey' not in page or self.should_stop():
+                totals['complete'] = 'LastEvaluatedKey' not in page and not failed
+                return totals
+            query_kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    def run(self):
+        buckets = [
+            key
+            for days_back in range(LOOKBACK_DAYS, -1, -1)
+            for key in bucket_keys(self.cycle_date - timedelta(days=days_back), AUTOPAY_SHARDS)
+        ]
+        with ThreadPoolExecutor(max_workers=AUTOPAY_WORKERS) as executor:
+            results = list(executor.map(self.drain_bucket, buckets))
+        complete = all(r.pop('complete') for r in results)
+        totals = {}
+        for r in results:
+            totals = merge_totals(totals, r)
+        return totals, complete
+
+
+def outcome_totals(dynamodb, cycle_date):
+    """Sums the sharded outcome counters written by update_loan_repayment_status."""
+    response = dynamodb.batch_get_item(RequestItems={
+        JOBS_TABLE_NAME: {'Keys': [{'job_id': job_id} for job_id in outcome_counter_ids(cycle_date)]}
+    })
+    totals = {}
+    for item in response.get('Responses', {}).get(JOBS_TABLE_NAME, []):
+        totals = merge_totals(totals, {k: v for k, v in item.items() if k not in ('job_id', 'expires_at')})
+    return totals
+
+
+def run_loan_autopay(event, context):
+    """
+    Scheduled job (EventBridge, daily).
+    Requests the scheduled repayment for every autopay loan due on the cycle
+    date (plus LOOKBACK_DAYS of missed dates) by querying the sharded
+    due-date index, with AUTOPAY_WORKERS buckets drained in parallel.
+    Requests go out as LOAN_REPAYMENT_REQUESTED on the payment topic, the
+    same event repay_loan publishes; outcomes are counted by
+    update_loan_repayment_status. If the run nears the Lambda timeout it
+    re-invokes itself and carries on.
+    Optional event keys: cycle_date (YYYY-MM-DD).
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    dynamodb = boto3.resource('dynamodb')
+    sns = boto3.client('sns')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    log_context = {"action": "run_loan_autopay"}
+
+    if not LOANS_TABLE_NAME or not jobs_table or not SNS_TOPIC_ARN:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    cycle_date = date.fromisoformat(event.get('cycle_date') or datetime.now(timezone.utc).date().isoformat())
+    job_id = autopay_job_id(cycle_date.isoformat())
+    log_context.update({"job_id": job_id, "cycle_date": cycle_date.isoformat()})
+
+    existing = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if existing and existing.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Autopay already complete for this date."}))
+        existing['outcomes'] = outcome_totals(dynamodb, cycle_date.isoformat())
+        return json.loads(json.dumps(existing, cls=DecimalEncoder))
+    if not existing:
+        jobs_table.put_item(Item={
+            'job_id': job_id,
+            'job_type': 'LOAN_AUTOPAY',
+            'status': 'RUNNING',
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + JOB_TTL_SECONDS
+        })
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    logger.info(json.dumps({**log_context, "status": "info", "shards": AUTOPAY_SHARDS, "lookback_days": LOOKBACK_DAYS, "message": "Starting autopay run."}))
+    autopay = AutopayRun(dynamodb_client, sns, cycle_date, CapacityLimiter(MAX_WCU_PER_SECOND), should_stop=out_of_time)
+    totals, complete = autopay.run()
+
+    # Each pass only sees loans the previous passes left behind, so totals add up
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression=(
+            "SET #status = :status, updated_at = :now "
+            "ADD loans_due :due, loans_requested :requested, loans_closed :closed, "
+            "publish_failures :failures, amount_requested :amount"
+        ),
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={
+            ':status': 'COMPLETE' if complete else 'RUNNING',
+            ':now': int(time.time()),
+            ':due': totals.get('loans_due', 0),
+            ':requested': totals.get('loans_requested', 0),
+            ':closed': totals.get('loans_closed', 0),
+            ':failures': totals.get('publish_failures', 0),
+            ':amount': totals.get('amount_requested', Decimal('0'))
+        }
+    )
+    log_context["result"] = totals
+
+    if not complete:
+        if totals.get('publish_failures'):
+            # Released loans are back in their due-date buckets, which the next LOOKBACK_DAYS daily runs sweep again
+            logger.warning(json.dumps({**log_context, "status": "warn", "message": "Some requests could not be published."}, cls=DecimalEncoder))
+        if out_of_time():
+            logger.info(json.dumps({**log_context, "status": "info", "message": "Out of time. Re-invoking to continue."}, cls=DecimalEncoder))
+            try:
+                boto3.client('lambda').invoke(
+                    FunctionName=context.function_name,
+                    InvocationType='Event',
+                    Payload=json.dumps({"cycle_date": cycle_date.isoformat()})
+                )
+            except ClientError as e:
+                # Fail so Lambda retries this asynchronous invocation with the same cycle_date;
+                # claimed loans have left their buckets, so the retry only picks up the rest.
+                logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke autopay job."}, cls=DecimalEncoder))
+                raise
+        return json.loads(json.dumps({"job_id": job_id, "status": "RUNNING", "result": totals}, cls=DecimalEncoder))
+
+    logger.info(json.dumps({**log_context, "status": "info", "message": "Autopay run complete."}, cls=DecimalEncoder))
+    return json.loads(json.dumps({"job_id": job_id, "status": "COMPLETE", "result": totals}, cls=DecimalEncoder))
@@ -0,0 +1,282 @@
+import json
+import os
+import time
+import boto3
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import logging
+
+from fintech_common.autopay import bucket_keys
+from fintech_common.autosave import (
+    AUTOSAVE_INDEX_NAME, DEFAULT_AUTOSAVE_SHARDS, MAX_FUNDS_RETRIES, RETRY_DELAY_DAYS,
+    autosave_job_id, next_run_date, run_bucket
+)
+from fintech_common.parallel_scan import CapacityLimiter, from_dynamodb, merge_totals
+from fintech_common.savings import SavingsTables, TransferError, contribute
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+SAVINGS_TABLE_NAME = os.environ.get('SAVINGS_TABLE_NAME')
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME')
+LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME')
+AUTOSAVE_SHARDS = int(os.environ.get('AUTOSAVE_SHARDS', str(DEFAULT_AUTOSAVE_SHARDS))) # Must match set_savings_autosave
+AUTOSAVE_WORKERS = int(os.environ.get('AUTOSAVE_WORKERS', '16'))
+# Run dates this far back are swept too, so a missed run is caught up next time
+LOOKBACK_DAYS = int(os.environ.get('LOOKBACK_DAYS', '3'))
+# Contributions share the wallets table with live payments
+MAX_WCU_PER_SECOND = int(os.environ.get('MAX_WCU_PER_SECOND', '500'))
+
+TIME_SAFETY_MARGIN_MS = 60 * 1000
+JOB_TTL_SECONDS = 30 * 24 * 3600
+# Three transactional writes (wallet, goal, ledger) at twice the normal cost
+CONTRIBUTION_WCU = 6
+
+# --- DecimalEncoder ---
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+# ---
+
+class AutosaveRun:
+    """
+    One pass over the due buckets of a cycle. Each bucket (date x shard) is
+    drained by its own worker, AUTOSAVE_WORKERS at a time: query a page of
+    due goals from the index (which projects the instruction), then make
+    each contribution as one transaction that also moves the goal to its
+    next bucket. A goal that has left the bucket fails that condition, so
+    reruns and resumed runs never save twice for the same date.
+    """
+
+    def __init__(self, dynamodb_client, cycle_date, write_limiter, should_stop=None):
+        self.client = dynamodb_client
+        self.cycle_date = cycle_date
+        self.write_limiter = write_limiter
+        self.should_stop = should_stop or (lambda: False)
+        self.tables = SavingsTables(WALLETS_TABLE_NAME, SAVINGS_TABLE_NAME, LOG_TABLE_NAME)
+
+    def _move(self, goal_id, bucket, run_date, status, attempts):
+        """Moves a goal from `bucket` to `run_date` without contributing."""
+        try:
+            self.client.update_item(
+                TableName=SAVINGS_TABLE_NAME,
+                Key={'goal_id': {'S': goal_id}},
+                UpdateExpression=(
+                    "SET autosave_due_bucket = :next_bucket, autosave_next_run = :next_run, "
+                    "autosave_last_run = :cycle, autosave_last_status = :status, autosave_attempts = :attempts"
+                ),
+                ConditionExpression="autosave_due_bucket = :bucket",
+                ExpressionAttributeValues={
+                    ':next_bucket': {'S': run_bucket(run_date, goal_id, AUTOSAVE_SHARDS)},
+                    ':next_run': {'S': run_date.isoformat()},
+                    ':cycle': {'S': self.cycle_date.isoformat()},
+                    ':status': {'S': status},
+                    ':attempts': {'N': str(attempts)},
+                    ':bucket': {'S': bucket}
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def _stop(self, goal_id, bucket, status):
+        """Takes a goal whose wallet is gone out of the index."""
+        try:
+            self.client.update_item(
+                TableName=SAVINGS_TABLE_NAME,
+                Key={'goal_id': {'S': goal_id}},
+                UpdateExpression=(
+                    "SET autosave_enabled = :false, autosave_last_run = :cycle, autosave_last_status = :status "
+                    "REMOVE autosave_due_bucket, autosave_next_run, autosave_attempts"
+                ),
+                ConditionExpression="autosave_due_bucket = :bucket",
+                ExpressionAttributeValues={
+                    ':false': {'BOOL': False},
+                    ':cycle': {'S': self.cycle_date.isoformat()},
+                    ':status': {'S': status},
+                    ':bucket': {'S': bucket}
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def _save(self, goal, bucket):
+        """Makes one contribution. Returns the outcome name it is counted under."""
+        goal_id = goal['goal_id']
+        amount = goal['autosave_amount']
+        following = next_run_date(self.cycle_date, goal['autosave_frequency'], int(goal['autosave_day']))
+        goal_update = {
+            'set': (
+                "autosave_due_bucket = :next_bucket, autosave_next_run = :next_run, "
+                "autosave_last_run = :cycle, autosave_last_status = :saved, autosave_attempts = :no_attempts"
+            ),
+            'condition': "autosave_due_bucket = :bucket AND autosave_amount = :amount",
+            'values': {
+                ':next_bucket': {'S': run_bucket(following, goal_id, AUTOSAVE_SHARDS)},
+                ':next_run': {'S': following.isoformat()},
+                ':cycle': {'S': self.cycle_date.isoformat()},
+                ':saved': {'S': 'SAVED'},
+                ':no_attempts': {'N': '0'},
+                ':bucket': {'S': bucket}
+            }
+        }
+        self.write_limiter.consume(CONTRIBUTION_WCU)
+        try:
+            contribute(
+                self.client, self.tables, goal['wallet_id'], goal_id, amount,
+                goal.get('goal_name'),
+                details={'source': 'AUTOSAVE', 'autosave_cycle': self.cycle_date.isoformat()},
+                goal_update=goal_update
+            )
+            return 'saved'
+        except TransferError as te:
+            if te.reason == 'INSUFFICIENT_FUNDS':
+                attempts = int(goal.get('autosave_attempts', 0)) + 1
+                retry_date = self.cycle_date + timedelta(days=RETRY_DELAY_DAYS)
+                if attempts <= MAX_FUNDS_RETRIES and retry_date < following:
+                    self._move(goal_id, bucket, retry_date, 'RETRY_PENDING', attempts)
+                    return 'retried'
+                # Out of retries: skip this cycle and keep the regular schedule
+                self._move(goal_id, bucket, following, 'INSUFFICIENT_FUNDS', 0)
+                return 'missed'
+            if te.reason == 'WALLET_NOT_FOUND':
+                self._stop(goal_id, bucket, 'WALLET_NOT_FOUND')
+                return 'stopped'
+            return 'skipped'  # Already saved by an earlier pass, or the instruction changed
+
+    def drain_bucket(self, bucket):
+        totals = {'goals_due': 0, 'goals_saved': 0, 'goals_retried': 0, 'goals_missed': 0,
+                  'goals_stopped': 0, 'goals_skipped': 0, 'amount_saved': Decimal('0')}
+        query_kwargs = {
+            'TableName': SAVINGS_TABLE_NAME,
+            'IndexName': AUTOSAVE_INDEX_NAME,
+            'KeyConditionExpression': "autosave_due_bucket = :bucket",
+            'ExpressionAttributeValues': {':bucket': {'S': bucket}}
+        }
+        while True:
+            page = self.client.query(**query_kwargs)
+            goals = [from_dynamodb(item) for item in page.get('Items', [])]
+            totals['goals_due'] += len(goals)
+            for goal in goals:
+                outcome = self._save(goal, bucket)
+                totals[f'goals_{outcome}'] += 1
+                if outcome == 'saved':
+                    totals['amount_saved'] += goal['autosave_amount']
+
+            # Handled goals have left the bucket, so stopping here loses nothing
+            if 'LastEvaluatedKey' not in page or self.should_stop():
+                totals['complete'] = 'LastEvaluatedKey' not in page
+                return totals
+            query_kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    def run(self):
+        buckets = [
+            key
+            for days_back in range(LOOKBACK_DAYS, -1, -1)
+            for key in bucket_keys(self.cycle_date - timedelta(days=days_back), AUTOSAVE_SHARDS)
+        ]
+        with ThreadPoolExecutor(max_workers=AUTOSAVE_WORKERS) as executor:
+            results = list(executor.map(self.drain_bucket, buckets))
+        complete = all(r.pop('complete') for r in results)
+        totals = {}
+        for r in results:
+            totals = merge_totals(totals, r)
+        return totals, complete
+
+
+def run_savings_autosave(event, context):
+    """
+    Scheduled job (EventBridge, daily).
+    Makes every recurring savings contribution due on the cycle date (plus
+    LOOKBACK_DAYS of missed dates) by querying the sharded autosave-due-index,
+    with AUTOSAVE_WORKERS buckets drained in parallel. Contributions use the
+    same wallet -> goal transaction as add_to_savings_goal. A wallet that is
+    short is retried the next day, up to MAX_FUNDS_RETRIES times, rather
+    than failing the run. Totals are recorded on the job item; if the run
+    nears the Lambda timeout it re-invokes itself and carries on.
+    Optional event keys: cycle_date (YYYY-MM-DD).
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    dynamodb = boto3.resource('dynamodb')
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
+    # ---
+
+    log_context = {"action": "run_savings_autosave"}
+
+    if not SAVINGS_TABLE_NAME or not WALLETS_TABLE_NAME or not LOG_TABLE_NAME or not jobs_table:
+        logger.error(json.dumps({**log_context, "status": "error", "message": "FATAL: Environment variables not set."}))
+        raise Exception("Server configuration error.")
+
+    cycle_date = date.fromisoformat(event.get('cycle_date') or datetime.now(timezone.utc).date().isoformat())
+    job_id = autosave_job_id(cycle_date.isoformat())
+    log_context.update({"job_id": job_id, "cycle_date": cycle_date.isoformat()})
+
+    existing = jobs_table.get_item(Key={'job_id': job_id}).get('Item')
+    if existing and existing.get('status') == 'COMPLETE':
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Auto-save already complete for this date."}))
+        return json.loads(json.dumps(existing, cls=DecimalEncoder))
+    if not existing:
+        jobs_table.put_item(Item={
+            'job_id': job_id,
+            'job_type': 'SAVINGS_AUTOSAVE',
+            'status': 'RUNNING',
+            'started_at': int(time.time()),
+            'expires_at': int(time.time()) + JOB_TTL_SECONDS
+        })
+
+    def out_of_time():
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return remaining is not None and remaining() < TIME_SAFETY_MARGIN_MS
+
+    logger.info(json.dumps({**log_context, "status": "info", "shards": AUTOSAVE_SHARDS, "lookback_days": LOOKBACK_DAYS, "message": "Starting auto-save run."}))
+    autosave = AutosaveRun(dynamodb_client, cycle_date, CapacityLimiter(MAX_WCU_PER_SECOND), should_stop=out_of_time)
+    totals, complete = autosave.run()
+
+    # Each pass only sees goals the previous passes left behind, so totals add up
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression=(
+            "SET #status = :status, updated_at = :now "
+            "ADD goals_due :due, goals_saved :saved, goals_retried :retried, goals_missed :missed, "
+            "goals_stopped :stopped, goals_skipped :skipped, amount_saved :amount"
+        ),
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={
+            ':status': 'COMPLETE' if complete else 'RUNNING',
+            ':now': int(time.time()),
+            ':due': totals.get('goals_due', 0),
+            ':saved': totals.get('goals_saved', 0),
+            ':retried': totals.get('goals_retried', 0),
+            ':missed': totals.get('goals_missed', 0),
+            ':stopped': totals.get('goals_stopped', 0),
+            ':skipped': totals.get('goals_skipped', 0),
+            ':amount': totals.get('amount_saved', Decimal('0'))
+        }
+    )
+    log_context["result"] = totals
+
+    if not complete:
+        logger.info(json.dumps({**log_context, "status": "info", "message": "Out of time. Re-invoking to continue."}, cls=DecimalEncoder))
+        try:
+            boto3.client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({"cycle_date": cycle_date.isoformat()})
+            )
+        except ClientError as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_code": e.response['Error']['Code'], "message": "Failed to re-invoke auto-save job."}, cls=DecimalEncoder))
+        return json.loads(json.dumps({"job_id": job_id, "status": "RUNNING", "result": totals}, cls=DecimalEncoder))
+
+    logger.info(json.dumps({**log_context, "status": "info", "message": "Auto-save run complete."}, cls=DecimalEncoder))
+    return json.loads(json.dumps({"job_id": job_id, "status": "COMPLETE", "result": totals}, cls=DecimalEncoder))
@@ -0,0 +1,134 @@
+import json
+import os
+import boto3
+from datetime import datetime, timezone
+from decimal import Decimal
+from urllib.parse import unquote
+from botocore.exceptions import ClientError
+from fintech_common.autopay import DEFAULT_AUTOPAY_SHARDS, autopay_day, due_bucket, next_due_date
+import logging
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
+AUTOPAY_SHARDS = int(os.environ.get('AUTOPAY_SHARDS', str(DEFAULT_AUTOPAY_SHARDS))) # Must match run_loan_autopay
+ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
+
+# --- CORS Headers ---
+OPTIONS_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Allow-Credentials": True
+}
+POST_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Credentials": True
+}
+# ---
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+
+def set_loan_autopay(event, context):
+    """
+    API: POST /loan/{loan_id}/autopay
+    Body: {"enabled": true, "day_of_month": 1-28} or {"enabled": false}.
+    Enrolling puts an APPROVED loan into the autopay due-date index for its
+    next due date; run_loan_autopay requests the minimum payment on that day.
+    Disabling removes it from the index.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb = boto3.resource('dynamodb')
+    table = dynamodb.Table(TABLE_NAME) if TABLE_NAME else None
+    # ---
+
+    # --- CORS Preflight Check ---
+    http_method = event.get('httpMethod', '').upper()
+    if http_method == 'OPTIONS':
+        logger.info("Handling OPTIONS preflight request for set_loan_autopay")
+        return { "statusCode": 200, "headers": OPTIONS_CORS_HEADERS, "body": "" }
+
+    if not table:
+        log_message = {
+            "status": "error",
+            "action": "set_loan_autopay",
+            "message": "FATAL: DYNAMODB_TABLE_NAME environment variable not set."
+        }
+        logger.error(json.dumps(log_message))
+        return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Server configuration error."}) }
+
+    if http_method == 'POST':
+        log_context = {"action": "set_loan_autopay"}
+        try:
+            loan_id = unquote(event['pathParameters']['loan_id']).strip()
+            body = json.loads(event.get('body') or '{}')
+            enabled = body.get('enabled', True)
+            log_context.update({"loan_id": loan_id, "enabled": enabled})
+
+            if not isinstance(enabled, bool):
+                raise ValueError("enabled must be true or false.")
+
+            if enabled:
+                today = datetime.now(timezone.utc).date()
+                day = autopay_day(body.get('day_of_month', min(today.day, 28)))
+                due_date = next_due_date(today, day)
+                response = table.update_item(
+                    Key={'loan_id': loan_id},
+                    UpdateExpression=(
+                        "SET autopay_enabled = :true, autopay_day = :day, "
+                        "next_due_date = :due, autopay_due_bucket = :bucket"
+                    ),
+                    ConditionExpression="#status = :approved",
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={
+                        ':true': True,
+                        ':day': day,
+                        ':due': due_date.isoformat(),
+                        ':bucket': due_bucket(due_date, loan_id, AUTOPAY_SHARDS),
+                        ':approved': 'APPROVED'
+                    },
+                    ReturnValues="ALL_NEW"
+                )
+            else:
+                response = table.update_item(
+                    Key={'loan_id': loan_id},
+                    UpdateExpression="SET autopay_enabled = :false REMOVE autopay_due_bucket, next_due_date",
+                    ConditionExpression="attribute_exists(loan_id)",
+                    ExpressionAttributeValues={':false': False},
+                    ReturnValues="ALL_NEW"
+                )
+
+            loan = response.get('Attributes', {})
+            logger.info(json.dumps({**log_context, "status": "info", "next_due_date": loan.get('next_due_date'), "message": "Autopay updated."}))
+
+            return {
+                "statusCode": 200,
+                "headers": POST_CORS_HEADERS,
+                "body": json.dumps({"message": "Autopay updated.", "loan": loan}, cls=DecimalEncoder)
+            }
+
+        except (ValueError, TypeError) as ve:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+            return { "statusCode": 400, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            log_context["error_code"] = error_code
+            if error_code == 'ConditionalCheckFailedException':
+                logger.warning(json.dumps({**log_context, "status": "warn", "message": "Loan not found or not APPROVED."}))
+                return { "statusCode": 409, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Loan not found or not in 'APPROVED' state."}) }
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Database error.", "error": str(e)}) }
+        except Exception as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Failed to update autopay.", "error": str(e)}) }
+    else:
+         return { "statusCode": 405, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Method {http_method} not allowed."}) }
@@ -0,0 +1,144 @@
+import json
+import os
+import boto3
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from urllib.parse import unquote
+from botocore.exceptions import ClientError
+from fintech_common.autosave import DEFAULT_AUTOSAVE_SHARDS, autosave_schedule, next_run_date, run_bucket
+import logging
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+SAVINGS_TABLE_NAME = os.environ.get('SAVINGS_TABLE_NAME')
+AUTOSAVE_SHARDS = int(os.environ.get('AUTOSAVE_SHARDS', str(DEFAULT_AUTOSAVE_SHARDS))) # Must match run_savings_autosave
+ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
+
+# --- CORS Headers ---
+OPTIONS_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Allow-Credentials": True
+}
+POST_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Credentials": True
+}
+# ---
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+
+def set_savings_autosave(event, context):
+    """
+    API: POST /savings-goal/{goal_id}/autosave
+    Body: {"wallet_id": ..., "enabled": true, "amount": "25.00",
+           "frequency": "WEEKLY" | "MONTHLY", "day": 0-6 | 1-28}
+    or {"wallet_id": ..., "enabled": false}.
+    Enabling stores the standing instruction on the goal and puts it into
+    the autosave due-date index for its next run; run_savings_autosave
+    moves the amount from the wallet on that day. Disabling removes it.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb = boto3.resource('dynamodb')
+    table = dynamodb.Table(SAVINGS_TABLE_NAME) if SAVINGS_TABLE_NAME else None
+    # ---
+
+    # --- CORS Preflight Check ---
+    http_method = event.get('httpMethod', '').upper()
+    if http_method == 'OPTIONS':
+        logger.info("Handling OPTIONS preflight request for set_savings_autosave")
+        return { "statusCode": 200, "headers": OPTIONS_CORS_HEADERS, "body": "" }
+
+    if not table:
+        log_message = {
+            "status": "error",
+            "action": "set_savings_autosave",
+            "message": "FATAL: SAVINGS_TABLE_NAME environment variable not set."
+        }
+        logger.error(json.dumps(log_message))
+        return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Server configuration error."}) }
+
+    if http_method == 'POST':
+        log_context = {"action": "set_savings_autosave"}
+        try:
+            goal_id = unquote(event['pathParameters']['goal_id']).strip()
+            body = json.loads(event.get('body') or '{}')
+            wallet_id = body.get('wallet_id')
+            enabled = body.get('enabled', True)
+            log_context.update({"goal_id": goal_id, "wallet_id": wallet_id, "enabled": enabled})
+
+            if not wallet_id:
+                raise ValueError("wallet_id is required.")
+            if not isinstance(enabled, bool):
+                raise ValueError("enabled must be true or false.")
+
+            if enabled:
+                amount = Decimal(str(body.get('amount', '0')))
+                if amount <= 0:
+                    raise ValueError("amount must be positive.")
+                frequency, day = autosave_schedule(body.get('frequency'), body.get('day'))
+                run_date = next_run_date(datetime.now(timezone.utc).date(), frequency, day)
+                response = table.update_item(
+                    Key={'goal_id': goal_id},
+                    UpdateExpression=(
+                        "SET autosave_enabled = :true, autosave_amount = :amount, autosave_frequency = :frequency, "
+                        "autosave_day = :day, autosave_next_run = :next_run, autosave_due_bucket = :bucket, "
+                        "autosave_attempts = :zero"
+                    ),
+                    ConditionExpression="attribute_exists(goal_id) AND wallet_id = :wallet_id",
+                    ExpressionAttributeValues={
+                        ':true': True,
+                        ':amount': amount,
+                        ':frequency': frequency,
+                        ':day': day,
+                        ':next_run': run_date.isoformat(),
+                        ':bucket': run_bucket(run_date, goal_id, AUTOSAVE_SHARDS),
+                        ':zero': 0,
+                        ':wallet_id': wallet_id
+                    },
+                    ReturnValues="ALL_NEW"
+                )
+            else:
+                response = table.update_item(
+                    Key={'goal_id': goal_id},
+                    UpdateExpression="SET autosave_enabled = :false REMOVE autosave_due_bucket, autosave_next_run, autosave_attempts",
+                    ConditionExpression="attribute_exists(goal_id) AND wallet_id = :wallet_id",
+                    ExpressionAttributeValues={':false': False, ':wallet_id': wallet_id},
+                    ReturnValues="ALL_NEW"
+                )
+
+            goal = response.get('Attributes', {})
+            logger.info(json.dumps({**log_context, "status": "info", "next_run": goal.get('autosave_next_run'), "message": "Auto-save updated."}))
+
+            return {
+                "statusCode": 200,
+                "headers": POST_CORS_HEADERS,
+                "body": json.dumps({"message": "Auto-save updated.", "goal": goal}, cls=DecimalEncoder)
+            }
+
+        except (ValueError, TypeError, InvalidOperation) as ve:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+            return { "statusCode": 400, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            log_context["error_code"] = error_code
+            if error_code == 'ConditionalCheckFailedException':
+                logger.warning(json.dumps({**log_context, "status": "warn", "message": "Goal not found or wallet ID mismatch."}))
+                return { "statusCode": 404, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Savings goal not found."}) }
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Database error.", "error": str(e)}) }
+        except Exception as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Failed to update auto-save.", "error": str(e)}) }
+    else:
+         return { "statusCode": 405, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Method {http_method} not allowed."}) }
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+import boto3
+from decimal import Decimal
+from urllib.parse import unquote
+from botocore.exceptions import ClientError
+import logging
+
+# --- Set up logger ---
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+# ---
+
+# --- Environment Variables ---
+ROUNDUPS_TABLE_NAME = os.environ.get('ROUNDUPS_TABLE_NAME')
+SAVINGS_TABLE_NAME = os.environ.get('SAVINGS_TABLE_NAME')
+ALLOWED_ORIGIN = os.environ.get("CORS_ORIGIN", "*")
+
+# --- CORS Headers ---
+OPTIONS_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Allow-Credentials": True
+}
+POST_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Credentials": True
+}
+# ---
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+        return super(DecimalEncoder, self).default(o)
+
+def set_savings_roundup(event, context):
+    """
+    API: POST /savings-goal/{goal_id}/roundup
+    Body: {"wallet_id": ..., "enabled": true, "goal_name": ...}
+    or {"wallet_id": ..., "enabled": false}.
+    Enabling points the wallet's round-ups at this goal (a wallet rounds up
+    into one goal at a time, so this replaces any earlier choice); the goal
+    is checked in the same transaction. Disabling stops round-ups into this
+    goal and drops any not yet swept.
+    """
+
+    # --- Initialize boto3 inside the handler ---
+    dynamodb_client = boto3.client('dynamodb')
+    # ---
+
+    # --- CORS Preflight Check ---
+    http_method = event.get('httpMethod', '').upper()
+    if http_method == 'OPTIONS':
+        logger.info("Handling OPTIONS preflight request for set_savings_roundup")
+        return { "statusCode": 200, "headers": OPTIONS_CORS_HEADERS, "body": "" }
+
+    if not ROUNDUPS_TABLE_NAME or not SAVINGS_TABLE_NAME:
+        log_message = {
+            "status": "error",
+            "action": "set_savings_roundup",
+            "message": "FATAL: ROUNDUPS_TABLE_NAME or SAVINGS_TABLE_NAME environment variable not set."
+        }
+        logger.error(json.dumps(log_message))
+        return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Server configuration error."}) }
+
+    if http_method == 'POST':
+        log_context = {"action": "set_savings_roundup"}
+        try:
+            goal_id = unquote(event['pathParameters']['goal_id']).strip()
+            body = json.loads(event.get('body') or '{}')
+            wallet_id = body.get('wallet_id')
+            enabled = body.get('enabled', True)
+            log_context.update({"goal_id": goal_id, "wallet_id": wallet_id, "enabled": enabled})
+
+            if not wallet_id:
+                raise ValueError("wallet_id is required.")
+            if not isinstance(enabled, bool):
+                raise ValueError("enabled must be true or false.")
+
+            if enabled:
+                goal_name = body.get('goal_name') or 'Savings Goal'
+                dynamodb_client.transact_write_items(
+                    TransactItems=[
+                        {'ConditionCheck': {
+                            'TableName': SAVINGS_TABLE_NAME,
+                            'Key': {'goal_id': {'S': goal_id}},
+                            'ConditionExpression': "attribute_exists(goal_id) AND wallet_id = :wallet_id",
+                            'ExpressionAttributeValues': {':wallet_id': {'S': wallet_id}}
+                        }},
+                        {'Update': {
+                            'TableName': ROUNDUPS_TABLE_NAME,
+                            'Key': {'wallet_id': {'S': wallet_id}},
+                            'UpdateExpression': "SET goal_id = :goal_id, goal_name = :goal_name, enabled = :true, enrolled_at = :now",
+                            'ExpressionAttributeValues': {
+                                ':goal_id': {'S': goal_id},
+                                ':goal_name': {'S': goal_name},
+                                ':true': {'BOOL': True},
+                                ':now': {'N': str(int(time.time()))}
+                            }
+                        }}
+                    ]
+                )
+            else:
+                dynamodb_client.update_item(
+                    TableName=ROUNDUPS_TABLE_NAME,
+                    Key={'wallet_id': {'S': wallet_id}},
+                    UpdateExpression="SET enabled = :false REMOVE pending_amount, pending_count, pending_tx, pending_since",
+                    ConditionExpression="goal_id = :goal_id",
+                    ExpressionAttributeValues={':false': {'BOOL': False}, ':goal_id': {'S': goal_id}}
+                )
+
+            logger.info(json.dumps({**log_context, "status": "info", "message": "Round-ups updated."}))
+
+            return {
+                "statusCode": 200,
+                "headers": POST_CORS_HEADERS,
+                "body": json.dumps({"message": "Round-ups updated.", "goal_id": goal_id, "enabled": enabled}, cls=DecimalEncoder)
+            }
+
+        except (ValueError, TypeError) as ve:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve)}))
+            return { "statusCode": 400, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Invalid input: {str(ve)}"}) }
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            log_context["error_code"] = error_code
+            if error_code in ('ConditionalCheckFailedException', 'TransactionCanceledException'):
+                logger.warning(json.dumps({**log_context, "status": "warn", "message": "Goal not found, wallet ID mismatch, or round-ups not pointed at this goal."}))
+                return { "statusCode": 404, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Savings goal not found."}) }
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Database error.", "error": str(e)}) }
+        except Exception as e:
+            logger.error(json.dumps({**log_context, "status": "error", "error_message": str(e)}))
+            return { "statusCode": 500, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": "Failed to update round-ups.", "error": str(e)}) }
+    else:
+         return { "statusCode": 405, "headers": POST_CORS_HEADERS, "body": json.dumps({"message": f"Method {http_method} not allowed."}) }
@@ -0,0 +1,3 @@
+# Shared code for the Fintech Ecosystem Lambdas.
+# Packaged as a Lambda layer (see terraform/main.tf) so every service
+# imports the same record models and helpers instead of copy-pasting them.
@@ -0,0 +1,64 @@
+"""
+Loan autopay scheduling.
+
+A loan enrolled in autopay carries `autopay_due_bucket`, a sparse GSI key
+of the form "<due date>#<shard>". The shard is a stable hash of the
+loan_id, so one day's due loans are spread over AUTOPAY_SHARDS index
+partitions instead of landing on a single hot key. The scheduler queries
+every shard of a date in parallel; claiming a loan moves its bucket to
+the next due date, and paying the loan off removes it from the index.
+"""
+import zlib
+from datetime import date
+
+AUTOPAY_INDEX_NAME = 'autopay-due-index'
+DEFAULT_AUTOPAY_SHARDS = 16
+MAX_AUTOPAY_DAY = 28  # Every month has this day
+
+
+def shard_for(loan_id, shards=DEFAULT_AUTOPAY_SHARDS):
+    return zlib.crc32(loan_id.encode('utf-8')) % shards
+
+
+def due_bucket(due_date, loan_id, shards=DEFAULT_AUTOPAY_SHARDS):
+    return bucket_key(due_date, shard_for(loan_id, shards))
+
+
+def bucket_key(due_date, shard):
+    return f"{due_date.isoformat()}#{shard:02d}"
+
+
+def bucket_keys(due_date, shards=DEFAULT_AUTOPAY_SHARDS):
+    """All shard keys for one due date."""
+    return [bucket_key(due_date, shard) for shard in range(shards)]
+
+
+def next_due_date(after, day_of_month):
+    """The first `day_of_month` strictly after `after`."""
+    if after.day < day_of_month:
+        return after.replace(day=day_of_month)
+    if after.month == 12:
+        return date(after.year + 1, 1, day_of_month)
+    return date(after.year, after.month + 1, day_of_month)
+
+
+def autopay_day(value):
+    """Validates a requested autopay day of month (1..28)."""
+    day = int(value)
+    if day < 1 or day > MAX_AUTOPAY_DAY:
+        raise ValueError(f"day_of_month must be between 1 and {MAX_AUTOPAY_DAY}.")
+    return day
+
+
+# --- Batch-jobs table keys ---
+# Outcomes arrive one SNS batch at a time for the whole book, so they are
+# counted across OUTCOME_COUNTER_SHARDS items rather than one hot item.
+OUTCOME_COUNTER_SHARDS = 10
+
+
+def autopay_job_id(cycle_date):
+    return f"loan-autopay#{cycle_date}"
+
+
+def outcome_counter_ids(cycle_date):
+    return [f"{autopay_job_id(cycle_date)}#outcomes#{shard}" for shard in range(OUTCOME_COUNTER_SHARDS)]
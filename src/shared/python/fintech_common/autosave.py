@@ -0,0 +1,57 @@
+"""
+Recurring auto-save: standing instructions that move a fixed amount from
+the wallet into a savings goal every week or month.
+
+The instruction lives on the goal item (autosave_amount, _frequency, _day)
+and a goal with one enabled carries `autosave_due_bucket`, the key of the
+sparse autosave-due-index. Buckets are "<run date>#<shard>" exactly like
+the loan autopay index (see autopay.py), so a day's instructions are spread
+over AUTOSAVE_SHARDS partitions and drained in parallel.
+
+Each contribution is fintech_common.savings.contribute() with the move to
+the next bucket added to the goal's write, so a run (or a rerun) can never
+save twice for the same date. When the wallet is short, the goal is moved
+to tomorrow's bucket instead, up to MAX_FUNDS_RETRIES times, after which
+the cycle is skipped and the next regular run date is kept.
+"""
+from datetime import timedelta
+
+from fintech_common.autopay import due_bucket, next_due_date
+
+AUTOSAVE_INDEX_NAME = 'autosave-due-index'
+DEFAULT_AUTOSAVE_SHARDS = 16
+FREQUENCIES = ('WEEKLY', 'MONTHLY')
+MAX_AUTOSAVE_DAY = 28  # Every month has this day
+MAX_FUNDS_RETRIES = 3
+RETRY_DELAY_DAYS = 1
+
+
+def autosave_schedule(frequency, day):
+    """
+    Validates a requested schedule. WEEKLY days are 0 (Monday) to 6,
+    MONTHLY days are 1 to 28. Returns (frequency, day).
+    """
+    frequency = str(frequency or '').upper()
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"frequency must be one of {', '.join(FREQUENCIES)}.")
+    day = int(day)
+    if frequency == 'WEEKLY' and not 0 <= day <= 6:
+        raise ValueError("day must be between 0 (Monday) and 6 for WEEKLY.")
+    if frequency == 'MONTHLY' and not 1 <= day <= MAX_AUTOSAVE_DAY:
+        raise ValueError(f"day must be between 1 and {MAX_AUTOSAVE_DAY} for MONTHLY.")
+    return frequency, day
+
+
+def next_run_date(after, frequency, day):
+    """The first scheduled run strictly after `after`."""
+    if frequency == 'WEEKLY':
+        return after + timedelta(days=(day - after.weekday() - 1) % 7 + 1)
+    return next_due_date(after, day)
+
+
+def run_bucket(run_date, goal_id, shards=DEFAULT_AUTOSAVE_SHARDS):
+    return due_bucket(run_date, goal_id, shards)
+
+
+def autosave_job_id(cycle_date):
+    return f"savings-autosave#{cycle_date}"
@@ -0,0 +1,50 @@
+"""
+Per-container cache of onboarding credit scores.
+
+Onboarding writes `credit_score` onto the user and the wallet. Pricing
+only needs the score by wallet_id, so lookups read a single projected
+attribute from the wallets table and keep it in memory for a TTL. A warm
+container prices repeat applications without a DynamoDB read.
+"""
+import time
+from collections import OrderedDict
+
+
+class CreditScoreCache:
+    """
+    LRU + TTL map of wallet_id -> credit score (int, or None when the wallet
+    has no score, e.g. wallets created before scores were stored).
+    Misses are cached too, so unknown wallets don't cost a read every time.
+    """
+
+    def __init__(self, ttl_seconds=900, max_entries=10000, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+
+    def get(self, wallets_table, wallet_id):
+        now = self._clock()
+        cached = self._entries.get(wallet_id)
+        if cached is not None and cached[1] > now:
+            self._entries.move_to_end(wallet_id)
+            return cached[0]
+
+        item = wallets_table.get_item(
+            Key={'wallet_id': wallet_id},
+            ProjectionExpression='credit_score'
+        ).get('Item') or {}
+        score = item.get('credit_score')
+        score = int(score) if score is not None else None
+
+        self._entries[wallet_id] = (score, now + self.ttl_seconds)
+        self._entries.move_to_end(wallet_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return score
+
+    def invalidate(self, wallet_id=None):
+        if wallet_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(wallet_id, None)
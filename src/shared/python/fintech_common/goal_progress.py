@@ -0,0 +1,70 @@
+"""
+Savings goal progress and completion projections.
+
+savings.contribute() keeps running contribution stats on every goal it
+credits (contributed_total, contribution_count, first_contribution_at,
+last_contribution_at), so the average contribution rate comes straight
+from the goal item and listing a wallet's goals needs no ledger reads.
+
+project_goals() works column-wise over a whole page of goals: each input
+is pulled into its own list once, and every output is one pass over
+those lists, rather than a per-goal chain of lookups.
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_CEILING, Decimal
+
+from fintech_common.records import to_decimal
+
+CENT = Decimal('0.01')
+SECONDS_PER_DAY = Decimal(86400)
+# A single recent contribution says little about the pace; average over at least this long
+MIN_RATE_WINDOW_DAYS = Decimal(7)
+
+
+def _column(goals, name):
+    return [goal.get(name) for goal in goals]
+
+
+def _decimals(values, default=None):
+    return [to_decimal(value, 'goal') if value is not None else default for value in values]
+
+
+def project_goals(goals, now):
+    """
+    Returns one progress dict per goal, in order: percent_complete,
+    average_daily_contribution and projected_completion_date (ISO date).
+    The rate and date are None for goals with no tracked contributions,
+    and the date is None once a goal is complete.
+    """
+    current = _decimals(_column(goals, 'current_amount'), Decimal('0'))
+    target = _decimals(_column(goals, 'target_amount'))
+    contributed = _decimals(_column(goals, 'contributed_total'))
+    first_at = _decimals(_column(goals, 'first_contribution_at'))
+
+    percent = [
+        min(c / t * 100, Decimal(100)).quantize(CENT) if t else None
+        for c, t in zip(current, target)
+    ]
+    window_days = [
+        max((Decimal(now) - f) / SECONDS_PER_DAY, MIN_RATE_WINDOW_DAYS) if f is not None else None
+        for f in first_at
+    ]
+    rate = [
+        total / days if total is not None and days is not None else None
+        for total, days in zip(contributed, window_days)
+    ]
+    remaining = [t - c if t is not None else None for c, t in zip(current, target)]
+    days_left = [
+        (left / r).to_integral_value(rounding=ROUND_CEILING) if left is not None and left > 0 and r else None
+        for left, r in zip(remaining, rate)
+    ]
+
+    today = datetime.fromtimestamp(now, timezone.utc).date()
+    return [
+        {
+            'percent_complete': p,
+            'average_daily_contribution': r.quantize(CENT) if r is not None else None,
+            'projected_completion_date': (today + timedelta(days=int(d))).isoformat() if d is not None else None
+        }
+        for p, r, d in zip(percent, rate, days_left)
+    ]
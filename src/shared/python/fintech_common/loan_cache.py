@@ -0,0 +1,71 @@
+"""
+Short-lived, versioned cache of loan items.
+
+Every write that changes a loan's status or remaining_balance also bumps
+its `version` (append VERSION_BUMP to the SET clause). A warm container
+keeps the loans it has read for a few seconds, so a burst of reads for
+the same loan costs one get_item.
+
+Writers live in other Lambdas and cannot reach this cache, so an entry
+can lag a write by up to the TTL. A read-only view (get_loan) accepts
+that. Anything that acts on a cached loan passes the version it saw into
+the conditional write downstream: if the loan has moved on, the condition
+fails and the write re-checks against the current item (repayments credit
+back whatever no longer fits), so a stale entry can never produce a wrong
+update. A request is only turned away after a refresh=True read, which is
+consistent and replaces the container's entry.
+"""
+import time
+from collections import OrderedDict
+
+VERSION_BUMP = "version = if_not_exists(version, :zero_version) + :one_version"
+VERSION_BUMP_VALUES = {':zero_version': 0, ':one_version': 1}
+# The same values for the low-level client
+VERSION_BUMP_VALUES_DYNAMODB = {':zero_version': {'N': '0'}, ':one_version': {'N': '1'}}
+
+
+def loan_version(item):
+    """Version of a loan item; loans written before versioning count as 0."""
+    return int(item.get('version', 0))
+
+
+class LoanCache:
+    """LRU + TTL map of loan_id -> loan item. Missing loans are not cached."""
+
+    def __init__(self, ttl_seconds=5, max_entries=1000, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+
+    def get(self, loans_table, loan_id, refresh=False):
+        """Returns the loan item (or None), reading through to `loans_table` when needed."""
+        now = self._clock()
+        cached = self._entries.get(loan_id)
+        if not refresh and cached is not None and cached[1] > now:
+            self._entries.move_to_end(loan_id)
+            return cached[0]
+
+        item = loans_table.get_item(Key={'loan_id': loan_id}, ConsistentRead=refresh).get('Item')
+        if item is None or refresh:
+            self._entries.pop(loan_id, None)  # A consistent read always wins over what is cached
+        if item is not None:
+            self.put(item, now)
+        return item
+
+    def put(self, item, now=None):
+        """Caches an item the caller already has (e.g. ReturnValues of its own write)."""
+        cached = self._entries.get(item['loan_id'])
+        if cached is not None and loan_version(cached[0]) > loan_version(item):
+            return  # Never replace a newer version with an older one
+        now = self._clock() if now is None else now
+        self._entries[item['loan_id']] = (item, now + self.ttl_seconds)
+        self._entries.move_to_end(item['loan_id'])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, loan_id=None):
+        if loan_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(loan_id, None)
@@ -0,0 +1,24 @@
+"""
+Hot/cold split of a wallet's loans.
+
+Open loans (PENDING, APPROVED) carry `active_wallet_id`, the key of the
+sparse active-wallet-index, so the dashboard query only ever touches the
+handful of loans a customer is still paying. Closing a loan (PAID,
+REJECTED) removes that attribute and sets `closed_wallet_id` plus
+`closed_at`, which key the wallet-history-index: history is read newest
+first, a page at a time.
+
+Writers that close a loan append CLOSE_LOAN_SET to their SET clause and
+CLOSE_LOAN_REMOVE to their REMOVE clause; archive_closed_loans backfills
+loans written before the split.
+"""
+
+ACTIVE_INDEX_NAME = 'active-wallet-index'
+HISTORY_INDEX_NAME = 'wallet-history-index'
+
+OPEN_STATUSES = ('PENDING', 'APPROVED')
+CLOSED_STATUSES = ('PAID', 'REJECTED')
+
+# Needs :closed_at in the expression values
+CLOSE_LOAN_SET = "closed_wallet_id = wallet_id, closed_at = :closed_at"
+CLOSE_LOAN_REMOVE = "active_wallet_id"
@@ -0,0 +1,82 @@
+"""
+Onboarding identifiers.
+
+A user's id is derived from their (normalised) email and the onboarding
+execution's name from the user id, so every path that starts onboarding
+for the same person (the API, a bulk import, a retry of either) lands on
+the same user record and the same Step Functions execution. Starting an
+execution name that is already in use either returns the running execution
+(same input) or fails with ExecutionAlreadyExists, never running (and
+billing) the workflow twice, and the execution ARN can be stored on the
+user before the execution is started.
+
+An application that has ended without an account (rejected, or the
+execution failed) is not deduplicated against: applying again moves the
+user to a new attempt, whose execution is named
+onboarding-<user_id>-<attempt>, and that attempt is started at most once.
+
+Users created before ids were derived have random ids (and executions
+named otherwise), so a new user is only claimed once the email-index shows
+no record for the email under any id; an applicant found there keeps their
+record, and their old execution is never started again by name.
+"""
+import time
+import uuid
+
+# Fixed namespace for uuid5 user ids; changing it would re-key every user
+USER_ID_NAMESPACE = uuid.UUID('6f1c2d3e-8a4b-5c6d-9e0f-1a2b3c4d5e6f')
+INITIAL_STATUS = 'PENDING_ID_VERIFICATION'
+# Final decisions after which the applicant may apply again
+REJECTED_STATUSES = ('REJECTED', 'REJECTED_MANUAL')
+EMAIL_INDEX_NAME = 'email-index'
+
+
+def normalise_email(email):
+    """Lower-cased and stripped; raises ValueError if it is not plausibly an email."""
+    if not isinstance(email, str) or '@' not in email.strip():
+        raise ValueError("A valid email is required.")
+    return email.strip().lower()
+
+
+def email_spellings(email):
+    """The emails to look a user up by: normalised, and as given (older records store it as sent)."""
+    normalised = normalise_email(email)
+    return [normalised] if email == normalised else [normalised, email]
+
+
+def onboarding_user_id(email):
+    return str(uuid.uuid5(USER_ID_NAMESPACE, normalise_email(email)))
+
+
+def onboarding_attempt(user_item):
+    """The user's current application attempt; records from before re-applications are attempt 1."""
+    return int(user_item.get('onboarding_attempt', 1))
+
+
+def execution_name(user_id, attempt=1):
+    """The first attempt keeps the original name, so existing executions are still found."""
+    return f"onboarding-{user_id}" if attempt <= 1 else f"onboarding-{user_id}-{attempt}"
+
+
+def execution_arn(state_machine_arn, name):
+    """The ARN an execution called `name` of `state_machine_arn` has (or will have)."""
+    return f"{state_machine_arn.replace(':stateMachine:', ':execution:', 1)}:{name}"
+
+
+def derived_execution(state_machine_arn, user_item):
+    """Whether the user's stored execution is the one execution_name() gives (not so for users from before derived ids)."""
+    name = execution_name(user_item['user_id'], onboarding_attempt(user_item))
+    return user_item.get('step_function_arn') == execution_arn(state_machine_arn, name)
+
+
+def new_user_item(email, state_machine_arn, **extra):
+    """The PENDING user record for `email`, pointing at its execution."""
+    user_id = onboarding_user_id(email)
+    return {
+        'user_id': user_id,
+        'email': normalise_email(email),
+        'onboarding_status': INITIAL_STATUS,
+        'created_at': int(time.time()),
+        'step_function_arn': execution_arn(state_machine_arn, execution_name(user_id)),
+        **extra
+    }
@@ -0,0 +1,242 @@
+"""
+Parallel segmented Scan with checkpoint/resume and capacity rate limiting.
+
+A table is split into `total_segments` Scan segments which a thread pool
+works through page by page. Each page is handed to an Aggregator, which
+folds it into a small per-segment state (counts and sums, never the rows
+themselves), so memory stays flat however large the table is.
+
+After every page the segment's LastEvaluatedKey and state can be written
+to a checkpoint store. A job that runs out of time (e.g. near the Lambda
+timeout) stops cleanly and the next run picks up where it left off.
+
+Consumed read capacity is fed into a shared token bucket so a backfill
+can be capped at a fixed number of RCUs per second and never starves the
+live API of on-demand throughput.
+"""
+import abc
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+_deserializer = TypeDeserializer()
+_serializer = TypeSerializer()
+
+
+def from_dynamodb(item):
+    """Converts a low-level client item to plain Python values (numbers become Decimal)."""
+    return {k: _deserializer.deserialize(v) for k, v in (item or {}).items()}
+
+
+def to_dynamodb(item):
+    """Converts plain Python values (no floats) to a low-level client item."""
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+
+def merge_totals(a, b):
+    """Adds two (possibly nested) dicts of numbers together."""
+    merged = dict(a)
+    for key, value in b.items():
+        if isinstance(value, dict):
+            merged[key] = merge_totals(merged.get(key, {}), value)
+        else:
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+class Aggregator(abc.ABC):
+    """
+    Streaming fold over scanned items.
+    Subclasses implement accumulate(); the default state is a dict of
+    running totals merged by addition. States must be JSON-like (dicts,
+    strings, ints, Decimals) so they can be checkpointed.
+    """
+
+    def initial(self):
+        return {}
+
+    @abc.abstractmethod
+    def accumulate(self, state, items):
+        """Folds one page of items (plain Python dicts) into `state` and returns it."""
+
+    def merge(self, a, b):
+        return merge_totals(a, b)
+
+
+class CapacityLimiter:
+    """
+    Thread-safe token bucket over consumed capacity units.
+    Workers report what each page consumed; once the bucket is in debt,
+    the caller sleeps until it has been paid back.
+    """
+
+    def __init__(self, units_per_second, clock=time.monotonic, sleep=time.sleep):
+        if units_per_second <= 0:
+            raise ValueError("units_per_second must be positive.")
+        self.rate = float(units_per_second)
+        self._clock = clock
+        self._sleep = sleep
+        self._available = self.rate
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, units):
+        with self._lock:
+            now = self._clock()
+            self._available = min(self.rate, self._available + (now - self._last) * self.rate)
+            self._last = now
+            self._available -= float(units)
+            wait = -self._available / self.rate if self._available < 0 else 0
+        if wait:
+            self._sleep(wait)
+
+
+class DynamoCheckpointStore:
+    """
+    Keeps one item per segment in the batch-jobs table:
+    job_id = "<job_id>#seg#<n>", with last_key (JSON), done and state.
+    """
+
+    def __init__(self, client, table_name, job_id, ttl_seconds=7 * 24 * 3600):
+        self.client = client
+        self.table_name = table_name
+        self.job_id = job_id
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, segment):
+        return f"{self.job_id}#seg#{segment}"
+
+    def load(self, total_segments):
+        """Returns {segment: {"last_key", "done", "state"}} for segments with saved progress."""
+        progress = {}
+        keys = [{'job_id': {'S': self._key(n)}} for n in range(total_segments)]
+        for start in range(0, len(keys), 100):
+            request = {self.table_name: {'Keys': keys[start:start + 100], 'ConsistentRead': True}}
+            while request:
+                response = self.client.batch_get_item(RequestItems=request)
+                for raw in response.get('Responses', {}).get(self.table_name, []):
+                    item = from_dynamodb(raw)
+                    segment = int(item['job_id'].rsplit('#', 1)[1])
+                    progress[segment] = {
+                        "last_key": json.loads(item['last_key']) if item.get('last_key') else None,
+                        "done": bool(item.get('done')),
+                        "state": item.get('state') or {}
+                    }
+                request = response.get('UnprocessedKeys') or None
+        return progress
+
+    def save(self, segment, last_key, done, state):
+        item = {
+            'job_id': self._key(segment),
+            'parent_job_id': self.job_id,
+            'done': done,
+            'state': state,
+            'updated_at': int(time.time()),
+            'expires_at': int(time.time()) + self.ttl_seconds
+        }
+        if last_key:
+            item['last_key'] = json.dumps(last_key)
+        self.client.put_item(TableName=self.table_name, Item=to_dynamodb(item))
+
+
+class ScanResult:
+    __slots__ = ('state', 'complete', 'items_scanned', 'capacity_consumed')
+
+    def __init__(self, state, complete, items_scanned, capacity_consumed):
+        self.state = state
+        self.complete = complete
+        self.items_scanned = items_scanned
+        self.capacity_consumed = capacity_consumed
+
+
+class ParallelScan:
+    """
+    Runs a segmented Scan of `table_name` through `aggregator`.
+
+    client                   low-level DynamoDB client (thread-safe, shared by workers)
+    total_segments           number of Scan segments; keep it fixed for the life of a job
+    max_workers              threads; defaults to total_segments
+    max_capacity_per_second  RCU budget across all workers, or None for unlimited
+    scan_kwargs              extra Scan parameters (ProjectionExpression, FilterExpression, ...)
+    checkpoint_store         e.g. DynamoCheckpointStore; None disables resume
+    """
+
+    def __init__(self, client, table_name, aggregator, total_segments=8, max_workers=None,
+                 max_capacity_per_second=None, page_size=None, scan_kwargs=None,
+                 checkpoint_store=None):
+        self.client = client
+        self.table_name = table_name
+        self.aggregator = aggregator
+        self.total_segments = total_segments
+        self.max_workers = max_workers or total_segments
+        self.limiter = CapacityLimiter(max_capacity_per_second) if max_capacity_per_second else None
+        self.page_size = page_size
+        self.scan_kwargs = scan_kwargs or {}
+        self.checkpoint_store = checkpoint_store
+        self._stats_lock = threading.Lock()
+        self._items_scanned = 0
+        self._capacity_consumed = Decimal('0')
+
+    def _scan_segment(self, segment, progress, should_stop):
+        state = progress.get("state") or self.aggregator.initial()
+        last_key = progress.get("last_key")
+        if progress.get("done"):
+            return state, True
+
+        while True:
+            if should_stop():
+                return state, False
+
+            params = {
+                'TableName': self.table_name,
+                'Segment': segment,
+                'TotalSegments': self.total_segments,
+                'ReturnConsumedCapacity': 'TOTAL',
+                **self.scan_kwargs
+            }
+            if self.page_size:
+                params['Limit'] = self.page_size
+            if last_key:
+                params['ExclusiveStartKey'] = last_key
+
+            response = self.client.scan(**params)
+            items = [from_dynamodb(raw) for raw in response.get('Items', [])]
+            state = self.aggregator.accumulate(state, items)
+            last_key = response.get('LastEvaluatedKey')
+            done = last_key is None
+
+            consumed = Decimal(str(response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)))
+            with self._stats_lock:
+                self._items_scanned += len(items)
+                self._capacity_consumed += consumed
+            if self.checkpoint_store:
+                self.checkpoint_store.save(segment, last_key, done, state)
+            if self.limiter and consumed:
+                self.limiter.consume(consumed)
+            if done:
+                return state, True
+
+    def run(self, should_stop=None):
+        """
+        Scans until every segment is finished or `should_stop()` returns True.
+        Returns a ScanResult whose state merges all segments scanned so far.
+        """
+        should_stop = should_stop or (lambda: False)
+        saved = self.checkpoint_store.load(self.total_segments) if self.checkpoint_store else {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._scan_segment, segment, saved.get(segment, {}), should_stop)
+                for segment in range(self.total_segments)
+            ]
+            outcomes = [future.result() for future in futures]
+
+        state = self.aggregator.initial()
+        for segment_state, _ in outcomes:
+            state = self.aggregator.merge(state, segment_state)
+        complete = all(done for _, done in outcomes)
+        return ScanResult(state, complete, self._items_scanned, self._capacity_consumed)
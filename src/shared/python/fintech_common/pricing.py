@@ -0,0 +1,176 @@
+"""
+Rate-grid loan pricing.
+
+The grid maps (term band x amount band x risk tier) to an annual rate and
+lives in the config table under config_id "loan-rate-grid":
+
+    {
+      "config_id": "loan-rate-grid",
+      "term_bands": [12, 24, 360],        # inclusive upper bounds, months
+      "amount_bands": [1000, 10000],      # inclusive upper bounds; larger amounts use the last band
+      "rates": {                          # tier -> [term band][amount band] -> annual %
+        "A": [["6.0", "5.5"], ["9.0", "8.5"], ["12.0", "11.5"]],
+        "B": [["8.0", "8.0"], ["12.0", "12.0"], ["15.0", "15.0"]]
+      },
+      "score_tiers": [[720, "A"], [0, "B"]],  # optional: min credit score -> tier
+      "default_tier": "B"                     # optional: tier when there is no score
+    }
+
+When a grid is loaded, the annuity factor r(1+r)^n / ((1+r)^n - 1) is
+precomputed for every distinct rate and every term up to the longest
+band. Quoting is then two bisects and a dict lookup, with no
+exponentiation per request. The loaded engine is cached per container
+for a TTL, so rate changes go live without a deploy.
+"""
+import time
+from bisect import bisect_left
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+from fintech_common.records import to_decimal
+
+RATE_GRID_CONFIG_ID = 'loan-rate-grid'
+DEFAULT_RISK_TIER = 'STANDARD'
+CENT = Decimal('0.01')
+
+# The rates apply_for_loan has always used: 8% up to 12 months, 12% up to 24, 15% beyond
+DEFAULT_RATE_GRID = {
+    'term_bands': [12, 24, 360],
+    'amount_bands': [],
+    'rates': {DEFAULT_RISK_TIER: [['8.0'], ['12.0'], ['15.0']]}
+}
+
+
+class Quote:
+    __slots__ = ('amount', 'loan_term_months', 'risk_tier', 'interest_rate',
+                 'monthly_payment', 'total_repayable', 'total_interest')
+
+    def __init__(self, amount, loan_term_months, risk_tier, interest_rate, monthly_payment):
+        self.amount = amount
+        self.loan_term_months = loan_term_months
+        self.risk_tier = risk_tier
+        self.interest_rate = interest_rate
+        self.monthly_payment = monthly_payment
+        self.total_repayable = monthly_payment * loan_term_months
+        self.total_interest = self.total_repayable - amount
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def annuity_factors(annual_rate, max_term):
+    """
+    Payment per unit of principal for every term 1..max_term at `annual_rate`%.
+    Builds (1 + r)^n incrementally instead of exponentiating per term.
+    """
+    factors = [None]  # index 0 unused, so factors[n] is the n-month factor
+    r = annual_rate / 100 / 12
+    growth = Decimal('1')
+    for n in range(1, max_term + 1):
+        growth *= 1 + r
+        factors.append(r * growth / (growth - 1) if r else Decimal('1') / n)
+    return factors
+
+
+class PricingEngine:
+    """An immutable, pre-computed view of one rate grid."""
+
+    def __init__(self, grid):
+        self.term_bands = [int(t) for t in grid['term_bands']]
+        self.amount_bands = [to_decimal(a, 'amount_bands') for a in grid.get('amount_bands', [])]
+        if not self.term_bands or self.term_bands != sorted(self.term_bands):
+            raise ValueError("Rate grid term_bands must be a non-empty ascending list.")
+        if self.amount_bands != sorted(self.amount_bands):
+            raise ValueError("Rate grid amount_bands must be ascending.")
+
+        amount_band_count = len(self.amount_bands) or 1
+        self.rates = {}
+        for tier, rows in grid['rates'].items():
+            if len(rows) != len(self.term_bands) or any(len(row) != amount_band_count for row in rows):
+                raise ValueError(f"Rate grid for tier {tier} does not match the term/amount bands.")
+            self.rates[tier] = [[to_decimal(rate, 'rate') for rate in row] for row in rows]
+
+        # (min_score, tier), highest first
+        self.score_tiers = sorted(
+            ((int(min_score), tier) for min_score, tier in grid.get('score_tiers', [])),
+            reverse=True
+        )
+        self.default_tier = grid.get('default_tier', DEFAULT_RISK_TIER)
+        for tier in [self.default_tier] + [tier for _, tier in self.score_tiers]:
+            if tier not in self.rates:
+                raise ValueError(f"Rate grid refers to unknown tier {tier}.")
+
+        self.max_term = self.term_bands[-1]
+        distinct_rates = {rate for rows in self.rates.values() for row in rows for rate in row}
+        self.factors = {rate: annuity_factors(rate, self.max_term) for rate in distinct_rates}
+
+    @property
+    def risk_tiers(self):
+        return list(self.rates)
+
+    def tier_for_score(self, credit_score):
+        """Maps a credit score to a risk tier; None (no score on file) gets default_tier."""
+        if credit_score is None:
+            return self.default_tier
+        for min_score, tier in self.score_tiers:
+            if credit_score >= min_score:
+                return tier
+        return self.default_tier
+
+    def rate_for(self, amount, term_months, risk_tier=DEFAULT_RISK_TIER):
+        if term_months <= 0 or term_months > self.max_term:
+            raise ValueError(f"loan_term_months must be between 1 and {self.max_term}.")
+        if risk_tier not in self.rates:
+            raise ValueError(f"Unknown risk tier: {risk_tier}.")
+        term_index = bisect_left(self.term_bands, term_months)
+        amount_index = min(bisect_left(self.amount_bands, amount), len(self.amount_bands) - 1) if self.amount_bands else 0
+        return self.rates[risk_tier][term_index][amount_index]
+
+    def quote(self, amount, term_months, risk_tier=DEFAULT_RISK_TIER):
+        """Prices one offer. Raises ValueError for out-of-grid input."""
+        amount = to_decimal(amount, 'amount')
+        term_months = int(term_months)
+        if amount <= 0:
+            raise ValueError("Amount must be positive.")
+        rate = self.rate_for(amount, term_months, risk_tier)
+        payment = (amount * self.factors[rate][term_months]).quantize(CENT)
+        return Quote(amount, term_months, risk_tier, rate, payment)
+
+
+# --- Per-container cache ---
+_cached_engine = None
+_cached_at = None
+
+
+def get_pricing_engine(config_table=None, ttl_seconds=300, clock=time.monotonic):
+    """
+    Returns the PricingEngine for the current rate grid, reloading it from
+    `config_table` (a boto3 Table) at most once per `ttl_seconds`.
+    Falls back to DEFAULT_RATE_GRID when there is no table or no grid item.
+    """
+    global _cached_engine, _cached_at
+    now = clock()
+    if _cached_engine is not None and _cached_at is not None and now - _cached_at < ttl_seconds:
+        return _cached_engine
+
+    grid = None
+    if config_table is not None:
+        try:
+            grid = config_table.get_item(Key={'config_id': RATE_GRID_CONFIG_ID}).get('Item')
+        except ClientError:
+            if _cached_engine is None:
+                raise
+            # Keep quoting from the stale grid rather than failing applications
+            _cached_at = now
+            return _cached_engine
+    _cached_engine = PricingEngine(grid or DEFAULT_RATE_GRID)
+    _cached_at = now
+    return _cached_engine
+
+
+def clear_pricing_cache():
+    """Drops the cached engine (tests, or after writing a new grid)."""
+    global _cached_engine, _cached_at
+    _cached_engine = None
+    _cached_at = None
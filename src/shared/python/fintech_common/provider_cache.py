@@ -0,0 +1,111 @@
+"""
+Cache of third-party provider results for onboarding.
+
+A user who re-applies, or an onboarding execution that is run again,
+asks the providers the same question a second time, and with real
+providers every call costs money and seconds. verify_id_mock and
+credit_check_mock therefore look the answer up first:
+
+1. in-process: a warm container keeps the results it has served (LRU,
+   for at most local_ttl_seconds), so a burst of retries costs nothing;
+2. the provider results table, keyed "<provider>#<identity>", where the
+   identity is a SHA-256 of the normalised email: the table holds no PII
+   and a re-application under a new user_id still hits;
+3. the provider itself, whose answer is then written to both layers and
+   is valid for ttl_seconds.
+
+DynamoDB TTL deletes expired items eventually (often hours late), so a
+read checks expires_at itself. Only answers are cached: a call that
+raised (throttled, timed out, failed) leaves nothing behind and the
+state machine's Retry asks the provider again. The cache is only an
+optimisation, so a table error falls back to the provider.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+from fintech_common.onboarding import normalise_email
+
+# Where an answer came from, for logs and tests
+SOURCE_MEMORY = 'memory'
+SOURCE_TABLE = 'table'
+SOURCE_PROVIDER = 'provider'
+
+
+def identity_key(email):
+    """The cache identity of a user: a hash of their normalised email."""
+    return hashlib.sha256(normalise_email(email).encode()).hexdigest()
+
+
+class ProviderResultCache:
+    """
+    Results of one provider, in process and in the provider results table.
+    Results are JSON-serialisable dicts; they are stored as a JSON string,
+    so numbers come back as they went in (not as Decimal).
+    """
+
+    def __init__(self, provider, ttl_seconds, local_ttl_seconds=300, max_entries=1000, clock=time.time):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # cache key -> (result, expires at)
+
+    def key(self, email):
+        return f"{self.provider}#{identity_key(email)}"
+
+    def fetch(self, table, email, call):
+        """
+        Returns (result, source): the cached result for `email`, or call()'s,
+        which is cached. No table (or a ttl of 0) means no caching at all.
+        """
+        if table is None or self.ttl_seconds <= 0:
+            return call(), SOURCE_PROVIDER
+        key = self.key(email)
+        now = self._clock()
+
+        cached = self._entries.get(key)
+        if cached is not None and cached[1] > now:
+            self._entries.move_to_end(key)
+            return cached[0], SOURCE_MEMORY
+
+        try:
+            item = table.get_item(Key={'cache_key': key}).get('Item')
+        except ClientError:
+            item = None
+        if item is not None and int(item['expires_at']) > now:
+            result = json.loads(item['result'])
+            self._remember(key, result, int(item['expires_at']), now)
+            return result, SOURCE_TABLE
+
+        result = call()
+        expires_at = int(now + self.ttl_seconds)
+        try:
+            table.put_item(Item={
+                'cache_key': key,
+                'provider': self.provider,
+                'result': json.dumps(result),
+                'cached_at': int(now),
+                'expires_at': expires_at
+            })
+        except ClientError:
+            pass  # Served from the provider; the next attempt simply asks again
+        self._remember(key, result, expires_at, now)
+        return result, SOURCE_PROVIDER
+
+    def _remember(self, key, result, expires_at, now):
+        self._entries[key] = (result, min(expires_at, now + self.local_ttl_seconds))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, email=None):
+        """Drops the in-process entries (all, or `email`'s); the table entry is left to expire."""
+        if email is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(self.key(email), None)
@@ -0,0 +1,154 @@
+"""
+Simulated third-party provider behaviour for the onboarding mocks.
+
+verify_id_mock and credit_check_mock call ProviderSimulation.call() before
+deciding, so onboarding can be load-tested against realistic provider
+latency and failures instead of instant answers. Each call:
+
+- is throttled (ProviderThrottled, returned at once) with throttle_rate,
+- times out (ProviderTimeout, after timeout_ms) with timeout_rate, or
+  whenever the sampled latency exceeds timeout_ms,
+- fails (ProviderError, after the sampled latency) with error_rate,
+- otherwise succeeds after the sampled latency, which it returns.
+
+The exceptions' class names are the Lambda errorType, which is what the
+state machine's Retry rules match on.
+
+Latency is a distribution spec (all values in ms):
+    none | fixed:MS | uniform:LOW,HIGH | normal:MEAN,STDDEV
+    | lognormal:MEDIAN,SIGMA | exponential:MEAN
+
+Configuration comes from PROVIDER_* environment variables and can be
+overridden per invocation with a `provider_simulation` dict in the event
+(same keys, lower case without the prefix), e.g. by a load test.
+"""
+import math
+import os
+import random
+import time
+
+ENV_PREFIX = 'PROVIDER_'
+
+
+class ProviderError(Exception):
+    """The provider answered with a server error."""
+
+
+class ProviderThrottled(ProviderError):
+    """The provider refused the call (HTTP 429); safe to retry with backoff."""
+
+
+class ProviderTimeout(ProviderError):
+    """The provider did not answer within timeout_ms."""
+
+
+def _numbers(spec, args, count):
+    values = [float(v) for v in args.split(',')] if args else []
+    if len(values) != count or any(v < 0 for v in values):
+        raise ValueError(f"Latency '{spec}' needs {count} non-negative number(s).")
+    return values
+
+
+def parse_latency(spec):
+    """Returns a function rng -> latency in ms for a distribution spec."""
+    spec = (spec or 'none').strip().lower()
+    kind, _, args = spec.partition(':')
+    if kind == 'none':
+        return lambda rng: 0.0
+    if kind == 'fixed':
+        (ms,) = _numbers(spec, args, 1)
+        return lambda rng: ms
+    if kind == 'uniform':
+        low, high = _numbers(spec, args, 2)
+        return lambda rng: rng.uniform(low, high)
+    if kind == 'normal':
+        mean, stddev = _numbers(spec, args, 2)
+        return lambda rng: max(0.0, rng.gauss(mean, stddev))
+    if kind == 'lognormal':
+        median, sigma = _numbers(spec, args, 2)
+        return lambda rng: rng.lognormvariate(math.log(median), sigma) if median else 0.0
+    if kind == 'exponential':
+        (mean,) = _numbers(spec, args, 1)
+        return lambda rng: rng.expovariate(1 / mean) if mean else 0.0
+    raise ValueError(f"Unknown latency distribution '{spec}'.")
+
+
+def _rate(value, name):
+    rate = float(value)
+    if not 0 <= rate <= 1:
+        raise ValueError(f"{name} must be between 0 and 1.")
+    return rate
+
+
+class ProviderSimulation:
+    """One provider's latency and failure profile; see the module docstring."""
+
+    def __init__(self, latency='none', error_rate=0, throttle_rate=0, timeout_rate=0,
+                 timeout_ms=3000, seed=None, sleep=time.sleep):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = _rate(error_rate, 'error_rate')
+        self.throttle_rate = _rate(throttle_rate, 'throttle_rate')
+        self.timeout_rate = _rate(timeout_rate, 'timeout_rate')
+        if self.error_rate + self.throttle_rate + self.timeout_rate > 1:
+            raise ValueError("error_rate + throttle_rate + timeout_rate cannot exceed 1.")
+        self.timeout_ms = float(timeout_ms)
+        self.rng = random.Random(seed)
+        self.sleep = sleep
+
+    @classmethod
+    def from_env(cls, overrides=None, environ=None, **kwargs):
+        """Built from PROVIDER_* variables, with `overrides` (event keys) on top."""
+        environ = os.environ if environ is None else environ
+        config = {}
+        for key in ('latency', 'error_rate', 'throttle_rate', 'timeout_rate', 'timeout_ms', 'seed'):
+            value = (overrides or {}).get(key, environ.get(ENV_PREFIX + key.upper()))
+            if value not in (None, ''):
+                config[key] = value
+        return cls(**config, **kwargs)
+
+    def call(self):
+        """Simulates one provider call; returns its latency in ms or raises."""
+        draw = self.rng.random()
+        if draw < self.throttle_rate:
+            raise ProviderThrottled("Provider throttled the request (simulated).")
+        draw -= self.throttle_rate
+        latency_ms = self.sample_latency(self.rng)
+        if draw < self.timeout_rate or latency_ms > self.timeout_ms:
+            self.sleep(self.timeout_ms / 1000)
+            raise ProviderTimeout(f"Provider did not answer within {self.timeout_ms:.0f}ms (simulated).")
+        draw -= self.timeout_rate
+        self.sleep(latency_ms / 1000)
+        if draw < self.error_rate:
+            raise ProviderError("Provider returned a server error (simulated).")
+        return latency_ms
+
+
+_simulations = {}
+
+
+def install(provider, simulation):
+    """
+    Uses `simulation` for `provider`'s calls from now on instead of one
+    built from the environment (the local workflow runner gives each mock
+    its own, sleeping on a virtual clock). None goes back to the
+    environment's.
+    """
+    if simulation is None:
+        _simulations.pop(provider, None)
+    else:
+        _simulations[provider] = simulation
+
+
+def simulation_for(event, provider):
+    """
+    The simulation for one call to `provider`: the installed or environment
+    one (kept across warm invocations so a seeded run is a sequence, not one
+    repeated draw), or a fresh one if the event overrides it.
+    """
+    if provider not in _simulations:
+        _simulations[provider] = ProviderSimulation.from_env()
+    simulation = _simulations[provider]
+    overrides = (event or {}).get('provider_simulation')
+    if overrides:
+        return ProviderSimulation.from_env(overrides, sleep=simulation.sleep)
+    return simulation
@@ -0,0 +1,193 @@
+"""
+Compact record models for the wallets, loans, savings-goals and
+transaction-logs tables.
+
+Every record uses __slots__ (no per-instance __dict__), validates its
+fields once on construction, and converts directly to and from the
+boto3 resource item format. The handlers build the items they write
+through these records, so every writer applies the same validation and
+defaults; from_items() lazily converts a page of full items.
+
+Scans that project only the attributes they fold keep working on the
+plain dicts they read: a partial item would not pass a record's
+required-field validation.
+"""
+import abc
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+
+LOAN_STATUSES = ('PENDING', 'APPROVED', 'REJECTED', 'PAID')
+
+
+def to_decimal(value, field):
+    """Coerces a number or numeric string to Decimal, raising ValueError otherwise."""
+    if isinstance(value, Decimal):
+        return value
+    if value is None or isinstance(value, (bool, float)):
+        raise ValueError(f"{field} must be a numeric string or Decimal.")
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"{field} must be a numeric string or Decimal.")
+
+
+def _to_int(value, field):
+    try:
+        return int(value)
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError(f"{field} must be an integer.")
+
+
+class _Record(abc.ABC):
+    """
+    Base class for the table records.
+    Subclasses list their attributes in FIELDS (item key order) and
+    implement _validate(). Attributes we don't model are kept in `extra`
+    so a from_item() -> to_item() round trip never drops data.
+    """
+    __slots__ = ('extra',)
+    FIELDS = ()
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        self.extra = fields or None
+        self._validate()
+
+    @abc.abstractmethod
+    def _validate(self):
+        """Checks and normalises the fields in place, raising ValueError."""
+
+    def _require(self, *names):
+        for name in names:
+            if not getattr(self, name):
+                raise ValueError(f"{type(self).__name__}.{name} is required.")
+
+    @classmethod
+    def from_item(cls, item):
+        """Builds a record from a DynamoDB item (boto3 resource format)."""
+        return cls(**item)
+
+    @classmethod
+    def from_items(cls, items):
+        """Lazily converts an iterable of items, e.g. a Query/Scan page."""
+        return (cls(**item) for item in items)
+
+    def to_item(self):
+        """Returns the DynamoDB item, omitting unset attributes."""
+        item = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                item[name] = value
+        if self.extra:
+            item.update({k: v for k, v in self.extra.items() if v is not None})
+        return item
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_item() == other.to_item()
+
+    def __repr__(self):
+        key = self.FIELDS[0]
+        return f"{type(self).__name__}({key}={getattr(self, key)!r})"
+
+
+class WalletRecord(_Record):
+    __slots__ = ('wallet_id', 'balance', 'currency', 'created_at', 'updated_at')
+    FIELDS = __slots__
+
+    def _validate(self):
+        self._require('wallet_id')
+        self.balance = to_decimal(self.balance if self.balance is not None else '0.00', 'balance')
+        self.currency = self.currency or 'USD'
+        if self.created_at is not None:
+            self.created_at = _to_int(self.created_at, 'created_at')
+        if self.updated_at is not None:
+            self.updated_at = _to_int(self.updated_at, 'updated_at')
+
+
+class LoanRecord(_Record):
+    __slots__ = (
+        'loan_id', 'wallet_id', 'amount', 'remaining_balance', 'interest_rate',
+        'loan_term_months', 'minimum_payment', 'status', 'created_at', 'updated_at'
+    )
+    FIELDS = __slots__
+
+    def _validate(self):
+        self._require('loan_id', 'wallet_id')
+        self.amount = to_decimal(self.amount, 'amount')
+        if self.amount <= 0:
+            raise ValueError("LoanRecord.amount must be positive.")
+        self.remaining_balance = to_decimal(
+            self.remaining_balance if self.remaining_balance is not None else self.amount,
+            'remaining_balance'
+        )
+        self.interest_rate = to_decimal(self.interest_rate if self.interest_rate is not None else '0', 'interest_rate')
+        if self.interest_rate < 0:
+            raise ValueError("LoanRecord.interest_rate cannot be negative.")
+        self.loan_term_months = _to_int(self.loan_term_months, 'loan_term_months')
+        if self.loan_term_months <= 0:
+            raise ValueError("LoanRecord.loan_term_months must be positive.")
+        if self.minimum_payment is not None:
+            self.minimum_payment = to_decimal(self.minimum_payment, 'minimum_payment')
+        self.status = self.status or 'PENDING'
+        if self.status not in LOAN_STATUSES:
+            raise ValueError(f"LoanRecord.status must be one of {LOAN_STATUSES}.")
+        if self.created_at is not None:
+            self.created_at = _to_int(self.created_at, 'created_at')
+        if self.updated_at is not None:
+            self.updated_at = _to_int(self.updated_at, 'updated_at')
+
+
+class GoalRecord(_Record):
+    __slots__ = ('goal_id', 'wallet_id', 'goal_name', 'target_amount', 'current_amount', 'created_at')
+    FIELDS = __slots__
+
+    def _validate(self):
+        self._require('goal_id', 'wallet_id', 'goal_name')
+        self.target_amount = to_decimal(self.target_amount, 'target_amount')
+        if self.target_amount <= 0:
+            raise ValueError("GoalRecord.target_amount must be positive.")
+        self.current_amount = to_decimal(
+            self.current_amount if self.current_amount is not None else '0.00', 'current_amount'
+        )
+        if self.current_amount < 0:
+            raise ValueError("GoalRecord.current_amount cannot be negative.")
+        if self.created_at is not None:
+            self.created_at = _to_int(self.created_at, 'created_at')
+
+
+class LedgerEntry(_Record):
+    """One row of the transaction-logs table. `balance_after` is 'N/A' when unknown."""
+    __slots__ = (
+        'transaction_id', 'wallet_id', 'timestamp', 'type', 'amount',
+        'balance_after', 'related_id', 'details'
+    )
+    FIELDS = __slots__
+
+    @classmethod
+    def new(cls, wallet_id, tx_type, amount, new_balance=None, related_id=None, details=None):
+        """Creates a fresh entry with the same defaults log_transaction has always used."""
+        return cls(
+            transaction_id=str(uuid.uuid4()),
+            wallet_id=wallet_id,
+            timestamp=int(time.time()),
+            type=tx_type,
+            amount=amount,
+            balance_after=new_balance,
+            related_id=related_id,
+            details=details
+        )
+
+    def _validate(self):
+        self._require('transaction_id', 'wallet_id', 'type')
+        self.timestamp = _to_int(self.timestamp, 'timestamp')
+        self.amount = to_decimal(self.amount, 'amount')
+        balance = self.balance_after
+        if balance is None or balance == 'N/A' or (isinstance(balance, Decimal) and balance.is_nan()):
+            self.balance_after = 'N/A'
+        else:
+            self.balance_after = to_decimal(balance, 'balance_after')
+        self.related_id = self.related_id or 'N/A'
+        self.details = self.details or {}
@@ -0,0 +1,77 @@
+"""
+The manual review queue.
+
+While an applicant waits for a reviewer, the onboarding state machine's
+WaitForManualReview step stores the task token on the user together with
+`review_queue` and `review_submitted_at` (the execution's start time, an
+ISO 8601 string). Those two attributes key the sparse review-queue-index,
+so listing the queue reads only the users actually waiting, oldest
+submission first, a page at a time.
+
+Every decision removes them again (LEAVE_QUEUE_REMOVE), in the same
+update that takes the task token, so a decided user drops out of the
+index and cannot be decided twice. If the decision then cannot be sent
+(throttling, a service error) the token is still live, so it is put back
+with return_to_queue(); only a spent token (SPENT_TOKEN_ERRORS) stays
+removed.
+"""
+import json
+
+from boto3.dynamodb.types import TypeSerializer
+
+REVIEW_QUEUE_INDEX_NAME = 'review-queue-index'
+REVIEW_QUEUE = 'MANUAL_REVIEW' # The index's only partition; set by the state machine
+
+# Status the user moves to for each reviewer decision
+DECISION_STATUSES = {
+    'APPROVED': 'PENDING_PROVISIONING', # The credit check ran alongside the ID check
+    'REJECTED': 'REJECTED_MANUAL'
+}
+
+LEAVE_QUEUE_REMOVE = "sfn_task_token, review_queue, review_submitted_at"
+# What a decision's update replaces or removes, and so what return_to_queue puts back
+QUEUE_ATTRIBUTES = ('onboarding_status', 'sfn_task_token', 'review_queue', 'review_submitted_at')
+
+# Task token errors after which the execution is no longer waiting for a decision
+SPENT_TOKEN_ERRORS = ('TaskDoesNotExist', 'TaskTimedOut')
+
+_serializer = TypeSerializer()
+
+
+def send_decision(sfn_client, task_token, decision):
+    """Resumes the waiting execution: success for APPROVED, ManualReviewRejected otherwise."""
+    if decision == 'APPROVED':
+        sfn_client.send_task_success(
+            taskToken=task_token,
+            output=json.dumps({"status": "APPROVED", "message": "Manual review approved."})
+        )
+    else:
+        sfn_client.send_task_failure(
+            taskToken=task_token,
+            error="ManualReviewRejected",
+            cause="The user was rejected during manual review by an admin."
+        )
+
+
+def return_to_queue(dynamodb_client, table_name, user_id, previous, decided_status):
+    """
+    Restores what a decision took (`previous`: the user's QUEUE_ATTRIBUTES as
+    they were, plain values) after the decision could not be sent, so the
+    user can be decided again. Only applies if nothing has changed the user
+    since; returns whether it did.
+    """
+    names = [name for name in QUEUE_ATTRIBUTES if previous.get(name) is not None]
+    try:
+        dynamodb_client.update_item(
+            TableName=table_name,
+            Key={'user_id': {'S': user_id}},
+            UpdateExpression="SET " + ", ".join(f"{name} = :{name}" for name in names),
+            ConditionExpression="attribute_not_exists(sfn_task_token) AND onboarding_status = :decided_status",
+            ExpressionAttributeValues={
+                ':decided_status': {'S': decided_status},
+                **{f":{name}": _serializer.serialize(previous[name]) for name in names}
+            }
+        )
+        return True
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        return False
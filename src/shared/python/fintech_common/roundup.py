@@ -0,0 +1,122 @@
+"""
+Round-up savings: every successful card payment is rounded up to the next
+whole unit and the difference is swept into the wallet's chosen goal.
+
+Sweeping each round-up on its own would add a transaction per payment, so
+round-ups are accumulated first. Each enrolled wallet has one row in the
+round-ups table holding its goal and a compact counter (pending_amount,
+pending_count, and the payment ids counted since the last flush, which
+makes SNS redeliveries harmless). record_roundup() is a single conditional
+ADD. The id set is capped at MAX_PENDING_TX, so a wallet whose flushes keep
+being deferred stops accumulating until one succeeds instead of growing its
+row toward the 400 KB item limit. Once pending_amount reaches the flush threshold, or when the daily job
+runs, flush() moves it with savings.contribute() and resets the counter in
+the same transaction.
+"""
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+from fintech_common.savings import TransferError, contribute
+
+ROUNDUP_UNIT = Decimal('1')
+DEFAULT_FLUSH_THRESHOLD = Decimal('5.00')
+# Payment ids kept per wallet between flushes (about 40 bytes each)
+MAX_PENDING_TX = 500
+
+
+def roundup_amount(amount, unit=ROUNDUP_UNIT):
+    """What rounds `amount` up to the next multiple of `unit` (0 if it already is one)."""
+    remainder = amount % unit
+    return unit - remainder if remainder else Decimal('0')
+
+
+def record_roundup(client, roundups_table, wallet_id, transaction_id, roundup, now):
+    """
+    Adds one payment's round-up to the wallet's counter. Returns the updated
+    row, or None if the wallet is not enrolled, the payment was already
+    counted, or MAX_PENDING_TX payments are already waiting for a flush.
+    """
+    try:
+        response = client.update_item(
+            TableName=roundups_table,
+            Key={'wallet_id': {'S': wallet_id}},
+            UpdateExpression=(
+                "SET pending_since = if_not_exists(pending_since, :now) "
+                "ADD pending_amount :roundup, pending_count :one, pending_tx :tx_ids"
+            ),
+            ConditionExpression=(
+                "enabled = :true AND NOT contains(pending_tx, :tx_id) "
+                "AND (attribute_not_exists(pending_tx) OR size(pending_tx) < :max_tx)"
+            ),
+            ExpressionAttributeValues={
+                ':now': {'N': str(now)},
+                ':roundup': {'N': str(roundup)},
+                ':one': {'N': '1'},
+                ':tx_ids': {'SS': [transaction_id]},
+                ':tx_id': {'S': transaction_id},
+                ':true': {'BOOL': True},
+                ':max_tx': {'N': str(MAX_PENDING_TX)}
+            },
+            ReturnValues='ALL_NEW'
+        )
+        return response['Attributes']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return None
+
+
+def flush(client, tables, roundups_table, row, now):
+    """
+    Sweeps a wallet's pending round-ups (a row as returned by DynamoDB) into
+    its goal. Returns the outcome: 'flushed', 'deferred' (wallet short or
+    busy; the counter keeps growing and is tried again later), 'raced' (the
+    counter moved since `row` was read) or 'disabled' (the goal is gone).
+    """
+    wallet_id = row['wallet_id']['S']
+    goal_id = row['goal_id']['S']
+    amount = Decimal(row['pending_amount']['N'])
+    counter_reset = {'Update': {
+        'TableName': roundups_table,
+        'Key': {'wallet_id': {'S': wallet_id}},
+        'UpdateExpression': (
+            "SET pending_amount = :zero, pending_count = :zero, last_flushed_at = :now "
+            "ADD flushed_total :amount REMOVE pending_tx, pending_since"
+        ),
+        'ConditionExpression': "pending_count = :seen_count AND goal_id = :goal_id",
+        'ExpressionAttributeValues': {
+            ':zero': {'N': '0'},
+            ':now': {'N': str(now)},
+            ':amount': {'N': str(amount)},
+            ':seen_count': row['pending_count'],
+            ':goal_id': {'S': goal_id}
+        }
+    }}
+    try:
+        contribute(
+            client, tables, wallet_id, goal_id, amount,
+            row.get('goal_name', {}).get('S'),
+            details={'source': 'ROUNDUP', 'round_ups': int(row['pending_count']['N'])},
+            extra_items=[counter_reset]
+        )
+        return 'flushed'
+    except TransferError as te:
+        if te.reason == 'EXTRA_CONDITION_FAILED':
+            return 'raced'
+        if te.reason != 'GOAL_CONDITION_FAILED':
+            return 'deferred'  # Short of funds, or the wallet kept changing: keep the round-ups
+        # The goal was deleted or changed hands: stop rounding up into it
+        try:
+            client.update_item(
+                TableName=roundups_table,
+                Key={'wallet_id': {'S': wallet_id}},
+                UpdateExpression="SET enabled = :false REMOVE pending_amount, pending_count, pending_tx, pending_since",
+                ConditionExpression="goal_id = :goal_id",
+                ExpressionAttributeValues={':false': {'BOOL': False}, ':goal_id': {'S': goal_id}}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return 'raced'  # The wallet picked another goal meanwhile
+        return 'disabled'
@@ -0,0 +1,286 @@
+"""
+Atomic transfers between a wallet and a savings goal.
+
+Every transfer is a single TransactWriteItems: the wallet update, the goal
+update (or delete) and the ledger entry commit together, and a caller
+that knows what the items hold reads nothing first. The checks a handler used to do with get_item (goal exists,
+belongs to the wallet, has the amount we think, wallet has the funds) are
+the transaction's conditions, and the failed item's ALL_OLD image from
+CancellationReasons says which one failed.
+
+The ledger entry's balance_after and goal_name are guarded the same way:
+the wallet update is conditioned on the balance the caller last saw
+(`seen_balance`) and the goal write on the goal's stored name, so the
+entry can never disagree with the items it is committed with. When a
+value was stale, the failed check's ALL_OLD image supplies the real one
+and the transfer is retried with it. A caller that knows neither (the
+client sent no expected_balance or goal_name) costs one consistent
+BatchGetItem for them first; one that knows both costs a single write.
+
+Goal ledger entries also carry the keys of the sparse goal-history-index
+(goal_history_id, and goal_history_key = zero-padded timestamp + '#' +
+type), so a goal's history is read a page at a time, newest first,
+without touching the other ledger rows that share its related_id.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+from fintech_common.records import LedgerEntry
+
+MAX_TRANSFER_ATTEMPTS = 3
+
+SavingsTables = namedtuple('SavingsTables', ['wallets', 'savings', 'log'])
+
+GOAL_HISTORY_INDEX_NAME = 'goal-history-index'
+GOAL_HISTORY_TYPES = ('SAVINGS_ADD', 'SAVINGS_REDEEM', 'SAVINGS_REFUND')
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class TransferError(Exception):
+    """A transfer the conditions refused, with the status code to return."""
+    def __init__(self, status_code, message, reason=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason  # WALLET_NOT_FOUND, INSUFFICIENT_FUNDS, GOAL_CONDITION_FAILED, EXTRA_CONDITION_FAILED
+
+
+def _item(raw):
+    return {k: _deserializer.deserialize(v) for k, v in (raw or {}).items()}
+
+
+def _reason(reasons, index):
+    """(failed, old_item) for one TransactItem; old_item is None if it did not exist."""
+    reason = reasons[index] if index < len(reasons) else {}
+    if reason.get('Code') != 'ConditionalCheckFailed':
+        return False, None
+    return True, (_item(reason['Item']) if reason.get('Item') else None)
+
+
+def _wallet_update(tables, wallet_id, sign, amount, seen_balance):
+    condition = 'balance >= :amount' if sign == '-' else 'attribute_exists(wallet_id)'
+    values = {':amount': {'N': str(amount)}}
+    if seen_balance is not None:
+        condition += ' AND balance = :seen_balance'
+        values[':seen_balance'] = {'N': str(seen_balance)}
+    return {'Update': {
+        'TableName': tables.wallets,
+        'Key': {'wallet_id': {'S': wallet_id}},
+        'UpdateExpression': f'SET balance = balance {sign} :amount',
+        'ConditionExpression': condition,
+        'ExpressionAttributeValues': values,
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+    }}
+
+
+def _goal_name_check(goal_name):
+    """The goal condition that its stored name is `goal_name` (None: the goal has no name)."""
+    if goal_name is None:
+        return 'attribute_not_exists(goal_name)', {}
+    return 'goal_name = :goal_name_val', {':goal_name_val': {'S': goal_name}}
+
+
+def _read_current(client, tables, wallet_id, goal_id, balance=True, goal_name=True):
+    """
+    (balance, goal_name) as stored, read consistently in one BatchGetItem;
+    either is None if its item (or attribute) does not exist. The
+    transaction is still conditioned on what was read.
+    """
+    request = {}
+    if balance:
+        request[tables.wallets] = {'Keys': [{'wallet_id': {'S': wallet_id}}], 'ProjectionExpression': 'balance', 'ConsistentRead': True}
+    if goal_name:
+        request[tables.savings] = {'Keys': [{'goal_id': {'S': goal_id}}], 'ProjectionExpression': 'goal_name', 'ConsistentRead': True}
+    found = {}
+    while request:
+        response = client.batch_get_item(RequestItems=request)
+        for table_name, items in response.get('Responses', {}).items():
+            for item in items:
+                found[table_name] = _item(item)
+        request = response.get('UnprocessedKeys') or None
+    return found.get(tables.wallets, {}).get('balance'), found.get(tables.savings, {}).get('goal_name')
+
+
+def goal_history_attributes(ledger_item):
+    """The goal-history-index keys for a ledger item, or {} if it is not a goal entry."""
+    goal_id = ledger_item.get('related_id')
+    if ledger_item.get('type') not in GOAL_HISTORY_TYPES or not goal_id or goal_id == 'N/A':
+        return {}
+    return {
+        'goal_history_id': goal_id,
+        'goal_history_key': f"{int(ledger_item['timestamp']):010d}#{ledger_item['type']}"
+    }
+
+
+def _ledger_put(tables, ledger_item):
+    item = {**ledger_item, **goal_history_attributes(ledger_item)}
+    return {'Put': {
+        'TableName': tables.log,
+        'Item': {k: _serializer.serialize(v) for k, v in item.items()}
+    }}
+
+
+def contribute(client, tables, wallet_id, goal_id, amount, goal_name=None,
+               seen_balance=None, tx_type='SAVINGS_ADD', details=None, goal_update=None, extra_items=None):
+    """
+    Debits the wallet, credits the goal and logs `tx_type`. Returns the
+    ledger item. Raises TransferError for a missing wallet, insufficient
+    funds, or a goal that is missing or owned by another wallet.
+    `goal_name` and `seen_balance` are what the caller believes is stored
+    (None: unknown, read first); the ledger entry only ever carries the
+    stored values.
+    `goal_update` optionally adds to the goal's write in the same
+    transaction: {'set': ..., 'condition': ..., 'values': {...}} with
+    low-level typed values (a failed extra condition reads as
+    GOAL_CONDITION_FAILED). `extra_items` are further TransactItems that
+    must commit with the transfer; if one of their conditions fails the
+    transfer raises TransferError with reason EXTRA_CONDITION_FAILED.
+    """
+    goal_update = goal_update or {}
+    # Running contribution stats, kept on the goal so projections need no ledger reads
+    goal_set = (
+        'SET current_amount = current_amount + :amount, '
+        'contributed_total = if_not_exists(contributed_total, :stat_zero) + :amount, '
+        'contribution_count = if_not_exists(contribution_count, :stat_zero) + :stat_one, '
+        'first_contribution_at = if_not_exists(first_contribution_at, :stat_now), '
+        'last_contribution_at = :stat_now'
+    )
+    goal_condition = 'attribute_exists(goal_id) AND wallet_id = :wallet_id_val'
+    if goal_update.get('set'):
+        goal_set += f", {goal_update['set']}"
+    if goal_update.get('condition'):
+        goal_condition += f" AND {goal_update['condition']}"
+    if seen_balance is None or goal_name is None:
+        stored_balance, stored_name = _read_current(
+            client, tables, wallet_id, goal_id, balance=seen_balance is None, goal_name=goal_name is None
+        )
+        seen_balance = stored_balance if seen_balance is None else seen_balance
+        goal_name = stored_name if goal_name is None else goal_name
+    for attempt in range(1, MAX_TRANSFER_ATTEMPTS + 1):
+        new_balance = seen_balance - amount if seen_balance is not None else None
+        name_condition, name_values = _goal_name_check(goal_name)
+        ledger_item = LedgerEntry.new(
+            wallet_id, tx_type, amount, new_balance, goal_id,
+            {"goal_name": goal_name or 'Savings Goal', **(details or {})}
+        ).to_item()
+        try:
+            client.transact_write_items(TransactItems=[
+                _wallet_update(tables, wallet_id, '-', amount, seen_balance),
+                {'Update': {
+                    'TableName': tables.savings,
+                    'Key': {'goal_id': {'S': goal_id}},
+                    'UpdateExpression': goal_set,
+                    'ConditionExpression': f"{goal_condition} AND {name_condition}",
+                    'ExpressionAttributeValues': {
+                        ':amount': {'N': str(amount)},
+                        ':wallet_id_val': {'S': wallet_id},
+                        ':stat_zero': {'N': '0'},
+                        ':stat_one': {'N': '1'},
+                        ':stat_now': {'N': str(ledger_item['timestamp'])},
+                        **name_values,
+                        **goal_update.get('values', {})
+                    },
+                    'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                }},
+                _ledger_put(tables, ledger_item),
+                *(extra_items or [])
+            ])
+            return ledger_item
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            reasons = e.response.get('CancellationReasons', [])
+            wallet_failed, wallet = _reason(reasons, 0)
+            goal_failed, goal = _reason(reasons, 1)
+            if wallet_failed and wallet is None:
+                raise TransferError(400, "Wallet not found.", 'WALLET_NOT_FOUND')
+            if wallet_failed and wallet.get('balance', Decimal('0')) < amount:
+                raise TransferError(400, "Insufficient funds.", 'INSUFFICIENT_FUNDS')
+            # Only a stale name is retried; any other goal condition is final
+            name_stale = (goal_failed and goal is not None and goal.get('wallet_id') == wallet_id
+                          and goal.get('goal_name') != goal_name)
+            if goal_failed and not name_stale:
+                raise TransferError(400, "Transaction failed. Savings goal not found or wallet ID mismatch.", 'GOAL_CONDITION_FAILED')
+            if any(_reason(reasons, index)[0] for index in range(3, len(reasons))):
+                raise TransferError(409, "Transaction failed. A related item changed.", 'EXTRA_CONDITION_FAILED')
+            if not (wallet_failed or name_stale):
+                raise
+            if wallet_failed:
+                seen_balance = wallet.get('balance', Decimal('0'))
+            if name_stale:
+                goal_name = goal.get('goal_name')
+    raise TransferError(409, "Wallet balance kept changing. Please retry.")
+
+
+def release(client, tables, goal_id, wallet_id, amount, goal_name, tx_type, message,
+            seen_balance=None, require_complete=False):
+    """
+    Deletes the goal and credits its `amount` to the wallet, logging
+    `tx_type`. The delete is conditioned on the goal still holding exactly
+    `amount` (and, with require_complete, on having reached its target), so
+    the credit can never differ from what is removed, and on `goal_name`
+    (None: the goal has no name) so the ledger names the goal that was
+    actually redeemed. If the goal moved on,
+    its current state comes back with the failed check and the transfer is
+    retried with it. A goal holding nothing is just deleted. Returns the
+    ledger item, or None when nothing was credited.
+    """
+    for attempt in range(1, MAX_TRANSFER_ATTEMPTS + 1):
+        name_condition, name_values = _goal_name_check(goal_name)
+        condition = f'attribute_exists(goal_id) AND wallet_id = :wallet_id_val AND current_amount = :amount AND {name_condition}'
+        if require_complete:
+            condition += ' AND current_amount >= target_amount'
+        transact_items = [{'Delete': {
+            'TableName': tables.savings,
+            'Key': {'goal_id': {'S': goal_id}},
+            'ConditionExpression': condition,
+            'ExpressionAttributeValues': {
+                ':amount': {'N': str(amount)},
+                ':wallet_id_val': {'S': wallet_id},
+                **name_values
+            },
+            'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+        }}]
+        ledger_item = None
+        if amount > 0:
+            new_balance = seen_balance + amount if seen_balance is not None else None
+            ledger_item = LedgerEntry.new(
+                wallet_id, tx_type, amount, new_balance, goal_id, {"message": f"{message}: {goal_name or 'Savings Goal'}"}
+            ).to_item()
+            transact_items += [
+                _wallet_update(tables, wallet_id, '+', amount, seen_balance),
+                _ledger_put(tables, ledger_item)
+            ]
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+            return ledger_item
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            reasons = e.response.get('CancellationReasons', [])
+            goal_failed, goal = _reason(reasons, 0)
+            wallet_failed, wallet = _reason(reasons, 1)
+            if goal_failed and goal is None:
+                raise TransferError(404, "Savings goal not found.")
+            if goal_failed and require_complete and goal.get('current_amount', Decimal('0')) < goal.get('target_amount', Decimal('0')):
+                raise TransferError(400, "Goal is not yet complete. Cannot redeem.")
+            if wallet_failed and wallet is None:
+                raise TransferError(400, "Transaction failed. Could not refund to wallet.")
+            if not (goal_failed or wallet_failed):
+                raise
+            if goal_failed:
+                # Our copy of the goal was stale; pick up what it holds now
+                if not goal.get('wallet_id'):
+                    raise TransferError(500, "Goal item is corrupt, missing wallet_id.")
+                if goal['wallet_id'] != wallet_id:
+                    seen_balance = None
+                wallet_id = goal['wallet_id']
+                amount = goal.get('current_amount', Decimal('0'))
+                goal_name = goal.get('goal_name')
+            if wallet_failed:
+                seen_balance = wallet.get('balance', Decimal('0'))
+    raise TransferError(409, "Savings goal kept changing. Please retry.")
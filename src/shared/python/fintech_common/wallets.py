@@ -0,0 +1,121 @@
+"""
+Wallet creation.
+
+A wallet and its WALLET_CREATED ledger entry are written in one
+TransactWriteItems, so there is never a wallet without its opening entry.
+Onboarding (provision_account) calls this directly rather than invoking
+the create_wallet Lambda, and commits the user's APPROVED status in the
+same transaction.
+
+An onboarding wallet's id is derived from the user id, so a retried
+ProvisionAccount task finds the wallet it already created (the Put's
+condition fails and its ALL_OLD image is returned) instead of creating a
+second one.
+"""
+import time
+import uuid
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+from fintech_common.records import LedgerEntry, WalletRecord
+
+# Fixed namespace for uuid5 wallet ids; changing it would break provisioning retries
+WALLET_ID_NAMESPACE = uuid.UUID('2b7e1516-28ae-5d2a-a6f7-15880913cf4f')
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class WalletError(Exception):
+    """A wallet the transaction could not create, with the reason why."""
+    def __init__(self, message, reason=None):
+        super().__init__(message)
+        self.reason = reason  # USER_NOT_FOUND, EXTRA_CONDITION_FAILED
+
+
+def onboarding_wallet_id(user_id):
+    return str(uuid.uuid5(WALLET_ID_NAMESPACE, user_id))
+
+
+def _typed(item):
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+
+def _item(raw):
+    return {k: _deserializer.deserialize(v) for k, v in (raw or {}).items()}
+
+
+def new_wallet(wallet_id=None, credit_score=None, now=None):
+    """The (wallet item, WALLET_CREATED ledger item) pair for a zero-balance wallet."""
+    now = int(now if now is not None else time.time())
+    wallet_id = wallet_id or str(uuid.uuid4())
+    balance = Decimal('0.00')
+    wallet = WalletRecord(
+        wallet_id=wallet_id,
+        balance=balance,
+        currency='USD',
+        created_at=now,
+        updated_at=now,
+        # Optional credit score from onboarding, kept for loan pricing
+        credit_score=int(credit_score) if credit_score is not None else None
+    ).to_item()
+    entry = LedgerEntry.new(wallet_id, 'WALLET_CREATED', balance, balance, wallet_id).to_item()
+    entry['timestamp'] = now
+    return wallet, entry
+
+
+def create_wallet(client, wallets_table, log_table, wallet_id=None, credit_score=None, extra_items=None):
+    """
+    Writes a new wallet and its opening ledger entry; returns (wallet, created).
+    If `wallet_id` is given and that wallet already exists, nothing is
+    written and the existing wallet is returned with created=False.
+    `extra_items` are further TransactItems that must commit with the
+    wallet; if one of their conditions fails, raises WalletError with
+    reason EXTRA_CONDITION_FAILED.
+    """
+    wallet, entry = new_wallet(wallet_id, credit_score)
+    items = [
+        {'Put': {
+            'TableName': wallets_table,
+            'Item': _typed(wallet),
+            'ConditionExpression': 'attribute_not_exists(wallet_id)',
+            'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+        }},
+        {'Put': {'TableName': log_table, 'Item': _typed(entry)}}
+    ] + list(extra_items or [])
+    try:
+        client.transact_write_items(TransactItems=items)
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        reasons = e.response.get('CancellationReasons', [])
+        codes = [reason.get('Code') for reason in reasons]
+        if codes and codes[0] == 'ConditionalCheckFailed':
+            return _item(reasons[0].get('Item')), False
+        if 'ConditionalCheckFailed' in codes[2:]:
+            raise WalletError("A condition on the wallet's transaction failed.", 'EXTRA_CONDITION_FAILED')
+        raise
+    return wallet, True
+
+
+def provision_wallet(client, wallets_table, log_table, users_table, user_id, credit_score=None):
+    """
+    Creates the onboarding wallet for `user_id` and marks the user APPROVED
+    with its wallet_id, all in one transaction. Returns (wallet, created);
+    a retry after the transaction committed returns the same wallet with
+    created=False. Raises WalletError (USER_NOT_FOUND) for an unknown user.
+    """
+    wallet_id = onboarding_wallet_id(user_id)
+    approve = {'Update': {
+        'TableName': users_table,
+        'Key': {'user_id': {'S': user_id}},
+        'UpdateExpression': 'SET onboarding_status = :approved, wallet_id = :wallet_id',
+        'ConditionExpression': 'attribute_exists(user_id)',
+        'ExpressionAttributeValues': {':approved': {'S': 'APPROVED'}, ':wallet_id': {'S': wallet_id}}
+    }}
+    try:
+        return create_wallet(client, wallets_table, log_table, wallet_id, credit_score, extra_items=[approve])
+    except WalletError as e:
+        raise WalletError(f"User {user_id} not found.", 'USER_NOT_FOUND') from e
@@ -1,10 +1,15 @@
 import json
 import os
-import boto3
-import uuid
 import time
+import boto3
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
+from fintech_common.onboarding import (
+    EMAIL_INDEX_NAME, INITIAL_STATUS, REJECTED_STATUSES, derived_execution, email_spellings, execution_arn,
+    execution_name, new_user_item, onboarding_attempt
+)
 import logging
 
 # Set up logger
@@ -35,10 +40,106 @@ class DecimalEncoder(json.JSONEncoder):
             return str(o)
         return super(DecimalEncoder, self).default(o)
 
+_deserializer = TypeDeserializer()
+
+def find_user(users_table, email):
+    """The user already on record for `email` under any id, or None."""
+    for spelling in email_spellings(email):
+        items = users_table.query(IndexName=EMAIL_INDEX_NAME, KeyConditionExpression=Key('email').eq(spelling))['Items']
+        if items:
+            return min(items, key=lambda item: item.get('created_at', 0))  # The first application, if older code made several
+    return None
+
+def claim_user(users_table, user_item):
+    """
+    Creates the user record unless it already exists.
+    Returns (item, created): the new item, or the existing one as stored.
+    """
+    try:
+        users_table.put_item(
+            Item=user_item,
+            ConditionExpression="attribute_not_exists(user_id)",
+            # Returns the existing record without a second read
+            ReturnValuesOnConditionCheckFailure="ALL_OLD"
+        )
+        return user_item, True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        existing = {k: _deserializer.deserialize(v) for k, v in (e.response.get('Item') or {}).items()}
+        return existing or user_item, False
+
+def start_new_attempt(users_table, user_item):
+    """
+    Moves a user whose application has ended to a fresh attempt, back at
+    the initial status and pointing at the attempt's own execution. The
+    update is conditioned on the status and attempt we saw, so concurrent
+    re-applications create one attempt.
+    Returns (item, created): the new attempt, or the record as stored if
+    another request moved it first.
+    """
+    user_id = user_item['user_id']
+    attempt = onboarding_attempt(user_item) + 1
+    values = {
+        ':initial': INITIAL_STATUS,
+        ':attempt': attempt,
+        ':arn': execution_arn(STEP_FUNCTION_ARN, execution_name(user_id, attempt)),
+        ':now': int(time.time()),
+        ':seen_status': user_item.get('onboarding_status')
+    }
+    condition = "onboarding_status = :seen_status AND "
+    if 'onboarding_attempt' in user_item:
+        condition += "onboarding_attempt = :seen_attempt"
+        values[':seen_attempt'] = user_item['onboarding_attempt']
+    else:
+        condition += "attribute_not_exists(onboarding_attempt)"
+    try:
+        response = users_table.update_item(
+            Key={'user_id': user_id},
+            UpdateExpression="SET onboarding_status = :initial, onboarding_attempt = :attempt, step_function_arn = :arn, reapplied_at = :now",
+            ConditionExpression=condition,
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD"
+        )
+        return response['Attributes'], True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        existing = {k: _deserializer.deserialize(v) for k, v in (e.response.get('Item') or {}).items()}
+        return existing or user_item, False
+
+def start_execution(sfn_client, user_item):
+    """
+    Starts the user's execution for their current attempt. Its name comes
+    from the user id and attempt and its input from the record, so a repeat
+    while it runs returns the same execution; a finished one is reported as
+    ExecutionAlreadyExists.
+    Returns False for ExecutionAlreadyExists.
+    """
+    try:
+        sfn_client.start_execution(
+            stateMachineArn=STEP_FUNCTION_ARN,
+            name=execution_name(user_item['user_id'], onboarding_attempt(user_item)),
+            input=json.dumps({'user_id': user_item['user_id'], 'email': user_item['email']})
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ExecutionAlreadyExists':
+            return False
+        raise
+
+def execution_ended(sfn_client, user_item):
+    """Whether the current attempt's execution has finished (a failed check ends it still at the initial status)."""
+    return sfn_client.describe_execution(executionArn=user_item['step_function_arn'])['status'] != 'RUNNING'
+
 def start_onboarding(event, context):
     """
     API: POST /onboarding/start
-    Starts the user onboarding Step Function.
+    Starts the user onboarding Step Function, at most once per application:
+    a repeated request returns the application in flight (200) instead of
+    starting another execution (202). An applicant whose application ended
+    without an account (rejected, or the checks failed) starts a new attempt.
     """
     
     # --- Initialize boto3 clients ---
@@ -70,48 +171,52 @@ def start_onboarding(event, context):
                 raise ValueError("Email is required.")
 
             log_context["email"] = email
-            
-            # Note: We removed the "email already exists" check for demo purposes
-
-            # 2. Create a new user ID
-            user_id = str(uuid.uuid4())
-            sfn_execution_name = f"{user_id}-{int(time.time())}"
-            
-            sfn_input = {
-                'user_id': user_id,
-                'email': email
-            }
-            
-            log_context["user_id"] = user_id
-
-            # 3. Start the Step Function execution
-            logger.info(json.dumps({**log_context, "status": "info", "message": "Starting Step Function execution."}))
-            sfn_response = sfn_client.start_execution(
-                stateMachineArn=STEP_FUNCTION_ARN,
-                name=sfn_execution_name,
-                input=json.dumps(sfn_input)
-            )
-            
-            # 4. Create the PENDING user record in DynamoDB
-            user_item = {
-                'user_id': user_id,
-                'email': email,
-                'onboarding_status': 'PENDING_ID_VERIFICATION',
-                'created_at': int(time.time()),
-                'step_function_arn': sfn_response['executionArn']
-            }
-            users_table.put_item(Item=user_item)
-            
-            logger.info(json.dumps({**log_context, "status": "info", "sfn_arn": sfn_response['executionArn'], "message": "Onboarding process started."}))
+
+            # 1. Claim the user first: the id is derived from the email, so a
+            #    double-click or client retry finds the record instead of
+            #    starting a second (billable) execution. Users from before
+            #    derived ids are only found through the email index.
+            existing = find_user(users_table, email)
+            if existing:
+                user_item, created = existing, False
+            else:
+                user_item, created = claim_user(users_table, new_user_item(email, STEP_FUNCTION_ARN))
+            user_id = user_item['user_id']
+            log_context.update({"user_id": user_id, "created": created})
+
+            # 2. Only applications in flight are deduplicated: a rejected applicant
+            #    applies again as a new attempt
+            if not created and user_item.get('onboarding_status') in REJECTED_STATUSES:
+                user_item, created = start_new_attempt(users_table, user_item)
+                log_context.update({"created": created, "attempt": onboarding_attempt(user_item)})
+
+            # 3. Start the execution. An existing user is only started again while
+            #    still at the initial status: their request may have failed
+            #    between the claim and the start, and a repeat is idempotent.
+            if created or user_item.get('onboarding_status') == INITIAL_STATUS:
+                logger.info(json.dumps({**log_context, "status": "info", "message": "Starting Step Function execution."}))
+                # An execution not named by execution_name() can only be checked, not started by name
+                if not derived_execution(STEP_FUNCTION_ARN, user_item) or not start_execution(sfn_client, user_item):
+                    logger.info(json.dumps({**log_context, "status": "info", "message": "Execution already exists."}))
+                    # Still at the initial status with the execution over: the checks failed
+                    if not created and execution_ended(sfn_client, user_item):
+                        user_item, created = start_new_attempt(users_table, user_item)
+                        log_context.update({"created": created, "attempt": onboarding_attempt(user_item)})
+                        if created or user_item.get('onboarding_status') == INITIAL_STATUS:
+                            start_execution(sfn_client, user_item)
+
+            logger.info(json.dumps({**log_context, "status": "info", "sfn_arn": user_item.get('step_function_arn'),
+                                    "message": "Onboarding process started." if created else "Onboarding already started."}))
 
             return {
-                "statusCode": 202, # Accepted
+                "statusCode": 202 if created else 200, # Accepted / the application in flight
                 "headers": POST_CORS_HEADERS,
                 "body": json.dumps({
-                    "message": "Onboarding process started.",
+                    "message": "Onboarding process started." if created else "Onboarding already started.",
                     "user_id": user_id,
-                    "status": "PENDING_ID_VERIFICATION"
-                })
+                    "status": user_item.get('onboarding_status', INITIAL_STATUS),
+                    "execution_arn": user_item.get('step_function_arn')
+                }, cls=DecimalEncoder)
             }
 
         except (ValueError, TypeError) as ve:
@@ -1,5 +1,10 @@
 import pytest
 import os
+import sys
+
+# The shared code ships as a Lambda layer (src/shared/python is mounted at
+# /opt/python in AWS), so put it on the import path for the tests as well.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'shared', 'python'))
 
 @pytest.fixture(autouse=True)
 def set_mock_aws_credentials(monkeypatch):
@@ -0,0 +1,88 @@
+import pytest
+import boto3
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['LOANS_TABLE_NAME'] = 'test-accrual-loans'
+os.environ['JOBS_TABLE_NAME'] = 'test-accrual-jobs'
+os.environ['SCAN_SEGMENTS'] = '2'
+
+from accrue_loan_interest.handler import accrue_loan_interest
+
+
+@pytest.fixture
+def loans_table():
+    """Mocks the loans and batch-jobs tables."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        for name, key in [('test-accrual-loans', 'loan_id'), ('test-accrual-jobs', 'job_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        table = dynamodb.Table('test-accrual-loans')
+        table.put_item(Item={
+            'loan_id': 'loan-approved', 'status': 'APPROVED', 'interest_rate': Decimal('10.0'),
+            'remaining_balance': Decimal('365.00'), 'interest_accrued_through': '2026-01-01'
+        })
+        table.put_item(Item={
+            'loan_id': 'loan-pending', 'status': 'PENDING', 'interest_rate': Decimal('10.0'),
+            'remaining_balance': Decimal('365.00')
+        })
+        yield table
+
+
+def test_accrues_interest_once_per_day(loans_table):
+    """
+    Tests that APPROVED loans accrue interest for the days since their last
+    accrual, and that rerunning the same date does not accrue again.
+    """
+    # ACT: three days of 10% APR on 365.00 is 0.30; the second run is a new job for the same date
+    result = accrue_loan_interest({'accrual_date': '2026-01-04'}, {})
+    accrue_loan_interest({'accrual_date': '2026-01-04', 'job_id': 'rerun'}, {})
+
+    # ASSERT
+    assert result['status'] == 'COMPLETE'
+    assert result['result']['interest_accrued'] == '0.30'
+
+    approved = loans_table.get_item(Key={'loan_id': 'loan-approved'})['Item']
+    assert approved['remaining_balance'] == Decimal('365.30')
+    assert approved['interest_accrued_through'] == '2026-01-04'
+
+    pending = loans_table.get_item(Key={'loan_id': 'loan-pending'})['Item']
+    assert pending['remaining_balance'] == Decimal('365.00')
+
+
+def test_small_balance_accrues_from_approval_by_carrying_sub_cent_interest(loans_table):
+    """
+    Tests that a loan that has never accrued starts from its approval date,
+    and that nights whose interest rounds to 0.00 still advance the accrual
+    date and carry the remainder until it adds up to a cent.
+    """
+    # ARRANGE: 8% APR on 10.00 is about 0.0022 a day
+    approved_at = int(datetime(2026, 1, 1, 12, tzinfo=timezone.utc).timestamp())
+    loans_table.put_item(Item={
+        'loan_id': 'loan-small', 'status': 'APPROVED', 'interest_rate': Decimal('8.0'),
+        'remaining_balance': Decimal('10.00'), 'approved_at': approved_at
+    })
+
+    # ACT
+    accrue_loan_interest({'accrual_date': '2026-01-03'}, {})
+    after_two_days = loans_table.get_item(Key={'loan_id': 'loan-small'})['Item']
+    for day in ('04', '05', '06'):
+        accrue_loan_interest({'accrual_date': f'2026-01-{day}'}, {})
+
+    # ASSERT
+    assert after_two_days['remaining_balance'] == Decimal('10.00')
+    assert after_two_days['interest_accrued_through'] == '2026-01-03'
+    assert Decimal('0.0043') < after_two_days['interest_remainder'] < Decimal('0.0044')
+
+    small = loans_table.get_item(Key={'loan_id': 'loan-small'})['Item']
+    assert small['remaining_balance'] == Decimal('10.01') # 5 days: 0.0110
+    assert small['interest_accrued_through'] == '2026-01-06'
+    assert Decimal('0.0009') < small['interest_remainder'] < Decimal('0.0010')
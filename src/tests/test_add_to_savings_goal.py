@@ -151,4 +151,94 @@ def test_add_to_savings_goal_insufficient_funds(mock_db):
 
     # 3. Check that NO transaction was logged
     logs = log_table.scan()['Items']
-    assert len(logs) == 0
\ No newline at end of file
+    assert len(logs) == 0
+
+
+def test_add_to_savings_goal_stale_expected_balance(mock_db):
+    """
+    Tests that a stale expected_balance still succeeds and logs the exact
+    balance taken from the failed condition check.
+    """
+    wallets_table = mock_db.Table(os.environ['WALLETS_TABLE_NAME'])
+    savings_table = mock_db.Table(os.environ['SAVINGS_TABLE_NAME'])
+    log_table = mock_db.Table(os.environ['TRANSACTIONS_LOG_TABLE_NAME'])
+
+    wallets_table.put_item(Item={'wallet_id': 'w_123', 'balance': Decimal('80.00')})
+    savings_table.put_item(Item={
+        'goal_id': 'g_123', 'wallet_id': 'w_123', 'goal_name': 'Vacation',
+        'current_amount': Decimal('0.00'), 'target_amount': Decimal('500.00')
+    })
+
+    event = {
+        "httpMethod": "POST",
+        "pathParameters": { "goal_id": "g_123" },
+        "body": json.dumps({ "wallet_id": "w_123", "amount": "30.00", "expected_balance": "100.00" })
+    }
+
+    response = add_to_savings_goal(event, {})
+
+    assert response['statusCode'] == 200
+    assert wallets_table.get_item(Key={'wallet_id': 'w_123'})['Item']['balance'] == Decimal('50.00')
+    logs = log_table.scan()['Items']
+    assert len(logs) == 1
+    assert logs[0]['balance_after'] == Decimal('50.00')
+
+
+def test_add_to_savings_goal_logs_the_stored_goal_name(mock_db):
+    """
+    Tests that the ledger names the goal as stored, not as the client sent it.
+    """
+    wallets_table = mock_db.Table(os.environ['WALLETS_TABLE_NAME'])
+    savings_table = mock_db.Table(os.environ['SAVINGS_TABLE_NAME'])
+    log_table = mock_db.Table(os.environ['TRANSACTIONS_LOG_TABLE_NAME'])
+
+    wallets_table.put_item(Item={'wallet_id': 'w_123', 'balance': Decimal('100.00')})
+    savings_table.put_item(Item={
+        'goal_id': 'g_123', 'wallet_id': 'w_123', 'goal_name': 'Vacation',
+        'current_amount': Decimal('0.00'), 'target_amount': Decimal('500.00')
+    })
+
+    event = {
+        "httpMethod": "POST",
+        "pathParameters": { "goal_id": "g_123" },
+        "body": json.dumps({ "wallet_id": "w_123", "amount": "30.00", "goal_name": "<script>", "expected_balance": "100.00" })
+    }
+
+    response = add_to_savings_goal(event, {})
+
+    assert response['statusCode'] == 200
+    logs = log_table.scan()['Items']
+    assert len(logs) == 1
+    assert logs[0]['details'] == {'goal_name': 'Vacation'}
+    assert logs[0]['balance_after'] == Decimal('70.00')
+    goal = savings_table.get_item(Key={'goal_id': 'g_123'})['Item']
+    assert (goal['contributed_total'], goal['contribution_count']) == (Decimal('30.00'), 1)
+
+
+def test_add_to_savings_goal_wallet_mismatch(mock_db):
+    """
+    Tests that a goal owned by another wallet is rejected by the transaction
+    and nothing is debited or logged.
+    """
+    wallets_table = mock_db.Table(os.environ['WALLETS_TABLE_NAME'])
+    savings_table = mock_db.Table(os.environ['SAVINGS_TABLE_NAME'])
+    log_table = mock_db.Table(os.environ['TRANSACTIONS_LOG_TABLE_NAME'])
+
+    wallets_table.put_item(Item={'wallet_id': 'w_123', 'balance': Decimal('100.00')})
+    savings_table.put_item(Item={
+        'goal_id': 'g_123', 'wallet_id': 'w_other', 'goal_name': 'Vacation',
+        'current_amount': Decimal('0.00'), 'target_amount': Decimal('500.00')
+    })
+
+    event = {
+        "httpMethod": "POST",
+        "pathParameters": { "goal_id": "g_123" },
+        "body": json.dumps({ "wallet_id": "w_123", "amount": "30.00" })
+    }
+
+    response = add_to_savings_goal(event, {})
+
+    assert response['statusCode'] == 400
+    assert "wallet ID mismatch" in response['body']
+    assert wallets_table.get_item(Key={'wallet_id': 'w_123'})['Item']['balance'] == Decimal('100.00')
+    assert log_table.scan()['Items'] == []
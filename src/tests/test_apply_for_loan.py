@@ -0,0 +1,91 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['DYNAMODB_TABLE_NAME'] = 'test-apply-loans'
+os.environ['CONFIG_TABLE_NAME'] = 'test-config'
+os.environ['WALLETS_TABLE_NAME'] = 'test-wallets'
+
+from apply_for_loan import handler as apply_module
+from apply_for_loan.handler import apply_for_loan
+from fintech_common.pricing import clear_pricing_cache
+
+
+def create_table(dynamodb, name, key):
+    return dynamodb.create_table(
+        TableName=name,
+        KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+@pytest.fixture
+def tables():
+    """Mocks the loans, config and wallets tables with a score-tiered grid."""
+    clear_pricing_cache()
+    apply_module._credit_scores.invalidate()
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        loans = create_table(dynamodb, 'test-apply-loans', 'loan_id')
+        config = create_table(dynamodb, 'test-config', 'config_id')
+        wallets = create_table(dynamodb, 'test-wallets', 'wallet_id')
+        config.put_item(Item={
+            'config_id': 'loan-rate-grid',
+            'term_bands': [12, 36],
+            'rates': {'A': [['6.0'], ['9.0']], 'B': [['12.0'], ['15.0']]},
+            'score_tiers': [[720, 'A'], [0, 'B']],
+            'default_tier': 'B'
+        })
+        wallets.put_item(Item={'wallet_id': 'w-good', 'balance': Decimal('0'), 'credit_score': 750})
+        wallets.put_item(Item={'wallet_id': 'w-legacy', 'balance': Decimal('0')})
+        yield loans, wallets
+    clear_pricing_cache()
+
+
+def apply(wallet_id):
+    event = {
+        'httpMethod': 'POST',
+        'body': json.dumps({'wallet_id': wallet_id, 'amount': '5000', 'loan_term_months': 24})
+    }
+    return apply_for_loan(event, {})
+
+
+def test_credit_score_prices_loan_in_matching_tier(tables):
+    """
+    Tests that the wallet's onboarding score picks the tier, and that a
+    wallet without a score is priced at the default tier.
+    """
+    loans_table, _ = tables
+
+    # ACT
+    good = json.loads(apply('w-good')['body'])['loan']
+    legacy = json.loads(apply('w-legacy')['body'])['loan']
+
+    # ASSERT
+    assert (good['risk_tier'], good['interest_rate'], good['credit_score']) == ('A', '9.0', 750)
+    assert (legacy['risk_tier'], legacy['interest_rate']) == ('B', '15.0')
+    stored = loans_table.get_item(Key={'loan_id': legacy['loan_id']})['Item']
+    assert 'credit_score' not in stored
+
+
+def test_credit_score_is_cached_per_container(tables):
+    """
+    Tests that a repeat applicant is priced from the cached score.
+    """
+    _, wallets_table = tables
+    apply('w-good')
+
+    # Score changes are picked up only after the TTL
+    wallets_table.update_item(
+        Key={'wallet_id': 'w-good'},
+        UpdateExpression='SET credit_score = :s',
+        ExpressionAttributeValues={':s': 600}
+    )
+    loan = json.loads(apply('w-good')['body'])['loan']
+
+    assert loan['risk_tier'] == 'A'
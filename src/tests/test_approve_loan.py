@@ -0,0 +1,95 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+MOCK_SNS_ARN = 'arn:aws:sns:us-east-1:123456789012:test-approve-loan-events'
+os.environ['DYNAMODB_TABLE_NAME'] = 'test-approve-loans'
+os.environ['SNS_TOPIC_ARN'] = MOCK_SNS_ARN
+os.environ['WALLETS_TABLE_NAME'] = 'test-wallets'
+os.environ['TRANSACTIONS_LOG_TABLE_NAME'] = 'test-transaction-logs'
+
+from approve_loan.handler import approve_loan, disburse_instantly, DisbursementError, MAX_DISBURSE_ATTEMPTS
+
+
+@pytest.fixture
+def mock_db():
+    """Mocks the loans, wallets and transaction-logs tables plus the loan events topic."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        for name, key in [('test-approve-loans', 'loan_id'), ('test-wallets', 'wallet_id'), ('test-transaction-logs', 'transaction_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        boto3.client('sns', region_name='us-east-1').create_topic(Name='test-approve-loan-events')
+
+        dynamodb.Table('test-wallets').put_item(Item={'wallet_id': 'wallet-1', 'balance': Decimal('10.00')})
+        dynamodb.Table('test-approve-loans').put_item(Item={
+            'loan_id': 'loan-1', 'wallet_id': 'wallet-1', 'amount': Decimal('250.00'),
+            'remaining_balance': Decimal('250.00'), 'status': 'PENDING'
+        })
+        yield dynamodb
+
+
+def test_instant_disbursement_approves_and_credits_in_one_call(mock_db):
+    """
+    Tests that instant mode approves the loan, credits the wallet and writes
+    the ledger entry before responding.
+    """
+    # ACT
+    event = {
+        'httpMethod': 'POST',
+        'pathParameters': {'loan_id': 'loan-1'},
+        'queryStringParameters': {'disbursement': 'instant'}
+    }
+    response = approve_loan(event, {})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['new_balance'] == '260.00'
+
+    loan = mock_db.Table('test-approve-loans').get_item(Key={'loan_id': 'loan-1'})['Item']
+    assert loan['status'] == 'APPROVED'
+    assert loan['disbursement'] == 'INSTANT'
+    assert mock_db.Table('test-wallets').get_item(Key={'wallet_id': 'wallet-1'})['Item']['balance'] == Decimal('260.00')
+
+    ledger = mock_db.Table('test-transaction-logs').scan()['Items']
+    assert len(ledger) == 1
+    assert ledger[0]['type'] == 'LOAN_IN'
+    assert ledger[0]['balance_after'] == Decimal('260.00')
+
+    # A second approval is a conflict and does not credit again
+    assert approve_loan(event, {})['statusCode'] == 409
+
+
+def test_instant_disbursement_gives_up_with_409_when_the_wallet_keeps_changing(mock_db):
+    """Tests that a wallet balance moving on every attempt ends in a 409 after the last retry, not a 500."""
+    client = boto3.client('dynamodb', region_name='us-east-1')
+    attempts = []
+
+    class WalletKeepsChanging:
+        def get_item(self, **kwargs):
+            return client.get_item(**kwargs)
+
+        def transact_write_items(self, **kwargs):
+            attempts.append(kwargs)
+            raise ClientError({
+                'Error': {'Code': 'TransactionCanceledException', 'Message': 'cancelled'},
+                'CancellationReasons': [{'Code': 'None'}, {'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}]
+            }, 'TransactWriteItems')
+
+    # ACT
+    with pytest.raises(DisbursementError) as raised:
+        disburse_instantly(WalletKeepsChanging(), 'loan-1', {})
+
+    # ASSERT
+    assert raised.value.status_code == 409
+    assert len(attempts) == MAX_DISBURSE_ATTEMPTS
+    assert mock_db.Table('test-approve-loans').get_item(Key={'loan_id': 'loan-1'})['Item']['status'] == 'PENDING'
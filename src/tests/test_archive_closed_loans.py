@@ -0,0 +1,94 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handlers ---
+os.environ['LOANS_TABLE_NAME'] = 'test-archive-loans'
+os.environ['DYNAMODB_TABLE_NAME'] = 'test-archive-loans'
+os.environ['JOBS_TABLE_NAME'] = 'test-archive-jobs'
+os.environ['SCAN_SEGMENTS'] = '2'
+
+from archive_closed_loans.handler import archive_closed_loans
+from get_loans_by_wallet.handler import get_loans_by_wallet
+
+
+@pytest.fixture
+def loans_table():
+    """Mocks a loans table with the active/history indexes and loans written before the split."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='test-archive-loans',
+            KeySchema=[{'AttributeName': 'loan_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'loan_id', 'AttributeType': 'S'},
+                {'AttributeName': 'active_wallet_id', 'AttributeType': 'S'},
+                {'AttributeName': 'closed_wallet_id', 'AttributeType': 'S'},
+                {'AttributeName': 'closed_at', 'AttributeType': 'N'}
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'active-wallet-index',
+                    'KeySchema': [{'AttributeName': 'active_wallet_id', 'KeyType': 'HASH'}],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'wallet-history-index',
+                    'KeySchema': [
+                        {'AttributeName': 'closed_wallet_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'closed_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        dynamodb.create_table(
+            TableName='test-archive-jobs',
+            KeySchema=[{'AttributeName': 'job_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'job_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        for loan_id, status, updated_at in [
+            ('open-1', 'APPROVED', 100), ('open-2', 'PENDING', 200),
+            ('paid-1', 'PAID', 300), ('paid-2', 'PAID', 400), ('rejected-1', 'REJECTED', 500)
+        ]:
+            table.put_item(Item={
+                'loan_id': loan_id, 'wallet_id': 'wallet-1', 'status': status,
+                'amount': Decimal('100'), 'updated_at': updated_at
+            })
+        # Rejected before its writer knew about the split, so still in the active index
+        table.update_item(Key={'loan_id': 'rejected-1'}, UpdateExpression='SET active_wallet_id = wallet_id')
+        yield table
+
+
+def _get(params=None):
+    event = {'httpMethod': 'GET', 'pathParameters': {'wallet_id': 'wallet-1'}, 'queryStringParameters': params}
+    response = get_loans_by_wallet(event, {})
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])
+
+
+def test_archival_splits_active_loans_from_paginated_history(loans_table):
+    """
+    Tests that the archival job indexes open loans as active and moves
+    closed ones to history, and that history is paged newest first.
+    """
+    # ACT
+    result = archive_closed_loans({}, {})
+
+    # ASSERT
+    assert result['status'] == 'COMPLETE'
+    assert result['result']['loans_activated'] == 2
+    assert result['result']['loans_archived'] == 3
+
+    assert sorted(loan['loan_id'] for loan in _get()) == ['open-1', 'open-2']
+
+    first = _get({'view': 'history', 'limit': '2'})
+    assert [loan['loan_id'] for loan in first['loans']] == ['rejected-1', 'paid-2']
+    second = _get({'view': 'history', 'limit': '2', 'cursor': first['next_cursor']})
+    assert [loan['loan_id'] for loan in second['loans']] == ['paid-1']
+    assert second['next_cursor'] is None
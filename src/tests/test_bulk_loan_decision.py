@@ -0,0 +1,84 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+MOCK_SNS_ARN = 'arn:aws:sns:us-east-1:123456789012:test-loan-events'
+os.environ['DYNAMODB_TABLE_NAME'] = 'test-loans'
+os.environ['SNS_TOPIC_ARN'] = MOCK_SNS_ARN
+os.environ['CORS_ORIGIN'] = '*'
+
+from bulk_loan_decision.handler import bulk_loan_decision
+
+
+@pytest.fixture
+def mock_loans():
+    """Mocks the loans table and the loan_events topic."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        sns = boto3.client('sns', region_name='us-east-1')
+
+        dynamodb.create_table(
+            TableName='test-loans',
+            KeySchema=[{'AttributeName': 'loan_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'loan_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        sns.create_topic(Name='test-loan-events')
+        yield dynamodb
+
+
+def test_bulk_loan_decision_reports_per_loan_outcomes(mock_loans):
+    """
+    Tests a mixed batch: two approvals, one rejection, one loan that is
+    no longer PENDING and one that does not exist.
+    """
+    # ARRANGE
+    loans_table = mock_loans.Table('test-loans')
+    for loan_id, status in [('loan-1', 'PENDING'), ('loan-2', 'PENDING'), ('loan-3', 'PENDING'), ('loan-4', 'APPROVED')]:
+        loans_table.put_item(Item={
+            'loan_id': loan_id, 'wallet_id': 'wallet-1', 'amount': Decimal('100.00'),
+            'remaining_balance': Decimal('100.00'), 'status': status
+        })
+
+    event = {
+        'httpMethod': 'POST',
+        'body': json.dumps({'decisions': [
+            {'loan_id': 'loan-1', 'decision': 'APPROVED'},
+            {'loan_id': 'loan-2', 'decision': 'APPROVED'},
+            {'loan_id': 'loan-3', 'decision': 'REJECTED'},
+            {'loan_id': 'loan-4', 'decision': 'APPROVED'},
+            {'loan_id': 'loan-missing', 'decision': 'REJECTED'},
+        ]})
+    }
+
+    # ACT
+    response = bulk_loan_decision(event, {})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    results = {r['loan_id']: r for r in body['results']}
+
+    assert body['summary'] == {'APPROVED': 2, 'REJECTED': 1, 'CONFLICT': 1, 'NOT_FOUND': 1}
+    assert results['loan-1']['event_published'] is True
+    assert results['loan-4']['current_status'] == 'APPROVED'
+    assert loans_table.get_item(Key={'loan_id': 'loan-2'})['Item']['status'] == 'APPROVED'
+    assert loans_table.get_item(Key={'loan_id': 'loan-3'})['Item']['status'] == 'REJECTED'
+
+
+def test_bulk_loan_decision_rejects_invalid_batch(mock_loans):
+    """
+    Tests that an invalid decision value fails the whole request with a 400.
+    """
+    event = {
+        'httpMethod': 'POST',
+        'body': json.dumps({'loan_ids': ['loan-1'], 'decision': 'MAYBE'})
+    }
+
+    response = bulk_loan_decision(event, {})
+
+    assert response['statusCode'] == 400
@@ -0,0 +1,108 @@
+import pytest
+import boto3
+import base64
+import json
+import os
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handlers ---
+os.environ['TRANSACTIONS_LOG_TABLE_NAME'] = 'test-transaction-logs'
+os.environ['JOBS_TABLE_NAME'] = 'test-history-jobs'
+os.environ['SCAN_SEGMENTS'] = '1'
+
+from get_goal_transactions.handler import get_goal_transactions
+from backfill_goal_history.handler import backfill_goal_history
+from fintech_common.savings import SavingsTables, contribute
+
+TABLES = SavingsTables('test-wallets', 'test-savings-goals', 'test-transaction-logs')
+
+
+@pytest.fixture
+def ledger():
+    """Mocks the ledger (with its goal-history-index), a wallet, a goal and the jobs table."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        for name, key in [('test-wallets', 'wallet_id'), ('test-savings-goals', 'goal_id'), ('test-history-jobs', 'job_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        dynamodb.create_table(
+            TableName='test-transaction-logs',
+            KeySchema=[{'AttributeName': 'transaction_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'transaction_id', 'AttributeType': 'S'},
+                {'AttributeName': 'goal_history_id', 'AttributeType': 'S'},
+                {'AttributeName': 'goal_history_key', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'goal-history-index',
+                'KeySchema': [
+                    {'AttributeName': 'goal_history_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'goal_history_key', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        dynamodb.Table('test-wallets').put_item(Item={'wallet_id': 'wallet-1', 'balance': Decimal('100.00')})
+        dynamodb.Table('test-savings-goals').put_item(Item={
+            'goal_id': 'goal-1', 'wallet_id': 'wallet-1', 'goal_name': 'Bike',
+            'current_amount': Decimal('0'), 'target_amount': Decimal('500')
+        })
+        yield dynamodb
+
+
+def history(**params):
+    response = get_goal_transactions({
+        'httpMethod': 'GET',
+        'pathParameters': {'goal_id': 'goal-1'},
+        'queryStringParameters': params or None
+    }, {})
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])
+
+
+def test_goal_history_pages_newest_first_and_backfills(ledger):
+    """
+    Tests that goal entries are written into the goal-history-index and read
+    back a page at a time, that other rows sharing the related_id are never
+    returned, and that the backfill indexes entries written before the index.
+    """
+    client = boto3.client('dynamodb', region_name='us-east-1')
+    log = ledger.Table('test-transaction-logs')
+    for amount in ('1.00', '2.00', '3.00'):
+        contribute(client, TABLES, 'wallet-1', 'goal-1', Decimal(amount), 'Bike')
+    # Same related_id, not a goal entry; and a goal entry from before the index
+    log.put_item(Item={'transaction_id': 'other', 'wallet_id': 'wallet-1', 'timestamp': 1, 'type': 'PAYMENT_OUT',
+                       'amount': Decimal('9.99'), 'related_id': 'goal-1'})
+    log.put_item(Item={'transaction_id': 'legacy', 'wallet_id': 'wallet-1', 'timestamp': 1, 'type': 'SAVINGS_ADD',
+                       'amount': Decimal('5.00'), 'related_id': 'goal-1'})
+
+    # ACT
+    first = history(limit='2')
+    rest = history(limit='2', cursor=first['next_cursor'])
+
+    # ASSERT
+    assert len(first['transactions']) == 2
+    assert [tx['type'] for tx in first['transactions'] + rest['transactions']] == ['SAVINGS_ADD'] * 3
+    assert sum(Decimal(tx['amount']) for tx in first['transactions'] + rest['transactions']) == Decimal('6.00')
+
+    result = backfill_goal_history({}, {})
+    assert result['result']['entries_indexed'] == 1
+    everything = history()
+    assert len(everything['transactions']) == 4
+    assert everything['transactions'][-1]['transaction_id'] == 'legacy' # Oldest last
+    assert everything['next_cursor'] is None
+
+    # A bad limit, and cursors that are not this goal's index keys, are rejected
+    other_goal = base64.urlsafe_b64encode(json.dumps({**json.loads(base64.urlsafe_b64decode(first['next_cursor'])),
+                                                      'goal_history_id': 'goal-2'}).encode()).decode()
+    wrong_keys = base64.urlsafe_b64encode(json.dumps({'transaction_id': 'x'}).encode()).decode()
+    for params in ({'limit': '0'}, {'cursor': other_goal}, {'cursor': wrong_keys}):
+        bad = get_goal_transactions({'httpMethod': 'GET', 'pathParameters': {'goal_id': 'goal-1'},
+                                     'queryStringParameters': params}, {})
+        assert bad['statusCode'] == 400
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from fintech_common.goal_progress import project_goals
+
+NOW = 1_700_000_000  # 2023-11-14 UTC
+DAY = 86400
+
+
+def test_project_goals_uses_tracked_contribution_rate():
+    """
+    Tests percent complete, the average daily rate (over at least a week)
+    and the projected completion date, plus goals that are complete or have
+    no tracked contributions.
+    """
+    goals = [
+        {   # 300 saved over 30 days: 10/day, 700 to go
+            'current_amount': Decimal('300'), 'target_amount': Decimal('1000'),
+            'contributed_total': Decimal('300'), 'first_contribution_at': Decimal(NOW - 30 * DAY)
+        },
+        {   # One contribution today is averaged over the minimum week
+            'current_amount': Decimal('70'), 'target_amount': Decimal('140'),
+            'contributed_total': Decimal('70'), 'first_contribution_at': Decimal(NOW)
+        },
+        {   # Overfunded
+            'current_amount': Decimal('120'), 'target_amount': Decimal('100'),
+            'contributed_total': Decimal('120'), 'first_contribution_at': Decimal(NOW - 10 * DAY)
+        },
+        {'current_amount': Decimal('0.00'), 'target_amount': Decimal('50')}
+    ]
+
+    on_track, new, done, untracked = project_goals(goals, NOW)
+
+    assert on_track == {'percent_complete': Decimal('30.00'), 'average_daily_contribution': Decimal('10.00'),
+                        'projected_completion_date': '2024-01-23'}
+    assert new['average_daily_contribution'] == Decimal('10.00')
+    assert new['projected_completion_date'] == '2023-11-21'
+    assert done['percent_complete'] == Decimal('100.00')
+    assert done['projected_completion_date'] is None
+    assert untracked == {'percent_complete': Decimal('0.00'), 'average_daily_contribution': None,
+                         'projected_completion_date': None}
@@ -0,0 +1,167 @@
+import pytest
+import boto3
+import json
+import os
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['USERS_TABLE_NAME'] = 'test-users'
+os.environ['JOBS_TABLE_NAME'] = 'test-import-jobs'
+os.environ['IMPORT_BUCKET_NAME'] = 'test-imports'
+os.environ['IMPORT_CHUNK_SIZE'] = '2'
+os.environ['STEP_FUNCTION_ARN'] = 'arn:aws:states:us-east-1:123456789012:stateMachine:test-onboarding'
+
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+
+from import_onboarding_users.handler import import_onboarding_users, OnboardingImport
+from fintech_common.parallel_scan import CapacityLimiter
+from fintech_common.onboarding import onboarding_user_id
+
+
+class OutOfTimeAfter:
+    """A Lambda context that runs out of time after `checks` chunks."""
+    function_name = 'import-onboarding-users'
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    def get_remaining_time_in_millis(self):
+        self.checks -= 1
+        return 0 if self.checks < 0 else 900000
+
+
+@pytest.fixture
+def import_env():
+    """Mocks the users and jobs tables, the import bucket and the onboarding state machine."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        dynamodb.create_table(
+            TableName='test-users',
+            KeySchema=[{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'email', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'email-index',
+                'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        dynamodb.create_table(
+            TableName='test-import-jobs',
+            KeySchema=[{'AttributeName': 'job_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'job_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket='test-imports')
+        sfn = boto3.client('stepfunctions', region_name='us-east-1')
+        sfn.create_state_machine(
+            name='test-onboarding',
+            definition=json.dumps({'StartAt': 'Done', 'States': {'Done': {'Type': 'Succeed'}}}),
+            roleArn='arn:aws:iam::123456789012:role/test-onboarding'
+        )
+        yield dynamodb, s3, sfn
+
+
+def test_import_streams_batches_and_resumes(import_env, monkeypatch):
+    """
+    Tests that a user file is imported in chunks, that invalid and repeated
+    rows are reported, that users who already exist are left alone, and that
+    a job stopped for time resumes from its checkpoint without starting any
+    execution twice.
+    """
+    dynamodb, s3, sfn = import_env
+    users = dynamodb.Table('test-users')
+    users.put_item(Item={'user_id': onboarding_user_id('known@example.com'), 'email': 'known@example.com',
+                         'onboarding_status': 'APPROVED'})
+    users.put_item(Item={'user_id': 'legacy-id', 'email': 'Old@Example.com', 'onboarding_status': 'APPROVED'})
+    s3.put_object(Bucket='test-imports', Key='imports/partner.csv', Body=(
+        '﻿name,Email\r\n'
+        'Ann,ann@example.com\r\n'
+        'Bob,not-an-email\r\n'
+        'Cat,CAT@example.com\r\n'
+        'Known,known@example.com\r\n'
+        'Cat again,cat@example.com\r\n'
+        'Old,Old@Example.com\r\n'
+    ).encode('utf-8'))
+    reinvocations = []
+    monkeypatch.setattr('import_onboarding_users.handler.boto3.client', lambda name, **kw: (
+        type('Lambda', (), {'invoke': lambda self, **args: reinvocations.append(json.loads(args['Payload']))})()
+        if name == 'lambda' else boto3.session.Session().client(name, region_name='us-east-1')
+    ))
+
+    # ACT: the first invocation runs out of time after one chunk
+    first = import_onboarding_users({'key': 'imports/partner.csv'}, OutOfTimeAfter(0))
+    assert first['status'] == 'RUNNING'
+    report = import_onboarding_users(reinvocations[0], OutOfTimeAfter(10))
+
+    # ASSERT (numbers come back as strings, like every job report)
+    assert report['status'] == 'COMPLETE'
+    assert report['rows_read'] == '6'
+    assert report['rows_invalid'] == '1'
+    assert report['users_written'] == '2'
+    assert report['users_existing'] == '3'  # known@, old@ (a random id), and cat@ repeated in a later chunk
+    assert report['executions_started'] == '2'
+    assert report['errors'] == [{'line': '3', 'error': 'A valid email is required.'}]
+
+    ann = users.get_item(Key={'user_id': onboarding_user_id('ann@example.com')})['Item']
+    assert ann['onboarding_status'] == 'PENDING_ID_VERIFICATION'
+    assert ann['step_function_arn'].endswith(f":execution:test-onboarding:onboarding-{ann['user_id']}")
+    assert users.get_item(Key={'user_id': onboarding_user_id('known@example.com')})['Item']['onboarding_status'] == 'APPROVED'
+    executions = sfn.list_executions(stateMachineArn=os.environ['STEP_FUNCTION_ARN'])['executions']
+    assert sorted(e['executionArn'] for e in executions) == sorted(
+        users.get_item(Key={'user_id': onboarding_user_id(email)})['Item']['step_function_arn']
+        for email in ('ann@example.com', 'cat@example.com')
+    )
+
+
+def test_failed_start_leaves_a_record_this_job_no_longer_owns(import_env):
+    """
+    Tests that when a start fails for a user whose record has meanwhile been
+    replaced (e.g. they signed up themselves), the row is reported as an
+    error and the chunk carries on, instead of the cleanup delete aborting it.
+    """
+    dynamodb, s3, sfn = import_env
+    users = dynamodb.Table('test-users')
+    user_id = onboarding_user_id('dee@example.com')
+    users.put_item(Item={'user_id': user_id, 'email': 'dee@example.com', 'onboarding_status': 'PENDING_ID_VERIFICATION'})
+
+    class FailingStepFunctions:
+        def start_execution(self, **kwargs):
+            raise ClientError({'Error': {'Code': 'InvalidExecutionInput', 'Message': 'bad input'}}, 'StartExecution')
+
+    job = OnboardingImport(boto3.client('dynamodb', region_name='us-east-1'), FailingStepFunctions(),
+                           ThreadPoolExecutor(max_workers=1), CapacityLimiter(100), 'job-1')
+
+    # ACT
+    outcome, error = job._start({'user_id': user_id, 'email': 'dee@example.com'})
+
+    # ASSERT
+    assert outcome == 'failed'
+    assert error.startswith('InvalidExecutionInput: bad input') and 'not removed' in error
+    assert users.get_item(Key={'user_id': user_id})['Item']['onboarding_status'] == 'PENDING_ID_VERIFICATION'
+
+
+def test_user_who_signs_up_during_the_import_is_not_overwritten(import_env, monkeypatch):
+    """
+    Tests that a user created after the existence check (e.g. by
+    start_onboarding) fails the conditional put and is reported as existing.
+    """
+    dynamodb, s3, sfn = import_env
+    users = dynamodb.Table('test-users')
+    user_id = onboarding_user_id('eve@example.com')
+    users.put_item(Item={'user_id': user_id, 'email': 'eve@example.com', 'onboarding_status': 'PENDING_ID_VERIFICATION'})
+    job = OnboardingImport(boto3.client('dynamodb', region_name='us-east-1'), sfn,
+                           ThreadPoolExecutor(max_workers=2), CapacityLimiter(100), 'job-1')
+    monkeypatch.setattr(job, '_existing', lambda user_ids: {})  # The sign-up lands after the batch get
+
+    # ACT
+    totals, errors = job.process([(2, ['eve@example.com'])], 0)
+
+    # ASSERT
+    assert (totals['users_written'], totals['users_existing'], errors) == (0, 1, [])
+    assert 'import_job_id' not in users.get_item(Key={'user_id': user_id})['Item']
@@ -0,0 +1,71 @@
+import pytest
+
+from local_workflow.onboarding_bench import MODULE_DIR, OnboardingBench
+from local_workflow.states import StateMachine
+from local_workflow.terraform import TerraformModule, Expression
+
+
+def test_onboarding_runs_end_to_end_from_the_terraform_definition():
+    """
+    Tests that the local runner executes the deployed state machine
+    definition: checks run in parallel (the slower one sets the pace),
+    flagged applicants wait for manual review and resume through the task
+    token, and every applicant ends approved or failed with state timings.
+    """
+    bench = OnboardingBench(
+        applicants=12, flag_rate=0.5, reject_rate=0, lowscore_rate=0,
+        review_approve_rate=1.0, review_delay_seconds=60,
+        verify_simulation={'latency': 'fixed:400'}, credit_simulation={'latency': 'fixed:900'},
+        seed=3,
+        tables={'USERS_TABLE_NAME': 'test-users', 'WALLETS_TABLE_NAME': 'test-wallets',
+                'TRANSACTIONS_LOG_TABLE_NAME': 'test-transaction-logs'},
+        state_machine_arn='arn:aws:states:us-east-1:123456789012:stateMachine:test-onboarding'
+    )
+
+    # ACT
+    report = bench.run()
+
+    # ASSERT
+    assert report['outcomes'] == {'SUCCEEDED': 12}
+    reviews = report['manual_reviews']['APPROVED']
+    assert 0 < reviews < 12
+    states = report['states']
+    assert states['WaitForManualReview']['simulated']['count'] == reviews
+    assert states['ProvisionAccount']['wall']['count'] == 12
+    # Parallel: the 900ms credit check, not 400 + 900
+    assert 900 <= states['RunChecks']['simulated']['p50_ms'] < 1200
+    assert report['end_to_end_simulated_with_review']['p50_ms'] >= 60000 + 5000
+
+
+def test_state_machine_retries_then_catches():
+    """Tests Retry backoff on the virtual clock, Catch with ResultPath, and unsupported Terraform expressions."""
+    calls = []
+
+    def flaky(event, context):
+        calls.append(event)
+        raise type('ProviderThrottled', (Exception,), {})("busy")
+
+    definition = {
+        'StartAt': 'Call',
+        'States': {
+            'Call': {'Type': 'Task', 'Resource': 'flaky', 'End': True,
+                     'Retry': [{'ErrorEquals': ['ProviderThrottled'], 'IntervalSeconds': 1, 'BackoffRate': 2, 'MaxAttempts': 2}],
+                     'Catch': [{'ErrorEquals': ['States.ALL'], 'ResultPath': '$.error', 'Next': 'Recovered'}]},
+            'Recovered': {'Type': 'Pass', 'Result': 'ok', 'ResultPath': '$.recovered', 'End': True}
+        }
+    }
+    machine = StateMachine(definition, {'flaky': flaky}, sdk=None)
+    execution = machine.start('arn:local:execution:1', '1', '{"user_id": "u1"}')
+
+    # ACT
+    machine.run(execution)
+
+    # ASSERT
+    assert execution.status == 'SUCCEEDED'
+    assert len(calls) == 3
+    assert machine.clock.now == 1 + 2
+    assert '"recovered": "ok"' in execution.output and '"Error": "ProviderThrottled"' in execution.output
+
+    module = TerraformModule(MODULE_DIR)
+    with pytest.raises(ValueError):
+        module.resolve(Expression('jsondecode(var.x)'))
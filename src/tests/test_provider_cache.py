@@ -0,0 +1,99 @@
+import pytest
+import boto3
+from moto import mock_aws
+
+from fintech_common import provider_sim
+from fintech_common.provider_cache import ProviderResultCache
+import credit_check_mock.handler as credit_check_mock
+
+
+@pytest.fixture
+def cache_table():
+    """Mocks the provider results table."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        dynamodb.create_table(
+            TableName='test-provider-results',
+            KeySchema=[{'AttributeName': 'cache_key', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'cache_key', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield dynamodb.Table('test-provider-results')
+
+
+def test_cache_serves_memory_then_table_until_the_result_expires(cache_table):
+    """
+    Tests the two layers: a warm container answers from memory, a cold one
+    from the table (keyed by the normalised email, not the user), and an
+    expired result or a failed call goes back to the provider.
+    """
+    now = [1_000_000]
+    calls = []
+
+    def call():
+        calls.append(now[0])
+        return {'status': 'APPROVED', 'credit_score': 750}
+
+    warm = ProviderResultCache('credit_check', ttl_seconds=3600, local_ttl_seconds=60, clock=lambda: now[0])
+    cold = ProviderResultCache('credit_check', ttl_seconds=3600, local_ttl_seconds=60, clock=lambda: now[0])
+
+    # ACT / ASSERT
+    assert warm.fetch(cache_table, 'Ann@Example.com', call) == ({'status': 'APPROVED', 'credit_score': 750}, 'provider')
+    assert warm.fetch(cache_table, 'ann@example.com ', call)[1] == 'memory'
+    now[0] += 120  # Past the in-process TTL, inside the result's
+    assert warm.fetch(cache_table, 'ann@example.com', call)[1] == 'table'
+    result, source = cold.fetch(cache_table, 'ann@example.com', call)
+    assert (result['credit_score'], source) == (750, 'table')
+    assert len(calls) == 1
+
+    now[0] += 3600  # Expired; DynamoDB TTL may not have deleted it yet
+    assert cold.fetch(cache_table, 'ann@example.com', call)[1] == 'provider'
+    assert len(calls) == 2
+
+    with pytest.raises(provider_sim.ProviderThrottled):
+        warm.fetch(cache_table, 'bob@example.com', lambda: provider_sim.ProviderSimulation(throttle_rate=1).call())
+    assert cache_table.get_item(Key={'cache_key': warm.key('bob@example.com')}).get('Item') is None
+    assert ProviderResultCache('credit_check', ttl_seconds=0).fetch(cache_table, 'ann@example.com', call)[1] == 'provider'
+
+
+def test_credit_check_reapplication_skips_the_provider(cache_table, monkeypatch):
+    """Tests that a re-application under a new user_id reuses the cached check."""
+    monkeypatch.setattr(credit_check_mock, 'RESULT_CACHE_TABLE_NAME', 'test-provider-results')
+    monkeypatch.setattr(credit_check_mock, 'USERS_TABLE_NAME', None)
+    credit_check_mock.result_cache.invalidate()
+    provider_calls = []
+    provider_sim.install('credit_check', provider_sim.ProviderSimulation(latency='fixed:1', sleep=provider_calls.append))
+    try:
+        # ACT
+        first = credit_check_mock.credit_check({'user_id': 'user-1', 'email': 'cara-lowscore@example.com'}, {})
+        credit_check_mock.result_cache.invalidate()  # A cold container
+        again = credit_check_mock.credit_check({'user_id': 'user-2', 'email': 'cara-lowscore@example.com'}, {})
+    finally:
+        provider_sim.install('credit_check', None)
+        credit_check_mock.result_cache.invalidate()
+
+    # ASSERT
+    assert first == again == {'status': 'REJECTED', 'message': 'Credit check failed: low score (Mock).', 'credit_score': 550}
+    assert len(provider_calls) == 1
+
+
+def test_credit_check_does_not_create_unknown_users(cache_table, monkeypatch):
+    """Tests that storing the score never creates a partial item for a user_id with no record."""
+    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+    dynamodb.create_table(
+        TableName='test-users',
+        KeySchema=[{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'user_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    monkeypatch.setattr(credit_check_mock, 'RESULT_CACHE_TABLE_NAME', None)
+    monkeypatch.setattr(credit_check_mock, 'USERS_TABLE_NAME', 'test-users')
+    provider_sim.install('credit_check', provider_sim.ProviderSimulation(latency='fixed:1', sleep=lambda s: None))
+    try:
+        # ACT / ASSERT
+        with pytest.raises(ValueError):
+            credit_check_mock.credit_check({'user_id': 'user-ghost', 'email': 'ghost@example.com'}, {})
+    finally:
+        provider_sim.install('credit_check', None)
+
+    assert dynamodb.Table('test-users').get_item(Key={'user_id': 'user-ghost'}).get('Item') is None
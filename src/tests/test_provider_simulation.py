@@ -0,0 +1,61 @@
+import pytest
+
+from fintech_common.provider_sim import (
+    ProviderError, ProviderSimulation, ProviderThrottled, ProviderTimeout, parse_latency
+)
+from verify_id_mock.handler import verify_id
+
+
+def test_simulation_injects_latency_and_failures():
+    """
+    Tests the latency distributions, that failure rates are honoured, that
+    tail latency beyond timeout_ms becomes a timeout, and that bad config is
+    rejected.
+    """
+    slept = []
+    sim = ProviderSimulation(latency='uniform:100,200', error_rate=0.2, throttle_rate=0.1, timeout_rate=0.1,
+                             timeout_ms=1000, seed=7, sleep=slept.append)
+
+    # ACT
+    outcomes = {}
+    for _ in range(2000):
+        try:
+            latency = sim.call()
+            assert 100 <= latency <= 200
+            outcome = 'ok'
+        except ProviderError as e:
+            outcome = type(e).__name__
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    # ASSERT
+    assert abs(outcomes['ProviderThrottled'] / 2000 - 0.1) < 0.03
+    assert abs(outcomes['ProviderTimeout'] / 2000 - 0.1) < 0.03
+    assert abs(outcomes['ProviderError'] / 2000 - 0.2) < 0.03
+    assert abs(outcomes['ok'] / 2000 - 0.6) < 0.03
+    assert 1.0 in slept  # Timeouts wait the full timeout_ms
+
+    slow = ProviderSimulation(latency='fixed:5000', timeout_ms=3000, sleep=slept.append)
+    with pytest.raises(ProviderTimeout):
+        slow.call()
+    with pytest.raises(ProviderThrottled):
+        ProviderSimulation(throttle_rate=1, sleep=slept.append).call()
+
+    rng = ProviderSimulation(seed=1).rng
+    assert parse_latency('lognormal:300,0.5')(rng) > 0
+    assert parse_latency('none')(rng) == 0
+    for bad in ('gamma:1', 'uniform:5', 'fixed:-1'):
+        with pytest.raises(ValueError):
+            parse_latency(bad)
+    with pytest.raises(ValueError):
+        ProviderSimulation(error_rate=0.7, timeout_rate=0.7)
+
+
+def test_mock_provider_raises_simulated_failures():
+    """Tests that a mock raises the simulated error type (for Retry) and otherwise still decides."""
+    event = {'user_id': 'user-1', 'email': 'ann@example.com'}
+
+    with pytest.raises(ProviderThrottled):
+        verify_id({**event, 'provider_simulation': {'throttle_rate': '1'}}, {})
+
+    result = verify_id({**event, 'provider_simulation': {'latency': 'fixed:1'}}, {})
+    assert result['status'] == 'APPROVED'
@@ -0,0 +1,60 @@
+import pytest
+import boto3
+import os
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['USERS_TABLE_NAME'] = 'test-users'
+os.environ['WALLETS_TABLE_NAME'] = 'test-wallets'
+os.environ['TRANSACTIONS_LOG_TABLE_NAME'] = 'test-transaction-logs'
+
+from provision_account.handler import provision_account
+from fintech_common.wallets import onboarding_wallet_id
+
+
+@pytest.fixture
+def onboarding_tables():
+    """Mocks the users, wallets and transaction-logs tables with one user awaiting provisioning."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        for name, key in [('test-users', 'user_id'), ('test-wallets', 'wallet_id'), ('test-transaction-logs', 'transaction_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        dynamodb.Table('test-users').put_item(Item={'user_id': 'user-1', 'onboarding_status': 'PENDING_CREDIT_CHECK'})
+        yield dynamodb
+
+
+def test_provision_account_creates_wallet_and_approves_once(onboarding_tables):
+    """
+    Tests that the wallet, its opening ledger entry and the user's APPROVED
+    status are written together, and that a retried task returns the same
+    wallet without writing anything twice.
+    """
+    dynamodb = onboarding_tables
+    event = {'user_id': 'user-1', 'CreditResult': {'credit_score': 720}}
+
+    # ACT
+    result = provision_account(event, {})
+    retried = provision_account(event, {})
+
+    # ASSERT
+    assert result['status'] == 'APPROVED'
+    assert result['wallet_id'] == onboarding_wallet_id('user-1')
+    assert retried['wallet_id'] == result['wallet_id']
+
+    user = dynamodb.Table('test-users').get_item(Key={'user_id': 'user-1'})['Item']
+    assert user['onboarding_status'] == 'APPROVED'
+    assert user['wallet_id'] == result['wallet_id']
+    wallet = dynamodb.Table('test-wallets').get_item(Key={'wallet_id': result['wallet_id']})['Item']
+    assert wallet['balance'] == 0
+    assert wallet['credit_score'] == 720
+    entries = dynamodb.Table('test-transaction-logs').scan()['Items']
+    assert [entry['type'] for entry in entries] == ['WALLET_CREATED']
+
+    with pytest.raises(Exception):
+        provision_account({'user_id': 'missing-user'}, {})
+    assert dynamodb.Table('test-wallets').scan()['Count'] == 1
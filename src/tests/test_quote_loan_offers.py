@@ -0,0 +1,96 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['CONFIG_TABLE_NAME'] = 'test-config'
+
+from quote_loan_offers.handler import quote_loan_offers
+from fintech_common.pricing import PricingEngine, DEFAULT_RATE_GRID, clear_pricing_cache
+
+
+@pytest.fixture
+def config_table():
+    """Mocks the config table with a two-tier rate grid."""
+    clear_pricing_cache()
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='test-config',
+            KeySchema=[{'AttributeName': 'config_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'config_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        table.put_item(Item={
+            'config_id': 'loan-rate-grid',
+            'term_bands': [12, 36],
+            'amount_bands': [Decimal('1000'), Decimal('10000')],
+            'rates': {
+                'A': [['6.0', '5.0'], ['9.0', '8.0']],
+                'B': [['12.0', '11.0'], ['15.0', '14.0']]
+            },
+            'score_tiers': [[720, 'A'], [0, 'B']],
+            'default_tier': 'B'
+        })
+        yield table
+    clear_pricing_cache()
+
+
+def test_default_grid_matches_legacy_pricing():
+    """
+    Tests that the built-in grid reproduces the old hardcoded 12% / 24-month price.
+    """
+    quote = PricingEngine(DEFAULT_RATE_GRID).quote('1000.00', 24)
+
+    r = Decimal('12.0') / 100 / 12
+    legacy = (Decimal('1000.00') * (r * (1 + r) ** 24) / ((1 + r) ** 24 - 1)).quantize(Decimal('0.01'))
+    assert quote.interest_rate == Decimal('12.0')
+    assert quote.monthly_payment == legacy
+
+
+def test_quote_many_offers_from_config_grid(config_table):
+    """
+    Tests the grid shorthand against the config table, with one offer
+    outside the grid reported per offer.
+    """
+    # ACT
+    event = {
+        'httpMethod': 'POST',
+        'body': json.dumps({'amounts': ['500', '5000'], 'terms': [6, 24, 48], 'risk_tier': 'B'})
+    }
+    response = quote_loan_offers(event, {})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    quotes = json.loads(response['body'])['quotes']
+    assert len(quotes) == 6
+    rates = [(q['amount'], q['loan_term_months'], q.get('interest_rate')) for q in quotes]
+    assert ('500', 6, '12.0') in rates
+    assert ('5000', 24, '14.0') in rates
+    assert all('error' in q for q in quotes if q['loan_term_months'] == 48)
+
+
+def test_credit_score_selects_risk_tier(config_table):
+    """
+    Tests that an offer priced by credit score lands in the matching tier,
+    and that an offer with neither score nor tier uses the grid's default tier.
+    """
+    # ACT
+    event = {
+        'httpMethod': 'POST',
+        'body': json.dumps({'offers': [
+            {'amount': '5000', 'loan_term_months': 24, 'credit_score': 780},
+            {'amount': '5000', 'loan_term_months': 24, 'credit_score': 610},
+            {'amount': '5000', 'loan_term_months': 24}
+        ]})
+    }
+    response = quote_loan_offers(event, {})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    quotes = json.loads(response['body'])['quotes']
+    assert [q['risk_tier'] for q in quotes] == ['A', 'B', 'B']
+    assert quotes[0]['interest_rate'] == '8.0'
@@ -0,0 +1,60 @@
+import pytest
+from decimal import Decimal
+
+from fintech_common.records import LoanRecord, GoalRecord, LedgerEntry, WalletRecord
+
+
+def test_loan_record_round_trip_keeps_unknown_attributes():
+    """
+    Tests that from_item -> to_item is lossless, including attributes
+    the record doesn't model (they are kept in `extra`).
+    """
+    item = {
+        'loan_id': 'l_1',
+        'wallet_id': 'w_1',
+        'amount': Decimal('500.00'),
+        'remaining_balance': Decimal('120.00'),
+        'interest_rate': Decimal('8.0'),
+        'loan_term_months': Decimal('12'), # DynamoDB returns numbers as Decimal
+        'minimum_payment': Decimal('43.49'),
+        'status': 'APPROVED',
+        'created_at': Decimal('1700000000'),
+        'some_future_field': 'kept'
+    }
+
+    loan = LoanRecord.from_item(item)
+
+    assert loan.loan_term_months == 12
+    assert loan.created_at == 1700000000
+    assert loan.to_item()['some_future_field'] == 'kept'
+    assert LoanRecord.from_item(loan.to_item()) == loan
+
+
+def test_records_validate_on_construction():
+    """Tests that bad data is rejected with ValueError (mapped to 400 by the handlers)."""
+    with pytest.raises(ValueError):
+        LoanRecord(loan_id='l_1', wallet_id='w_1', amount='-5', loan_term_months=12)
+    with pytest.raises(ValueError):
+        LoanRecord(loan_id='l_1', wallet_id='w_1', amount='5', loan_term_months=12, status='UNKNOWN')
+    with pytest.raises(ValueError):
+        GoalRecord(goal_id='g_1', wallet_id='w_1', goal_name='Trip', target_amount='abc')
+    with pytest.raises(ValueError):
+        WalletRecord(balance='10.00') # missing wallet_id
+
+
+def test_ledger_entry_matches_log_transaction_shape():
+    """
+    Tests that LedgerEntry.new() produces the same item shape
+    the log_transaction helpers have always written.
+    """
+    item = LedgerEntry.new('w_1', 'CREDIT', Decimal('10.00')).to_item()
+
+    assert set(item) == {'transaction_id', 'wallet_id', 'timestamp', 'type', 'amount', 'balance_after', 'related_id', 'details'}
+    assert item['balance_after'] == 'N/A'
+    assert item['related_id'] == 'N/A'
+    assert item['details'] == {}
+
+    item = LedgerEntry.new('w_1', 'SAVINGS_ADD', '5', new_balance=Decimal('95.00'), related_id='g_1').to_item()
+    assert item['amount'] == Decimal('5')
+    assert item['balance_after'] == Decimal('95.00')
+    assert item['related_id'] == 'g_1'
@@ -0,0 +1,80 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['SAVINGS_TABLE_NAME'] = 'test-savings-goals'
+os.environ['WALLETS_TABLE_NAME'] = 'test-wallets'
+os.environ['TRANSACTIONS_LOG_TABLE_NAME'] = 'test-transaction-logs'
+
+from redeem_savings_goal.handler import redeem_savings_goal
+
+
+@pytest.fixture
+def mock_db():
+    """Mocks the wallets, savings goals and transaction log tables with one wallet and goal."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        for name, key in [('test-wallets', 'wallet_id'), ('test-savings-goals', 'goal_id'), ('test-transaction-logs', 'transaction_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        dynamodb.Table('test-wallets').put_item(Item={'wallet_id': 'w_123', 'balance': Decimal('10.00')})
+        dynamodb.Table('test-savings-goals').put_item(Item={
+            'goal_id': 'g_123', 'wallet_id': 'w_123', 'goal_name': 'Vacation',
+            'current_amount': Decimal('520.00'), 'target_amount': Decimal('500.00')
+        })
+        yield dynamodb
+
+
+def redeem(body):
+    event = {"httpMethod": "POST", "pathParameters": {"goal_id": "g_123"}, "body": json.dumps(body)}
+    return redeem_savings_goal(event, {})
+
+
+def test_redeem_with_stale_client_state(mock_db):
+    """
+    Tests that a redemption whose client-side amount, name and balance are
+    all stale still credits exactly what the goal held and logs the exact
+    balance and the stored name, and that the goal is gone.
+    """
+    # ACT: the goal actually holds 520, is named Vacation, and the wallet holds 10
+    response = redeem({"wallet_id": "w_123", "amount": "500.00", "goal_name": "Holiday", "expected_balance": "0.00"})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    assert mock_db.Table('test-wallets').get_item(Key={'wallet_id': 'w_123'})['Item']['balance'] == Decimal('530.00')
+    assert 'Item' not in mock_db.Table('test-savings-goals').get_item(Key={'goal_id': 'g_123'})
+    logs = mock_db.Table('test-transaction-logs').scan()['Items']
+    assert len(logs) == 1
+    assert logs[0]['type'] == 'SAVINGS_REDEEM'
+    assert logs[0]['amount'] == Decimal('520.00')
+    assert logs[0]['balance_after'] == Decimal('530.00')
+    assert logs[0]['details'] == {'message': 'Redeemed goal: Vacation'}
+
+
+def test_redeem_incomplete_goal_is_refused(mock_db):
+    """
+    Tests that a goal below its target is refused by the transaction's
+    condition, even when the client has no state and the goal is read first.
+    """
+    # ARRANGE
+    mock_db.Table('test-savings-goals').update_item(
+        Key={'goal_id': 'g_123'}, UpdateExpression='SET current_amount = :a',
+        ExpressionAttributeValues={':a': Decimal('100.00')}
+    )
+
+    # ACT
+    response = redeem({})
+
+    # ASSERT
+    assert response['statusCode'] == 400
+    assert "not yet complete" in response['body']
+    assert mock_db.Table('test-wallets').get_item(Key={'wallet_id': 'w_123'})['Item']['balance'] == Decimal('10.00')
+    assert mock_db.Table('test-transaction-logs').scan()['Items'] == []
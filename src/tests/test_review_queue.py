@@ -0,0 +1,135 @@
+import pytest
+import boto3
+import os
+import json
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handlers ---
+os.environ['USERS_TABLE_NAME'] = 'test-users'
+os.environ['CORS_ORIGIN'] = '*'
+
+from get_review_queue.handler import get_review_queue
+from botocore.exceptions import ClientError
+
+from bulk_manual_review.handler import apply_decision, bulk_manual_review
+
+
+@pytest.fixture
+def mock_users():
+    """Mocks the users table with its sparse review-queue-index."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        dynamodb.create_table(
+            TableName='test-users',
+            KeySchema=[{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'review_queue', 'AttributeType': 'S'},
+                {'AttributeName': 'review_submitted_at', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'review-queue-index',
+                'KeySchema': [
+                    {'AttributeName': 'review_queue', 'KeyType': 'HASH'},
+                    {'AttributeName': 'review_submitted_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': ['email', 'created_at', 'onboarding_status']}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        users_table = dynamodb.Table('test-users')
+        # As WaitForManualReview leaves them, submitted out of key order
+        for user_id, minute in [('user-b', 2), ('user-c', 3), ('user-a', 1)]:
+            users_table.put_item(Item={
+                'user_id': user_id, 'email': f"{user_id}@example.com", 'onboarding_status': 'PENDING_MANUAL_REVIEW',
+                'sfn_task_token': f"token-{user_id}", 'review_queue': 'MANUAL_REVIEW',
+                'review_submitted_at': f"2026-10-19T09:0{minute}:00.000Z"
+            })
+        users_table.put_item(Item={'user_id': 'user-approved', 'email': 'user-approved@example.com', 'onboarding_status': 'APPROVED'})
+        yield users_table
+
+
+def _queue(**params):
+    response = get_review_queue({'httpMethod': 'GET', 'queryStringParameters': params}, {})
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])
+
+
+def test_review_queue_pages_oldest_first_and_empties_as_users_are_decided(mock_users):
+    """
+    Tests that the queue lists only waiting users, oldest submission first,
+    without their task tokens, and that a bulk decision (with a user not
+    awaiting review and one that does not exist) removes the decided users.
+    """
+    # ACT
+    first = _queue(limit='2')
+    second = _queue(limit='2', cursor=first['next_cursor'])
+
+    # ASSERT
+    assert [u['user_id'] for u in first['users']] == ['user-a', 'user-b']
+    assert [u['user_id'] for u in second['users']] == ['user-c']
+    assert 'sfn_task_token' not in first['users'][0] and first['users'][0]['email'] == 'user-a@example.com'
+
+    # ACT
+    response = bulk_manual_review({'httpMethod': 'POST', 'body': json.dumps({'decisions': [
+        {'user_id': 'user-a', 'decision': 'APPROVED'},
+        {'user_id': 'user-b', 'decision': 'REJECTED'},
+        {'user_id': 'user-approved', 'decision': 'APPROVED'},
+        {'user_id': 'user-missing', 'decision': 'APPROVED'},
+    ]})}, {})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    results = {r['user_id']: r for r in body['results']}
+    assert body['summary'] == {'APPROVED': 1, 'REJECTED': 1, 'NOT_PENDING': 1, 'NOT_FOUND': 1}
+    assert results['user-approved']['current_status'] == 'APPROVED'
+
+    user_a = mock_users.get_item(Key={'user_id': 'user-a'})['Item']
+    assert user_a['onboarding_status'] == 'PENDING_PROVISIONING'
+    assert 'sfn_task_token' not in user_a and 'review_queue' not in user_a
+    assert mock_users.get_item(Key={'user_id': 'user-b'})['Item']['onboarding_status'] == 'REJECTED_MANUAL'
+    assert [u['user_id'] for u in _queue()['users']] == ['user-c']
+
+
+def test_bulk_manual_review_rejects_invalid_batch(mock_users):
+    """
+    Tests that an invalid decision value fails the whole request with a 400.
+    """
+    event = {
+        'httpMethod': 'POST',
+        'body': json.dumps({'user_ids': ['user-a'], 'decision': 'MAYBE'})
+    }
+
+    # ACT
+    response = bulk_manual_review(event, {})
+
+    # ASSERT
+    assert response['statusCode'] == 400
+    assert mock_users.get_item(Key={'user_id': 'user-a'})['Item']['sfn_task_token'] == 'token-user-a'
+
+
+def test_unsent_decision_puts_the_user_back_in_the_queue(mock_users):
+    """
+    Tests that a decision that could not be sent (throttled) restores the
+    task token and queue position, while a spent token stays removed.
+    """
+    class StepFunctions:
+        def __init__(self, code):
+            self.code = code
+
+        def send_task_success(self, **kwargs):
+            raise ClientError({'Error': {'Code': self.code, 'Message': ''}}, 'SendTaskSuccess')
+
+    client = boto3.client('dynamodb', region_name='us-east-1')
+
+    # ACT
+    throttled = apply_decision(client, StepFunctions('ThrottlingException'), 'user-a', 'APPROVED')
+    timed_out = apply_decision(client, StepFunctions('TaskTimedOut'), 'user-b', 'APPROVED')
+
+    # ASSERT
+    assert (throttled['outcome'], throttled['requeued']) == ('ERROR', True)
+    user_a = mock_users.get_item(Key={'user_id': 'user-a'})['Item']
+    assert (user_a['onboarding_status'], user_a['sfn_task_token']) == ('PENDING_MANUAL_REVIEW', 'token-user-a')
+    assert timed_out['outcome'] == 'TIMED_OUT'
+    assert [u['user_id'] for u in _queue()['users']] == ['user-a', 'user-c']
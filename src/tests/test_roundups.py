@@ -0,0 +1,136 @@
+import pytest
+import boto3
+import json
+import os
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handlers ---
+os.environ['ROUNDUPS_TABLE_NAME'] = 'test-roundups'
+os.environ['SAVINGS_TABLE_NAME'] = 'test-savings-goals'
+os.environ['WALLETS_TABLE_NAME'] = 'test-wallets'
+os.environ['TRANSACTIONS_LOG_TABLE_NAME'] = 'test-transaction-logs'
+os.environ['JOBS_TABLE_NAME'] = 'test-roundup-jobs'
+os.environ['ROUNDUP_FLUSH_THRESHOLD'] = '1.50'
+os.environ['SCAN_SEGMENTS'] = '1'
+# moto rolls back a cancelled transaction by restoring the whole table, which
+# can undo a concurrent one; real DynamoDB isolates them
+os.environ['FLUSH_WORKERS'] = '1'
+
+from accumulate_roundups.handler import accumulate_roundups
+from flush_roundups.handler import flush_roundups
+from set_savings_roundup.handler import set_savings_roundup
+
+
+def payment(transaction_id, amount, wallet_id='wallet-1'):
+    message = {'event_type': 'PAYMENT_SUCCESSFUL', 'details': {
+        'transaction_id': transaction_id, 'wallet_id': wallet_id, 'amount': amount
+    }}
+    return {'Records': [{'Sns': {'MessageId': transaction_id, 'Message': json.dumps(message)}}]}
+
+
+@pytest.fixture
+def roundup_env():
+    """Mocks wallets, goals, the ledger, round-ups and jobs, with wallet-1 rounding up into 'holiday'."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        for name, key in [('test-wallets', 'wallet_id'), ('test-savings-goals', 'goal_id'),
+                          ('test-transaction-logs', 'transaction_id'), ('test-roundups', 'wallet_id'),
+                          ('test-roundup-jobs', 'job_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        dynamodb.Table('test-wallets').put_item(Item={'wallet_id': 'wallet-1', 'balance': Decimal('100.00')})
+        dynamodb.Table('test-savings-goals').put_item(Item={
+            'goal_id': 'holiday', 'wallet_id': 'wallet-1', 'goal_name': 'Holiday',
+            'current_amount': Decimal('0'), 'target_amount': Decimal('500')
+        })
+        response = set_savings_roundup({
+            'httpMethod': 'POST',
+            'pathParameters': {'goal_id': 'holiday'},
+            'body': json.dumps({'wallet_id': 'wallet-1', 'goal_name': 'Holiday'})
+        }, {})
+        assert response['statusCode'] == 200
+        yield dynamodb
+
+
+def test_roundups_accumulate_and_flush_at_threshold(roundup_env):
+    """
+    Tests that round-ups build up on the counter without touching the wallet,
+    that a redelivered payment is not counted twice, and that reaching the
+    threshold sweeps the total into the goal in one transaction.
+    """
+    goals = roundup_env.Table('test-savings-goals')
+    wallets = roundup_env.Table('test-wallets')
+    roundups = roundup_env.Table('test-roundups')
+
+    # ACT
+    accumulate_roundups(payment('tx-1', '3.40'), {})  # 0.60
+    accumulate_roundups(payment('tx-1', '3.40'), {})  # Redelivery
+    accumulate_roundups(payment('tx-2', '7.75'), {})  # 0.25
+
+    # ASSERT: nothing has moved yet
+    row = roundups.get_item(Key={'wallet_id': 'wallet-1'})['Item']
+    assert row['pending_amount'] == Decimal('0.85')
+    assert row['pending_count'] == 2
+    assert wallets.get_item(Key={'wallet_id': 'wallet-1'})['Item']['balance'] == Decimal('100.00')
+
+    accumulate_roundups(payment('tx-3', '1.10'), {})  # 0.90, crosses 1.50
+
+    row = roundups.get_item(Key={'wallet_id': 'wallet-1'})['Item']
+    assert row['pending_amount'] == 0
+    assert 'pending_tx' not in row
+    assert row['flushed_total'] == Decimal('1.75')
+    assert goals.get_item(Key={'goal_id': 'holiday'})['Item']['current_amount'] == Decimal('1.75')
+    assert wallets.get_item(Key={'wallet_id': 'wallet-1'})['Item']['balance'] == Decimal('98.25')
+    logs = roundup_env.Table('test-transaction-logs').scan()['Items']
+    assert [(log['amount'], log['details']['round_ups']) for log in logs] == [(Decimal('1.75'), 3)]
+
+
+def test_daily_flush_sweeps_small_balances(roundup_env):
+    """
+    Tests that the daily job sweeps round-ups below the threshold, and that
+    payments from wallets that are not enrolled are ignored.
+    """
+    accumulate_roundups(payment('tx-1', '4.80'), {})
+    accumulate_roundups(payment('tx-2', '4.80', wallet_id='wallet-2'), {})
+
+    # ACT
+    result = flush_roundups({}, {})
+
+    # ASSERT
+    assert result['status'] == 'COMPLETE'
+    assert result['result']['wallets_flushed'] == 1
+    assert roundup_env.Table('test-savings-goals').get_item(Key={'goal_id': 'holiday'})['Item']['current_amount'] == Decimal('0.20')
+    assert roundup_env.Table('test-roundups').get_item(Key={'wallet_id': 'wallet-2'}).get('Item') is None
+
+
+def test_busy_wallet_defers_and_keeps_its_roundups(roundup_env, monkeypatch):
+    """
+    Tests that a flush refused without a goal problem (the wallet kept
+    changing: a 409 with no reason) keeps the enrollment and the pending
+    round-ups, and that the pending payment ids are capped.
+    """
+    import fintech_common.roundup as roundup
+
+    def busy(*args, **kwargs):
+        raise roundup.TransferError(409, "Wallet balance kept changing. Please retry.")
+
+    monkeypatch.setattr(roundup, 'contribute', busy)
+    monkeypatch.setattr(roundup, 'MAX_PENDING_TX', 2)
+    accumulate_roundups(payment('tx-1', '4.80'), {})
+
+    # ACT
+    result = flush_roundups({}, {})
+    accumulate_roundups(payment('tx-2', '4.80'), {})
+    accumulate_roundups(payment('tx-3', '4.80'), {})  # Over the cap: not counted
+
+    # ASSERT
+    assert result['status'] == 'COMPLETE'
+    row = roundup_env.Table('test-roundups').get_item(Key={'wallet_id': 'wallet-1'})['Item']
+    assert row['enabled'] is True
+    assert row['pending_amount'] == Decimal('0.40')
+    assert row['pending_tx'] == {'tx-1', 'tx-2'}
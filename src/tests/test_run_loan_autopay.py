@@ -0,0 +1,110 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from moto import mock_aws
+
+MOCK_SNS_ARN = 'arn:aws:sns:us-east-1:123456789012:test-payment-events'
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['LOANS_TABLE_NAME'] = 'test-autopay-loans'
+os.environ['JOBS_TABLE_NAME'] = 'test-autopay-jobs'
+os.environ['SNS_TOPIC_ARN'] = MOCK_SNS_ARN
+os.environ['AUTOPAY_SHARDS'] = '4'
+os.environ['LOOKBACK_DAYS'] = '1'
+
+from run_loan_autopay.handler import run_loan_autopay
+from fintech_common.autopay import due_bucket
+from datetime import date
+
+CYCLE = date(2024, 3, 15)
+
+
+def loan(loan_id, due, balance, status='APPROVED'):
+    return {
+        'loan_id': loan_id, 'wallet_id': f'wallet-{loan_id}', 'status': status,
+        'remaining_balance': Decimal(balance), 'minimum_payment': Decimal('30.00'),
+        'autopay_enabled': True, 'next_due_date': due.isoformat(),
+        'autopay_due_bucket': due_bucket(due, loan_id, 4)
+    }
+
+
+@pytest.fixture
+def autopay_env():
+    """Mocks the loans table (with the due-date index), the jobs table and a queue on the payment topic."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        loans = dynamodb.create_table(
+            TableName='test-autopay-loans',
+            KeySchema=[{'AttributeName': 'loan_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'loan_id', 'AttributeType': 'S'},
+                {'AttributeName': 'autopay_due_bucket', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'autopay-due-index',
+                'KeySchema': [{'AttributeName': 'autopay_due_bucket', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'KEYS_ONLY'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        dynamodb.create_table(
+            TableName='test-autopay-jobs',
+            KeySchema=[{'AttributeName': 'job_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'job_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        for item in [
+            loan('due-today', CYCLE, '100.00'),
+            loan('small-balance', CYCLE, '20.00'),
+            loan('missed-yesterday', date(2024, 3, 14), '100.00'),
+            loan('paid-off', CYCLE, '0.00', status='PAID'),
+            loan('due-next-month', date(2024, 4, 15), '100.00'),
+        ]:
+            loans.put_item(Item=item)
+
+        sns = boto3.client('sns', region_name='us-east-1')
+        sqs = boto3.client('sqs', region_name='us-east-1')
+        sns.create_topic(Name='test-payment-events')
+        queue_url = sqs.create_queue(QueueName='autopay-requests')['QueueUrl']
+        queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+        sns.subscribe(TopicArn=MOCK_SNS_ARN, Protocol='sqs', Endpoint=queue_arn)
+
+        def published():
+            messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+            return [json.loads(json.loads(m['Body'])['Message'])['details'] for m in messages]
+
+        yield loans, published
+
+
+def test_autopay_requests_due_loans_once(autopay_env):
+    """
+    Tests that a run requests every due (and recently missed) loan, moves it
+    to its next due bucket, drops closed loans from the index, and that a
+    rerun for the same cycle requests nothing again.
+    """
+    loans_table, published = autopay_env
+
+    # ACT
+    result = run_loan_autopay({'cycle_date': CYCLE.isoformat()}, {})
+
+    # ASSERT
+    assert result['status'] == 'COMPLETE'
+    assert result['result']['loans_requested'] == 3
+    assert result['result']['loans_closed'] == 1
+    requests = {d['loan_id']: d for d in published()}
+    assert set(requests) == {'due-today', 'small-balance', 'missed-yesterday'}
+    assert requests['due-today']['amount'] == '30.00'
+    assert requests['small-balance']['amount'] == '20.00'
+    assert requests['due-today']['source'] == 'AUTOPAY'
+
+    advanced = loans_table.get_item(Key={'loan_id': 'due-today'})['Item']
+    assert advanced['next_due_date'] == '2024-04-15'
+    assert advanced['autopay_due_bucket'] == due_bucket(date(2024, 4, 15), 'due-today', 4)
+    assert 'autopay_due_bucket' not in loans_table.get_item(Key={'loan_id': 'paid-off'})['Item']
+
+    # Rerun: the cycle is already complete and nothing is published twice
+    rerun = run_loan_autopay({'cycle_date': CYCLE.isoformat()}, {})
+    assert rerun['status'] == 'COMPLETE'
+    assert published() == []
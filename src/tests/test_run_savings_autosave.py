@@ -0,0 +1,107 @@
+import pytest
+import boto3
+import os
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['SAVINGS_TABLE_NAME'] = 'test-savings-goals'
+os.environ['WALLETS_TABLE_NAME'] = 'test-wallets'
+os.environ['TRANSACTIONS_LOG_TABLE_NAME'] = 'test-transaction-logs'
+os.environ['JOBS_TABLE_NAME'] = 'test-autosave-jobs'
+os.environ['AUTOSAVE_SHARDS'] = '4'
+os.environ['LOOKBACK_DAYS'] = '1'
+# moto rolls back a cancelled transaction by restoring the whole table, which
+# can undo a concurrent one; real DynamoDB isolates them
+os.environ['AUTOSAVE_WORKERS'] = '1'
+
+from run_savings_autosave.handler import run_savings_autosave
+from fintech_common.autosave import run_bucket
+from datetime import date
+
+CYCLE = date(2024, 3, 15)  # A Friday
+
+
+def goal(goal_id, wallet_id, amount, frequency, day, run_date=CYCLE):
+    return {
+        'goal_id': goal_id, 'wallet_id': wallet_id, 'goal_name': goal_id.title(),
+        'current_amount': Decimal('0'), 'target_amount': Decimal('1000'),
+        'autosave_enabled': True, 'autosave_amount': Decimal(amount),
+        'autosave_frequency': frequency, 'autosave_day': day, 'autosave_attempts': 0,
+        'autosave_next_run': run_date.isoformat(), 'autosave_due_bucket': run_bucket(run_date, goal_id, 4)
+    }
+
+
+@pytest.fixture
+def autosave_env():
+    """Mocks wallets, goals (with the autosave index), the ledger and the jobs table."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        for name, key in [('test-wallets', 'wallet_id'), ('test-transaction-logs', 'transaction_id'), ('test-autosave-jobs', 'job_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        goals = dynamodb.create_table(
+            TableName='test-savings-goals',
+            KeySchema=[{'AttributeName': 'goal_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'goal_id', 'AttributeType': 'S'},
+                {'AttributeName': 'autosave_due_bucket', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'autosave-due-index',
+                'KeySchema': [{'AttributeName': 'autosave_due_bucket', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': [
+                    'wallet_id', 'goal_name', 'autosave_amount', 'autosave_frequency', 'autosave_day', 'autosave_attempts'
+                ]}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        wallets = dynamodb.Table('test-wallets')
+        wallets.put_item(Item={'wallet_id': 'rich', 'balance': Decimal('100.00')})
+        wallets.put_item(Item={'wallet_id': 'poor', 'balance': Decimal('5.00')})
+        goals.put_item(Item=goal('holiday', 'rich', '25.00', 'WEEKLY', 4))
+        goals.put_item(Item=goal('car', 'poor', '25.00', 'MONTHLY', 15))
+        goals.put_item(Item=goal('next-week', 'rich', '10.00', 'WEEKLY', 4, date(2024, 3, 22)))
+        yield dynamodb
+
+
+def test_autosave_contributes_and_defers_short_wallets(autosave_env):
+    """
+    Tests that due instructions are saved and moved to their next run, that
+    a short wallet is retried the next day instead of failing the run, and
+    that a goal saved for a date is not saved again.
+    """
+    goals = autosave_env.Table('test-savings-goals')
+    wallets = autosave_env.Table('test-wallets')
+
+    # ACT
+    result = run_savings_autosave({'cycle_date': CYCLE.isoformat()}, {})
+
+    # ASSERT
+    assert result['status'] == 'COMPLETE'
+    assert result['result']['goals_saved'] == 1
+    assert result['result']['goals_retried'] == 1
+
+    holiday = goals.get_item(Key={'goal_id': 'holiday'})['Item']
+    assert holiday['current_amount'] == Decimal('25.00')
+    assert holiday['autosave_next_run'] == '2024-03-22'
+    assert wallets.get_item(Key={'wallet_id': 'rich'})['Item']['balance'] == Decimal('75.00')
+    logs = autosave_env.Table('test-transaction-logs').scan()['Items']
+    assert [(log['related_id'], log['details']['source']) for log in logs] == [('holiday', 'AUTOSAVE')]
+
+    car = goals.get_item(Key={'goal_id': 'car'})['Item']
+    assert car['current_amount'] == Decimal('0')
+    assert car['autosave_next_run'] == '2024-03-16'
+    assert car['autosave_attempts'] == 1
+    assert car['autosave_last_status'] == 'RETRY_PENDING'
+
+    # The next day's run only retries the short wallet; holiday has left the 15th
+    wallets.put_item(Item={'wallet_id': 'poor', 'balance': Decimal('30.00')})
+    next_day = run_savings_autosave({'cycle_date': '2024-03-16'}, {})
+    assert next_day['result']['goals_saved'] == 1
+    assert goals.get_item(Key={'goal_id': 'car'})['Item']['autosave_next_run'] == '2024-04-15'
+    assert goals.get_item(Key={'goal_id': 'holiday'})['Item']['current_amount'] == Decimal('25.00')
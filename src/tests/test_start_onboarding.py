@@ -0,0 +1,139 @@
+import pytest
+import boto3
+import json
+import os
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['USERS_TABLE_NAME'] = 'test-users'
+os.environ['STEP_FUNCTION_ARN'] = 'arn:aws:states:us-east-1:123456789012:stateMachine:test-onboarding'
+os.environ['CORS_ORIGIN'] = '*'
+
+from start_onboarding.handler import start_onboarding
+from fintech_common.onboarding import INITIAL_STATUS, new_user_item
+
+
+@pytest.fixture
+def onboarding_env():
+    """Mocks the users table (with its email-index) and the onboarding state machine."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        dynamodb.create_table(
+            TableName='test-users',
+            KeySchema=[{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'email', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'email-index',
+                'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        sfn = boto3.client('stepfunctions', region_name='us-east-1')
+        sfn.create_state_machine(
+            name='test-onboarding',
+            definition=json.dumps({'StartAt': 'Wait', 'States': {'Wait': {'Type': 'Wait', 'Seconds': 60, 'End': True}}}),
+            roleArn='arn:aws:iam::123456789012:role/test-onboarding'
+        )
+        yield dynamodb.Table('test-users'), sfn
+
+
+def _start(email):
+    response = start_onboarding({'httpMethod': 'POST', 'body': json.dumps({'email': email})}, {})
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_repeated_start_returns_the_existing_application(onboarding_env):
+    """
+    Tests that a double-click (the same email, differently typed) claims the
+    user once and starts one execution, and that the repeat returns the
+    existing application, also once it has moved past the first step.
+    """
+    users_table, sfn = onboarding_env
+
+    # ACT
+    first_code, first = _start('Dana@Example.com')
+    second_code, second = _start(' dana@example.com')
+
+    # ASSERT
+    assert (first_code, second_code) == (202, 200)
+    assert second['user_id'] == first['user_id']
+    assert second['execution_arn'] == first['execution_arn']
+    executions = sfn.list_executions(stateMachineArn=os.environ['STEP_FUNCTION_ARN'])['executions']
+    assert [e['executionArn'] for e in executions] == [first['execution_arn']]
+
+    users_table.update_item(Key={'user_id': first['user_id']}, UpdateExpression="SET onboarding_status = :s",
+                            ExpressionAttributeValues={':s': 'APPROVED'})
+    code, again = _start('dana@example.com')
+    assert (code, again['status']) == (200, 'APPROVED')
+    assert len(sfn.list_executions(stateMachineArn=os.environ['STEP_FUNCTION_ARN'])['executions']) == 1
+
+
+def test_start_repairs_a_claim_without_an_execution(onboarding_env):
+    """Tests that a user claimed by a request that failed before starting the execution gets it on retry."""
+    users_table, sfn = onboarding_env
+    user = new_user_item('eli@example.com', os.environ['STEP_FUNCTION_ARN'])
+    users_table.put_item(Item=user)
+
+    # ACT
+    code, body = _start('eli@example.com')
+
+    # ASSERT
+    assert (code, body['status']) == (200, INITIAL_STATUS)
+    assert sfn.describe_execution(executionArn=user['step_function_arn'])['status'] == 'RUNNING'
+
+
+def test_rejected_applicant_can_apply_again(onboarding_env):
+    """
+    Tests that an application that ended without an account does not block
+    the applicant: a manual rejection, and checks that failed (the user is
+    left at the initial status with the execution over), each start a new
+    attempt with its own execution, which a repeat then deduplicates.
+    """
+    users_table, sfn = onboarding_env
+    _, first = _start('fay@example.com')
+    users_table.update_item(Key={'user_id': first['user_id']}, UpdateExpression="SET onboarding_status = :s",
+                            ExpressionAttributeValues={':s': 'REJECTED_MANUAL'})
+    sfn.stop_execution(executionArn=first['execution_arn'])
+
+    # ACT
+    code, second = _start('fay@example.com')
+    repeat_code, repeat = _start('fay@example.com')
+
+    # ASSERT
+    assert (code, second['status']) == (202, INITIAL_STATUS)
+    assert second['execution_arn'] == f"{first['execution_arn']}-2"
+    assert (repeat_code, repeat['execution_arn']) == (200, second['execution_arn'])
+    assert sfn.describe_execution(executionArn=second['execution_arn'])['status'] == 'RUNNING'
+
+    # ACT: the second attempt's checks fail, so its execution ends at the initial status
+    sfn.stop_execution(executionArn=second['execution_arn'])
+    code, third = _start('fay@example.com')
+
+    # ASSERT
+    assert (code, third['execution_arn']) == (202, f"{first['execution_arn']}-3")
+    assert users_table.get_item(Key={'user_id': first['user_id']})['Item']['onboarding_attempt'] == 3
+    assert len(sfn.list_executions(stateMachineArn=os.environ['STEP_FUNCTION_ARN'])['executions']) == 3
+
+
+def test_user_from_before_derived_ids_keeps_their_record(onboarding_env):
+    """
+    Tests that an applicant whose record has a random id (created before ids
+    were derived from the email) is found by email instead of getting a
+    second record, and that their running execution is not started again.
+    """
+    users_table, sfn = onboarding_env
+    execution = sfn.start_execution(stateMachineArn=os.environ['STEP_FUNCTION_ARN'], name='legacy-1700000000')
+    users_table.put_item(Item={'user_id': 'legacy-id', 'email': 'Gus@example.com', 'onboarding_status': INITIAL_STATUS,
+                               'created_at': 1700000000, 'step_function_arn': execution['executionArn']})
+
+    # ACT
+    code, body = _start('Gus@example.com')
+
+    # ASSERT
+    assert (code, body['user_id'], body['execution_arn']) == (200, 'legacy-id', execution['executionArn'])
+    assert users_table.scan()['Count'] == 1
+    assert len(sfn.list_executions(stateMachineArn=os.environ['STEP_FUNCTION_ARN'])['executions']) == 1
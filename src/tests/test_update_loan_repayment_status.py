@@ -0,0 +1,159 @@
+import pytest
+import boto3
+import os
+import json
+from decimal import Decimal
+from moto import mock_aws
+
+# --- Set Environment Variables BEFORE importing the handler ---
+os.environ['LOANS_TABLE_NAME'] = 'test-repayment-loans'
+os.environ['JOBS_TABLE_NAME'] = 'test-autopay-jobs'
+os.environ['WALLETS_TABLE_NAME'] = 'test-wallets'
+os.environ['TRANSACTIONS_LOG_TABLE_NAME'] = 'test-transaction-logs'
+
+from update_loan_repayment_status.handler import apply_repayment, update_loan_repayment_status
+
+
+@pytest.fixture
+def loans_table():
+    """Mocks the loans table with one APPROVED loan, and its wallet and ledger for refunds."""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='test-repayment-loans',
+            KeySchema=[{'AttributeName': 'loan_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'loan_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        for name, key in [('test-autopay-jobs', 'job_id'), ('test-wallets', 'wallet_id'), ('test-transaction-logs', 'transaction_id')]:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        dynamodb.Table('test-wallets').put_item(Item={'wallet_id': 'wallet-1', 'balance': Decimal('0.00')})
+        table.put_item(Item={
+            'loan_id': 'loan-1', 'wallet_id': 'wallet-1', 'amount': Decimal('100.00'),
+            'remaining_balance': Decimal('100.00'), 'status': 'APPROVED'
+        })
+        yield table
+
+
+def _repayment(message_id, amount, event_type='LOAN_REPAYMENT_SUCCESSFUL', **extra):
+    return {'Sns': {'MessageId': message_id, 'Message': json.dumps({
+        'event_type': event_type,
+        'details': {'loan_id': 'loan-1', 'wallet_id': 'wallet-1', 'amount': amount, **extra}
+    })}}
+
+
+def test_partial_repayment_keeps_loan_approved(loans_table):
+    """
+    Tests that a partial repayment only decrements the balance.
+    """
+    update_loan_repayment_status({'Records': [_repayment('m-1', '40.00')]}, {})
+
+    loan = loans_table.get_item(Key={'loan_id': 'loan-1'})['Item']
+    assert loan['remaining_balance'] == Decimal('60.00')
+    assert loan['status'] == 'APPROVED'
+
+
+def test_batched_repayments_pay_off_loan(loans_table):
+    """
+    Tests that repayments for the same loan in one batch are summed and
+    that the final payoff sets the balance and PAID status together.
+    """
+    # ARRANGE
+    event = {'Records': [
+        _repayment('m-1', '60.00'),
+        _repayment('m-2', '10.00', event_type='LOAN_REPAYMENT_FAILED'),
+        _repayment('m-3', '40.00'),
+    ]}
+
+    # ACT
+    update_loan_repayment_status(event, {})
+
+    # ASSERT
+    loan = loans_table.get_item(Key={'loan_id': 'loan-1'})['Item']
+    assert loan['remaining_balance'] == Decimal('0.00')
+    assert loan['status'] == 'PAID'
+
+    # A late repayment against a PAID loan is refunded, once even if redelivered
+    update_loan_repayment_status({'Records': [_repayment('m-4', '5.00')]}, {})
+    update_loan_repayment_status({'Records': [_repayment('m-4', '5.00')]}, {})
+    assert loans_table.get_item(Key={'loan_id': 'loan-1'})['Item']['remaining_balance'] == Decimal('0.00')
+    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+    assert dynamodb.Table('test-wallets').get_item(Key={'wallet_id': 'wallet-1'})['Item']['balance'] == Decimal('5.00')
+    refunds = dynamodb.Table('test-transaction-logs').scan()['Items']
+    assert [(r['type'], r['amount'], r['related_id']) for r in refunds] == [('LOAN_REPAYMENT_REFUND', Decimal('5.00'), 'loan-1')]
+
+
+def test_autopay_outcomes_are_tracked(loans_table):
+    """
+    Tests that autopay-initiated repayments record the loan's last autopay
+    status and add to the cycle's outcome counters.
+    """
+    autopay = {'source': 'AUTOPAY', 'autopay_cycle': '2024-03-15'}
+    update_loan_repayment_status({'Records': [
+        _repayment('m-1', '30.00', event_type='LOAN_REPAYMENT_FAILED', **autopay),
+        _repayment('m-2', '30.00', **autopay),
+    ]}, {})
+
+    loan = loans_table.get_item(Key={'loan_id': 'loan-1'})['Item']
+    assert loan['remaining_balance'] == Decimal('70.00')
+    assert loan['autopay_last_status'] == 'SUCCEEDED'
+
+    jobs_table = boto3.resource('dynamodb', region_name='us-east-1').Table('test-autopay-jobs')
+    counters = [item for item in jobs_table.scan()['Items'] if item['job_id'].startswith('loan-autopay#2024-03-15#outcomes#')]
+    assert sum(item['succeeded'] for item in counters) == 1
+    assert sum(item['failed'] for item in counters) == 1
+    assert sum(item['amount_collected'] for item in counters) == Decimal('30.00')
+
+
+def test_stale_validation_is_rechecked(loans_table):
+    """
+    Tests that a repayment validated against an older loan version is
+    re-checked: it still applies when it fits the current balance, and a
+    stale payoff records the excess and credits it back to the wallet
+    instead of leaving a negative balance.
+    """
+    # The loan moves to version 2 after repay_loan validated it at version 1
+    loans_table.update_item(
+        Key={'loan_id': 'loan-1'},
+        UpdateExpression='SET remaining_balance = :b, version = :v',
+        ExpressionAttributeValues={':b': Decimal('50.00'), ':v': 2}
+    )
+
+    update_loan_repayment_status({'Records': [_repayment('m-1', '20.00', loan_version=1)]}, {})
+    loan = loans_table.get_item(Key={'loan_id': 'loan-1'})['Item']
+    assert (loan['remaining_balance'], loan['version']) == (Decimal('30.00'), 3)
+
+    # Capped at the old 100.00 balance: pays off the 30.00 left and records the rest
+    update_loan_repayment_status({'Records': [_repayment('m-2', '100.00', loan_version=1)]}, {})
+    loan = loans_table.get_item(Key={'loan_id': 'loan-1'})['Item']
+    assert loan['status'] == 'PAID'
+    assert loan['remaining_balance'] == Decimal('0')
+    assert loan['overpaid_amount'] == Decimal('70.00')
+    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+    assert dynamodb.Table('test-wallets').get_item(Key={'wallet_id': 'wallet-1'})['Item']['balance'] == Decimal('70.00')
+    refund = dynamodb.Table('test-transaction-logs').scan()['Items'][0]
+    assert (refund['type'], refund['amount']) == ('LOAN_REPAYMENT_REFUND', Decimal('70.00'))
+
+
+def test_payoff_hint_writes_once(loans_table, monkeypatch):
+    """
+    Tests that a final repayment carrying the balance repay_loan saw goes
+    straight to the payoff write, and that a stale hint falls back to the
+    current balance.
+    """
+    writes = []
+    update_item = loans_table.update_item
+    monkeypatch.setattr(loans_table, 'update_item', lambda **kwargs: writes.append(kwargs) or update_item(**kwargs))
+
+    assert apply_repayment(loans_table, 'loan-1', Decimal('40.00'), seen_balance=Decimal('100.00'))[:2] == (Decimal('60.00'), 'APPROVED')
+    writes.clear()
+    assert apply_repayment(loans_table, 'loan-1', Decimal('60.00'), seen_balance=Decimal('60.00'))[:2] == (Decimal('0'), 'PAID')
+    assert len(writes) == 1
+
+    loans_table.put_item(Item={'loan_id': 'loan-2', 'wallet_id': 'wallet-1', 'remaining_balance': Decimal('80.00'), 'status': 'APPROVED'})
+    assert apply_repayment(loans_table, 'loan-2', Decimal('50.00'), seen_balance=Decimal('50.00'))[:2] == (Decimal('30.00'), 'APPROVED')
@@ -1,8 +1,16 @@
 import json
 import os
+import random
+import time
+import uuid
 import boto3
+from collections import namedtuple
 from decimal import Decimal, InvalidOperation
 from botocore.exceptions import ClientError
+from fintech_common.autopay import outcome_counter_ids
+from fintech_common.loan_cache import VERSION_BUMP, VERSION_BUMP_VALUES
+from fintech_common.loan_index import CLOSE_LOAN_REMOVE, CLOSE_LOAN_SET
+from fintech_common.records import LedgerEntry
 import logging # <-- 1. Import logging
 
 # --- 2. Set up logger ---
@@ -12,17 +20,239 @@ logger.setLevel(logging.INFO)
 
 # --- Environment Variables ---
 LOANS_TABLE_NAME = os.environ.get('LOANS_TABLE_NAME')
-# (This Lambda doesn't log to the transactions table, so it doesn't need LOG_TABLE_NAME)
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME') # Autopay outcome counters; optional
+# Overpayments are credited back to the wallet and logged
+WALLETS_TABLE_NAME = os.environ.get('WALLETS_TABLE_NAME')
+LOG_TABLE_NAME = os.environ.get('TRANSACTIONS_LOG_TABLE_NAME')
+
+MAX_REPAYMENT_ATTEMPTS = 3
+
+# Where to credit back what a repayment could not apply. transaction_id is
+# derived from the SNS messages, so a redelivered batch never refunds twice.
+Refund = namedtuple('Refund', ['wallets_table', 'log_table', 'wallet_id', 'transaction_id'])
+
+def refund_for(loan_id, wallet_id, message_ids):
+    if not WALLETS_TABLE_NAME or not LOG_TABLE_NAME:
+        return None
+    transaction_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"loan-repayment-refund:{loan_id}:{','.join(message_ids)}"))
+    return Refund(WALLETS_TABLE_NAME, LOG_TABLE_NAME, wallet_id, transaction_id)
+
+def refund_items(refund, loan_id, amount, reason):
+    """The wallet credit and its ledger entry, for a TransactWriteItems."""
+    ledger_item = LedgerEntry(
+        transaction_id=refund.transaction_id,
+        wallet_id=refund.wallet_id,
+        timestamp=int(time.time()),
+        type='LOAN_REPAYMENT_REFUND',
+        amount=amount,
+        related_id=loan_id,
+        details={"reason": reason}
+    ).to_item()
+    return [
+        {'Update': {
+            'TableName': refund.wallets_table,
+            'Key': {'wallet_id': refund.wallet_id},
+            'UpdateExpression': "SET balance = balance + :amount",
+            'ConditionExpression': "attribute_exists(wallet_id)",
+            'ExpressionAttributeValues': {':amount': amount}
+        }},
+        {'Put': {
+            'TableName': refund.log_table,
+            'Item': ledger_item,
+            'ConditionExpression': "attribute_not_exists(transaction_id)"
+        }}
+    ]
+
+def refund_unapplied(loans_table, loan_id, amount, refund, reason):
+    """
+    Credits back a repayment that could not be applied at all (the loan is
+    missing or no longer APPROVED). Returns False if it was already refunded.
+    """
+    try:
+        loans_table.meta.client.transact_write_items(TransactItems=refund_items(refund, loan_id, amount, reason))
+        return True
+    except ClientError as ce:
+        reasons = ce.response.get('CancellationReasons', [])
+        if ce.response['Error']['Code'] == 'TransactionCanceledException' and len(reasons) > 1 and reasons[1].get('Code') == 'ConditionalCheckFailed':
+            return False
+        raise
+
+def apply_repayment(loans_table, loan_id, amount, expected_version=None, refund=None, seen_balance=None):
+    """
+    Applies a repayment with a single conditional write in the common case.
+    Partial repayments only decrement the balance. If the loan turns out to be
+    paid off by this amount, the balance and the APPROVED -> PAID transition
+    are written together, so the balance never reaches zero on an APPROVED loan.
+    A paid-off loan also leaves the autopay due-date index and moves from the
+    wallet's active loans to its history.
+
+    `expected_version` is the loan version repay_loan validated the request
+    against (possibly from its cache). If the loan has changed since, the
+    request is re-checked against the current item; anything paid beyond
+    the current balance is recorded as overpaid_amount rather than driving
+    the balance negative, and with a `refund` it is credited back to the
+    wallet in the same transaction as the payoff.
+    `seen_balance` is the remaining_balance repay_loan saw. When the amount
+    covers it, the payoff write is tried first instead of a decrement that
+    would fail its condition.
+    Returns (new_remaining_balance, new_status, refunded_amount).
+    A loan that is missing or not APPROVED takes nothing: with a `refund`
+    the whole amount is credited back (once), without one this raises
+    ClientError (ConditionalCheckFailedException).
+    """
+    last_error = None
+    # The balance a payoff write is conditioned on; None until one is known
+    payoff_balance = seen_balance if seen_balance is not None and amount >= seen_balance else None
+    for _ in range(MAX_REPAYMENT_ATTEMPTS):
+        if payoff_balance is None:
+            condition = "#status = :status_approved AND remaining_balance > :amount"
+            values = {':amount': amount, ':status_approved': 'APPROVED', **VERSION_BUMP_VALUES}
+            if expected_version is not None:
+                condition += " AND version = :version" if expected_version else " AND attribute_not_exists(version)"
+                if expected_version:
+                    values[':version'] = expected_version
+            try:
+                response = loans_table.update_item(
+                    Key={'loan_id': loan_id},
+                    UpdateExpression=f"SET remaining_balance = remaining_balance - :amount, {VERSION_BUMP}",
+                    ConditionExpression=condition,
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues=values,
+                    ReturnValues="UPDATED_NEW",
+                    ReturnValuesOnConditionCheckFailure="ALL_OLD"
+                )
+                return response['Attributes']['remaining_balance'], 'APPROVED', Decimal('0')
+            except ClientError as ce:
+                if ce.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                last_error = ce
+                current = ce.response.get('Item')
+                # Missing loan, or not APPROVED: nothing to pay off, so all of it goes back
+                if not current or current.get('status', {}).get('S') != 'APPROVED':
+                    if not refund:
+                        raise
+                    refunded = refund_unapplied(loans_table, loan_id, amount, refund, "Loan is not APPROVED.")
+                    current = current or {}
+                    return (
+                        Decimal(current.get('remaining_balance', {}).get('N', '0')),
+                        current.get('status', {}).get('S', 'NOT_FOUND'),
+                        amount if refunded else Decimal('0')
+                    )
+
+            payoff_balance = Decimal(current['remaining_balance']['N'])
+            if payoff_balance > amount:
+                # Only the version check failed: the loan changed after validation, but this amount still fits
+                logger.info(json.dumps({"action": "apply_repayment", "loan_id": loan_id, "status": "info", "message": "Loan changed since the repayment was validated; re-checked against the current balance."}))
+                expected_version = None
+                payoff_balance = None
+                continue
+
+        # Payoff path: this amount clears the balance it is conditioned on
+        excess = amount - payoff_balance
+        values = {
+            ':zero': Decimal('0'),
+            ':seen_balance': payoff_balance,
+            ':status_approved': 'APPROVED',
+            ':status_paid': 'PAID',
+            ':closed_at': int(time.time()),
+            **VERSION_BUMP_VALUES
+        }
+        overpaid = ""
+        if excess > 0:
+            overpaid = "overpaid_amount = if_not_exists(overpaid_amount, :zero) + :excess, "
+            values[':excess'] = excess
+        payoff = {
+            'Key': {'loan_id': loan_id},
+            'UpdateExpression': (
+                f"SET remaining_balance = :zero, #status = :status_paid, {overpaid}{VERSION_BUMP}, {CLOSE_LOAN_SET} "
+                f"REMOVE autopay_due_bucket, {CLOSE_LOAN_REMOVE}"
+            ),
+            'ConditionExpression': "#status = :status_approved AND remaining_balance = :seen_balance",
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': values
+        }
+        try:
+            if excess > 0 and refund:
+                loans_table.meta.client.transact_write_items(TransactItems=[
+                    {'Update': {'TableName': loans_table.name, **payoff}},
+                    *refund_items(refund, loan_id, excess, "Paid beyond the remaining balance.")
+                ])
+                return Decimal('0'), 'PAID', excess
+            response = loans_table.update_item(**payoff, ReturnValues="UPDATED_NEW")
+            return response['Attributes']['remaining_balance'], 'PAID', Decimal('0')
+        except ClientError as ce:
+            reasons = ce.response.get('CancellationReasons', [])
+            loan_moved = ce.response['Error']['Code'] == 'ConditionalCheckFailedException' or (
+                ce.response['Error']['Code'] == 'TransactionCanceledException'
+                and reasons and reasons[0].get('Code') == 'ConditionalCheckFailed'
+            )
+            if not loan_moved:
+                raise
+            # The balance is not the one this payoff assumed; start over from the current item
+            last_error = ce
+            expected_version = None
+            payoff_balance = None
+    raise last_error
+
+def record_autopay_outcomes(loans_table, jobs_table, outcomes):
+    """
+    Tracks the result of autopay requests (events with source AUTOPAY).
+    Each loan gets its last autopay status; per-cycle totals are added to
+    one randomly chosen counter shard per cycle, once per SNS batch.
+    """
+    cycles = {}
+    for loan_id, cycle, succeeded, amount in outcomes:
+        try:
+            loans_table.update_item(
+                Key={'loan_id': loan_id},
+                UpdateExpression=(
+                    "SET autopay_last_status = :status, autopay_failures = :zero ADD autopay_successes :one"
+                    if succeeded else
+                    "SET autopay_last_status = :status ADD autopay_failures :one"
+                ),
+                ConditionExpression="attribute_exists(loan_id)",
+                ExpressionAttributeValues=(
+                    {':status': 'SUCCEEDED', ':zero': 0, ':one': 1} if succeeded else {':status': 'FAILED', ':one': 1}
+                )
+            )
+        except ClientError as ce:
+            if ce.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+        totals = cycles.setdefault(cycle, {'succeeded': 0, 'failed': 0, 'amount_collected': Decimal('0')})
+        if succeeded:
+            totals['succeeded'] += 1
+            totals['amount_collected'] += amount
+        else:
+            totals['failed'] += 1
+
+    if not jobs_table:
+        return
+    for cycle, totals in cycles.items():
+        jobs_table.update_item(
+            Key={'job_id': random.choice(outcome_counter_ids(cycle))},
+            UpdateExpression="ADD succeeded :succeeded, failed :failed, amount_collected :amount SET expires_at = :expires",
+            ExpressionAttributeValues={
+                ':succeeded': totals['succeeded'],
+                ':failed': totals['failed'],
+                ':amount': totals['amount_collected'],
+                ':expires': int(time.time()) + 30 * 24 * 3600
+            }
+        )
 
 def update_loan_repayment_status(event, context):
     """
     SNS Subscriber for 'LOAN_REPAYMENT_SUCCESSFUL' / 'FAILED'
     Updates the loan's remaining_balance in the loans_table.
+    Successful repayments for the same loan in one batch are summed and
+    applied as a single update. Whatever could not be applied (beyond the
+    balance, or against a loan that is no longer APPROVED) is credited back
+    to the wallet. Autopay outcomes are recorded as well.
     """
     
     # --- 3. Initialize boto3 inside the handler ---
     dynamodb = boto3.resource('dynamodb')
     loans_table = dynamodb.Table(LOANS_TABLE_NAME) if LOANS_TABLE_NAME else None
+    jobs_table = dynamodb.Table(JOBS_TABLE_NAME) if JOBS_TABLE_NAME else None
     # ---
     
     if not loans_table:
@@ -36,6 +266,11 @@ def update_loan_repayment_status(event, context):
 
     logger.info(f"Received event: {json.dumps(event)}")
 
+    # loan_id -> {"amount": total, "message_ids": [...]}, in arrival order
+    repayments = {}
+    # (loan_id, cycle, succeeded, amount) for autopay-initiated repayments
+    autopay_outcomes = []
+
     for record in event['Records']:
         message_id = record.get('Sns', {}).get('MessageId', 'Unknown')
         log_context = {"action": "update_loan_repayment_status", "sns_message_id": message_id}
@@ -65,36 +300,16 @@ def update_loan_repayment_status(event, context):
             amount = Decimal(amount_str)
             log_context["amount"] = str(amount)
 
+            if event_details.get('source') == 'AUTOPAY' and event_type in ('LOAN_REPAYMENT_SUCCESSFUL', 'LOAN_REPAYMENT_FAILED'):
+                autopay_outcomes.append((loan_id, event_details.get('autopay_cycle'), event_type == 'LOAN_REPAYMENT_SUCCESSFUL', amount))
+
             if event_type == 'LOAN_REPAYMENT_SUCCESSFUL':
-                logger.info(json.dumps({**log_context, "status": "info", "message": "Processing successful repayment."}))
-                
-                # Decrease the remaining_balance on the loan
-                response = loans_table.update_item(
-                    Key={'loan_id': loan_id},
-                    UpdateExpression="SET remaining_balance = remaining_balance - :amount",
-                    ConditionExpression="attribute_exists(loan_id) AND #status = :status_approved",
-                    ExpressionAttributeNames={'#status': 'status'},
-                    ExpressionAttributeValues={ 
-                        ':amount': amount,
-                        ':status_approved': 'APPROVED'
-                    },
-                    ReturnValues="UPDATED_NEW"
-                )
-                
-                new_remaining_balance = response.get('Attributes', {}).get('remaining_balance')
-                log_context["new_remaining_balance"] = str(new_remaining_balance)
-                logger.info(json.dumps({**log_context, "status": "info", "message": "Loan balance updated."}))
-                
-                # If loan is paid off, update status to 'PAID'
-                if new_remaining_balance is not None and new_remaining_balance <= 0:
-                    logger.info(json.dumps({**log_context, "status": "info", "message": "Loan fully paid off. Setting status to PAID."}))
-                    loans_table.update_item(
-                         Key={'loan_id': loan_id},
-                         UpdateExpression="SET #status = :status_paid",
-                         ExpressionAttributeNames={'#status': 'status'},
-                         ExpressionAttributeValues={':status_paid': 'PAID'}
-                    )
-                    logger.info(json.dumps({**log_context, "status": "info", "message": "Loan status set to PAID."}))
+                logger.info(json.dumps({**log_context, "status": "info", "message": "Queued successful repayment."}))
+                pending = repayments.setdefault(loan_id, {"wallet_id": wallet_id, "amount": Decimal('0'), "message_ids": [], "versions": [], "balances": []})
+                pending["amount"] += amount
+                pending["message_ids"].append(message_id)
+                pending["versions"].append(event_details.get('loan_version'))
+                pending["balances"].append(event_details.get('remaining_balance'))
 
             elif event_type == 'LOAN_REPAYMENT_FAILED':
                 reason = sns_message.get('reason', 'Unknown')
@@ -106,6 +321,29 @@ def update_loan_repayment_status(event, context):
 
         except (ValueError, InvalidOperation, TypeError) as val_err:
              logger.error(json.dumps({**log_context, "status": "error", "message": f"Invalid data error: {str(val_err)}"}))
+
+    for loan_id, pending in repayments.items():
+        log_context = {
+            "action": "update_loan_repayment_status",
+            "loan_id": loan_id,
+            "amount": str(pending["amount"]),
+            "sns_message_ids": pending["message_ids"]
+        }
+        try:
+            logger.info(json.dumps({**log_context, "status": "info", "message": "Processing successful repayment."}))
+            # A single request is checked against the version it was validated on; a summed batch re-checks the balance
+            expected_version = pending["versions"][0] if len(pending["versions"]) == 1 else None
+            # The lowest balance any request saw is the likeliest one left to pay off
+            seen_balances = pending["balances"]
+            seen_balance = min(Decimal(b) for b in seen_balances) if None not in seen_balances else None
+            refund = refund_for(loan_id, pending["wallet_id"], pending["message_ids"])
+            new_remaining_balance, new_status, refunded = apply_repayment(loans_table, loan_id, pending["amount"], expected_version, refund, seen_balance)
+            log_context.update({"new_remaining_balance": str(new_remaining_balance), "loan_status": new_status, "refunded_amount": str(refunded)})
+            if new_status in ('APPROVED', 'PAID'):
+                logger.info(json.dumps({**log_context, "status": "info", "message": "Loan balance updated."}))
+            else:
+                logger.warning(json.dumps({**log_context, "status": "warn", "message": "Loan is not APPROVED; repayment refunded to the wallet."}))
+
         except ClientError as ce:
              log_context["error_code"] = ce.response['Error']['Code']
              if ce.response['Error']['Code'] == 'ConditionalCheckFailedException':
@@ -117,4 +355,11 @@ def update_loan_repayment_status(event, context):
             logger.error(json.dumps({**log_context, "status": "error", "message": f"Unexpected error: {str(e)}"}))
             raise e # Force SNS to retry
 
+    if autopay_outcomes:
+        try:
+            record_autopay_outcomes(loans_table, jobs_table, autopay_outcomes)
+        except ClientError as ce:
+            # The balances above are already applied; only the tracking is lost
+            logger.error(json.dumps({"action": "update_loan_repayment_status", "status": "error", "error_code": ce.response['Error']['Code'], "message": "Failed to record autopay outcomes."}))
+
     return {"statusCode": 200, "body": "Events processed."}
\ No newline at end of file
@@ -1,17 +1,63 @@
 import json
 import os
+import boto3
 import logging
 
+from fintech_common.provider_cache import ProviderResultCache
+from fintech_common.provider_sim import ProviderError, simulation_for
+
 # Set up logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# --- Environment Variables ---
+RESULT_CACHE_TABLE_NAME = os.environ.get('RESULT_CACHE_TABLE_NAME')
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+
+# Kept across warm invocations (the in-process layer of the cache)
+result_cache = ProviderResultCache('verify_id', RESULT_CACHE_TTL_SECONDS)
+
+def ask_provider(event, email, log_context):
+    """The (simulated) provider call; raises ProviderError subclasses for Retry."""
+    # --- SIMULATED PROVIDER CALL ---
+    # Latency, errors, timeouts and throttling as configured (PROVIDER_* env vars,
+    # or the event's provider_simulation); failures raise so the Step Function's
+    # Retry policy handles them like a real provider's.
+    try:
+        latency_ms = simulation_for(event, 'verify_id').call()
+    except ValueError as ve:
+        logger.error(json.dumps({**log_context, "status": "error", "error_message": str(ve), "message": "Invalid provider simulation config."}))
+        raise Exception("Server configuration error.")
+    except ProviderError as pe:
+        logger.warning(json.dumps({**log_context, "status": "warn", "error_type": type(pe).__name__, "message": str(pe)}))
+        raise
+    log_context["provider_latency_ms"] = round(latency_ms)
+
+    # --- MOCK LOGIC ---
+    decision = "APPROVED"
+    message = "ID Verification successful (Mock)."
+
+    if "flag@" in email:
+        decision = "FLAGGED"
+        message = "ID ambiguous, flagging for manual review (Mock)."
+    elif "reject@" in email:
+        decision = "REJECTED"
+        message = "ID Verification failed (Mock)."
+    # --- END MOCK LOGIC ---
+
+    return {
+        "status": decision,
+        "message": message
+    }
+
 def verify_id(event, context):
     """
     MOCK: Simulates an ID verification step (like AWS Rekognition).
     This function is invoked by the Step Function.
     
-    It ONLY returns a decision.
+    It ONLY returns a decision. A decision for the same person from the last
+    RESULT_CACHE_TTL_SECONDS (a re-application, or a re-run execution) is
+    reused instead of calling the provider again.
     """
     
     logger.info(f"Received event: {json.dumps(event)}")
@@ -24,22 +70,10 @@ def verify_id(event, context):
         logger.error(json.dumps({**log_context, "status": "error", "message": "user_id not found in event input."}))
         raise ValueError("user_id not found in event input.")
 
-    # --- MOCK LOGIC ---
-    decision = "APPROVED"
-    message = "ID Verification successful (Mock)."
-
-    if "flag@" in email:
-        decision = "FLAGGED"
-        message = "ID ambiguous, flagging for manual review (Mock)."
-    elif "reject@" in email:
-        decision = "REJECTED"
-        message = "ID Verification failed (Mock)."
+    cache_table = boto3.resource('dynamodb').Table(RESULT_CACHE_TABLE_NAME) if RESULT_CACHE_TABLE_NAME else None
+    result, source = result_cache.fetch(cache_table, email, lambda: ask_provider(event, email, log_context))
     
-    logger.info(json.dumps({**log_context, "status": "info", "decision": decision, "message": "Simulation complete."}))
-    # --- END MOCK LOGIC ---
+    logger.info(json.dumps({**log_context, "status": "info", "decision": result['status'], "result_source": source, "message": "Simulation complete."}))
 
     # Return the result to the Step Function
-    return {
-        "status": decision,
-        "message": message
-    }
\ No newline at end of file
+    return result
@@ -53,11 +53,43 @@ resource "aws_dynamodb_table" "loans_table" {
     name = "wallet_id"
     type = "S"
   }
+  attribute {
+    name = "autopay_due_bucket" # "<due date>#<shard>", only on loans enrolled in autopay
+    type = "S"
+  }
+  attribute {
+    name = "active_wallet_id" # Only on open loans (PENDING, APPROVED)
+    type = "S"
+  }
+  attribute {
+    name = "closed_wallet_id" # Only on closed loans (PAID, REJECTED)
+    type = "S"
+  }
+  attribute {
+    name = "closed_at"
+    type = "N"
+  }
   global_secondary_index {
     name            = "wallet_id-index"
     hash_key        = "wallet_id"
     projection_type = "ALL"
   }
+  global_secondary_index {
+    name            = "autopay-due-index"
+    hash_key        = "autopay_due_bucket"
+    projection_type = "KEYS_ONLY"
+  }
+  global_secondary_index {
+    name            = "active-wallet-index"
+    hash_key        = "active_wallet_id"
+    projection_type = "ALL"
+  }
+  global_secondary_index {
+    name            = "wallet-history-index"
+    hash_key        = "closed_wallet_id"
+    range_key       = "closed_at"
+    projection_type = "ALL"
+  }
   tags = local.common_tags
 }
 
@@ -95,11 +127,37 @@ resource "aws_dynamodb_table" "savings_goals_table" {
     name = "wallet_id"
     type = "S"
   }
+  attribute {
+    name = "autosave_due_bucket"
+    type = "S"
+  }
   global_secondary_index {
     name            = "wallet_id-index"
     hash_key        = "wallet_id"
     projection_type = "ALL"
   }
+  # Sparse: only goals with a recurring auto-save. Projects the instruction
+  # so run_savings_autosave never reads the goal item itself.
+  global_secondary_index {
+    name               = "autosave-due-index"
+    hash_key           = "autosave_due_bucket"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["wallet_id", "goal_name", "autosave_amount", "autosave_frequency", "autosave_day", "autosave_attempts"]
+  }
+  tags = local.common_tags
+}
+
+# One row per wallet enrolled in round-ups: the chosen goal plus the
+# round-ups counted since the last sweep into it.
+resource "aws_dynamodb_table" "roundups_table" {
+  name         = "${local.project_name}-savings-roundups"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "wallet_id"
+
+  attribute {
+    name = "wallet_id"
+    type = "S"
+  }
   tags = local.common_tags
 }
 
@@ -124,6 +182,14 @@ resource "aws_dynamodb_table" "transactions_log_table" {
     name = "related_id"
     type = "S"
   }
+  attribute {
+    name = "goal_history_id"
+    type = "S"
+  }
+  attribute {
+    name = "goal_history_key"
+    type = "S"
+  }
 
   global_secondary_index {
     name            = "wallet_id-timestamp-index"
@@ -137,6 +203,14 @@ resource "aws_dynamodb_table" "transactions_log_table" {
     range_key       = "timestamp"
     projection_type = "ALL"
   }
+  # Sparse: only savings goal entries, keyed "<timestamp>#<type>", so goal
+  # history pages never read the other rows sharing a related_id
+  global_secondary_index {
+    name            = "goal-history-index"
+    hash_key        = "goal_history_id"
+    range_key       = "goal_history_key"
+    projection_type = "ALL"
+  }
   tags = local.common_tags
 }
 
@@ -154,6 +228,14 @@ resource "aws_dynamodb_table" "users_table" {
     name = "email" # We'll index this to find users
     type = "S"
   }
+  attribute {
+    name = "review_queue"
+    type = "S"
+  }
+  attribute {
+    name = "review_submitted_at" # The onboarding execution's start time (ISO 8601)
+    type = "S"
+  }
 
   # This index lets us query by email to prevent duplicate signups
   global_secondary_index {
@@ -161,7 +243,65 @@ resource "aws_dynamodb_table" "users_table" {
     hash_key        = "email"
     projection_type = "ALL"
   }
+  # Sparse: only applicants waiting for manual review (set and cleared
+  # with sfn_task_token), oldest submission first. The token is not projected.
+  global_secondary_index {
+    name               = "review-queue-index"
+    hash_key           = "review_queue"
+    range_key          = "review_submitted_at"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["email", "created_at", "onboarding_status"]
+  }
+
+  tags = local.common_tags
+}
+
+# Cached third-party provider results (ID verification, credit checks),
+# keyed "<provider>#<sha256 of the email>". Expired entries go via TTL.
+resource "aws_dynamodb_table" "provider_results_table" {
+  name         = "${local.project_name}-provider-results"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "cache_key"
+
+  attribute {
+    name = "cache_key"
+    type = "S"
+  }
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+  tags = local.common_tags
+}
+
+# Runtime configuration read by the services (e.g. the loan rate grid).
+resource "aws_dynamodb_table" "config_table" {
+  name         = "${local.project_name}-config"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "config_id"
+
+  attribute {
+    name = "config_id"
+    type = "S"
+  }
+  tags = local.common_tags
+}
+
+# Checkpoints and results for long-running batch jobs (reports, backfills).
+# Segment checkpoints expire on their own via TTL.
+resource "aws_dynamodb_table" "batch_jobs_table" {
+  name         = "${local.project_name}-batch-jobs"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "job_id"
 
+  attribute {
+    name = "job_id"
+    type = "S"
+  }
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
   tags = local.common_tags
 }
 
@@ -189,17 +329,6 @@ resource "aws_api_gateway_stage" "api_stage" {
   stage_name    = "v1"
 }
 
-# Allow the Onboarding Step Function to invoke the Create Wallet Lambda
-resource "aws_lambda_permission" "sfn_can_invoke_create_wallet" {
-  statement_id  = "AllowStepFunctionToInvokeCreateWallet"
-  action        = "lambda:InvokeFunction"
-  function_name = module.digital_wallet.create_wallet_lambda_arn
-  principal     = "states.amazonaws.com"
-
-  # This links it to our specific Step Function execution
-  source_arn    = module.onboarding_orchestrator.step_function_arn
-}
-
 resource "aws_sns_topic" "payment_events" {
   name = "${local.project_name}-payment-events"
   tags = local.common_tags
@@ -354,6 +483,22 @@ resource "aws_lambda_permission" "cognito_allow_invoke_pre_signup" {
   source_arn    = aws_cognito_user_pool.user_pool.arn
 }
 
+# --- SHARED LAMBDA LAYER ---
+# Python code shared by several services (record models, helpers).
+# The zip root contains python/fintech_common, which Lambda mounts on sys.path.
+data "archive_file" "shared_layer_zip" {
+  type        = "zip"
+  source_dir  = "../src/shared"
+  output_path = "shared_layer.zip"
+}
+
+resource "aws_lambda_layer_version" "shared_layer" {
+  layer_name          = "${local.project_name}-shared"
+  filename            = data.archive_file.shared_layer_zip.output_path
+  source_code_hash    = data.archive_file.shared_layer_zip.output_base64sha256
+  compatible_runtimes = ["python3.12"]
+}
+
 # --- SERVICE MODULES ---
 
 # --- THIS IS THE CORRECT DIGITAL_WALLET BLOCK ---
@@ -376,6 +521,7 @@ module "digital_wallet" {
   transactions_log_table_arn   = aws_dynamodb_table.transactions_log_table.arn
   frontend_cors_origin         = var.frontend_cors_origin
   api_gateway_authorizer_id    = aws_api_gateway_authorizer.cognito_auth.id
+  shared_layer_arn             = aws_lambda_layer_version.shared_layer.arn
 }
 # --- END CORRECTION ---
 
@@ -398,6 +544,13 @@ module "micro_loan" {
   transactions_log_table_arn   = aws_dynamodb_table.transactions_log_table.arn
   frontend_cors_origin         = var.frontend_cors_origin
   api_gateway_authorizer_id    = aws_api_gateway_authorizer.cognito_auth.id
+  shared_layer_arn             = aws_lambda_layer_version.shared_layer.arn
+  batch_jobs_table_name        = aws_dynamodb_table.batch_jobs_table.name
+  batch_jobs_table_arn         = aws_dynamodb_table.batch_jobs_table.arn
+  wallets_table_name           = aws_dynamodb_table.wallet_table.name
+  wallets_table_arn            = aws_dynamodb_table.wallet_table.arn
+  config_table_name            = aws_dynamodb_table.config_table.name
+  config_table_arn             = aws_dynamodb_table.config_table.arn
 }
 
 module "payment_processor" {
@@ -435,8 +588,14 @@ module "savings_goal" {
   wallets_table_arn            = module.digital_wallet.wallet_table_arn
   transactions_log_table_name  = aws_dynamodb_table.transactions_log_table.name
   transactions_log_table_arn   = aws_dynamodb_table.transactions_log_table.arn
+  batch_jobs_table_name        = aws_dynamodb_table.batch_jobs_table.name
+  batch_jobs_table_arn         = aws_dynamodb_table.batch_jobs_table.arn
+  roundups_table_name          = aws_dynamodb_table.roundups_table.name
+  roundups_table_arn           = aws_dynamodb_table.roundups_table.arn
+  payment_sns_topic_arn        = aws_sns_topic.payment_events.arn
   frontend_cors_origin         = var.frontend_cors_origin
   api_gateway_authorizer_id    = aws_api_gateway_authorizer.cognito_auth.id
+  shared_layer_arn             = aws_lambda_layer_version.shared_layer.arn
 }
 
 module "debt_optimiser" {
@@ -469,13 +628,37 @@ module "onboarding_orchestrator" {
   
   users_table_arn              = aws_dynamodb_table.users_table.arn
   kyc_documents_bucket_arn     = aws_s3_bucket.kyc_documents_bucket.arn
-  
-  # We need to get the ARN from the digital_wallet module.
-  # This requires adding an output to that module first.
-  create_wallet_lambda_arn   = module.digital_wallet.create_wallet_lambda_arn 
+  wallets_table_name           = aws_dynamodb_table.wallet_table.name
+  wallets_table_arn            = aws_dynamodb_table.wallet_table.arn
+  transactions_log_table_name  = aws_dynamodb_table.transactions_log_table.name
+  transactions_log_table_arn   = aws_dynamodb_table.transactions_log_table.arn
   
   frontend_cors_origin         = var.frontend_cors_origin
   api_gateway_authorizer_id    = aws_api_gateway_authorizer.cognito_auth.id
+  shared_layer_arn             = aws_lambda_layer_version.shared_layer.arn
+  batch_jobs_table_name        = aws_dynamodb_table.batch_jobs_table.name
+  batch_jobs_table_arn         = aws_dynamodb_table.batch_jobs_table.arn
+  provider_results_table_name  = aws_dynamodb_table.provider_results_table.name
+  provider_results_table_arn   = aws_dynamodb_table.provider_results_table.arn
+}
+
+module "portfolio_reports" {
+  source = "./modules/portfolio_reports"
+  providers = {
+    aws = aws
+  }
+
+  project_name          = local.project_name
+  tags                  = local.common_tags
+  loans_table_name      = aws_dynamodb_table.loans_table.name
+  loans_table_arn       = aws_dynamodb_table.loans_table.arn
+  wallets_table_name    = aws_dynamodb_table.wallet_table.name
+  wallets_table_arn     = aws_dynamodb_table.wallet_table.arn
+  savings_table_name    = aws_dynamodb_table.savings_goals_table.name
+  savings_table_arn     = aws_dynamodb_table.savings_goals_table.arn
+  batch_jobs_table_name = aws_dynamodb_table.batch_jobs_table.name
+  batch_jobs_table_arn  = aws_dynamodb_table.batch_jobs_table.arn
+  shared_layer_arn      = aws_lambda_layer_version.shared_layer.arn
 }
 
 # --- FRONTEND DEPLOYMENT (S3 & CloudFront) ---
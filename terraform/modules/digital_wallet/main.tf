@@ -111,6 +111,7 @@ resource "aws_lambda_function" "create_wallet_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME           = var.dynamodb_table_name
@@ -159,6 +160,7 @@ resource "aws_lambda_function" "credit_wallet_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME           = var.dynamodb_table_name
@@ -183,6 +185,7 @@ resource "aws_lambda_function" "debit_wallet_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME           = var.dynamodb_table_name
@@ -235,6 +238,7 @@ resource "aws_lambda_function" "process_loan_approval_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME           = var.dynamodb_table_name
@@ -258,6 +262,7 @@ resource "aws_lambda_function" "process_payment_request_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME           = var.dynamodb_table_name
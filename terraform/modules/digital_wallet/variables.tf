@@ -61,4 +61,9 @@ variable "frontend_cors_origin" {
 variable "api_gateway_authorizer_id" {
   description = "The ID of the Cognito API Gateway Authorizer"
   type        = string
+}
+
+variable "shared_layer_arn" {
+  description = "The ARN of the shared Python Lambda layer (fintech_common)"
+  type        = string
 }
\ No newline at end of file
@@ -59,6 +59,16 @@ data "aws_iam_policy_document" "dynamodb_loans_table_policy_doc" {
     actions   = ["dynamodb:PutItem"] # For logging repayments
     resources = [var.transactions_log_table_arn]
   }
+  statement {
+    sid       = "ConfigTableReadAccess" # Rate grid for loan pricing
+    actions   = ["dynamodb:GetItem"]
+    resources = [var.config_table_arn]
+  }
+  statement {
+    sid       = "WalletInstantDisbursementAccess" # approve_loan ?disbursement=instant, repayment refunds
+    actions   = ["dynamodb:GetItem", "dynamodb:UpdateItem"]
+    resources = [var.wallets_table_arn]
+  }
 }
 resource "aws_iam_policy" "dynamodb_loans_table_policy" {
   name   = "${var.project_name}-loans-table-policy"
@@ -69,6 +79,37 @@ resource "aws_iam_role_policy_attachment" "dynamodb_loans_table_attachment" {
   policy_arn = aws_iam_policy.dynamodb_loans_table_policy.arn
 }
 
+# --- IAM: Batch Jobs Policy (interest accrual, autopay, archival) ---
+data "aws_iam_policy_document" "loan_batch_jobs_policy_doc" {
+  statement {
+    sid       = "LoanTableScanAccess"
+    actions   = ["dynamodb:Scan"]
+    resources = [var.dynamodb_table_arn]
+  }
+  statement {
+    sid       = "BatchJobsTableAccess"
+    actions   = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem", "dynamodb:BatchGetItem"]
+    resources = [var.batch_jobs_table_arn]
+  }
+  statement {
+    sid       = "SelfReinvoke" # Resume a batch run that ran out of time
+    actions   = ["lambda:InvokeFunction"]
+    resources = [
+      "arn:aws:lambda:*:*:function:${var.project_name}-accrue-loan-interest",
+      "arn:aws:lambda:*:*:function:${var.project_name}-run-loan-autopay",
+      "arn:aws:lambda:*:*:function:${var.project_name}-archive-closed-loans"
+    ]
+  }
+}
+resource "aws_iam_policy" "loan_batch_jobs_policy" {
+  name   = "${var.project_name}-loan-batch-jobs-policy"
+  policy = data.aws_iam_policy_document.loan_batch_jobs_policy_doc.json
+}
+resource "aws_iam_role_policy_attachment" "loan_batch_jobs_attachment" {
+  role       = aws_iam_role.lambda_exec_role.name
+  policy_arn = aws_iam_policy.loan_batch_jobs_policy.arn
+}
+
 # --- IAM: SNS Publish Policies ---
 # Policy for loan_events topic
 data "aws_iam_policy_document" "sns_loan_publish_policy_doc" {
@@ -121,9 +162,12 @@ resource "aws_lambda_function" "apply_for_loan_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
+      CONFIG_TABLE_NAME   = var.config_table_name
+      WALLETS_TABLE_NAME  = var.wallets_table_name
       CORS_ORIGIN         = var.frontend_cors_origin
       REDEPLOY_TRIGGER = sha1(var.frontend_cors_origin)
     }
@@ -145,6 +189,7 @@ resource "aws_lambda_function" "get_loan_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
@@ -169,6 +214,7 @@ resource "aws_lambda_function" "get_loans_by_wallet_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
@@ -193,10 +239,14 @@ resource "aws_lambda_function" "approve_loan_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
       SNS_TOPIC_ARN       = var.sns_topic_arn
+      # Instant disbursement writes the wallet credit and ledger entry itself
+      WALLETS_TABLE_NAME          = var.wallets_table_name
+      TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
       CORS_ORIGIN         = var.frontend_cors_origin
       REDEPLOY_TRIGGER = sha1(var.frontend_cors_origin)
     }
@@ -218,6 +268,7 @@ resource "aws_lambda_function" "reject_loan_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
@@ -227,6 +278,57 @@ resource "aws_lambda_function" "reject_loan_lambda" {
   }
 }
 
+# --- LAMBDA: BULK LOAN DECISION ---
+data "archive_file" "bulk_loan_decision_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/bulk_loan_decision"
+  output_path = "${path.module}/bulk_loan_decision.zip"
+}
+resource "aws_lambda_function" "bulk_loan_decision_lambda" {
+  function_name    = "${var.project_name}-bulk-loan-decision"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.bulk_loan_decision_zip.output_path
+  source_code_hash = data.archive_file.bulk_loan_decision_zip.output_base64sha256
+  handler          = "handler.bulk_loan_decision"
+  runtime          = "python3.12"
+  timeout          = 29
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      DYNAMODB_TABLE_NAME = var.dynamodb_table_name
+      SNS_TOPIC_ARN       = var.sns_topic_arn
+      CORS_ORIGIN         = var.frontend_cors_origin
+      REDEPLOY_TRIGGER = sha1(var.frontend_cors_origin)
+    }
+  }
+}
+
+# --- LAMBDA: QUOTE LOAN OFFERS ---
+data "archive_file" "quote_loan_offers_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/quote_loan_offers"
+  output_path = "${path.module}/quote_loan_offers.zip"
+}
+resource "aws_lambda_function" "quote_loan_offers_lambda" {
+  function_name    = "${var.project_name}-quote-loan-offers"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.quote_loan_offers_zip.output_path
+  source_code_hash = data.archive_file.quote_loan_offers_zip.output_base64sha256
+  handler          = "handler.quote_loan_offers"
+  runtime          = "python3.12"
+  timeout          = 10
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      CONFIG_TABLE_NAME = var.config_table_name
+      CORS_ORIGIN       = var.frontend_cors_origin
+      REDEPLOY_TRIGGER  = sha1(var.frontend_cors_origin)
+    }
+  }
+}
+
 # --- LAMBDA: REPAY LOAN ---
 data "archive_file" "repay_loan_zip" {
   type        = "zip"
@@ -242,6 +344,7 @@ resource "aws_lambda_function" "repay_loan_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
@@ -252,6 +355,32 @@ resource "aws_lambda_function" "repay_loan_lambda" {
   }
 }
 
+# --- LAMBDA: SET LOAN AUTOPAY ---
+data "archive_file" "set_loan_autopay_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/set_loan_autopay"
+  output_path = "${path.module}/set_loan_autopay.zip"
+}
+resource "aws_lambda_function" "set_loan_autopay_lambda" {
+  function_name    = "${var.project_name}-set-loan-autopay"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.set_loan_autopay_zip.output_path
+  source_code_hash = data.archive_file.set_loan_autopay_zip.output_base64sha256
+  handler          = "handler.set_loan_autopay"
+  runtime          = "python3.12"
+  timeout          = 10
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      DYNAMODB_TABLE_NAME = var.dynamodb_table_name
+      AUTOPAY_SHARDS      = var.autopay_shards
+      CORS_ORIGIN         = var.frontend_cors_origin
+      REDEPLOY_TRIGGER    = sha1(var.frontend_cors_origin)
+    }
+  }
+}
+
 ################################################################################
 # --- LAMBDA FUNCTIONS (EVENT) ---
 ################################################################################
@@ -271,14 +400,156 @@ resource "aws_lambda_function" "update_loan_repayment_status_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       LOANS_TABLE_NAME            = var.dynamodb_table_name
       TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
+      WALLETS_TABLE_NAME          = var.wallets_table_name # Overpayment refunds
+      JOBS_TABLE_NAME             = var.batch_jobs_table_name # Autopay outcome counters
     }
   }
 }
 
+# --- LAMBDA: ACCRUE LOAN INTEREST (nightly batch job) ---
+data "archive_file" "accrue_loan_interest_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/accrue_loan_interest"
+  output_path = "${path.module}/accrue_loan_interest.zip"
+}
+resource "aws_lambda_function" "accrue_loan_interest_lambda" {
+  function_name    = "${var.project_name}-accrue-loan-interest"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.accrue_loan_interest_zip.output_path
+  source_code_hash = data.archive_file.accrue_loan_interest_zip.output_base64sha256
+  handler          = "handler.accrue_loan_interest"
+  runtime          = "python3.12"
+  timeout          = 900
+  memory_size      = 1024
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      LOANS_TABLE_NAME   = var.dynamodb_table_name
+      JOBS_TABLE_NAME    = var.batch_jobs_table_name
+      MAX_RCU_PER_SECOND = var.accrual_max_rcu_per_second
+      MAX_WCU_PER_SECOND = var.accrual_max_wcu_per_second
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "nightly_interest_accrual" {
+  name                = "${var.project_name}-nightly-interest-accrual"
+  description         = "Accrues daily interest on APPROVED loans."
+  schedule_expression = var.accrual_schedule_expression
+  tags                = var.tags
+}
+resource "aws_cloudwatch_event_target" "interest_accrual_target" {
+  rule      = aws_cloudwatch_event_rule.nightly_interest_accrual.name
+  target_id = "accrue-loan-interest"
+  arn       = aws_lambda_function.accrue_loan_interest_lambda.arn
+}
+resource "aws_lambda_permission" "events_invoke_accrue_loan_interest" {
+  statement_id  = "AllowEventBridgeToInvokeAccrueLoanInterest"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.accrue_loan_interest_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.nightly_interest_accrual.arn
+}
+
+# --- LAMBDA: RUN LOAN AUTOPAY (daily batch job) ---
+data "archive_file" "run_loan_autopay_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/run_loan_autopay"
+  output_path = "${path.module}/run_loan_autopay.zip"
+}
+resource "aws_lambda_function" "run_loan_autopay_lambda" {
+  function_name    = "${var.project_name}-run-loan-autopay"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.run_loan_autopay_zip.output_path
+  source_code_hash = data.archive_file.run_loan_autopay_zip.output_base64sha256
+  handler          = "handler.run_loan_autopay"
+  runtime          = "python3.12"
+  timeout          = 900
+  memory_size      = 1024
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      LOANS_TABLE_NAME   = var.dynamodb_table_name
+      JOBS_TABLE_NAME    = var.batch_jobs_table_name
+      SNS_TOPIC_ARN      = var.payment_sns_topic_arn # Publishes to payment_events
+      AUTOPAY_SHARDS     = var.autopay_shards
+      MAX_WCU_PER_SECOND = var.autopay_max_wcu_per_second
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "daily_loan_autopay" {
+  name                = "${var.project_name}-daily-loan-autopay"
+  description         = "Requests scheduled repayments for autopay loans due today."
+  schedule_expression = var.autopay_schedule_expression
+  tags                = var.tags
+}
+resource "aws_cloudwatch_event_target" "loan_autopay_target" {
+  rule      = aws_cloudwatch_event_rule.daily_loan_autopay.name
+  target_id = "run-loan-autopay"
+  arn       = aws_lambda_function.run_loan_autopay_lambda.arn
+}
+resource "aws_lambda_permission" "events_invoke_run_loan_autopay" {
+  statement_id  = "AllowEventBridgeToInvokeRunLoanAutopay"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.run_loan_autopay_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.daily_loan_autopay.arn
+}
+
+# --- LAMBDA: ARCHIVE CLOSED LOANS (nightly batch job) ---
+data "archive_file" "archive_closed_loans_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/archive_closed_loans"
+  output_path = "${path.module}/archive_closed_loans.zip"
+}
+resource "aws_lambda_function" "archive_closed_loans_lambda" {
+  function_name    = "${var.project_name}-archive-closed-loans"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.archive_closed_loans_zip.output_path
+  source_code_hash = data.archive_file.archive_closed_loans_zip.output_base64sha256
+  handler          = "handler.archive_closed_loans"
+  runtime          = "python3.12"
+  timeout          = 900
+  memory_size      = 1024
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      LOANS_TABLE_NAME   = var.dynamodb_table_name
+      JOBS_TABLE_NAME    = var.batch_jobs_table_name
+      MAX_RCU_PER_SECOND = var.accrual_max_rcu_per_second
+      MAX_WCU_PER_SECOND = var.accrual_max_wcu_per_second
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "nightly_loan_archival" {
+  name                = "${var.project_name}-nightly-loan-archival"
+  description         = "Moves closed loans from the active index to wallet history."
+  schedule_expression = var.archive_schedule_expression
+  tags                = var.tags
+}
+resource "aws_cloudwatch_event_target" "loan_archival_target" {
+  rule      = aws_cloudwatch_event_rule.nightly_loan_archival.name
+  target_id = "archive-closed-loans"
+  arn       = aws_lambda_function.archive_closed_loans_lambda.arn
+}
+resource "aws_lambda_permission" "events_invoke_archive_closed_loans" {
+  statement_id  = "AllowEventBridgeToInvokeArchiveClosedLoans"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.archive_closed_loans_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.nightly_loan_archival.arn
+}
+
 ################################################################################
 # --- API GATEWAY ---
 ################################################################################
@@ -626,6 +897,174 @@ resource "aws_api_gateway_integration_response" "repay_loan_options_integration_
   depends_on = [aws_api_gateway_integration.repay_loan_options_integration]
 }
 
+# --- API: /loan/{loan_id}/autopay ---
+resource "aws_api_gateway_resource" "loan_autopay_resource" {
+  rest_api_id = var.api_gateway_id
+  parent_id   = aws_api_gateway_resource.loan_id_resource.id
+  path_part   = "autopay"
+}
+
+# --- API: POST /loan/{loan_id}/autopay ---
+resource "aws_api_gateway_method" "set_loan_autopay_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.loan_autopay_resource.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = var.api_gateway_authorizer_id
+}
+resource "aws_api_gateway_integration" "set_loan_autopay_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id             = aws_api_gateway_resource.loan_autopay_resource.id
+  http_method             = aws_api_gateway_method.set_loan_autopay_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.set_loan_autopay_lambda.invoke_arn
+}
+
+# --- API: OPTIONS /loan/{loan_id}/autopay (CORS) ---
+resource "aws_api_gateway_method" "loan_autopay_options_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.loan_autopay_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+resource "aws_api_gateway_method_response" "loan_autopay_options_200" {
+   rest_api_id   = var.api_gateway_id
+   resource_id   = aws_api_gateway_resource.loan_autopay_resource.id
+   http_method   = aws_api_gateway_method.loan_autopay_options_method.http_method
+   status_code   = "200"
+   response_models = { "application/json" = "Empty" }
+   response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => true }
+}
+resource "aws_api_gateway_integration" "loan_autopay_options_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id           = aws_api_gateway_resource.loan_autopay_resource.id
+  http_method             = aws_api_gateway_method.loan_autopay_options_method.http_method
+  type                    = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\": 200}" }
+}
+resource "aws_api_gateway_integration_response" "loan_autopay_options_integration_response" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.loan_autopay_resource.id
+  http_method = aws_api_gateway_method.loan_autopay_options_method.http_method
+  status_code = aws_api_gateway_method_response.loan_autopay_options_200.status_code
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => "'${v}'" }
+  response_templates = { "application/json" = "" }
+  depends_on = [aws_api_gateway_integration.loan_autopay_options_integration]
+}
+
+# --- API: /loan/bulk-decision ---
+resource "aws_api_gateway_resource" "bulk_loan_decision_resource" {
+  rest_api_id = var.api_gateway_id
+  parent_id   = aws_api_gateway_resource.loan_resource.id
+  path_part   = "bulk-decision"
+}
+
+# --- API: POST /loan/bulk-decision ---
+resource "aws_api_gateway_method" "bulk_loan_decision_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.bulk_loan_decision_resource.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = var.api_gateway_authorizer_id
+}
+resource "aws_api_gateway_integration" "bulk_loan_decision_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id             = aws_api_gateway_resource.bulk_loan_decision_resource.id
+  http_method             = aws_api_gateway_method.bulk_loan_decision_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.bulk_loan_decision_lambda.invoke_arn
+}
+
+# --- API: OPTIONS /loan/bulk-decision (CORS) ---
+resource "aws_api_gateway_method" "bulk_loan_decision_options_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.bulk_loan_decision_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+resource "aws_api_gateway_method_response" "bulk_loan_decision_options_200" {
+   rest_api_id   = var.api_gateway_id
+   resource_id   = aws_api_gateway_resource.bulk_loan_decision_resource.id
+   http_method   = aws_api_gateway_method.bulk_loan_decision_options_method.http_method
+   status_code   = "200"
+   response_models = { "application/json" = "Empty" }
+   response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => true }
+}
+resource "aws_api_gateway_integration" "bulk_loan_decision_options_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id           = aws_api_gateway_resource.bulk_loan_decision_resource.id
+  http_method             = aws_api_gateway_method.bulk_loan_decision_options_method.http_method
+  type                    = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\": 200}" }
+}
+resource "aws_api_gateway_integration_response" "bulk_loan_decision_options_integration_response" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.bulk_loan_decision_resource.id
+  http_method = aws_api_gateway_method.bulk_loan_decision_options_method.http_method
+  status_code = aws_api_gateway_method_response.bulk_loan_decision_options_200.status_code
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => "'${v}'" }
+  response_templates = { "application/json" = "" }
+  depends_on = [aws_api_gateway_integration.bulk_loan_decision_options_integration]
+}
+
+# --- API: /loan/quotes ---
+resource "aws_api_gateway_resource" "quote_loan_offers_resource" {
+  rest_api_id = var.api_gateway_id
+  parent_id   = aws_api_gateway_resource.loan_resource.id
+  path_part   = "quotes"
+}
+
+# --- API: POST /loan/quotes ---
+resource "aws_api_gateway_method" "quote_loan_offers_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.quote_loan_offers_resource.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = var.api_gateway_authorizer_id
+}
+resource "aws_api_gateway_integration" "quote_loan_offers_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id             = aws_api_gateway_resource.quote_loan_offers_resource.id
+  http_method             = aws_api_gateway_method.quote_loan_offers_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.quote_loan_offers_lambda.invoke_arn
+}
+
+# --- API: OPTIONS /loan/quotes (CORS) ---
+resource "aws_api_gateway_method" "quote_loan_offers_options_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.quote_loan_offers_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+resource "aws_api_gateway_method_response" "quote_loan_offers_options_200" {
+   rest_api_id   = var.api_gateway_id
+   resource_id   = aws_api_gateway_resource.quote_loan_offers_resource.id
+   http_method   = aws_api_gateway_method.quote_loan_offers_options_method.http_method
+   status_code   = "200"
+   response_models = { "application/json" = "Empty" }
+   response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => true }
+}
+resource "aws_api_gateway_integration" "quote_loan_offers_options_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id           = aws_api_gateway_resource.quote_loan_offers_resource.id
+  http_method             = aws_api_gateway_method.quote_loan_offers_options_method.http_method
+  type                    = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\": 200}" }
+}
+resource "aws_api_gateway_integration_response" "quote_loan_offers_options_integration_response" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.quote_loan_offers_resource.id
+  http_method = aws_api_gateway_method.quote_loan_offers_options_method.http_method
+  status_code = aws_api_gateway_method_response.quote_loan_offers_options_200.status_code
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => "'${v}'" }
+  response_templates = { "application/json" = "" }
+  depends_on = [aws_api_gateway_integration.quote_loan_offers_options_integration]
+}
+
 
 ################################################################################
 # --- LAMBDA PERMISSIONS ---
@@ -671,6 +1110,30 @@ resource "aws_lambda_permission" "api_gateway_reject_loan_permission" {
   source_arn    = "${var.api_gateway_execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "api_gateway_bulk_loan_decision_permission" {
+  statement_id  = "AllowAPIGatewayToInvokeBulkLoanDecision"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.bulk_loan_decision_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${var.api_gateway_execution_arn}/*/*"
+}
+
+resource "aws_lambda_permission" "api_gateway_quote_loan_offers_permission" {
+  statement_id  = "AllowAPIGatewayToInvokeQuoteLoanOffers"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.quote_loan_offers_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${var.api_gateway_execution_arn}/*/*"
+}
+
+resource "aws_lambda_permission" "api_gateway_set_loan_autopay_permission" {
+  statement_id  = "AllowAPIGatewayInvokeSetLoanAutopay"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.set_loan_autopay_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${var.api_gateway_execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "api_gateway_repay_loan_permission" {
   statement_id  = "AllowAPIGatewayToInvokeRepayLoan"
   action        = "lambda:InvokeFunction"
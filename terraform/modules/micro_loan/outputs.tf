@@ -49,6 +49,15 @@ output "api_gateway_config_hash" {
     aws_api_gateway_method_response.reject_loan_options_200,
     aws_api_gateway_integration_response.reject_loan_options_integration_response,
 
+    # POST /loan/bulk-decision
+    aws_api_gateway_resource.bulk_loan_decision_resource,
+    aws_api_gateway_method.bulk_loan_decision_method,
+    aws_api_gateway_integration.bulk_loan_decision_integration,
+    aws_api_gateway_method.bulk_loan_decision_options_method,
+    aws_api_gateway_integration.bulk_loan_decision_options_integration,
+    aws_api_gateway_method_response.bulk_loan_decision_options_200,
+    aws_api_gateway_integration_response.bulk_loan_decision_options_integration_response,
+
     # POST /loan/{loan_id}/repay
     aws_api_gateway_resource.repay_loan_resource,
     aws_api_gateway_method.repay_loan_method,
@@ -57,6 +66,24 @@ output "api_gateway_config_hash" {
     aws_api_gateway_method_response.repay_loan_options_200,
     aws_api_gateway_integration.repay_loan_options_integration,
     aws_api_gateway_integration_response.repay_loan_options_integration_response,
+
+    # POST /loan/quotes
+    aws_api_gateway_resource.quote_loan_offers_resource,
+    aws_api_gateway_method.quote_loan_offers_method,
+    aws_api_gateway_integration.quote_loan_offers_integration,
+    aws_api_gateway_method.quote_loan_offers_options_method,
+    aws_api_gateway_integration.quote_loan_offers_options_integration,
+    aws_api_gateway_method_response.quote_loan_offers_options_200,
+    aws_api_gateway_integration_response.quote_loan_offers_options_integration_response,
+
+    # POST /loan/{loan_id}/autopay
+    aws_api_gateway_resource.loan_autopay_resource,
+    aws_api_gateway_method.set_loan_autopay_method,
+    aws_api_gateway_integration.set_loan_autopay_integration,
+    aws_api_gateway_method.loan_autopay_options_method,
+    aws_api_gateway_integration.loan_autopay_options_integration,
+    aws_api_gateway_method_response.loan_autopay_options_200,
+    aws_api_gateway_integration_response.loan_autopay_options_integration_response,
   ]))
 }
 
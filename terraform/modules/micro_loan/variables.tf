@@ -59,4 +59,80 @@ variable "frontend_cors_origin" {
 variable "api_gateway_authorizer_id" {
   description = "The ID of the Cognito API Gateway Authorizer"
   type        = string
-}
\ No newline at end of file
+}
+
+variable "shared_layer_arn" {
+  description = "The ARN of the shared Python Lambda layer (fintech_common)"
+  type        = string
+}
+variable "batch_jobs_table_name" {
+  description = "The name of the batch jobs (checkpoints/results) DynamoDB table"
+  type        = string
+}
+
+variable "batch_jobs_table_arn" {
+  description = "The ARN of the batch jobs DynamoDB table"
+  type        = string
+}
+
+variable "accrual_schedule_expression" {
+  description = "When the nightly interest accrual runs"
+  type        = string
+  default     = "cron(30 0 * * ? *)"
+}
+
+variable "accrual_max_rcu_per_second" {
+  description = "Read capacity budget for the accrual scan"
+  type        = number
+  default     = 500
+}
+
+variable "accrual_max_wcu_per_second" {
+  description = "Write capacity budget for accrual updates (leaves headroom for live repayments)"
+  type        = number
+  default     = 500
+}
+
+variable "archive_schedule_expression" {
+  description = "When the nightly closed-loan archival runs"
+  type        = string
+  default     = "cron(0 2 * * ? *)"
+}
+
+variable "autopay_schedule_expression" {
+  description = "When the daily loan autopay run starts"
+  type        = string
+  default     = "cron(0 6 * * ? *)"
+}
+
+variable "autopay_shards" {
+  description = "Shards per due date in the autopay-due-index (spreads one day's loans over partitions)"
+  type        = number
+  default     = 16
+}
+
+variable "autopay_max_wcu_per_second" {
+  description = "Write capacity budget for autopay claims (leaves headroom for live repayments)"
+  type        = number
+  default     = 500
+}
+
+variable "wallets_table_name" {
+  description = "The name of the wallets DynamoDB table (instant disbursement)"
+  type        = string
+}
+
+variable "wallets_table_arn" {
+  description = "The ARN of the wallets DynamoDB table (instant disbursement)"
+  type        = string
+}
+
+variable "config_table_name" {
+  description = "The name of the config DynamoDB table (loan rate grid)"
+  type        = string
+}
+
+variable "config_table_arn" {
+  description = "The ARN of the config DynamoDB table"
+  type        = string
+}
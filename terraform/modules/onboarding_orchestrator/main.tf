@@ -17,6 +17,25 @@ locals {
     "Access-Control-Allow-Origin"  = var.frontend_cors_origin,
     "Access-Control-Allow-Credentials" = "true"
   }
+
+  # Retry policy for the provider checks. Errors are the mocks' exception
+  # class names (fintech_common.provider_sim) plus Lambda's own throttling.
+  provider_retry = [
+    {
+      ErrorEquals     = ["ProviderThrottled", "Lambda.TooManyRequestsException"]
+      IntervalSeconds = var.provider_retry_interval_seconds
+      BackoffRate     = 2
+      MaxAttempts     = var.provider_retry_max_attempts + 2 # Throttling clears; keep trying longer
+      JitterStrategy  = "FULL"
+    },
+    {
+      ErrorEquals     = ["ProviderTimeout", "ProviderError", "States.Timeout"]
+      IntervalSeconds = var.provider_retry_interval_seconds
+      BackoffRate     = 2
+      MaxAttempts     = var.provider_retry_max_attempts
+      JitterStrategy  = "FULL"
+    }
+  ]
 }
 
 # --- 1. IAM Role for the Lambdas ---
@@ -122,6 +141,7 @@ resource "aws_lambda_function" "start_onboarding_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       USERS_TABLE_NAME  = split("/", var.users_table_arn)[1]
@@ -169,6 +189,7 @@ resource "aws_lambda_function" "manual_review_handler_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       USERS_TABLE_NAME = split("/", var.users_table_arn)[1]
@@ -192,10 +213,14 @@ resource "aws_lambda_function" "verify_id_mock_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
-    variables = {
-      USERS_TABLE_NAME = split("/", var.users_table_arn)[1]
-    }
+    # PROVIDER_* keys from var.verify_id_provider_simulation (latency, failure injection)
+    variables = merge({
+      USERS_TABLE_NAME         = split("/", var.users_table_arn)[1]
+      RESULT_CACHE_TABLE_NAME  = var.provider_results_table_name
+      RESULT_CACHE_TTL_SECONDS = var.verify_id_result_cache_ttl_seconds
+    }, var.verify_id_provider_simulation)
   }
 }
 
@@ -214,10 +239,14 @@ resource "aws_lambda_function" "credit_check_mock_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
-    variables = {
-      USERS_TABLE_NAME = split("/", var.users_table_arn)[1]
-    }
+    # PROVIDER_* keys from var.credit_check_provider_simulation (latency, failure injection)
+    variables = merge({
+      USERS_TABLE_NAME         = split("/", var.users_table_arn)[1]
+      RESULT_CACHE_TABLE_NAME  = var.provider_results_table_name
+      RESULT_CACHE_TTL_SECONDS = var.credit_check_result_cache_ttl_seconds
+    }, var.credit_check_provider_simulation)
   }
 }
 
@@ -236,14 +265,91 @@ resource "aws_lambda_function" "provision_account_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
-      USERS_TABLE_NAME         = split("/", var.users_table_arn)[1]
-      CREATE_WALLET_LAMBDA_ARN = var.create_wallet_lambda_arn
+      USERS_TABLE_NAME            = split("/", var.users_table_arn)[1]
+      WALLETS_TABLE_NAME          = var.wallets_table_name
+      TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
+    }
+  }
+}
+
+# --- 4.7 LAMBDA: import_onboarding_users (Batch job; invoked manually per partner file) ---
+data "archive_file" "import_onboarding_users_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/import_onboarding_users"
+  output_path = "${path.module}/import_onboarding_users.zip"
+}
+resource "aws_lambda_function" "import_onboarding_users_lambda" {
+  function_name    = "${var.project_name}-import-onboarding-users"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.import_onboarding_users_zip.output_path
+  source_code_hash = data.archive_file.import_onboarding_users_zip.output_base64sha256
+  handler          = "handler.import_onboarding_users"
+  runtime          = "python3.12"
+  timeout          = 900
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      USERS_TABLE_NAME      = split("/", var.users_table_arn)[1]
+      STEP_FUNCTION_ARN     = aws_sfn_state_machine.onboarding_sfn.arn
+      JOBS_TABLE_NAME       = var.batch_jobs_table_name
+      IMPORT_BUCKET_NAME    = split(":::", var.kyc_documents_bucket_arn)[1]
+      START_CONCURRENCY     = var.import_start_concurrency
+      MAX_STARTS_PER_SECOND = var.import_max_starts_per_second
     }
   }
 }
 
+# --- 4.8 LAMBDA: get_review_queue (API, Admin) ---
+data "archive_file" "get_review_queue_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/get_review_queue"
+  output_path = "${path.module}/get_review_queue.zip"
+}
+resource "aws_lambda_function" "get_review_queue_lambda" {
+  function_name    = "${var.project_name}-get-review-queue"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.get_review_queue_zip.output_path
+  source_code_hash = data.archive_file.get_review_queue_zip.output_base64sha256
+  handler          = "handler.get_review_queue"
+  runtime          = "python3.12"
+  timeout          = 10
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      USERS_TABLE_NAME = split("/", var.users_table_arn)[1]
+      CORS_ORIGIN      = var.frontend_cors_origin
+    }
+  }
+}
+
+# --- 4.9 LAMBDA: bulk_manual_review (API, Admin) ---
+data "archive_file" "bulk_manual_review_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/bulk_manual_review"
+  output_path = "${path.module}/bulk_manual_review.zip"
+}
+resource "aws_lambda_function" "bulk_manual_review_lambda" {
+  function_name    = "${var.project_name}-bulk-manual-review"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.bulk_manual_review_zip.output_path
+  source_code_hash = data.archive_file.bulk_manual_review_zip.output_base64sha256
+  handler          = "handler.bulk_manual_review"
+  runtime          = "python3.12"
+  timeout          = 30
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      USERS_TABLE_NAME = split("/", var.users_table_arn)[1]
+      CORS_ORIGIN      = var.frontend_cors_origin
+    }
+  }
+}
 
 ################################################################################
 # --- 5. AWS STEP FUNCTION ---
@@ -257,60 +363,67 @@ resource "aws_sfn_state_machine" "onboarding_sfn" {
 
   definition = jsonencode({
     Comment = "User Onboarding and KYC Orchestrator"
-    StartAt = "VerifyID"
+    StartAt = "RunChecks"
     States = {
-      VerifyID = {
-        Type = "Task"
-        Resource = aws_lambda_function.verify_id_mock_lambda.arn
-        ResultPath = "$.VerificationResult"
-        Next = "IDCheckDecision"
-        Catch = [ {
-          ErrorEquals = ["States.ALL"],
-          Next = "FailState"
-        } ]
-      },
-      IDCheckDecision = {
-        Type = "Choice"
-        Choices = [
+      # The ID and credit checks don't depend on each other, so they run as
+      # parallel branches: onboarding waits for the slower one, not both.
+      RunChecks = {
+        Type = "Parallel"
+        Branches = [
           {
-            Variable = "$.VerificationResult.status",
-            StringEquals = "APPROVED",
-            Next = "Wait_Before_CreditCheck" # <-- UPDATED
+            StartAt = "VerifyID"
+            States = {
+              VerifyID = {
+                Type = "Task"
+                Resource = aws_lambda_function.verify_id_mock_lambda.arn
+                TimeoutSeconds = 10
+                Retry = local.provider_retry
+                End = true
+              }
+            }
           },
           {
-            Variable = "$.VerificationResult.status",
-            StringEquals = "FLAGGED",
-            Next = "WaitForManualReview"
+            StartAt = "RunCreditCheck"
+            States = {
+              RunCreditCheck = {
+                Type = "Task"
+                Resource = aws_lambda_function.credit_check_mock_lambda.arn
+                TimeoutSeconds = 10
+                Retry = local.provider_retry
+                End = true
+              }
+            }
           }
         ]
-        Default = "FailState"
-      },
-      
-      # --- NEW STATE ---
-      Wait_Before_CreditCheck = {
-        Type = "Wait",
-        Seconds = 5, # Wait 5 seconds
-        Next = "RunCreditCheck"
-      },
-      # --- END NEW STATE ---
-      
-      RunCreditCheck = {
-        Type = "Task"
-        Resource = aws_lambda_function.credit_check_mock_lambda.arn
-        ResultPath = "$.CreditResult"
-        Next = "CreditCheckDecision"
+        # Merge the branch outputs (in branch order) into one result
+        ResultSelector = {
+          "VerificationResult.$" = "$[0]",
+          "CreditResult.$"       = "$[1]"
+        }
+        ResultPath = "$.Checks"
+        Next = "ChecksDecision"
         Catch = [ {
           ErrorEquals = ["States.ALL"],
           Next = "FailState"
         } ]
       },
-      CreditCheckDecision = {
+      ChecksDecision = {
         Type = "Choice"
         Choices = [
           {
-            Variable = "$.CreditResult.status",
-            StringEquals = "APPROVED",
-            Next = "Wait_Before_Provisioning" # <-- UPDATED
+            And = [
+              { Variable = "$.Checks.VerificationResult.status", StringEquals = "APPROVED" },
+              { Variable = "$.Checks.CreditResult.status", StringEquals = "APPROVED" }
+            ],
+            Next = "Wait_Before_Provisioning"
+          },
+          {
+            # Only worth a reviewer's time if the credit check passed
+            And = [
+              { Variable = "$.Checks.VerificationResult.status", StringEquals = "FLAGGED" },
+              { Variable = "$.Checks.CreditResult.status", StringEquals = "APPROVED" }
+            ],
+            Next = "WaitForManualReview"
           }
         ]
         Default = "FailState"
@@ -324,14 +437,18 @@ resource "aws_sfn_state_machine" "onboarding_sfn" {
           "Key" = {
             "user_id" = { "S.$" = "$.user_id" }
           },
-          "UpdateExpression" = "SET onboarding_status = :status, sfn_task_token = :token",
+          # review_queue + review_submitted_at put the user on the sparse
+          # review-queue-index (fintech_common.review_queue), oldest first
+          "UpdateExpression" = "SET onboarding_status = :status, sfn_task_token = :token, review_queue = :queue, review_submitted_at = :submitted",
           "ExpressionAttributeValues" = {
-            ":status" = { "S" = "PENDING_MANUAL_REVIEW" },
-            ":token"  = { "S.$" = "$$.Task.Token" }
+            ":status"    = { "S" = "PENDING_MANUAL_REVIEW" },
+            ":token"     = { "S.$" = "$$.Task.Token" },
+            ":queue"     = { "S" = "MANUAL_REVIEW" },
+            ":submitted" = { "S.$" = "$$.Execution.StartTime" }
           }
         }
         ResultPath = null
-        Next = "Wait_Before_CreditCheck" # <-- UPDATED
+        Next = "Wait_Before_Provisioning" # The credit check has already run
         Catch = [ {
           ErrorEquals = ["States.ALL"],
           Next = "FailState"
@@ -349,6 +466,10 @@ resource "aws_sfn_state_machine" "onboarding_sfn" {
       ProvisionAccount = {
         Type = "Task"
         Resource = aws_lambda_function.provision_account_lambda.arn
+        Parameters = {
+          "user_id.$"      = "$.user_id",
+          "CreditResult.$" = "$.Checks.CreditResult"
+        }
         End = true
       },
       FailState = {
@@ -368,7 +489,8 @@ data "aws_iam_policy_document" "lambda_policy_doc" {
   statement {
     sid = "DynamoDBUsersTable"
     actions = [
-      "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:UpdateItem", "dynamodb:Query"
+      "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:UpdateItem", "dynamodb:Query",
+      "dynamodb:BatchGetItem", "dynamodb:DeleteItem" # Bulk import
     ]
     resources = [
       var.users_table_arn,
@@ -381,9 +503,31 @@ data "aws_iam_policy_document" "lambda_policy_doc" {
     resources = ["*"]
   }
   statement {
-    sid       = "InvokeCreateWalletLambda"
+    sid       = "CreateWallet" # provision_account's wallet + ledger entry transaction
+    actions   = ["dynamodb:PutItem"]
+    resources = [var.wallets_table_arn, var.transactions_log_table_arn]
+  }
+
+  statement {
+    sid       = "ProviderResultsCache" # verify_id_mock / credit_check_mock
+    actions   = ["dynamodb:GetItem", "dynamodb:PutItem"]
+    resources = [var.provider_results_table_arn]
+  }
+
+  statement {
+    sid       = "BatchJobsTableAccess"
+    actions   = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem"]
+    resources = [var.batch_jobs_table_arn]
+  }
+  statement {
+    sid       = "ReadImportFiles"
+    actions   = ["s3:GetObject"]
+    resources = ["${var.kyc_documents_bucket_arn}/imports/*"]
+  }
+  statement {
+    sid       = "SelfReinvoke" # Resume an import that ran out of time
     actions   = ["lambda:InvokeFunction"]
-    resources = [var.create_wallet_lambda_arn]
+    resources = ["arn:aws:lambda:*:*:function:${var.project_name}-import-onboarding-users"]
   }
 
   # --- This statement is the only one that changes ---
@@ -392,6 +536,11 @@ data "aws_iam_policy_document" "lambda_policy_doc" {
     actions   = ["states:StartExecution"]
     resources = [aws_sfn_state_machine.onboarding_sfn.arn]
   }
+  statement {
+    sid       = "DescribeOnboardingExecutions" # start_onboarding: has the last attempt ended?
+    actions   = ["states:DescribeExecution"]
+    resources = ["${replace(aws_sfn_state_machine.onboarding_sfn.arn, ":stateMachine:", ":execution:")}:*"]
+  }
 }
 
 # Renamed from lambda_policy_final to lambda_policy
@@ -587,6 +736,112 @@ resource "aws_api_gateway_integration_response" "review_options_integration_resp
   depends_on = [aws_api_gateway_integration.review_options_integration]
 }
 
+# --- API: GET /onboarding/review-queue (Admin) ---
+resource "aws_api_gateway_resource" "review_queue_resource" {
+  rest_api_id = var.api_gateway_id
+  parent_id   = aws_api_gateway_resource.onboarding_resource.id
+  path_part   = "review-queue"
+}
+resource "aws_api_gateway_method" "review_queue_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.review_queue_resource.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = var.api_gateway_authorizer_id
+}
+resource "aws_api_gateway_integration" "review_queue_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id             = aws_api_gateway_resource.review_queue_resource.id
+  http_method             = aws_api_gateway_method.review_queue_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.get_review_queue_lambda.invoke_arn
+}
+# (OPTIONS for /review-queue)
+resource "aws_api_gateway_method" "review_queue_options_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.review_queue_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+resource "aws_api_gateway_method_response" "review_queue_options_200" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.review_queue_resource.id
+  http_method = aws_api_gateway_method.review_queue_options_method.http_method
+  status_code = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => true }
+}
+resource "aws_api_gateway_integration" "review_queue_options_integration" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.review_queue_resource.id
+  http_method = aws_api_gateway_method.review_queue_options_method.http_method
+  type        = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\": 200}" }
+}
+resource "aws_api_gateway_integration_response" "review_queue_options_integration_response" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.review_queue_resource.id
+  http_method = aws_api_gateway_method.review_queue_options_method.http_method
+  status_code = aws_api_gateway_method_response.review_queue_options_200.status_code
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => "'${v}'" }
+  response_templates = { "application/json" = "" }
+  depends_on = [aws_api_gateway_integration.review_queue_options_integration]
+}
+
+# --- API: POST /onboarding/manual-review/bulk (Admin) ---
+resource "aws_api_gateway_resource" "bulk_review_resource" {
+  rest_api_id = var.api_gateway_id
+  parent_id   = aws_api_gateway_resource.review_resource.id
+  path_part   = "bulk"
+}
+resource "aws_api_gateway_method" "bulk_review_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.bulk_review_resource.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = var.api_gateway_authorizer_id
+}
+resource "aws_api_gateway_integration" "bulk_review_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id             = aws_api_gateway_resource.bulk_review_resource.id
+  http_method             = aws_api_gateway_method.bulk_review_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.bulk_manual_review_lambda.invoke_arn
+}
+# (OPTIONS for /manual-review/bulk)
+resource "aws_api_gateway_method" "bulk_review_options_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.bulk_review_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+resource "aws_api_gateway_method_response" "bulk_review_options_200" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.bulk_review_resource.id
+  http_method = aws_api_gateway_method.bulk_review_options_method.http_method
+  status_code = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => true }
+}
+resource "aws_api_gateway_integration" "bulk_review_options_integration" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.bulk_review_resource.id
+  http_method = aws_api_gateway_method.bulk_review_options_method.http_method
+  type        = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\": 200}" }
+}
+resource "aws_api_gateway_integration_response" "bulk_review_options_integration_response" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.bulk_review_resource.id
+  http_method = aws_api_gateway_method.bulk_review_options_method.http_method
+  status_code = aws_api_gateway_method_response.bulk_review_options_200.status_code
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => "'${v}'" }
+  response_templates = { "application/json" = "" }
+  depends_on = [aws_api_gateway_integration.bulk_review_options_integration]
+}
+
 
 ################################################################################
 # --- 8. LAMBDA PERMISSIONS ---
@@ -614,5 +869,20 @@ resource "aws_lambda_permission" "api_gateway_manual_review" {
   source_arn    = "${var.api_gateway_execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "api_gateway_get_review_queue" {
+  statement_id  = "AllowAPIGatewayToInvokeGetReviewQueue"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.get_review_queue_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${var.api_gateway_execution_arn}/*/*"
+}
+resource "aws_lambda_permission" "api_gateway_bulk_manual_review" {
+  statement_id  = "AllowAPIGatewayToInvokeBulkManualReview"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.bulk_manual_review_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${var.api_gateway_execution_arn}/*/*"
+}
+
 
 
@@ -29,6 +29,24 @@ output "api_gateway_config_hash" {
     aws_api_gateway_integration.review_options_integration,
     aws_api_gateway_method_response.review_options_200,
     aws_api_gateway_integration_response.review_options_integration_response,
+
+    # GET /onboarding/review-queue
+    aws_api_gateway_resource.review_queue_resource,
+    aws_api_gateway_method.review_queue_method,
+    aws_api_gateway_integration.review_queue_integration,
+    aws_api_gateway_method.review_queue_options_method,
+    aws_api_gateway_integration.review_queue_options_integration,
+    aws_api_gateway_method_response.review_queue_options_200,
+    aws_api_gateway_integration_response.review_queue_options_integration_response,
+
+    # POST /onboarding/manual-review/bulk
+    aws_api_gateway_resource.bulk_review_resource,
+    aws_api_gateway_method.bulk_review_method,
+    aws_api_gateway_integration.bulk_review_integration,
+    aws_api_gateway_method.bulk_review_options_method,
+    aws_api_gateway_integration.bulk_review_options_integration,
+    aws_api_gateway_method_response.bulk_review_options_200,
+    aws_api_gateway_integration_response.bulk_review_options_integration_response,
   ]))
 }
 
@@ -33,8 +33,23 @@ variable "kyc_documents_bucket_arn" {
   type        = string
 }
 
-variable "create_wallet_lambda_arn" {
-  description = "The ARN of the create_wallet Lambda function (which the Step Function will invoke)."
+variable "wallets_table_name" {
+  description = "The name of the wallets DynamoDB table (provision_account creates the user's wallet)"
+  type        = string
+}
+
+variable "wallets_table_arn" {
+  description = "The ARN of the wallets DynamoDB table"
+  type        = string
+}
+
+variable "transactions_log_table_name" {
+  description = "The name of the transaction logs DynamoDB table (for the WALLET_CREATED entry)"
+  type        = string
+}
+
+variable "transactions_log_table_arn" {
+  description = "The ARN of the transaction logs DynamoDB table"
   type        = string
 }
 
@@ -46,4 +61,77 @@ variable "frontend_cors_origin" {
 variable "api_gateway_authorizer_id" {
   description = "The ID of the Cognito API Gateway Authorizer"
   type        = string
-}
\ No newline at end of file
+}
+
+variable "shared_layer_arn" {
+  description = "The ARN of the shared Python Lambda layer (fintech_common)"
+  type        = string
+}
+
+variable "batch_jobs_table_name" {
+  description = "The name of the batch jobs (checkpoints/results) DynamoDB table"
+  type        = string
+}
+
+variable "batch_jobs_table_arn" {
+  description = "The ARN of the batch jobs DynamoDB table"
+  type        = string
+}
+
+variable "import_start_concurrency" {
+  description = "Onboarding executions the bulk import starts at once"
+  type        = number
+  default     = 10
+}
+
+variable "import_max_starts_per_second" {
+  description = "Most onboarding executions the bulk import starts per second (StartExecution is throttled per account)"
+  type        = number
+  default     = 25
+}
+
+variable "verify_id_provider_simulation" {
+  description = "PROVIDER_* environment variables for verify_id_mock (e.g. { PROVIDER_LATENCY = \"lognormal:400,0.6\", PROVIDER_THROTTLE_RATE = \"0.02\" }); see fintech_common/provider_sim.py"
+  type        = map(string)
+  default     = {}
+}
+
+variable "credit_check_provider_simulation" {
+  description = "PROVIDER_* environment variables for credit_check_mock; see fintech_common/provider_sim.py"
+  type        = map(string)
+  default     = {}
+}
+
+variable "provider_retry_interval_seconds" {
+  description = "First retry delay for a failed provider check (doubles per attempt, full jitter)"
+  type        = number
+  default     = 1
+}
+
+variable "provider_retry_max_attempts" {
+  description = "Retries of a provider check that errored or timed out (throttled calls get two more)"
+  type        = number
+  default     = 3
+}
+
+variable "provider_results_table_name" {
+  description = "The name of the provider results cache DynamoDB table"
+  type        = string
+}
+
+variable "provider_results_table_arn" {
+  description = "The ARN of the provider results cache DynamoDB table"
+  type        = string
+}
+
+variable "verify_id_result_cache_ttl_seconds" {
+  description = "How long an ID verification result is reused for the same person (0 disables the cache)"
+  type        = number
+  default     = 2592000 # 30 days
+}
+
+variable "credit_check_result_cache_ttl_seconds" {
+  description = "How long a credit check result is reused for the same person (0 disables the cache)"
+  type        = number
+  default     = 604800 # 7 days
+}
@@ -0,0 +1,121 @@
+terraform {
+  required_providers {
+    aws = {
+      source  = "hashicorp/aws"
+      version = "~> 5.0"
+    }
+  }
+}
+
+locals {
+  # One nightly run per report; each invocation resumes its own daily job_id
+  reports = ["loans", "wallets", "savings"]
+}
+
+# --- IAM ---
+data "aws_iam_policy_document" "lambda_assume_role_policy" {
+  statement {
+    actions = ["sts:AssumeRole"]
+    principals {
+      type        = "Service"
+      identifiers = ["lambda.amazonaws.com"]
+    }
+  }
+}
+
+resource "aws_iam_role" "lambda_exec_role" {
+  name               = "${var.project_name}-reports-lambda-role"
+  assume_role_policy = data.aws_iam_policy_document.lambda_assume_role_policy.json
+  tags               = var.tags
+}
+
+resource "aws_iam_role_policy_attachment" "lambda_basic_execution" {
+  role       = aws_iam_role.lambda_exec_role.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
+}
+
+data "aws_iam_policy_document" "reports_policy_doc" {
+  statement {
+    sid       = "PortfolioTablesScanAccess"
+    actions   = ["dynamodb:Scan"]
+    resources = [var.loans_table_arn, var.wallets_table_arn, var.savings_table_arn]
+  }
+  statement {
+    sid       = "BatchJobsTableAccess"
+    actions   = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem", "dynamodb:BatchGetItem"]
+    resources = [var.batch_jobs_table_arn]
+  }
+  statement {
+    sid       = "SelfReinvoke" # Resume a report that ran out of time
+    actions   = ["lambda:InvokeFunction"]
+    resources = ["arn:aws:lambda:*:*:function:${var.project_name}-portfolio-report"]
+  }
+}
+resource "aws_iam_policy" "reports_policy" {
+  name   = "${var.project_name}-reports-policy"
+  policy = data.aws_iam_policy_document.reports_policy_doc.json
+}
+resource "aws_iam_role_policy_attachment" "reports_attachment" {
+  role       = aws_iam_role.lambda_exec_role.name
+  policy_arn = aws_iam_policy.reports_policy.arn
+}
+
+################################################################################
+# --- LAMBDA FUNCTIONS ---
+################################################################################
+
+# --- LAMBDA: PORTFOLIO REPORT ---
+data "archive_file" "portfolio_report_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/portfolio_report"
+  output_path = "${path.module}/portfolio_report.zip"
+}
+resource "aws_lambda_function" "portfolio_report_lambda" {
+  function_name    = "${var.project_name}-portfolio-report"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.portfolio_report_zip.output_path
+  source_code_hash = data.archive_file.portfolio_report_zip.output_base64sha256
+  handler          = "handler.portfolio_report"
+  runtime          = "python3.12"
+  timeout          = 900
+  memory_size      = 512
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      LOANS_TABLE_NAME        = var.loans_table_name
+      WALLETS_TABLE_NAME      = var.wallets_table_name
+      SAVINGS_TABLE_NAME      = var.savings_table_name
+      JOBS_TABLE_NAME         = var.batch_jobs_table_name
+      SCAN_SEGMENTS           = var.scan_segments
+      SCAN_MAX_RCU_PER_SECOND = var.scan_max_rcu_per_second
+    }
+  }
+}
+
+################################################################################
+# --- SCHEDULE ---
+################################################################################
+
+resource "aws_cloudwatch_event_rule" "nightly_reports" {
+  name                = "${var.project_name}-nightly-portfolio-reports"
+  description         = "Runs the portfolio reports every night."
+  schedule_expression = var.report_schedule_expression
+  tags                = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "portfolio_report_target" {
+  for_each  = toset(local.reports)
+  rule      = aws_cloudwatch_event_rule.nightly_reports.name
+  target_id = "portfolio-report-${each.key}"
+  arn       = aws_lambda_function.portfolio_report_lambda.arn
+  input     = jsonencode({ report = each.key })
+}
+
+resource "aws_lambda_permission" "events_invoke_portfolio_report" {
+  statement_id  = "AllowEventBridgeToInvokePortfolioReport"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.portfolio_report_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.nightly_reports.arn
+}
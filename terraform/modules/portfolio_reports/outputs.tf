@@ -0,0 +1,4 @@
+output "portfolio_report_lambda_arn" {
+  description = "The ARN of the portfolio report Lambda."
+  value       = aws_lambda_function.portfolio_report_lambda.arn
+}
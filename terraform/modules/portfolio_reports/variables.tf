@@ -0,0 +1,72 @@
+variable "project_name" {
+  description = "The name of the overall project."
+  type        = string
+}
+
+variable "tags" {
+  description = "A map of tags to apply to all resources."
+  type        = map(string)
+}
+
+variable "loans_table_name" {
+  description = "The name of the loans DynamoDB table."
+  type        = string
+}
+
+variable "loans_table_arn" {
+  description = "The ARN of the loans DynamoDB table."
+  type        = string
+}
+
+variable "wallets_table_name" {
+  description = "The name of the wallets DynamoDB table."
+  type        = string
+}
+
+variable "wallets_table_arn" {
+  description = "The ARN of the wallets DynamoDB table."
+  type        = string
+}
+
+variable "savings_table_name" {
+  description = "The name of the savings goals DynamoDB table."
+  type        = string
+}
+
+variable "savings_table_arn" {
+  description = "The ARN of the savings goals DynamoDB table."
+  type        = string
+}
+
+variable "batch_jobs_table_name" {
+  description = "The name of the batch jobs (checkpoints/results) DynamoDB table."
+  type        = string
+}
+
+variable "batch_jobs_table_arn" {
+  description = "The ARN of the batch jobs DynamoDB table."
+  type        = string
+}
+
+variable "shared_layer_arn" {
+  description = "The ARN of the shared Python Lambda layer (fintech_common)"
+  type        = string
+}
+
+variable "scan_segments" {
+  description = "Number of parallel Scan segments per report."
+  type        = number
+  default     = 8
+}
+
+variable "scan_max_rcu_per_second" {
+  description = "Read capacity budget for a report scan, so it never competes with live traffic."
+  type        = number
+  default     = 200
+}
+
+variable "report_schedule_expression" {
+  description = "When the nightly reports run."
+  type        = string
+  default     = "cron(0 2 * * ? *)"
+}
@@ -76,7 +76,7 @@ data "aws_iam_policy_document" "dynamodb_savings_table_policy_doc" {
       sid = "TransactionLogReadGoalIndex"
       actions = ["dynamodb:Query"] # Permission to query GSI
       resources = [
-          "${var.transactions_log_table_arn}/index/related_id-timestamp-index" # Specific index ARN
+          "${var.transactions_log_table_arn}/index/goal-history-index" # Specific index ARN
       ]
   }
 }
@@ -91,6 +91,59 @@ resource "aws_iam_role_policy_attachment" "dynamodb_savings_table_attachment" {
   policy_arn = aws_iam_policy.dynamodb_savings_table_policy.arn
 }
 
+# --- IAM: Batch Jobs Policy (auto-save, round-ups, backfills) ---
+data "aws_iam_policy_document" "savings_batch_jobs_policy_doc" {
+  statement {
+    sid       = "BatchJobsTableAccess"
+    actions   = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem"]
+    resources = [var.batch_jobs_table_arn]
+  }
+  statement {
+    sid       = "SelfReinvoke" # Resume a batch run that ran out of time
+    actions   = ["lambda:InvokeFunction"]
+    resources = [
+      "arn:aws:lambda:*:*:function:${var.project_name}-run-savings-autosave",
+      "arn:aws:lambda:*:*:function:${var.project_name}-flush-roundups",
+      "arn:aws:lambda:*:*:function:${var.project_name}-backfill-goal-history"
+    ]
+  }
+  statement {
+    sid       = "TransactionLogBackfill" # Indexes goal entries written before goal-history-index
+    actions   = ["dynamodb:Scan", "dynamodb:UpdateItem"]
+    resources = [var.transactions_log_table_arn]
+  }
+}
+resource "aws_iam_policy" "savings_batch_jobs_policy" {
+  name   = "${var.project_name}-savings-batch-jobs-policy"
+  policy = data.aws_iam_policy_document.savings_batch_jobs_policy_doc.json
+}
+resource "aws_iam_role_policy_attachment" "savings_batch_jobs_attachment" {
+  role       = aws_iam_role.lambda_exec_role.name
+  policy_arn = aws_iam_policy.savings_batch_jobs_policy.arn
+}
+
+# --- IAM: Round-ups Policy ---
+data "aws_iam_policy_document" "savings_roundups_policy_doc" {
+  statement {
+    sid       = "RoundupsTableAccess"
+    actions   = ["dynamodb:UpdateItem", "dynamodb:Scan"]
+    resources = [var.roundups_table_arn]
+  }
+  statement {
+    sid       = "SavingsTableConditionCheck" # Enrolment checks the goal in the same transaction
+    actions   = ["dynamodb:ConditionCheckItem"]
+    resources = [var.dynamodb_table_arn]
+  }
+}
+resource "aws_iam_policy" "savings_roundups_policy" {
+  name   = "${var.project_name}-savings-roundups-policy"
+  policy = data.aws_iam_policy_document.savings_roundups_policy_doc.json
+}
+resource "aws_iam_role_policy_attachment" "savings_roundups_attachment" {
+  role       = aws_iam_role.lambda_exec_role.name
+  policy_arn = aws_iam_policy.savings_roundups_policy.arn
+}
+
 ################################################################################
 # --- LAMBDA FUNCTIONS (API) ---
 ################################################################################
@@ -110,6 +163,7 @@ resource "aws_lambda_function" "create_savings_goal_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
@@ -134,6 +188,7 @@ resource "aws_lambda_function" "get_savings_goals_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
@@ -158,6 +213,7 @@ resource "aws_lambda_function" "delete_savings_goal_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       DYNAMODB_TABLE_NAME = var.dynamodb_table_name
@@ -185,6 +241,7 @@ resource "aws_lambda_function" "add_to_savings_goal_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       SAVINGS_TABLE_NAME          = var.dynamodb_table_name
@@ -211,6 +268,7 @@ resource "aws_lambda_function" "get_goal_transactions_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
@@ -235,6 +293,7 @@ resource "aws_lambda_function" "redeem_savings_goal_lambda" {
   runtime          = "python3.12"
   timeout          = 10
   tags             = var.tags
+  layers           = [var.shared_layer_arn]
   environment {
     variables = {
       SAVINGS_TABLE_NAME          = var.dynamodb_table_name
@@ -245,6 +304,218 @@ resource "aws_lambda_function" "redeem_savings_goal_lambda" {
   }
 }
 
+# --- LAMBDA: SET SAVINGS AUTOSAVE ---
+data "archive_file" "set_savings_autosave_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/set_savings_autosave"
+  output_path = "${path.module}/set_savings_autosave.zip"
+}
+resource "aws_lambda_function" "set_savings_autosave_lambda" {
+  function_name    = "${var.project_name}-set-savings-autosave"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.set_savings_autosave_zip.output_path
+  source_code_hash = data.archive_file.set_savings_autosave_zip.output_base64sha256
+  handler          = "handler.set_savings_autosave"
+  runtime          = "python3.12"
+  timeout          = 10
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      SAVINGS_TABLE_NAME = var.dynamodb_table_name
+      AUTOSAVE_SHARDS    = var.autosave_shards
+      CORS_ORIGIN        = var.frontend_cors_origin
+    }
+  }
+}
+
+# --- LAMBDA: RUN SAVINGS AUTOSAVE (daily batch job) ---
+data "archive_file" "run_savings_autosave_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/run_savings_autosave"
+  output_path = "${path.module}/run_savings_autosave.zip"
+}
+resource "aws_lambda_function" "run_savings_autosave_lambda" {
+  function_name    = "${var.project_name}-run-savings-autosave"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.run_savings_autosave_zip.output_path
+  source_code_hash = data.archive_file.run_savings_autosave_zip.output_base64sha256
+  handler          = "handler.run_savings_autosave"
+  runtime          = "python3.12"
+  timeout          = 900
+  memory_size      = 1024
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      SAVINGS_TABLE_NAME          = var.dynamodb_table_name
+      WALLETS_TABLE_NAME          = var.wallets_table_name
+      TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
+      JOBS_TABLE_NAME             = var.batch_jobs_table_name
+      AUTOSAVE_SHARDS             = var.autosave_shards
+      MAX_WCU_PER_SECOND          = var.autosave_max_wcu_per_second
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "daily_savings_autosave" {
+  name                = "${var.project_name}-daily-savings-autosave"
+  description         = "Makes the recurring savings contributions due today."
+  schedule_expression = var.autosave_schedule_expression
+  tags                = var.tags
+}
+resource "aws_cloudwatch_event_target" "savings_autosave_target" {
+  rule      = aws_cloudwatch_event_rule.daily_savings_autosave.name
+  target_id = "run-savings-autosave"
+  arn       = aws_lambda_function.run_savings_autosave_lambda.arn
+}
+resource "aws_lambda_permission" "events_invoke_run_savings_autosave" {
+  statement_id  = "AllowEventBridgeToInvokeRunSavingsAutosave"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.run_savings_autosave_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.daily_savings_autosave.arn
+}
+
+# --- LAMBDA: SET SAVINGS ROUNDUP ---
+data "archive_file" "set_savings_roundup_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/set_savings_roundup"
+  output_path = "${path.module}/set_savings_roundup.zip"
+}
+resource "aws_lambda_function" "set_savings_roundup_lambda" {
+  function_name    = "${var.project_name}-set-savings-roundup"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.set_savings_roundup_zip.output_path
+  source_code_hash = data.archive_file.set_savings_roundup_zip.output_base64sha256
+  handler          = "handler.set_savings_roundup"
+  runtime          = "python3.12"
+  timeout          = 10
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      ROUNDUPS_TABLE_NAME = var.roundups_table_name
+      SAVINGS_TABLE_NAME  = var.dynamodb_table_name
+      CORS_ORIGIN         = var.frontend_cors_origin
+    }
+  }
+}
+
+# --- LAMBDA: ACCUMULATE ROUNDUPS (SNS subscriber) ---
+data "archive_file" "accumulate_roundups_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/accumulate_roundups"
+  output_path = "${path.module}/accumulate_roundups.zip"
+}
+resource "aws_lambda_function" "accumulate_roundups_lambda" {
+  function_name    = "${var.project_name}-accumulate-roundups"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.accumulate_roundups_zip.output_path
+  source_code_hash = data.archive_file.accumulate_roundups_zip.output_base64sha256
+  handler          = "handler.accumulate_roundups"
+  runtime          = "python3.12"
+  timeout          = 10
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      ROUNDUPS_TABLE_NAME         = var.roundups_table_name
+      SAVINGS_TABLE_NAME          = var.dynamodb_table_name
+      WALLETS_TABLE_NAME          = var.wallets_table_name
+      TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
+      ROUNDUP_FLUSH_THRESHOLD     = var.roundup_flush_threshold
+    }
+  }
+}
+
+resource "aws_sns_topic_subscription" "roundup_payment_subscription" {
+  topic_arn = var.payment_sns_topic_arn
+  protocol  = "lambda"
+  endpoint  = aws_lambda_function.accumulate_roundups_lambda.arn
+  filter_policy = jsonencode({
+    "event_type": ["PAYMENT_SUCCESSFUL"]
+  })
+}
+resource "aws_lambda_permission" "sns_invoke_accumulate_roundups" {
+  statement_id  = "AllowSNSToInvokeAccumulateRoundups"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.accumulate_roundups_lambda.function_name
+  principal     = "sns.amazonaws.com"
+  source_arn    = var.payment_sns_topic_arn
+}
+
+# --- LAMBDA: FLUSH ROUNDUPS (daily batch job) ---
+data "archive_file" "flush_roundups_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/flush_roundups"
+  output_path = "${path.module}/flush_roundups.zip"
+}
+resource "aws_lambda_function" "flush_roundups_lambda" {
+  function_name    = "${var.project_name}-flush-roundups"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.flush_roundups_zip.output_path
+  source_code_hash = data.archive_file.flush_roundups_zip.output_base64sha256
+  handler          = "handler.flush_roundups"
+  runtime          = "python3.12"
+  timeout          = 900
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      ROUNDUPS_TABLE_NAME         = var.roundups_table_name
+      SAVINGS_TABLE_NAME          = var.dynamodb_table_name
+      WALLETS_TABLE_NAME          = var.wallets_table_name
+      TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
+      JOBS_TABLE_NAME             = var.batch_jobs_table_name
+      MAX_WCU_PER_SECOND          = var.roundup_max_wcu_per_second
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "daily_roundup_flush" {
+  name                = "${var.project_name}-daily-roundup-flush"
+  description         = "Sweeps round-ups below the flush threshold into their goals."
+  schedule_expression = var.roundup_flush_schedule_expression
+  tags                = var.tags
+}
+resource "aws_cloudwatch_event_target" "roundup_flush_target" {
+  rule      = aws_cloudwatch_event_rule.daily_roundup_flush.name
+  target_id = "flush-roundups"
+  arn       = aws_lambda_function.flush_roundups_lambda.arn
+}
+resource "aws_lambda_permission" "events_invoke_flush_roundups" {
+  statement_id  = "AllowEventBridgeToInvokeFlushRoundups"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.flush_roundups_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.daily_roundup_flush.arn
+}
+
+# --- LAMBDA: BACKFILL GOAL HISTORY (one-off batch job) ---
+data "archive_file" "backfill_goal_history_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../src/backfill_goal_history"
+  output_path = "${path.module}/backfill_goal_history.zip"
+}
+resource "aws_lambda_function" "backfill_goal_history_lambda" {
+  function_name    = "${var.project_name}-backfill-goal-history"
+  role             = aws_iam_role.lambda_exec_role.arn
+  filename         = data.archive_file.backfill_goal_history_zip.output_path
+  source_code_hash = data.archive_file.backfill_goal_history_zip.output_base64sha256
+  handler          = "handler.backfill_goal_history"
+  runtime          = "python3.12"
+  timeout          = 900
+  tags             = var.tags
+  layers           = [var.shared_layer_arn]
+  environment {
+    variables = {
+      TRANSACTIONS_LOG_TABLE_NAME = var.transactions_log_table_name
+      JOBS_TABLE_NAME             = var.batch_jobs_table_name
+    }
+  }
+}
+
 ################################################################################
 # --- API GATEWAY ---
 ################################################################################
@@ -592,6 +863,118 @@ resource "aws_api_gateway_integration_response" "redeem_goal_options_integration
   depends_on = [aws_api_gateway_integration.redeem_goal_options_integration]
 }
 
+# --- API: /savings-goal/{goal_id}/autosave ---
+resource "aws_api_gateway_resource" "goal_autosave_resource" {
+  rest_api_id = var.api_gateway_id
+  parent_id   = aws_api_gateway_resource.savings_goal_id_resource.id
+  path_part   = "autosave"
+}
+
+# --- API: POST /savings-goal/{goal_id}/autosave ---
+resource "aws_api_gateway_method" "set_savings_autosave_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.goal_autosave_resource.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = var.api_gateway_authorizer_id
+}
+resource "aws_api_gateway_integration" "set_savings_autosave_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id             = aws_api_gateway_resource.goal_autosave_resource.id
+  http_method             = aws_api_gateway_method.set_savings_autosave_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.set_savings_autosave_lambda.invoke_arn
+}
+
+# --- API: OPTIONS /savings-goal/{goal_id}/autosave (CORS) ---
+resource "aws_api_gateway_method" "goal_autosave_options_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.goal_autosave_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+resource "aws_api_gateway_method_response" "goal_autosave_options_200" {
+   rest_api_id   = var.api_gateway_id
+   resource_id   = aws_api_gateway_resource.goal_autosave_resource.id
+   http_method   = aws_api_gateway_method.goal_autosave_options_method.http_method
+   status_code   = "200"
+   response_models = { "application/json" = "Empty" }
+   response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => true }
+}
+resource "aws_api_gateway_integration" "goal_autosave_options_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id           = aws_api_gateway_resource.goal_autosave_resource.id
+  http_method             = aws_api_gateway_method.goal_autosave_options_method.http_method
+  type                    = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\": 200}" }
+}
+resource "aws_api_gateway_integration_response" "goal_autosave_options_integration_response" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.goal_autosave_resource.id
+  http_method = aws_api_gateway_method.goal_autosave_options_method.http_method
+  status_code = aws_api_gateway_method_response.goal_autosave_options_200.status_code
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => "'${v}'" }
+  response_templates = { "application/json" = "" }
+  depends_on = [aws_api_gateway_integration.goal_autosave_options_integration]
+}
+
+# --- API: /savings-goal/{goal_id}/roundup ---
+resource "aws_api_gateway_resource" "goal_roundup_resource" {
+  rest_api_id = var.api_gateway_id
+  parent_id   = aws_api_gateway_resource.savings_goal_id_resource.id
+  path_part   = "roundup"
+}
+
+# --- API: POST /savings-goal/{goal_id}/roundup ---
+resource "aws_api_gateway_method" "set_savings_roundup_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.goal_roundup_resource.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = var.api_gateway_authorizer_id
+}
+resource "aws_api_gateway_integration" "set_savings_roundup_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id             = aws_api_gateway_resource.goal_roundup_resource.id
+  http_method             = aws_api_gateway_method.set_savings_roundup_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.set_savings_roundup_lambda.invoke_arn
+}
+
+# --- API: OPTIONS /savings-goal/{goal_id}/roundup (CORS) ---
+resource "aws_api_gateway_method" "goal_roundup_options_method" {
+  rest_api_id   = var.api_gateway_id
+  resource_id   = aws_api_gateway_resource.goal_roundup_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+resource "aws_api_gateway_method_response" "goal_roundup_options_200" {
+   rest_api_id   = var.api_gateway_id
+   resource_id   = aws_api_gateway_resource.goal_roundup_resource.id
+   http_method   = aws_api_gateway_method.goal_roundup_options_method.http_method
+   status_code   = "200"
+   response_models = { "application/json" = "Empty" }
+   response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => true }
+}
+resource "aws_api_gateway_integration" "goal_roundup_options_integration" {
+  rest_api_id             = var.api_gateway_id
+  resource_id           = aws_api_gateway_resource.goal_roundup_resource.id
+  http_method             = aws_api_gateway_method.goal_roundup_options_method.http_method
+  type                    = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\": 200}" }
+}
+resource "aws_api_gateway_integration_response" "goal_roundup_options_integration_response" {
+  rest_api_id = var.api_gateway_id
+  resource_id = aws_api_gateway_resource.goal_roundup_resource.id
+  http_method = aws_api_gateway_method.goal_roundup_options_method.http_method
+  status_code = aws_api_gateway_method_response.goal_roundup_options_200.status_code
+  response_parameters = { for k, v in local.cors_headers : "method.response.header.${k}" => "'${v}'" }
+  response_templates = { "application/json" = "" }
+  depends_on = [aws_api_gateway_integration.goal_roundup_options_integration]
+}
+
 ################################################################################
 # --- LAMBDA PERMISSIONS ---
 ################################################################################
@@ -642,4 +1025,20 @@ resource "aws_lambda_permission" "api_gateway_redeem_goal_permission" {
   function_name = aws_lambda_function.redeem_savings_goal_lambda.function_name
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${var.api_gateway_execution_arn}/*/*"
-}
\ No newline at end of file
+}
+
+resource "aws_lambda_permission" "api_gateway_set_savings_autosave_permission" {
+  statement_id  = "AllowAPIGatewayToInvokeSetSavingsAutosave"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.set_savings_autosave_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${var.api_gateway_execution_arn}/*/*"
+}
+
+resource "aws_lambda_permission" "api_gateway_set_savings_roundup_permission" {
+  statement_id  = "AllowAPIGatewayToInvokeSetSavingsRoundup"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.set_savings_roundup_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${var.api_gateway_execution_arn}/*/*"
+}
@@ -59,5 +59,23 @@ output "api_gateway_config_hash" {
     aws_api_gateway_method_response.redeem_goal_options_200,
     aws_api_gateway_integration.redeem_goal_options_integration,
     aws_api_gateway_integration_response.redeem_goal_options_integration_response,
+
+    # POST /savings-goal/{goal_id}/autosave
+    aws_api_gateway_resource.goal_autosave_resource,
+    aws_api_gateway_method.set_savings_autosave_method,
+    aws_api_gateway_integration.set_savings_autosave_integration,
+    aws_api_gateway_method.goal_autosave_options_method,
+    aws_api_gateway_integration.goal_autosave_options_integration,
+    aws_api_gateway_method_response.goal_autosave_options_200,
+    aws_api_gateway_integration_response.goal_autosave_options_integration_response,
+
+    # POST /savings-goal/{goal_id}/roundup
+    aws_api_gateway_resource.goal_roundup_resource,
+    aws_api_gateway_method.set_savings_roundup_method,
+    aws_api_gateway_integration.set_savings_roundup_integration,
+    aws_api_gateway_method.goal_roundup_options_method,
+    aws_api_gateway_integration.goal_roundup_options_integration,
+    aws_api_gateway_method_response.goal_roundup_options_200,
+    aws_api_gateway_integration_response.goal_roundup_options_integration_response,
   ]))
 }
\ No newline at end of file
@@ -61,4 +61,70 @@ variable "frontend_cors_origin" {
 variable "api_gateway_authorizer_id" {
   description = "The ID of the Cognito API Gateway Authorizer"
   type        = string
-}
\ No newline at end of file
+}
+
+variable "shared_layer_arn" {
+  description = "The ARN of the shared Python Lambda layer (fintech_common)"
+  type        = string
+}
+
+variable "batch_jobs_table_name" {
+  description = "The name of the batch jobs (checkpoints/results) DynamoDB table"
+  type        = string
+}
+
+variable "batch_jobs_table_arn" {
+  description = "The ARN of the batch jobs DynamoDB table"
+  type        = string
+}
+
+variable "autosave_schedule_expression" {
+  description = "When the daily savings auto-save run starts"
+  type        = string
+  default     = "cron(0 7 * * ? *)"
+}
+
+variable "autosave_shards" {
+  description = "Shards per run date in the autosave-due-index (spreads one day's goals over partitions)"
+  type        = number
+  default     = 16
+}
+
+variable "autosave_max_wcu_per_second" {
+  description = "Write capacity budget for auto-save contributions (leaves headroom for live payments)"
+  type        = number
+  default     = 500
+}
+
+variable "roundups_table_name" {
+  description = "The name of the savings round-ups DynamoDB table"
+  type        = string
+}
+
+variable "roundups_table_arn" {
+  description = "The ARN of the savings round-ups DynamoDB table"
+  type        = string
+}
+
+variable "payment_sns_topic_arn" {
+  description = "The ARN of the payment events SNS topic (round-ups follow PAYMENT_SUCCESSFUL)"
+  type        = string
+}
+
+variable "roundup_flush_threshold" {
+  description = "Pending round-ups are swept into the goal as soon as they reach this amount"
+  type        = string
+  default     = "5.00"
+}
+
+variable "roundup_flush_schedule_expression" {
+  description = "When the daily sweep of round-ups below the threshold starts"
+  type        = string
+  default     = "cron(0 6 * * ? *)"
+}
+
+variable "roundup_max_wcu_per_second" {
+  description = "Write capacity budget for the daily round-up sweep"
+  type        = number
+  default     = 200
+}